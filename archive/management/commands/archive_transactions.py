@@ -0,0 +1,49 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from archive import store
+
+
+def _date(value, option):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"{option} must be YYYY-MM-DD.")
+
+
+class Command(BaseCommand):
+    help = (
+        "Move journal lines, savings and member transactions and closed loans' repayments from closed "
+        "fiscal periods into the archive tables. --restore-after moves them back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--through", help="Archive rows dated up to this date (default: the end of the last "
+                                              "closed period, but at least ARCHIVE_AFTER_DAYS ago).")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the rows that would move.")
+        parser.add_argument("--restore-after", help="Move archived rows dated after this date back.")
+
+    def handle(self, *args, **options):
+        if options["restore_after"]:
+            run = store.restore(_date(options["restore_after"], "--restore-after"), log=self.stdout.write)
+            self.stdout.write(self.style.SUCCESS(f"Restored in {run.rows['seconds']}s."))
+            return
+
+        through = _date(options["through"], "--through") if options["through"] else None
+        if options["dry_run"]:
+            counts, through = store.plan(through)
+            if through is None:
+                raise CommandError("No fiscal period is closed; nothing can be archived.")
+            self.stdout.write(f"Would archive rows dated up to {through}:")
+            for name, count in counts.items():
+                self.stdout.write(f"  {name:<20} {count}")
+            return
+
+        through = through or store.archive_through()
+        try:
+            run = store.archive(through, log=self.stdout.write)
+        except store.ArchiveError as exc:
+            raise CommandError(str(exc))
+        moved = sum(count for name, count in run.rows.items() if name != "seconds")
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} rows dated up to {through} in {run.rows['seconds']}s."))
@@ -0,0 +1,87 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:29
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('core', '0008_fiscalperiod_openingbalance_and_more'),
+        ('loans', '0008_alter_loaninterestaccrual_repayment'),
+        ('savings', '0003_stored_balance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('ARCHIVE', 'Archive'), ('RESTORE', 'Restore')], default='ARCHIVE', max_length=8)),
+                ('through', models.DateField()),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('rows', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedJournalLine',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('debit', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('credit', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('account', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.account')),
+                ('entry', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.journalentry')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedLoanRepayment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('principal_component', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('interest_component', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('excess_routed_to_savings', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('source', models.CharField(blank=True, max_length=50)),
+                ('journal_entry', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.journalentry')),
+                ('loan', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='loans.loan')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedMemberTransaction',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('description', models.CharField(max_length=255)),
+                ('transaction_type', models.CharField(max_length=50)),
+                ('source_model', models.CharField(blank=True, max_length=50)),
+                ('source_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('journal_entry', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.journalentry')),
+                ('member', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.member')),
+            ],
+            options={
+                'ordering': ['-date', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedSavingsTransaction',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('transaction_type', models.CharField(max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('notes', models.CharField(blank=True, max_length=255)),
+                ('source', models.CharField(blank=True, max_length=50)),
+                ('journal_entry', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.journalentry')),
+                ('savings_account', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='savings.savingsaccount')),
+            ],
+        ),
+    ]
@@ -0,0 +1,78 @@
+"""
+Cold copies of the transaction tables (see archive/store.py).
+
+Each Archived* model has the columns of its live model, ids included, so
+rows move with INSERT ... SELECT. Foreign keys keep their columns but have
+no database constraint and no reverse accessor: the live rows they point
+at may be deleted later, and nothing live should see archived rows by
+accident.
+"""
+from django.db import models
+from django.utils import timezone
+
+COLD = {"db_constraint": False, "on_delete": models.DO_NOTHING, "related_name": "+"}
+
+
+class ArchivedJournalLine(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    entry = models.ForeignKey("core.JournalEntry", **COLD)
+    account = models.ForeignKey("core.Account", **COLD)
+    debit = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    credit = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+
+class ArchivedSavingsTransaction(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    savings_account = models.ForeignKey("savings.SavingsAccount", **COLD)
+    date = models.DateField()
+    transaction_type = models.CharField(max_length=20)
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    journal_entry = models.ForeignKey("core.JournalEntry", null=True, blank=True, **COLD)
+    notes = models.CharField(max_length=255, blank=True)
+    source = models.CharField(max_length=50, blank=True)
+
+
+class ArchivedMemberTransaction(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    member = models.ForeignKey("core.Member", **COLD)
+    date = models.DateField()
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    description = models.CharField(max_length=255)
+    transaction_type = models.CharField(max_length=50)
+    source_model = models.CharField(max_length=50, blank=True)
+    source_id = models.PositiveIntegerField(null=True, blank=True)
+    journal_entry = models.ForeignKey("core.JournalEntry", null=True, blank=True, **COLD)
+
+    class Meta:
+        ordering = ['-date', '-id']
+
+
+class ArchivedLoanRepayment(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    loan = models.ForeignKey("loans.Loan", **COLD)
+    date = models.DateField()
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    principal_component = models.DecimalField(max_digits=14, decimal_places=2)
+    interest_component = models.DecimalField(max_digits=14, decimal_places=2)
+    excess_routed_to_savings = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    source = models.CharField(max_length=50, blank=True)
+    journal_entry = models.ForeignKey("core.JournalEntry", null=True, blank=True, **COLD)
+
+
+class ArchiveRun(models.Model):
+    """One archive or restore pass. Afterwards only rows dated up to `through` can be in the archive."""
+    ARCHIVE = "ARCHIVE"
+    RESTORE = "RESTORE"
+    ACTION_CHOICES = [(ARCHIVE, "Archive"), (RESTORE, "Restore")]
+
+    action = models.CharField(max_length=8, choices=ACTION_CHOICES, default=ARCHIVE)
+    through = models.DateField()
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    rows = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"{self.get_action_display()} through {self.through}"
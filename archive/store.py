@@ -0,0 +1,167 @@
+"""
+Archival of closed-period transactions.
+
+`archive()` moves rows out of the four tables that grow without bound into
+their same-shaped Archived* tables, once they are both inside a closed
+fiscal period (core/periods.py) and older than ARCHIVE_AFTER_DAYS:
+
+    JournalLine          whole journal entries, except entries with a
+                         bank-matched line or an open integrity issue
+    SavingsTransaction   by date
+    MemberTransaction    by date
+    LoanRepayment        by date, of CLOSED loans only - open loans'
+                         balances are summed from their repayments
+
+Each batch of ids is one INSERT ... SELECT and one DELETE in a transaction,
+so a row is always in exactly one store. Balances stay right without the
+archived rows: the period-close opening balances carry the GL forward,
+savings balances are stored on the account, and only settled loans lose
+repayments. Code that reads history across closed periods aggregates over
+both stores with `stores()`.
+
+`restore(after)` moves rows dated after a date back into the live tables,
+e.g. before a period is reopened.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from core import periods
+from core.models import JournalLine, MemberTransaction
+from loans.models import Loan, LoanRepayment
+from reconciliation.models import BankMatch, IntegrityIssue
+from savings.models import SavingsTransaction
+
+from .models import (
+    ArchivedJournalLine, ArchivedLoanRepayment, ArchivedMemberTransaction, ArchivedSavingsTransaction, ArchiveRun,
+)
+
+BATCH_SIZE = 2000
+
+ARCHIVES = {
+    JournalLine: ArchivedJournalLine,
+    SavingsTransaction: ArchivedSavingsTransaction,
+    MemberTransaction: ArchivedMemberTransaction,
+    LoanRepayment: ArchivedLoanRepayment,
+}
+# The date each table is archived by
+DATE_FIELDS = {
+    JournalLine: "entry__date",
+    SavingsTransaction: "date",
+    MemberTransaction: "date",
+    LoanRepayment: "date",
+}
+
+
+class ArchiveError(ValueError):
+    pass
+
+
+def stores(model):
+    """[live queryset, archived queryset] of `model`; both have the same fields."""
+    return [model.objects.all(), ARCHIVES[model].objects.all()]
+
+
+def keep_days():
+    return getattr(settings, "ARCHIVE_AFTER_DAYS", 365)
+
+
+def archive_through(today=None):
+    """The last date that may be archived: the end of the last closed period, but at least ARCHIVE_AFTER_DAYS ago."""
+    locked = periods.locked_through()
+    if locked is None:
+        return None
+    return min(locked, (today or timezone.localdate()) - timedelta(days=keep_days()))
+
+
+def archived_through():
+    """Rows dated up to this date may be in the archive; None if nothing is."""
+    return ArchiveRun.objects.filter(finished_at__isnull=False).values_list("through", flat=True).first()
+
+
+def eligible(model, through):
+    """The live rows of `model` that archive(through) moves."""
+    rows = model.objects.filter(**{f"{DATE_FIELDS[model]}__lte": through})
+    if model is JournalLine:
+        rows = rows.exclude(
+            Exists(BankMatch.objects.filter(journal_line__entry_id=OuterRef("entry_id")))
+        ).exclude(
+            Exists(IntegrityIssue.objects.filter(journal_entry_id=OuterRef("entry_id")))
+        )
+    elif model is LoanRepayment:
+        rows = rows.filter(loan__status=Loan.CLOSED)
+    return rows
+
+
+def _move(source, target, ids):
+    """Move rows `ids` from `source`'s table to `target`'s. Returns how many moved."""
+    columns = [field.column for field in source._meta.concrete_fields]
+    if sorted(columns) != sorted(field.column for field in target._meta.concrete_fields):
+        raise ArchiveError(f"{target.__name__} no longer has the columns of {source.__name__}.")
+    quote = connection.ops.quote_name
+    names = ", ".join(quote(column) for column in columns)
+    placeholders = ", ".join(["%s"] * len(ids))
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(target._meta.db_table)} ({names}) "
+            f"SELECT {names} FROM {quote(source._meta.db_table)} WHERE id IN ({placeholders})",
+            ids,
+        )
+        cursor.execute(f"DELETE FROM {quote(source._meta.db_table)} WHERE id IN ({placeholders})", ids)
+        return cursor.rowcount
+
+
+def _move_all(source, target, rows, log):
+    ids = list(rows.order_by("pk").values_list("pk", flat=True))
+    moved = 0
+    for start in range(0, len(ids), BATCH_SIZE):
+        moved += _move(source, target, ids[start:start + BATCH_SIZE])
+    log(f"{source.__name__}: {moved} row(s) moved to {target._meta.db_table}")
+    return moved
+
+
+def plan(through=None):
+    """{model name: rows archive() would move}, and the date it would archive through."""
+    through = through or archive_through()
+    if through is None:
+        return {}, None
+    return {model.__name__: eligible(model, through).count() for model in ARCHIVES}, through
+
+
+def archive(through=None, log=None):
+    """Archive closed-period rows dated up to `through` (default `archive_through()`). Returns the ArchiveRun."""
+    log = log or (lambda message: None)
+    locked = periods.locked_through()
+    through = through or archive_through()
+    if through is None or locked is None or through > locked:
+        raise ArchiveError("Only rows inside a closed fiscal period can be archived.")
+
+    started = time.perf_counter()
+    run = ArchiveRun.objects.create(action=ArchiveRun.ARCHIVE, through=max(through, archived_through() or through))
+    moved = {}
+    for model, archived in ARCHIVES.items():
+        moved[model.__name__] = _move_all(model, archived, eligible(model, through), log)
+    run.rows = {**moved, "seconds": round(time.perf_counter() - started, 3)}
+    run.finished_at = timezone.now()
+    run.save(update_fields=["rows", "finished_at"])
+    return run
+
+
+def restore(after, log=None):
+    """Move archived rows dated after `after` back to the live tables. Returns the ArchiveRun."""
+    log = log or (lambda message: None)
+    started = time.perf_counter()
+    previous = archived_through()
+    run = ArchiveRun.objects.create(action=ArchiveRun.RESTORE, through=min(after, previous or after))
+    moved = {}
+    for model, archived in ARCHIVES.items():
+        rows = archived.objects.filter(**{f"{DATE_FIELDS[model]}__gt": after})
+        moved[model.__name__] = _move_all(archived, model, rows, log)
+    run.rows = {**moved, "seconds": round(time.perf_counter() - started, 3)}
+    run.finished_at = timezone.now()
+    run.save(update_fields=["rows", "finished_at"])
+    return run
@@ -0,0 +1,118 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase
+
+from core import periods
+from core.models import Account, AccountType, JournalEntry, JournalLine, Member, MemberTransaction, ReportTag
+from loans.models import Loan, LoanProduct, LoanRepayment
+from reconciliation import integrity
+from savings.models import SavingsAccount, SavingsTransaction
+
+from . import store
+from .models import ArchivedJournalLine, ArchivedLoanRepayment, ArchivedMemberTransaction, ArchivedSavingsTransaction
+
+AMOUNT_FIELDS = {
+    JournalLine: ["debit", "credit"],
+    SavingsTransaction: ["amount"],
+    MemberTransaction: ["amount"],
+    LoanRepayment: ["amount", "principal_component", "interest_component"],
+}
+
+
+class RoundTripTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        def account(code, name, account_type, tag):
+            return Account.objects.create(code=code, name=name, type=account_type, report_tag=tag)
+
+        cls.cash = account("1010", "Cash", AccountType.ASSET, ReportTag.ASSET_CASH_EQUITY)
+        principal = account("1200", "Loans", AccountType.ASSET, ReportTag.ASSET_LOANS_PRINCIPAL)
+        interest = account("1210", "Interest receivable", AccountType.ASSET, ReportTag.ASSET_LOAN_INTEREST)
+        cls.savings_gl = account("2010", "Members savings", AccountType.LIABILITY, ReportTag.LIAB_MEMBERS_SAVINGS)
+        account("3100", "Retained earnings", AccountType.EQUITY, ReportTag.EQUITY_RETAINED_EARNINGS)
+        cls.income = account("4010", "Interest on loans", AccountType.INCOME, ReportTag.INCOME_INTEREST_ON_LOANS)
+
+        member = Member.objects.create(member_no="M-000001", full_name="Wanjiru Kariuki")
+        savings = SavingsAccount.objects.create(member=member, account=cls.savings_gl, opened_on=date(2024, 1, 1))
+        product = LoanProduct.objects.create(
+            name="Development Loan", annual_rate=Decimal("12.00"), interest_method=LoanProduct.REDUCING,
+            default_tenor_months=12,
+        )
+        loans = [
+            Loan.objects.create(
+                member=member, product=product, principal=Decimal("1000.00"), annual_rate=Decimal("12.00"),
+                interest_method=LoanProduct.REDUCING, disbursed_on=date(2024, 1, 1), tenor_months=12,
+                principal_account=principal, interest_account=interest, status=status,
+            )
+            for status in (Loan.CLOSED, Loan.ACTIVE)
+        ]
+
+        for day in (date(2024, 3, 1), date(2024, 9, 1), date(2025, 3, 1)):
+            cls.post(day, cls.cash, cls.savings_gl, "500.00")
+            cls.post(day, cls.cash, cls.income, "25.00")
+            SavingsTransaction.objects.create(  # and its MemberTransaction (savings/signals.py)
+                savings_account=savings, date=day, transaction_type=SavingsTransaction.DEPOSIT, amount=Decimal("500.00"),
+            )
+            for loan in loans:
+                LoanRepayment.objects.create(
+                    loan=loan, date=day, amount=Decimal("110.00"),
+                    principal_component=Decimal("100.00"), interest_component=Decimal("10.00"),
+                )
+        # An unbalanced entry, which stays live while its integrity issue is open
+        cls.unbalanced = JournalEntry.objects.create(date=date(2024, 6, 1))
+        JournalLine.objects.create(entry=cls.unbalanced, account=cls.cash, debit=Decimal("7.00"))
+
+    @staticmethod
+    def post(day, debit, credit, amount):
+        entry = JournalEntry.objects.create(date=day)
+        JournalLine.objects.bulk_create([
+            JournalLine(entry=entry, account=debit, debit=Decimal(amount)),
+            JournalLine(entry=entry, account=credit, credit=Decimal(amount)),
+        ])
+
+    def snapshot(self):
+        totals = {}
+        for model, fields in AMOUNT_FIELDS.items():
+            sums = [0] + [Decimal(0)] * len(fields)
+            for rows in store.stores(model):
+                found = rows.aggregate(*(Sum(field) for field in fields))
+                sums[0] += rows.count()
+                for i, field in enumerate(fields, 1):
+                    sums[i] += Decimal(found[f"{field}__sum"] or 0).quantize(Decimal("0.01"))
+            totals[model.__name__] = sums
+        balances = {
+            as_of: {pk: balance for pk, balance in periods.balances(as_of).items() if balance}
+            for as_of in (date(2024, 6, 30), date(2024, 12, 31), date(2025, 6, 30))
+        }
+        scan = integrity.run(full=True)
+        issues = sorted(integrity.IntegrityIssue.objects.values_list("journal_entry_id", "kind"))
+        return totals, balances, scan.summary["found"], issues
+
+    def archive(self, *args):
+        call_command("archive_transactions", *args, stdout=StringIO())
+
+    def test_archive_and_restore_leave_totals_balances_and_the_scan_unchanged(self):
+        periods.close(date(2024, 12, 31))
+        self.member_rows_2024 = MemberTransaction.objects.filter(date__lte=date(2024, 12, 31)).count()
+        self.assertGreater(self.member_rows_2024, 0)
+        before = self.snapshot()
+        self.assertEqual(before[2], {"UNBALANCED": 1})
+
+        self.archive("--through", "2024-12-31")
+
+        self.assertEqual(ArchivedSavingsTransaction.objects.count(), 2)
+        self.assertEqual(ArchivedMemberTransaction.objects.count(), self.member_rows_2024)
+        self.assertEqual(ArchivedLoanRepayment.objects.count(), 2)  # the closed loan's only
+        self.assertTrue(ArchivedJournalLine.objects.exists())
+        self.assertFalse(ArchivedJournalLine.objects.filter(entry=self.unbalanced).exists())
+        self.assertEqual(self.snapshot(), before)
+
+        self.archive("--restore-after", "2024-06-30")
+
+        self.assertEqual(ArchivedSavingsTransaction.objects.get().date, date(2024, 3, 1))
+        self.assertFalse(ArchivedJournalLine.objects.filter(entry__date__gt=date(2024, 6, 30)).exists())
+        self.assertEqual(self.snapshot(), before)
@@ -0,0 +1,319 @@
+"""
+Benchmarks for the hot views and batch jobs.
+
+Each case is run a few times against the current database; wall time and
+query count are recorded per case. `run_suite()` returns a JSON-friendly
+dict so results can be saved and compared between releases.
+"""
+import platform
+import statistics
+import time
+
+import django
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from core import rollups
+from core.instrumentation import QueryProfile
+from core.metrics import compute_dashboard_metrics, invalidate_dashboard_metrics
+from core.models import Member
+from receipts import bulk
+from receipts.models import Receipt
+
+BENCHMARK_USERNAME = "benchmark"
+
+
+def measure(func, repeat=3):
+    """Run `func` `repeat` times; report timings in ms and the query count of the last run."""
+    timings, queries, status = [], 0, "ok"
+    for _ in range(repeat):
+        with QueryProfile() as profile:
+            started = time.perf_counter()
+            try:
+                result = func()
+            except Exception as exc:  # a failing case is a result, not a crash
+                result, status = None, f"error: {exc.__class__.__name__}: {exc}"
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = profile.count
+        if hasattr(result, "status_code") and result.status_code != 200:
+            status = f"http {result.status_code}"
+        if status != "ok":
+            break
+    return {
+        "status": status,
+        "queries": queries,
+        "median_ms": round(statistics.median(timings), 2),
+        "min_ms": round(min(timings), 2),
+        "max_ms": round(max(timings), 2),
+        "runs": len(timings),
+    }
+
+
+def _client():
+    user, _ = get_user_model().objects.get_or_create(username=BENCHMARK_USERNAME)
+    client = Client(HTTP_HOST="localhost", raise_request_exception=False)
+    client.force_login(user)
+    return client
+
+
+def view_cases():
+    """(name, url) pairs for every hot view, picked against the current data."""
+    busiest = (
+        Member.objects.annotate(activity=Count("transactions"))
+        .order_by("-activity", "pk")
+        .values_list("pk", flat=True)
+        .first()
+    )
+    cases = [
+        ("dashboard", reverse("dashboard")),
+        ("journal_entry_list", reverse("journal_entry_list")),
+        ("member_list", reverse("member_list")),
+        ("savingsaccount_list", reverse("savingsaccount_list")),
+        ("savingstransaction_list", reverse("savingstransaction_list")),
+        ("loan_list", reverse("loan_list")),
+        ("loanrepayment_list", reverse("loanrepayment_list")),
+        ("receipt_list", reverse("receipts:receipt_list")),
+        ("trend_data", reverse("trend_data")),
+    ]
+    if busiest:
+        cases.append(("member_detail", reverse("member_detail", args=[busiest])))
+    return cases
+
+
+def batch_cases():
+    receipt_ids = list(Receipt.objects.order_by("-pk").values_list("pk", flat=True)[:500])
+    return [
+        ("batch.dashboard_metrics", compute_dashboard_metrics),
+        ("batch.rebuild_rollups", rollups.rebuild),
+        ("batch.render_500_receipts", lambda: bulk.render_receipts(receipt_ids, use_cache=False)),
+    ]
+
+
+def run_suite(repeat=3, include_batch=True):
+    """Benchmark every view and batch job against the current database."""
+    client = _client()
+    results = {}
+    for name, url in view_cases():
+        if name == "dashboard":
+            # Measure the cold path; the warm path is a cache hit.
+            results["dashboard.cold"] = measure(
+                lambda: (invalidate_dashboard_metrics(), client.get(url))[1], repeat
+            )
+        results[name] = measure(lambda: client.get(url), repeat)
+    if include_batch:
+        for name, func in batch_cases():
+            results[name] = measure(func, repeat)
+    return results
+
+
+def environment():
+    return {
+        "recorded_at": timezone.now().isoformat(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "machine": platform.machine(),
+    }
+
+
+TELLER_SOURCE = "Teller benchmark"
+
+
+def _teller(account_ids, postings, latencies, errors, barrier):
+    from django.db import OperationalError, connections, transaction
+    from savings.models import SavingsTransaction
+
+    barrier.wait()
+    try:
+        for i in range(postings):
+            account_id = account_ids[i % len(account_ids)]
+            started = time.perf_counter()
+            try:
+                with transaction.atomic():
+                    tx = SavingsTransaction.objects.create(
+                        savings_account_id=account_id,
+                        transaction_type=SavingsTransaction.DEPOSIT,
+                        amount=100,
+                        source=TELLER_SOURCE,
+                    )
+                    Receipt.objects.create(
+                        member_id=tx.savings_account.member_id,
+                        type=Receipt.SAVINGS,
+                        amount=tx.amount,
+                        savings_transaction=tx,
+                        payment_method="Cash",
+                    )
+            except OperationalError as exc:
+                errors.append(str(exc))
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+    finally:
+        connections.close_all()
+
+
+def teller_throughput(tellers=12, postings=50, cleanup=True):
+    """
+    Simulate `tellers` concurrent counters each posting `postings` savings
+    deposits (transaction + receipt, with every posting signal firing).
+    Reports postings per second, latency percentiles and lock failures.
+    """
+    import threading
+    from savings.models import SavingsAccount, SavingsTransaction
+
+    account_ids = list(SavingsAccount.objects.order_by("pk").values_list("pk", flat=True)[:tellers * 10])
+    if not account_ids:
+        raise ValueError("No savings accounts to post to; run generate_sacco_data first.")
+
+    latencies, errors = [], []
+    barrier = threading.Barrier(tellers)
+    threads = [
+        threading.Thread(
+            target=_teller,
+            args=(account_ids[i::tellers] or account_ids, postings, latencies, errors, barrier),
+        )
+        for i in range(tellers)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    if cleanup:
+        Receipt.objects.filter(savings_transaction__source=TELLER_SOURCE).delete()
+        SavingsTransaction.objects.filter(source=TELLER_SOURCE).delete()
+
+    latencies.sort()
+
+    def percentile(p):
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 2) if latencies else None
+
+    return {
+        "database": connection.vendor,
+        "tellers": tellers,
+        "attempted": tellers * postings,
+        "committed": len(latencies),
+        "lock_errors": len(errors),
+        "seconds": round(elapsed, 3),
+        "postings_per_second": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": round(latencies[-1], 2) if latencies else None,
+        "sample_error": errors[0] if errors else None,
+    }
+
+
+WITHDRAWAL_SOURCE = "Withdrawal benchmark"
+
+
+def _withdrawer(account_id, attempts, amount, lock, outcomes, latencies, barrier):
+    from django.db import OperationalError, connections
+    from savings import postings
+    from savings.models import SavingsAccount
+
+    account = SavingsAccount(pk=account_id)
+    barrier.wait()
+    try:
+        for _ in range(attempts):
+            started = time.perf_counter()
+            try:
+                postings.withdraw(account, amount, notes="Benchmark withdrawal", source=WITHDRAWAL_SOURCE, lock=lock)
+            except postings.InsufficientFunds:
+                outcomes.append("insufficient")
+                continue
+            except postings.ConcurrentUpdate:
+                outcomes.append("conflict")
+                continue
+            except OperationalError:
+                outcomes.append("lock_error")
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+            outcomes.append("committed")
+    finally:
+        connections.close_all()
+
+
+def withdrawal_contention(threads=8, attempts=50, amount=100, lock=True, cleanup=True):
+    """
+    `threads` tellers each try `attempts` withdrawals of `amount` from one
+    new savings account funded for only half of them, so every posting
+    contends for the same row. Reports throughput, rejections and whether
+    the stored balance still matches the transaction history without ever
+    going negative.
+    """
+    import threading
+    from decimal import Decimal
+
+    from django.db.models import Sum
+    from core.models import JournalEntry, MemberTransaction
+    from savings.models import SavingsAccount, SavingsTransaction
+
+    template = SavingsAccount.objects.select_related("member").order_by("pk").first()
+    if template is None:
+        raise ValueError("No savings accounts to copy; run generate_sacco_data first.")
+    amount = Decimal(amount)
+    expected = threads * attempts // 2
+    account = SavingsAccount.objects.create(member=template.member, account=template.account)
+    SavingsTransaction.objects.create(
+        savings_account=account,
+        transaction_type=SavingsTransaction.DEPOSIT,
+        amount=amount * expected,
+        source=WITHDRAWAL_SOURCE,
+    )
+
+    outcomes, latencies = [], []
+    barrier = threading.Barrier(threads)
+    workers = [
+        threading.Thread(target=_withdrawer, args=(account.pk, attempts, amount, lock, outcomes, latencies, barrier))
+        for _ in range(threads)
+    ]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    account.refresh_from_db()
+    history = account.transactions.aggregate(total=Sum(SavingsTransaction.signed_amount()))["total"] or 0
+    committed = outcomes.count("committed")
+
+    if cleanup:
+        transactions = account.transactions.all()
+        entry_ids = list(transactions.exclude(journal_entry=None).values_list("journal_entry", flat=True))
+        MemberTransaction.objects.filter(
+            source_model="SavingsTransaction", source_id__in=transactions.values("pk")
+        ).delete()
+        account.delete()
+        JournalEntry.objects.filter(pk__in=entry_ids).delete()
+
+    latencies.sort()
+
+    def percentile(p):
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 2) if latencies else None
+
+    return {
+        "database": connection.vendor,
+        "mode": "lock" if lock else "optimistic",
+        "threads": threads,
+        "attempted": threads * attempts,
+        "funded_for": expected,
+        "committed": committed,
+        "insufficient": outcomes.count("insufficient"),
+        "conflicts": outcomes.count("conflict"),
+        "lock_errors": outcomes.count("lock_error"),
+        "final_balance": account.current_balance,
+        "balance_matches_history": account.current_balance == history,
+        "overdrawn": account.current_balance < 0 or committed > expected,
+        "seconds": round(elapsed, 3),
+        "withdrawals_per_second": round(committed / elapsed, 1) if elapsed else None,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "max_ms": round(latencies[-1], 2) if latencies else None,
+    }
@@ -0,0 +1,95 @@
+"""
+Read-replica routing for reports and exports.
+
+Nothing goes to the replica unless it runs inside `use_replica`, a context
+manager that also works as a view/command decorator. Postings always hit
+the primary. Read-your-writes is handled in two places:
+
+* inside a block, the first write pins the rest of the block to the primary;
+* across requests, ReplicaPinningMiddleware pins a user to the primary for
+  REPLICA_PIN_SECONDS after any POST, so a teller's next report includes
+  the entry they just posted even if the replica is lagging.
+"""
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA_ALIAS = "replica"
+PIN_COOKIE = "db_pin"
+
+# Auth and sessions are read before the view runs and must see fresh writes.
+PRIMARY_ONLY_APPS = {"auth", "sessions", "contenttypes", "admin"}
+
+_use_replica = ContextVar("use_replica", default=False)
+_wrote = ContextVar("wrote_in_replica_block", default=False)
+_pinned = ContextVar("pinned_to_primary", default=False)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+class use_replica(ContextDecorator):
+    """Route reads inside the block (or decorated view/command) to the read replica."""
+
+    def _recreate_cm(self):
+        # A decorated view runs in many threads at once; give each call its own tokens.
+        return type(self)()
+
+    def __enter__(self):
+        self._tokens = (_use_replica.set(True), _wrote.set(False))
+        return self
+
+    def __exit__(self, *exc_info):
+        replica_token, wrote_token = self._tokens
+        _use_replica.reset(replica_token)
+        _wrote.reset(wrote_token)
+        return False
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if (
+            _use_replica.get()
+            and not _wrote.get()
+            and not _pinned.get()
+            and model._meta.app_label not in PRIMARY_ONLY_APPS
+            and replica_configured()
+        ):
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Read-your-writes: once a replica block writes, it stops reading from the replica.
+        if _use_replica.get():
+            _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica is populated by replication, never migrated directly.
+        return db != REPLICA_ALIAS
+
+
+class ReplicaPinningMiddleware:
+    """Keep a user on the primary for a few seconds after they post something."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.pin_seconds = getattr(settings, "REPLICA_PIN_SECONDS", 10)
+
+    def __call__(self, request):
+        token = _pinned.set(bool(request.COOKIES.get(PIN_COOKIE)))
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned.reset(token)
+
+        if request.method not in ("GET", "HEAD", "OPTIONS") and replica_configured():
+            response.set_cookie(PIN_COOKIE, "1", max_age=self.pin_seconds, httponly=True, samesite="Lax")
+        return response
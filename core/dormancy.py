@@ -0,0 +1,227 @@
+"""
+Dormancy of members and savings accounts.
+
+Member and SavingsAccount carry `last_activity_on`, the date of their
+latest savings transaction, loan repayment or receipt. Every save of one
+of those moves it forward in a single UPDATE (core/signals.py, and
+mobilemoney/posting.py for its bulk batches), so finding dormant rows is
+an indexed range filter rather than a max() over every activity table.
+Edits and deletes never move it back; `rebuild()` recomputes it from the
+tables, archived rows included, as the migration that added it did
+(savings/migrations/0007). A row it is still missing on is checked
+against the activity tables rather than taken as inactive.
+
+`mark_dormant()` deactivates savings accounts with no transaction for
+SAVINGS_DORMANCY_DAYS and sets members with no activity for
+MEMBER_DORMANCY_DAYS to INACTIVE; members with an open loan are left
+alone. `reactivate()` undoes either, and counts as activity so the next
+run does not mark the row again. Both change statuses with bulk
+`update()`s and write a DormancyLog row per change for audit.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef, Q
+from django.utils import timezone
+
+from archive.store import stores
+from loans.models import Loan, LoanRepayment
+from receipts.models import Receipt
+from savings.models import SavingsAccount, SavingsTransaction
+
+from .models import DormancyLog, Member
+
+BATCH_SIZE = 2000
+
+
+def account_days():
+    return getattr(settings, "SAVINGS_DORMANCY_DAYS", 365)
+
+
+def member_days():
+    return getattr(settings, "MEMBER_DORMANCY_DAYS", account_days())
+
+
+def _as_date(value):
+    if hasattr(value, "tzinfo") and value.tzinfo is not None:
+        return timezone.localdate(value)
+    return value.date() if hasattr(value, "date") and callable(value.date) else value
+
+
+def activity(row):
+    """(member_id, savings_account_id or None, date) of a saved SavingsTransaction, LoanRepayment or Receipt."""
+    if isinstance(row, SavingsTransaction):
+        return row.savings_account.member_id, row.savings_account_id, _as_date(row.date)
+    if isinstance(row, LoanRepayment):
+        return row.loan.member_id, None, _as_date(row.date)
+    if isinstance(row, Receipt):
+        return row.member_id, None, _as_date(row.issued_on)
+    raise TypeError(f"{type(row).__name__} is not member activity.")
+
+
+def _advance(rows, day):
+    return rows.filter(Q(last_activity_on__lt=day) | Q(last_activity_on__isnull=True)).update(last_activity_on=day)
+
+
+def touch(rows):
+    """Move last_activity_on forward for the members and savings accounts of saved activity `rows`."""
+    members, accounts = defaultdict(set), defaultdict(set)
+    for row in rows:
+        member_id, account_id, day = activity(row)
+        if day is None:
+            continue
+        members[day].add(member_id)
+        if account_id:
+            accounts[day].add(account_id)
+    for day, ids in accounts.items():
+        _advance(SavingsAccount.objects.filter(pk__in=ids), day)
+    for day, ids in members.items():
+        _advance(Member.objects.filter(pk__in=ids), day)
+
+
+def _latest(days, key, day):
+    if day is not None and (days.get(key) is None or day > days[key]):
+        days[key] = day
+
+
+def _store(model, days):
+    """Write {pk: last_activity_on} over every row of `model`, touching only rows that change. Returns how many did."""
+    changed = [
+        model(pk=pk, last_activity_on=days.get(pk))
+        for pk, current in model.objects.values_list("pk", "last_activity_on")
+        if current != days.get(pk)
+    ]
+    model.objects.bulk_update(changed, ["last_activity_on"], batch_size=BATCH_SIZE)
+    return len(changed)
+
+
+@transaction.atomic
+def rebuild():
+    """Recompute every last_activity_on from the activity tables. Returns the number of rows changed."""
+    accounts, members = {}, {}
+    for store in stores(SavingsTransaction):
+        for account_id, day in store.values("savings_account_id").annotate(last=Max("date")).values_list(
+            "savings_account_id", "last"
+        ).order_by():
+            _latest(accounts, account_id, day)
+    for account_id, member_id in SavingsAccount.objects.values_list("pk", "member_id"):
+        _latest(members, member_id, accounts.get(account_id))
+    for store in stores(LoanRepayment):
+        for member_id, day in store.values("loan__member_id").annotate(last=Max("date")).values_list(
+            "loan__member_id", "last"
+        ).order_by():
+            _latest(members, member_id, day)
+    for member_id, issued in Receipt.objects.values("member_id").annotate(last=Max("issued_on")).values_list(
+        "member_id", "last"
+    ).order_by():
+        _latest(members, member_id, _as_date(issued))
+    return _store(SavingsAccount, accounts) + _store(Member, members)
+
+
+def _active_since(stores_and_fields, cutoff):
+    """Q matching rows with activity on or after `cutoff` in any of [(queryset, outer-ref field, date lookup)]."""
+    return reduce(or_, (
+        Exists(rows.filter(**{field: OuterRef("pk"), lookup: cutoff})) for rows, field, lookup in stores_and_fields
+    ))
+
+
+def dormant_accounts(as_of=None, accounts=None):
+    """
+    Active savings accounts with no transaction in SAVINGS_DORMANCY_DAYS up
+    to `as_of`. An account whose last_activity_on is not filled in is
+    checked against its transactions rather than taken as inactive.
+    """
+    cutoff = (as_of or timezone.localdate()) - timedelta(days=account_days())
+    accounts = SavingsAccount.objects.all() if accounts is None else accounts
+    recent = _active_since([(store, "savings_account_id", "date__gte") for store in stores(SavingsTransaction)], cutoff)
+    return accounts.filter(active=True).filter(
+        Q(last_activity_on__lt=cutoff) | Q(last_activity_on__isnull=True, opened_on__lt=cutoff) & ~recent
+    )
+
+
+def dormant_members(as_of=None, members=None):
+    """
+    ACTIVE members with no activity in MEMBER_DORMANCY_DAYS up to `as_of`
+    and no open loan. As for accounts, a member whose last_activity_on is
+    not filled in is checked against the activity tables.
+    """
+    cutoff = (as_of or timezone.localdate()) - timedelta(days=member_days())
+    members = Member.objects.all() if members is None else members
+    open_loans = Loan.objects.filter(member=OuterRef("pk"), status__in=[Loan.ACTIVE, Loan.DEFAULTED])
+    recent = _active_since(
+        [(store, "savings_account__member_id", "date__gte") for store in stores(SavingsTransaction)]
+        + [(store, "loan__member_id", "date__gte") for store in stores(LoanRepayment)]
+        + [(Receipt.objects.all(), "member_id", "issued_on__date__gte")],
+        cutoff,
+    )
+    return members.filter(status=Member.ACTIVE).filter(
+        Q(last_activity_on__lt=cutoff)
+        | Q(last_activity_on__isnull=True) & (
+            Q(joined_on__lt=cutoff) | Q(joined_on__isnull=True, created_at__date__lt=cutoff)
+        ) & ~recent
+    ).exclude(Exists(open_loans))
+
+
+def _change(rows, action, as_of, user, account_fields, member_fields):
+    """Update `rows` - (pk, member_id, last_activity_on, is_account) - with the fields and log each change."""
+    with transaction.atomic():
+        for is_account, model, fields in ((True, SavingsAccount, account_fields), (False, Member, member_fields)):
+            ids = [pk for pk, _, _, account in rows if account is is_account]
+            for start in range(0, len(ids), BATCH_SIZE):
+                model.objects.filter(pk__in=ids[start:start + BATCH_SIZE]).update(**fields)
+        DormancyLog.objects.bulk_create(
+            [
+                DormancyLog(
+                    member_id=member_id, savings_account_id=pk if is_account else None, action=action,
+                    last_activity_on=last, as_of=as_of, created_by=user,
+                )
+                for pk, member_id, last, is_account in rows
+            ],
+            batch_size=BATCH_SIZE,
+        )
+    accounts = sum(1 for *_, is_account in rows if is_account)
+    return accounts, len(rows) - accounts
+
+
+def _rows(accounts, members):
+    rows = []
+    if accounts is not None:
+        rows += [(*row, True) for row in accounts.values_list("pk", "member_id", "last_activity_on")]
+    if members is not None:
+        rows += [(pk, pk, last, False) for pk, last in members.values_list("pk", "last_activity_on")]
+    return rows
+
+
+def mark_dormant(as_of=None, accounts=None, members=None, user=None, dry_run=False):
+    """
+    Deactivate the dormant ones among `accounts` and set the dormant ones
+    among `members` INACTIVE; pass None to skip either. Returns
+    (accounts changed, members changed), or found with `dry_run`.
+    """
+    as_of = as_of or timezone.localdate()
+    found_accounts = None if accounts is None else dormant_accounts(as_of, accounts)
+    found_members = None if members is None else dormant_members(as_of, members)
+    if dry_run:
+        return (
+            0 if found_accounts is None else found_accounts.count(),
+            0 if found_members is None else found_members.count(),
+        )
+    rows = _rows(found_accounts, found_members)
+    return _change(rows, DormancyLog.DORMANT, as_of, user, {"active": False}, {"status": Member.INACTIVE})
+
+
+def reactivate(accounts=None, members=None, user=None):
+    """Reactivate inactive `accounts` and INACTIVE `members`. Returns (accounts changed, members changed)."""
+    rows = _rows(
+        None if accounts is None else accounts.filter(active=False),
+        None if members is None else members.filter(status=Member.INACTIVE),
+    )
+    today = timezone.localdate()
+    return _change(
+        rows, DormancyLog.REACTIVATED, today, user,
+        {"active": True, "last_activity_on": today}, {"status": Member.ACTIVE, "last_activity_on": today},
+    )
@@ -1,6 +1,7 @@
 from django import forms
 from django.forms import inlineformset_factory
 from .models import Account, ReportTag, JournalEntry, JournalLine, Member
+from . import periods
 
 
 class AccountForm(forms.ModelForm):
@@ -76,6 +77,12 @@ class JournalEntryForm(forms.ModelForm):
             "memo": "Brief description of the transaction."
         }
 
+    def clean_date(self):
+        date = self.cleaned_data["date"]
+        if periods.is_locked(date):
+            raise forms.ValidationError(f"Entries up to {periods.locked_through()} are in a closed period.")
+        return date
+
 
 
 class JournalLineForm(forms.ModelForm):
@@ -0,0 +1,140 @@
+"""
+Query-count and SQL-timing instrumentation.
+
+`QueryProfile` is a context manager that hooks every statement run on a
+connection and records the count, total SQL time, the slowest statements
+and statements repeated with the same shape (the usual N+1 signature).
+It works with DEBUG off and keeps no more than it needs.
+
+`assert_max_queries` wraps it as a query budget for tests and scripts.
+The request middleware lives in core/middleware.py.
+"""
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db import connections, DEFAULT_DB_ALIAS
+
+# Literals that survive parameter binding (IN lists, inlined numbers, quoted strings).
+_NUMBER = re.compile(r"\b\d+(\.\d+)?\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_IN_LIST = re.compile(r"\bIN \((?:\s*(?:%s|\?|\d+)\s*,?)+\)", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+
+
+def query_shape(sql):
+    """Normalise a statement so repeats that differ only in values compare equal."""
+    shape = _STRING.sub("?", sql)
+    shape = _IN_LIST.sub("IN (...)", shape)
+    shape = _NUMBER.sub("?", shape)
+    return _SPACES.sub(" ", shape).strip()
+
+
+class QueryProfile:
+    """
+    Record the statements run on one or more connections.
+
+        with QueryProfile() as profile:
+            response = view(request)
+        profile.count, profile.total_ms, profile.slowest(), profile.duplicates()
+    """
+
+    def __init__(self, using=None, keep_slowest=5):
+        self.aliases = [using] if isinstance(using, str) else list(using or [DEFAULT_DB_ALIAS])
+        self.keep_slowest = keep_slowest
+        self.count = 0
+        self.total_ms = 0.0
+        self.shapes = Counter()
+        self._slowest = []
+        self._stack = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.count += 1
+            self.total_ms += elapsed
+            self.shapes[query_shape(sql)] += 1
+            self._remember(elapsed, sql)
+
+    def _remember(self, elapsed, sql):
+        if len(self._slowest) < self.keep_slowest:
+            self._slowest.append((elapsed, sql))
+            self._slowest.sort(reverse=True)
+        elif elapsed > self._slowest[-1][0]:
+            self._slowest[-1] = (elapsed, sql)
+            self._slowest.sort(reverse=True)
+
+    def __enter__(self):
+        for alias in self.aliases:
+            wrapper = connections[alias].execute_wrapper(self)
+            wrapper.__enter__()
+            self._stack.append(wrapper)
+        return self
+
+    def __exit__(self, *exc_info):
+        while self._stack:
+            self._stack.pop().__exit__(*exc_info)
+        return False
+
+    def slowest(self):
+        """[(ms, sql), ...] slowest first."""
+        return [(round(ms, 2), sql) for ms, sql in self._slowest]
+
+    def duplicates(self, threshold=2):
+        """{shape: times} for statement shapes run at least `threshold` times."""
+        return {shape: n for shape, n in self.shapes.most_common() if n >= threshold}
+
+    def summary(self, max_sql_length=300):
+        """A JSON-friendly digest, suitable for structured logs."""
+        return {
+            "queries": self.count,
+            "sql_ms": round(self.total_ms, 2),
+            "duplicate_shapes": len(self.duplicates()),
+            "duplicate_queries": sum(n - 1 for n in self.duplicates().values()),
+            "slowest": [
+                {"ms": ms, "sql": sql[:max_sql_length]} for ms, sql in self.slowest()
+            ],
+            "duplicates": [
+                {"times": n, "sql": shape[:max_sql_length]}
+                for shape, n in list(self.duplicates().items())[:self.keep_slowest]
+            ],
+        }
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def assert_max_queries(budget, using=None):
+    """
+    Fail when the wrapped block runs more than `budget` queries.
+
+        with assert_max_queries(6):
+            client.get(reverse("savingsaccount_list"))
+
+    Unlike TestCase.assertNumQueries it is an upper bound, so a page that
+    gets cheaper does not break the test, and the failure message lists the
+    repeated statement shapes that usually explain the overrun.
+    """
+    with QueryProfile(using=using) as profile:
+        yield profile
+    if profile.count > budget:
+        repeated = "\n".join(
+            f"  {n}x {shape[:200]}" for shape, n in list(profile.duplicates().items())[:5]
+        )
+        raise QueryBudgetExceeded(
+            f"{profile.count} queries executed, budget is {budget}."
+            + (f"\nRepeated statements:\n{repeated}" if repeated else "")
+        )
+
+
+class QueryBudgetMixin:
+    """TestCase mixin: `self.assertMaxQueries(n)` as a context manager."""
+
+    def assertMaxQueries(self, budget, using=None):
+        return assert_max_queries(budget, using=using)
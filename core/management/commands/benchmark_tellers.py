@@ -0,0 +1,33 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmarks
+
+
+class Command(BaseCommand):
+    help = "Measure posting throughput with many tellers writing at once against the configured database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tellers", type=int, default=12, help="Concurrent teller threads.")
+        parser.add_argument("--postings", type=int, default=50, help="Deposits posted by each teller.")
+        parser.add_argument("--keep", action="store_true", help="Keep the benchmark postings.")
+        parser.add_argument("--output", help="Write the result as JSON to this file.")
+
+    def handle(self, *args, **options):
+        try:
+            result = benchmarks.teller_throughput(
+                tellers=options["tellers"],
+                postings=options["postings"],
+                cleanup=not options["keep"],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        for key, value in result.items():
+            self.stdout.write(f"  {key:<22} {value}")
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump({"environment": benchmarks.environment(), "result": result}, fh, indent=2)
+        if result["lock_errors"]:
+            self.stdout.write(self.style.WARNING(f"{result['lock_errors']} postings failed on the write lock."))
@@ -0,0 +1,56 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmarks, synthetic
+
+
+class Command(BaseCommand):
+    help = (
+        "Record wall time and query count for the hot views and batch jobs. "
+        "With --scales, regenerates synthetic data at each scale first (destroys existing data)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scales", help="Comma-separated member counts, e.g. 100,1000,10000.")
+        parser.add_argument("--years", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--skip-batch", action="store_true", help="Only benchmark views.")
+        parser.add_argument("--output", help="Write results as JSON to this file.")
+        parser.add_argument("--noinput", "--no-input", action="store_false", dest="interactive")
+
+    def handle(self, *args, **options):
+        scales = []
+        if options["scales"]:
+            try:
+                scales = [int(n) for n in options["scales"].split(",")]
+            except ValueError:
+                raise CommandError("--scales must be a comma-separated list of integers.")
+            if options["interactive"]:
+                answer = input("--scales replaces all data with synthetic data. Type 'yes' to continue: ")
+                if answer != "yes":
+                    raise CommandError("Aborted.")
+
+        report = {"environment": benchmarks.environment(), "runs": []}
+        for scale in scales or [None]:
+            rows = None
+            if scale is not None:
+                self.stdout.write(f"Generating {scale:,} members...")
+                synthetic.flush()
+                rows = synthetic.generate(members=scale, years=options["years"], seed=options["seed"])
+
+            results = benchmarks.run_suite(repeat=options["repeat"], include_batch=not options["skip_batch"])
+            report["runs"].append({"members": scale, "rows": rows, "results": results})
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f"Scale: {scale or 'current data'}"))
+            for name, result in results.items():
+                line = f"  {name:<32} {result['median_ms']:>10.1f} ms {result['queries']:>7} queries"
+                if result["status"] != "ok":
+                    line += f"  [{result['status']}]"
+                self.stdout.write(line)
+
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(report, fh, indent=2, default=str)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Stress concurrent withdrawals against one savings account and check that it is never overdrawn. "
+        "Uses a throwaway account that is deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8, help="Concurrent teller threads.")
+        parser.add_argument("--attempts", type=int, default=50, help="Withdrawals tried by each thread.")
+        parser.add_argument("--amount", default="100", help="Amount of each withdrawal.")
+        parser.add_argument("--optimistic", action="store_true",
+                            help="Post without row locks, relying on the version check and retries.")
+        parser.add_argument("--keep", action="store_true", help="Keep the benchmark account and postings.")
+        parser.add_argument("--output", help="Write the result as JSON to this file.")
+
+    def handle(self, *args, **options):
+        try:
+            result = benchmarks.withdrawal_contention(
+                threads=options["threads"],
+                attempts=options["attempts"],
+                amount=options["amount"],
+                lock=not options["optimistic"],
+                cleanup=not options["keep"],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        for key, value in result.items():
+            self.stdout.write(f"  {key:<24} {value}")
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump({"environment": benchmarks.environment(), "result": result}, fh, indent=2, default=str)
+        if result["overdrawn"] or not result["balance_matches_history"]:
+            raise CommandError("The account was overdrawn or its stored balance drifted from its transactions.")
+        self.stdout.write(self.style.SUCCESS(
+            f"No overdraft: {result['committed']} of {result['attempted']} withdrawals committed "
+            f"for {result['funded_for']} funded."
+        ))
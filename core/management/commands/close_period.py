@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from core import periods
+
+
+class Command(BaseCommand):
+    help = (
+        "Close the fiscal period ending --end: post the closing entry to retained earnings, record "
+        "opening balances and lock the period's journal entries. --reopen undoes the latest close."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--end", help="Last day of the period (YYYY-MM-DD).")
+        parser.add_argument("--name", default="", help="Period name (default FY<year of --end>).")
+        parser.add_argument("--reopen", action="store_true", help="Reopen the latest closed period.")
+
+    def handle(self, *args, **options):
+        if options["reopen"]:
+            try:
+                period = periods.reopen()
+            except periods.PeriodError as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(self.style.SUCCESS(f"Reopened {period}."))
+            return
+
+        if not options["end"]:
+            raise CommandError("Give --end YYYY-MM-DD, or --reopen.")
+        try:
+            end = datetime.strptime(options["end"], "%Y-%m-%d").date()
+        except ValueError:
+            raise CommandError("--end must be YYYY-MM-DD.")
+        try:
+            period = periods.close(end, name=options["name"])
+        except (periods.PeriodError, ImproperlyConfigured) as exc:
+            raise CommandError(str(exc))
+
+        entry = period.closing_entry
+        self.stdout.write(f"Closed {period}.")
+        self.stdout.write(f"  {'closing entry':<16} {f'JE #{entry.pk} ({entry.lines.count()} lines)' if entry else 'none'}")
+        self.stdout.write(f"  {'opening balances':<16} {period.opening_balances.count()}")
+        self.stdout.write(self.style.SUCCESS(f"Entries dated up to {period.end_date} are now locked."))
@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import synthetic
+
+
+class Command(BaseCommand):
+    help = "Generate a reproducible synthetic data set (members, savings, loans, receipts, journal entries)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--members", type=int, default=1000)
+        parser.add_argument("--years", type=int, default=3, help="Years of transaction history.")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--end-date", help="Last day of generated history (YYYY-MM-DD). Defaults to today.")
+        parser.add_argument(
+            "--flush", action="store_true",
+            help="Delete ALL members, savings, loans, receipts and journal entries first.",
+        )
+        parser.add_argument("--noinput", "--no-input", action="store_false", dest="interactive")
+
+    def handle(self, *args, **options):
+        end_date = None
+        if options["end_date"]:
+            try:
+                end_date = datetime.strptime(options["end_date"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("--end-date must be YYYY-MM-DD")
+
+        if options["flush"]:
+            if options["interactive"]:
+                answer = input("This deletes every member, loan, savings and journal row. Type 'yes' to continue: ")
+                if answer != "yes":
+                    raise CommandError("Aborted.")
+            synthetic.flush()
+            self.stdout.write("Flushed existing data.")
+
+        try:
+            counts = synthetic.generate(
+                members=options["members"],
+                years=options["years"],
+                seed=options["seed"],
+                end_date=end_date,
+                log=self.stdout.write,
+            )
+        except synthetic.GeneratorError as exc:
+            raise CommandError(f"{exc} Pass --flush to replace it.")
+        for model, count in counts.items():
+            self.stdout.write(f"  {model:<20} {count:>10,}")
+        self.stdout.write(self.style.SUCCESS("Synthetic data generated."))
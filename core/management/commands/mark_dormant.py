@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core import dormancy
+from core.models import Member
+from savings.models import SavingsAccount
+
+
+class Command(BaseCommand):
+    help = (
+        "Deactivate savings accounts with no transaction in SAVINGS_DORMANCY_DAYS and set members with "
+        "no activity in MEMBER_DORMANCY_DAYS INACTIVE. Every change is logged."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--as-of", help="Date to measure inactivity to (YYYY-MM-DD). Defaults to today.")
+        parser.add_argument("--dry-run", action="store_true", help="Count what would change without changing it.")
+        parser.add_argument(
+            "--rebuild", action="store_true",
+            help="Recompute every last activity date from the transaction tables first.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            as_of = (
+                datetime.strptime(options["as_of"], "%Y-%m-%d").date() if options["as_of"] else timezone.localdate()
+            )
+        except ValueError:
+            raise CommandError("--as-of must be YYYY-MM-DD.")
+
+        if options["rebuild"]:
+            self.stdout.write(f"Recomputed {dormancy.rebuild()} last activity date(s).")
+        accounts, members = dormancy.mark_dormant(
+            as_of, accounts=SavingsAccount.objects.all(), members=Member.objects.all(), dry_run=options["dry_run"],
+        )
+        verb = "Would mark" if options["dry_run"] else "Marked"
+        self.stdout.write(f"  {'Savings accounts':<18} {accounts}")
+        self.stdout.write(f"  {'Members':<18} {members}")
+        self.stdout.write(self.style.SUCCESS(f"{verb} {accounts + members} row(s) dormant as of {as_of}."))
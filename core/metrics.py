@@ -0,0 +1,131 @@
+"""
+Dashboard KPIs.
+
+All figures are computed with a handful of grouped aggregates (one per
+table) and kept in the REPORT_CACHE alias, which every process shares.
+Postings invalidate the cached copy through signals (see core/signals.py)
+in whichever process makes them; the short TTL is only a backstop for
+writes that bypass the ORM.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, DecimalField, Exists, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from archive.store import stores
+from core.models import Account, JournalEntry, Member
+from loans.models import Loan, LoanRepayment, LoanSchedule
+from savings.models import SavingsTransaction
+
+DASHBOARD_CACHE_KEY = "dashboard:metrics"
+
+ZERO = Value(0, output_field=DecimalField(max_digits=14, decimal_places=2))
+
+
+def _sum(expression, **kwargs):
+    return Coalesce(Sum(expression, **kwargs), ZERO)
+
+
+def compute_dashboard_metrics(today=None):
+    """Compute every dashboard figure with a fixed number of queries (eight), whatever the data size."""
+    today = today or timezone.localdate()
+    par_days = getattr(settings, "PAR_DAYS", 30)
+    month_start = today.replace(day=1)
+
+    members = Member.objects.aggregate(
+        total=Count("id"),
+        active=Count("id", filter=Q(status=Member.ACTIVE)),
+        joined_this_month=Count("id", filter=Q(joined_on__gte=month_start)),
+    )
+
+    savings = {}
+    for store in stores(SavingsTransaction):  # live and archived
+        totals = store.aggregate(
+            deposits=_sum("amount", filter=Q(transaction_type=SavingsTransaction.DEPOSIT)),
+            withdrawals=_sum("amount", filter=Q(transaction_type=SavingsTransaction.WITHDRAWAL)),
+            interest=_sum("amount", filter=Q(transaction_type=SavingsTransaction.INTEREST)),
+            deposits_today=_sum(
+                "amount", filter=Q(transaction_type=SavingsTransaction.DEPOSIT, date=today)
+            ),
+        )
+        for name, total in totals.items():
+            savings[name] = savings.get(name, 0) + round(total, 2)  # SQLite sums decimals as floats
+
+    repaid = (
+        LoanRepayment.objects.filter(loan=OuterRef("pk"))
+        .values("loan")
+        .annotate(total=Sum("amount"))
+        .values("total")
+    )
+    in_arrears = LoanSchedule.objects.filter(
+        loan=OuterRef("pk"),
+        paid=False,
+        due_date__lt=today - timedelta(days=par_days),
+    )
+    loans = (
+        Loan.objects.filter(status__in=[Loan.ACTIVE, Loan.DEFAULTED])
+        .annotate(repaid=Coalesce(Subquery(repaid), ZERO), at_risk=Exists(in_arrears))
+        .aggregate(
+            loan_count=Count("id"),
+            outstanding=_sum(F("principal") - F("repaid")),
+            outstanding_at_risk=_sum(F("principal") - F("repaid"), filter=Q(at_risk=True)),
+        )
+    )
+
+    repayments_today = LoanRepayment.objects.filter(date=today).aggregate(
+        total=_sum("amount")
+    )["total"]
+
+    recent_entries = list(
+        JournalEntry.objects.order_by("-date", "-id").values("id", "date", "memo", "posted")[:5]
+    )
+
+    total_savings = savings["deposits"] + savings["interest"] - savings["withdrawals"]
+    par_ratio = (
+        loans["outstanding_at_risk"] / loans["outstanding"] * 100
+        if loans["outstanding"] > 0 else None
+    )
+
+    return {
+        "as_of": today,
+        "total_accounts": Account.objects.count(),
+        "total_entries": JournalEntry.objects.count(),
+        "recent_entries": recent_entries,
+        "total_members": members["total"],
+        "active_members": members["active"],
+        "new_members_this_month": members["joined_this_month"],
+        "total_savings": total_savings,
+        "active_loans": loans["loan_count"],
+        "loans_outstanding": loans["outstanding"],
+        "par_days": par_days,
+        "par_amount": loans["outstanding_at_risk"],
+        "par_ratio": par_ratio,
+        "collections_today": savings["deposits_today"] + repayments_today,
+        "savings_collections_today": savings["deposits_today"],
+        "loan_collections_today": repayments_today,
+    }
+
+
+def _cache():
+    return caches[getattr(settings, "REPORT_CACHE", "default")]
+
+
+def get_dashboard_metrics():
+    """Cached dashboard figures; recomputed after a posting or when the TTL lapses."""
+    cache = _cache()
+    metrics = cache.get(DASHBOARD_CACHE_KEY)
+    if metrics is None or metrics["as_of"] != timezone.localdate():
+        metrics = compute_dashboard_metrics()
+        cache.set(
+            DASHBOARD_CACHE_KEY,
+            metrics,
+            timeout=getattr(settings, "DASHBOARD_CACHE_TIMEOUT", 60),
+        )
+    return metrics
+
+
+def invalidate_dashboard_metrics():
+    _cache().delete(DASHBOARD_CACHE_KEY)
@@ -0,0 +1,50 @@
+import json
+import logging
+
+from django.conf import settings
+
+from .instrumentation import QueryProfile
+
+logger = logging.getLogger("sacco.sql")
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Profiles the SQL behind every request when SQL_INSTRUMENTATION_ENABLED is on.
+
+    Adds X-DB-Query-Count, X-DB-Time-Ms and X-DB-Duplicate-Queries headers and
+    logs one structured record per request to the "sacco.sql" logger (a warning
+    when the request runs more than SQL_INSTRUMENTATION_WARN_QUERIES queries).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "SQL_INSTRUMENTATION_ENABLED", False)
+        self.headers = getattr(settings, "SQL_INSTRUMENTATION_HEADERS", True)
+        self.warn_queries = getattr(settings, "SQL_INSTRUMENTATION_WARN_QUERIES", 50)
+        self.keep_slowest = getattr(settings, "SQL_INSTRUMENTATION_SLOWEST", 5)
+        self.aliases = list(settings.DATABASES)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        with QueryProfile(using=self.aliases, keep_slowest=self.keep_slowest) as profile:
+            response = self.get_response(request)
+
+        summary = profile.summary()
+        if self.headers:
+            response["X-DB-Query-Count"] = str(summary["queries"])
+            response["X-DB-Time-Ms"] = f"{summary['sql_ms']:.2f}"
+            response["X-DB-Duplicate-Queries"] = str(summary["duplicate_queries"])
+
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "view": getattr(getattr(request, "resolver_match", None), "view_name", None),
+            **summary,
+        }
+        level = logging.WARNING if profile.count > self.warn_queries else logging.INFO
+        logger.log(level, json.dumps(record, default=str), extra={"sql_profile": record})
+        return response
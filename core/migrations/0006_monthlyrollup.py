@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_member_payroll_number'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(choices=[('deposits', 'Savings deposits'), ('withdrawals', 'Savings withdrawals'), ('disbursements', 'Loan disbursements'), ('repayments', 'Loan repayments'), ('new_members', 'New members')], max_length=32)),
+                ('period', models.DateField(help_text='First day of the month')),
+                ('value', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['metric', 'period'],
+                'unique_together': {('metric', 'period')},
+            },
+        ),
+    ]
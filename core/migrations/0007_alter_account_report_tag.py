@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_monthlyrollup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='account',
+            name='report_tag',
+            field=models.CharField(blank=True, choices=[('INCOME_INTEREST_ON_LOANS', 'Interest from loans'), ('INCOME_DONATION', 'Donation income'), ('INCOME_LAP_FORMS', 'Income from LAP forms'), ('INCOME_REGISTRATION_FEES', 'Registration fee income'), ('EXP_BANK_CHARGES', 'Bank charges'), ('EXP_MEETING', 'Meeting expenses'), ('EXP_ACCOUNTANCY', 'Accountancy fees'), ('EXP_AGM', 'AGM expenses'), ('EXP_BAD_DEBT_PROVISION', 'Provision for bad debts'), ('EXP_HONORARIA', 'Honoraria'), ('EXP_AUDIT_FEES', 'Audit fees'), ('ASSET_CASH_EQUITY', 'Cash at bank - Equity'), ('ASSET_LOANS_PRINCIPAL', 'Loans receivable - principal'), ('ASSET_LOAN_INTEREST', 'Interest receivable on loans'), ('ASSET_LOAN_LOSS_PROVISION', 'Provision for loan losses (contra)'), ('ASSET_RECEIVABLE_HIGHLANDS', 'Receivable from Highlands Ltd'), ('LIAB_MEMBERS_SAVINGS', 'Total members savings'), ('LIAB_ACCOUNTS_PAYABLE', 'Accounts payable'), ('EQUITY_SHARE_CAPITAL', 'Share capital'), ('EQUITY_RETAINED_EARNINGS', 'Retained earnings'), ('EQUITY_CURRENT_YEAR_SURPLUS', 'Surplus for the year')], max_length=64, null=True),
+        ),
+    ]
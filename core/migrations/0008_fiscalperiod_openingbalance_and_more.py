@@ -0,0 +1,65 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_alter_account_report_tag'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FiscalPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=30)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField(unique=True)),
+                ('closed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-end_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='OpeningBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=16)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='journalentry',
+            index=models.Index(fields=['date'], name='core_journa_date_f2e922_idx'),
+        ),
+        migrations.AddField(
+            model_name='fiscalperiod',
+            name='closed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='fiscalperiod',
+            name='closing_entry',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='closes_period', to='core.journalentry'),
+        ),
+        migrations.AddField(
+            model_name='openingbalance',
+            name='account',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='core.account'),
+        ),
+        migrations.AddField(
+            model_name='openingbalance',
+            name='period',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='opening_balances', to='core.fiscalperiod'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='openingbalance',
+            unique_together={('period', 'account')},
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:41
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_fiscalperiod_openingbalance_and_more'),
+        ('savings', '0004_savingsbalance'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DormancyLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('DORMANT', 'Marked dormant'), ('REACTIVATED', 'Reactivated')], max_length=12)),
+                ('last_activity_on', models.DateField(blank=True, null=True)),
+                ('as_of', models.DateField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='last_activity_on',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['status', 'last_activity_on'], name='core_member_status_1b6f64_idx'),
+        ),
+        migrations.AddField(
+            model_name='dormancylog',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='dormancylog',
+            name='member',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dormancy_log', to='core.member'),
+        ),
+        migrations.AddField(
+            model_name='dormancylog',
+            name='savings_account',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='dormancy_log', to='savings.savingsaccount'),
+        ),
+    ]
@@ -31,6 +31,7 @@ class ReportTag(models.TextChoices):
     ASSET_CASH_EQUITY = "ASSET_CASH_EQUITY", "Cash at bank - Equity"
     ASSET_LOANS_PRINCIPAL = "ASSET_LOANS_PRINCIPAL", "Loans receivable - principal"
     ASSET_LOAN_INTEREST = "ASSET_LOAN_INTEREST", "Interest receivable on loans"
+    ASSET_LOAN_LOSS_PROVISION = "ASSET_LOAN_LOSS_PROVISION", "Provision for loan losses (contra)"
     ASSET_RECEIVABLE_HIGHLANDS = "ASSET_RECEIVABLE_HIGHLANDS", "Receivable from Highlands Ltd"
     LIAB_MEMBERS_SAVINGS = "LIAB_MEMBERS_SAVINGS", "Total members savings"
     LIAB_ACCOUNTS_PAYABLE = "LIAB_ACCOUNTS_PAYABLE", "Accounts payable"
@@ -56,6 +57,11 @@ class JournalEntry(models.Model):
     posted = models.BooleanField(default=True)  # allow draft entries if needed
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["date"]),
+        ]
+
 class JournalLine(models.Model):
     entry = models.ForeignKey(JournalEntry, related_name="lines", on_delete=models.CASCADE)
     account = models.ForeignKey(Account, on_delete=models.PROTECT)
@@ -86,6 +92,11 @@ class Member(models.Model):
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True, null=True)
     updated_at = models.DateTimeField(auto_now=True, null=True)
+    # Latest savings transaction, loan repayment or receipt (core/dormancy.py).
+    last_activity_on = models.DateField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "last_activity_on"])]
 
     def __str__(self):
         return f"{self.member_no} - {self.full_name}"
@@ -96,10 +107,7 @@ class Member(models.Model):
 
         total_savings = sum(sa.balance for sa in savings_accounts)
         total_loans = loans.aggregate(Sum('principal'))['principal__sum'] or 0
-        total_paid = sum(
-            loan.repayments.aggregate(Sum('amount'))['amount__sum'] or 0
-            for loan in loans
-        )
+        total_paid = sum(loan.get_total_repaid() for loan in loans)
         loan_balance = total_loans - total_paid
 
         return {
@@ -125,3 +133,82 @@ class MemberTransaction(models.Model):
 
     def __str__(self):
         return f"{self.transaction_type} - {self.amount} on {self.date} ({self.member.full_name})"
+
+
+class RollupMetric(models.TextChoices):
+    DEPOSITS = "deposits", "Savings deposits"
+    WITHDRAWALS = "withdrawals", "Savings withdrawals"
+    DISBURSEMENTS = "disbursements", "Loan disbursements"
+    REPAYMENTS = "repayments", "Loan repayments"
+    NEW_MEMBERS = "new_members", "New members"
+
+class MonthlyRollup(models.Model):
+    """Per-month totals for trend charts, maintained as transactions are posted (see core/rollups.py)."""
+    metric = models.CharField(max_length=32, choices=RollupMetric.choices)
+    period = models.DateField(help_text="First day of the month")
+    value = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['metric', 'period']
+        unique_together = ('metric', 'period')
+
+    def __str__(self):
+        return f"{self.metric} {self.period:%Y-%m}: {self.value}"
+
+
+class FiscalPeriod(models.Model):
+    """A closed accounting period (see core/periods.py). Entries dated in it can no longer be changed."""
+    name = models.CharField(max_length=30)
+    start_date = models.DateField()
+    end_date = models.DateField(unique=True)
+    closing_entry = models.OneToOneField(
+        JournalEntry, null=True, blank=True, related_name="closes_period", on_delete=models.PROTECT
+    )
+    closed_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+    closed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-end_date']
+
+    def __str__(self):
+        return f"{self.name} ({self.start_date} to {self.end_date})"
+
+
+class OpeningBalance(models.Model):
+    """An account's balance (debit positive) at the end of a closed period; later balances start from it."""
+    period = models.ForeignKey(FiscalPeriod, related_name="opening_balances", on_delete=models.CASCADE)
+    account = models.ForeignKey(Account, on_delete=models.PROTECT)
+    balance = models.DecimalField(max_digits=16, decimal_places=2)
+
+    class Meta:
+        unique_together = ('period', 'account')
+
+    def __str__(self):
+        return f"{self.account} at {self.period.end_date}: {self.balance}"
+
+
+class DormancyLog(models.Model):
+    """A status change made by the dormancy engine or a bulk reactivation (core/dormancy.py)."""
+    DORMANT = "DORMANT"
+    REACTIVATED = "REACTIVATED"
+    ACTION_CHOICES = [(DORMANT, "Marked dormant"), (REACTIVATED, "Reactivated")]
+
+    member = models.ForeignKey(Member, related_name="dormancy_log", on_delete=models.CASCADE)
+    # Set for a savings account's change; None for the member's own status
+    savings_account = models.ForeignKey(
+        "savings.SavingsAccount", null=True, blank=True, related_name="dormancy_log", on_delete=models.CASCADE
+    )
+    action = models.CharField(max_length=12, choices=ACTION_CHOICES)
+    last_activity_on = models.DateField(null=True, blank=True)
+    as_of = models.DateField()
+    created_at = models.DateTimeField(default=timezone.now)
+    created_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+
+    def __str__(self):
+        subject = f"savings account {self.savings_account_id}" if self.savings_account_id else self.member.member_no
+        return f"{subject} {self.get_action_display().lower()} as of {self.as_of}"
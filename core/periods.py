@@ -0,0 +1,203 @@
+"""
+Fiscal period close.
+
+`close()` ends the period running from the day after the last close (or
+the first journal entry) to `end`:
+
+1. one closing entry dated `end` zeroes every INCOME and EXPENSE account,
+   and any account tagged EQUITY_CURRENT_YEAR_SURPLUS, into the account
+   tagged EQUITY_RETAINED_EARNINGS;
+2. every account's balance at `end`, closing entry included, is stored as
+   an OpeningBalance row of the new FiscalPeriod;
+3. entries dated up to `end` are locked: `check_open()` refuses them.
+   core/signals.py runs it on every JournalEntry save and delete, and the
+   paths that bulk-create entries (mobile money, accrual, provisioning)
+   or that post subledger rows without one (savings postings, the
+   savings and repayment forms) check the date themselves.
+
+`balances()` starts from the latest snapshot on or before the date asked
+for and adds only the lines posted after it, so a balance as of this year
+reads this year's lines rather than the whole journal. `activity()` gives
+a period's movements for an income statement, leaving closing entries out.
+Both read archived journal lines too (archive/store.py).
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import DecimalField, F, Min, Q, Sum
+
+from archive.models import ArchivedJournalLine, ArchiveRun
+
+from .models import Account, AccountType, FiscalPeriod, JournalEntry, JournalLine, OpeningBalance, ReportTag
+
+BATCH_SIZE = 2000
+CENTS = Decimal("0.01")
+ZERO = Decimal("0.00")
+MONEY = DecimalField(max_digits=16, decimal_places=2)
+
+
+class PeriodError(ValueError):
+    pass
+
+
+class PeriodLocked(PeriodError):
+    pass
+
+
+def _money(value):
+    return Decimal(value or 0).quantize(CENTS)  # SQLite sums decimals as floats
+
+
+def retained_earnings_account():
+    account = Account.objects.filter(report_tag=ReportTag.EQUITY_RETAINED_EARNINGS).order_by("code").first()
+    if account is None:
+        raise ImproperlyConfigured("Closing a period needs an account tagged EQUITY_RETAINED_EARNINGS.")
+    return account
+
+
+def closing_accounts():
+    return Account.objects.filter(
+        Q(type__in=[AccountType.INCOME, AccountType.EXPENSE]) | Q(report_tag=ReportTag.EQUITY_CURRENT_YEAR_SURPLUS)
+    )
+
+
+def last_closed():
+    return FiscalPeriod.objects.order_by("-end_date").first()
+
+
+def locked_through():
+    """The last date of the latest closed period, or None."""
+    return FiscalPeriod.objects.order_by("-end_date").values_list("end_date", flat=True).first()
+
+
+def is_locked(day):
+    through = locked_through()
+    return through is not None and day is not None and day <= through
+
+
+def check_open(*days):
+    """Raise PeriodLocked if any of `days` is in a closed period."""
+    through = locked_through()
+    for day in days:
+        if through is not None and day is not None and day <= through:
+            raise PeriodLocked(f"Entries up to {through} are in a closed period; nothing can be posted on {day}.")
+
+
+def _net(lines):
+    """{account_id: debit - credit} of a JournalLine queryset."""
+    return {
+        account_id: _money(total)
+        for account_id, total in lines.values("account_id")
+        .annotate(total=Sum(F("debit") - F("credit"), output_field=MONEY))
+        .values_list("account_id", "total")
+    }
+
+
+def _lines(accounts=None, **filters):
+    """Posted journal lines matching `filters`, from the live and the archived table (archive/store.py)."""
+    for model in (JournalLine, ArchivedJournalLine):
+        lines = model.objects.filter(entry__posted=True, **filters)
+        yield lines if accounts is None else lines.filter(account__in=accounts)
+
+
+def balances(as_of, accounts=None):
+    """{account_id: debit - credit} of posted lines up to `as_of`, from the latest snapshot on or before it."""
+    totals = defaultdict(lambda: ZERO)
+    filters = {"entry__date__lte": as_of}
+    period = FiscalPeriod.objects.filter(end_date__lte=as_of).order_by("-end_date").first()
+    if period:
+        opening = period.opening_balances.all()
+        if accounts is not None:
+            opening = opening.filter(account__in=accounts)
+        for account_id, balance in opening.values_list("account_id", "balance"):
+            totals[account_id] += balance
+        filters["entry__date__gt"] = period.end_date
+    for lines in _lines(accounts, **filters):
+        for account_id, net in _net(lines).items():
+            totals[account_id] += net
+    return dict(totals)
+
+
+def activity(first, last, accounts=None):
+    """{account_id: debit - credit} of posted lines dated first..last, closing entries left out."""
+    totals = defaultdict(lambda: ZERO)
+    for lines in _lines(accounts, entry__date__gte=first, entry__date__lte=last, entry__closes_period__isnull=True):
+        for account_id, net in _net(lines).items():
+            totals[account_id] += net
+    return dict(totals)
+
+
+def next_start():
+    """First day of the next period to close: the day after the last close, else the first entry's date."""
+    previous = last_closed()
+    if previous:
+        return previous.end_date + timedelta(days=1)
+    return JournalEntry.objects.aggregate(first=Min("date"))["first"]
+
+
+def close(end, user=None, name=""):
+    """Close the period ending `end`. Returns the FiscalPeriod."""
+    with transaction.atomic():
+        previous = last_closed()
+        if previous and end <= previous.end_date:
+            raise PeriodError(f"Entries up to {previous.end_date} are already closed.")
+        start = next_start() or end
+        if start > end:
+            raise PeriodError(f"The period to close starts on {start}, after {end}.")
+        drafts = JournalEntry.objects.filter(posted=False, date__gte=start, date__lte=end).count()
+        if drafts:
+            raise PeriodError(f"{drafts} unposted draft entries are dated in the period; post or delete them first.")
+
+        name = name or f"FY{end:%Y}"
+        retained = retained_earnings_account()
+        income = activity(start, end, closing_accounts())
+        entry = None
+        if any(income.values()):
+            entry = JournalEntry.objects.create(
+                date=end, reference=f"CLOSE-{name}"[:50], memo=f"Closing entry for {name}", created_by=user,
+            )
+            lines = [
+                JournalLine(entry=entry, account_id=account_id, debit=max(-net, ZERO), credit=max(net, ZERO))
+                for account_id, net in income.items()
+                if net
+            ]
+            surplus = sum(income.values(), ZERO)
+            if surplus:
+                lines.append(JournalLine(entry=entry, account=retained, debit=max(surplus, ZERO), credit=max(-surplus, ZERO)))
+            JournalLine.objects.bulk_create(lines, batch_size=BATCH_SIZE)
+
+        opening = balances(end)
+        period = FiscalPeriod.objects.create(
+            name=name, start_date=start, end_date=end, closing_entry=entry, closed_by=user,
+        )
+        OpeningBalance.objects.bulk_create(
+            [
+                OpeningBalance(period=period, account_id=account_id, balance=balance)
+                for account_id, balance in opening.items()
+                if balance
+            ],
+            batch_size=BATCH_SIZE,
+        )
+    return period
+
+
+def reopen():
+    """Undo the latest close: its closing entry and snapshot are deleted and its dates unlocked."""
+    with transaction.atomic():
+        period = last_closed()
+        if period is None:
+            raise PeriodError("No period is closed.")
+        archived = ArchiveRun.objects.filter(finished_at__isnull=False).values_list("through", flat=True).first()
+        if archived and archived >= period.start_date:
+            raise PeriodError(
+                f"Transactions up to {archived} are archived; restore those after "
+                f"{period.start_date - timedelta(days=1)} first (manage.py archive_transactions --restore-after)."
+            )
+        entry = period.closing_entry
+        period.delete()
+        if entry:
+            entry.delete()
+    return period
@@ -0,0 +1,162 @@
+"""
+Monthly rollups for trend charts.
+
+MonthlyRollup holds one row per (metric, month). Rows are adjusted by the
+delta of every save/delete on the source models (see core/signals.py), so
+a 24-month trend reads 24 rows per metric instead of grouping over every
+transaction. `rebuild()` recomputes everything from the source tables.
+"""
+from collections import defaultdict
+from datetime import date
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from archive.store import stores
+from core.models import Member, MonthlyRollup, RollupMetric
+from loans.models import Loan, LoanRepayment
+from savings.models import SavingsTransaction
+
+SAVINGS_METRICS = {
+    SavingsTransaction.DEPOSIT: RollupMetric.DEPOSITS,
+    SavingsTransaction.WITHDRAWAL: RollupMetric.WITHDRAWALS,
+}
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _as_date(value):
+    return value.date() if hasattr(value, "date") and callable(value.date) else value
+
+
+def contributions(instance):
+    """What a single saved row adds to the rollups, as (metric, period, value, count) tuples."""
+    if isinstance(instance, SavingsTransaction):
+        metric = SAVINGS_METRICS.get(instance.transaction_type)
+        if metric and instance.date:
+            return [(metric, month_start(_as_date(instance.date)), instance.amount, 1)]
+    elif isinstance(instance, LoanRepayment):
+        if instance.date:
+            return [(RollupMetric.REPAYMENTS, month_start(_as_date(instance.date)), instance.amount, 1)]
+    elif isinstance(instance, Loan):
+        if instance.disbursed_on:
+            return [(RollupMetric.DISBURSEMENTS, month_start(instance.disbursed_on), instance.principal, 1)]
+    elif isinstance(instance, Member):
+        joined = instance.joined_on or (instance.created_at and timezone.localdate(instance.created_at))
+        if joined:
+            return [(RollupMetric.NEW_MEMBERS, month_start(joined), 1, 1)]
+    return []
+
+
+def apply(added=(), removed=()):
+    """Add one set of contributions and subtract another, netting them per (metric, period) first."""
+    deltas = defaultdict(lambda: [0, 0])
+    for rows, sign in ((added, 1), (removed, -1)):
+        for metric, period, value, count in rows:
+            deltas[(metric, period)][0] += sign * value
+            deltas[(metric, period)][1] += sign * count
+
+    for (metric, period), (value, count) in deltas.items():
+        if not value and not count:
+            continue
+        _bump(metric, period, value, count)
+
+
+def _bump(metric, period, value, count):
+    updated = MonthlyRollup.objects.filter(metric=metric, period=period).update(
+        value=F("value") + value, count=F("count") + count
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            MonthlyRollup.objects.create(metric=metric, period=period, value=value, count=count)
+    except IntegrityError:
+        # Another request created the row first; add to theirs.
+        MonthlyRollup.objects.filter(metric=metric, period=period).update(
+            value=F("value") + value, count=F("count") + count
+        )
+
+
+def _grouped(queryset, date_field, value_expression):
+    return (
+        queryset.annotate(period=TruncMonth(date_field))
+        .values("period")
+        .annotate(value=Sum(value_expression), count=Count("id"))
+        .order_by()
+    )
+
+
+def _merge(totals, metric, row):
+    value, count = totals.get((metric, row["period"]), (0, 0))
+    totals[(metric, row["period"])] = (value + row["value"], count + row["count"])
+
+
+@transaction.atomic
+def rebuild():
+    """Recompute every rollup from the source tables. Returns the number of rows written."""
+    rows = []
+    # Live and archived transactions; a month can be split between the two
+    totals = {}
+    for store in stores(SavingsTransaction):
+        for tx_type, metric in SAVINGS_METRICS.items():
+            for row in _grouped(store.filter(transaction_type=tx_type), "date", "amount"):
+                _merge(totals, metric, row)
+    for store in stores(LoanRepayment):
+        for row in _grouped(store, "date", "amount"):
+            _merge(totals, RollupMetric.REPAYMENTS, row)
+    for (metric, period), (value, count) in totals.items():
+        rows.append(MonthlyRollup(metric=metric, period=period, value=value, count=count))
+
+    for row in _grouped(Loan.objects.all(), "disbursed_on", "principal"):
+        rows.append(MonthlyRollup(metric=RollupMetric.DISBURSEMENTS, period=row["period"],
+                                  value=row["value"], count=row["count"]))
+
+    new_members = defaultdict(int)
+    with_join_date = _grouped(Member.objects.filter(joined_on__isnull=False), "joined_on", "id")
+    without_join_date = _grouped(Member.objects.filter(joined_on__isnull=True), "created_at", "id")
+    for row in [*with_join_date, *without_join_date]:
+        if row["period"]:
+            new_members[_as_date(row["period"])] += row["count"]
+    for period, n in new_members.items():
+        rows.append(MonthlyRollup(metric=RollupMetric.NEW_MEMBERS, period=period, value=n, count=n))
+
+    rows = [row for row in rows if row.period is not None]
+    MonthlyRollup.objects.all().delete()
+    MonthlyRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def series(metrics=None, months=24, end=None):
+    """
+    Chart-ready trend data: a list of month labels and one list of values per
+    metric, zero-filled for months with no activity.
+    """
+    metrics = metrics or RollupMetric.values
+    last = month_start(end or timezone.localdate())
+    first = add_months(last, -(months - 1))
+    periods = [add_months(first, i) for i in range(months)]
+
+    values = {metric: dict.fromkeys(periods, 0) for metric in metrics}
+    rows = MonthlyRollup.objects.filter(
+        metric__in=metrics, period__gte=first, period__lte=last
+    ).values_list("metric", "period", "value")
+    for metric, period, value in rows:
+        values[metric][period] = value
+
+    return {
+        "labels": [period.strftime("%Y-%m") for period in periods],
+        "series": {
+            metric: [float(values[metric][period]) for period in periods]
+            for metric in metrics
+        },
+    }
@@ -0,0 +1,94 @@
+# core/signals.py
+
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from . import dormancy, periods, rollups
+from .metrics import invalidate_dashboard_metrics
+
+# Any posting that can move a dashboard figure drops the cached copy.
+DASHBOARD_SOURCES = [
+    "core.Account",
+    "core.JournalEntry",
+    "core.Member",
+    "savings.SavingsTransaction",
+    "loans.Loan",
+    "loans.LoanRepayment",
+    "loans.LoanSchedule",
+]
+
+
+def refresh_dashboard(sender, **kwargs):
+    invalidate_dashboard_metrics()
+
+
+for source in DASHBOARD_SOURCES:
+    post_save.connect(refresh_dashboard, sender=source, dispatch_uid=f"dashboard-save-{source}")
+    post_delete.connect(refresh_dashboard, sender=source, dispatch_uid=f"dashboard-delete-{source}")
+
+
+# Monthly rollups follow every posting by its delta (see core/rollups.py).
+ROLLUP_SOURCES = [
+    "core.Member",
+    "savings.SavingsTransaction",
+    "loans.Loan",
+    "loans.LoanRepayment",
+]
+
+
+def remember_rollup_contribution(sender, instance, raw=False, **kwargs):
+    previous = sender.objects.filter(pk=instance.pk).first() if instance.pk and not raw else None
+    instance._rollup_previous = rollups.contributions(previous) if previous else []
+
+
+def update_rollups(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    rollups.apply(
+        added=rollups.contributions(instance),
+        removed=getattr(instance, "_rollup_previous", []),
+    )
+    instance._rollup_previous = []
+
+
+def remove_from_rollups(sender, instance, **kwargs):
+    rollups.apply(removed=rollups.contributions(instance))
+
+
+for source in ROLLUP_SOURCES:
+    pre_save.connect(remember_rollup_contribution, sender=source, dispatch_uid=f"rollup-pre-{source}")
+    post_save.connect(update_rollups, sender=source, dispatch_uid=f"rollup-save-{source}")
+    post_delete.connect(remove_from_rollups, sender=source, dispatch_uid=f"rollup-delete-{source}")
+
+
+# Members' and savings accounts' last activity dates move forward with every
+# posting (see core/dormancy.py).
+ACTIVITY_SOURCES = [
+    "savings.SavingsTransaction",
+    "loans.LoanRepayment",
+    "receipts.Receipt",
+]
+
+
+def record_activity(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    dormancy.touch([instance])
+
+
+for source in ACTIVITY_SOURCES:
+    post_save.connect(record_activity, sender=source, dispatch_uid=f"activity-save-{source}")
+
+
+# Nothing is posted into, moved out of or deleted from a closed period.
+def guard_closed_period(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = sender.objects.filter(pk=instance.pk).values_list("date", flat=True).first() if instance.pk else None
+    periods.check_open(instance.date, previous)
+
+
+def guard_closed_period_delete(sender, instance, **kwargs):
+    periods.check_open(instance.date)
+
+
+pre_save.connect(guard_closed_period, sender="core.JournalEntry", dispatch_uid="period-lock-save")
+pre_delete.connect(guard_closed_period_delete, sender="core.JournalEntry", dispatch_uid="period-lock-delete")
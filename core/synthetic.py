@@ -0,0 +1,374 @@
+"""
+Synthetic SACCO data for load testing and benchmarks.
+
+`generate()` builds a reproducible data set - members, savings accounts,
+years of monthly deposits, loans with schedules and repayments, receipts
+and journal entries - from a seed. The same seed and end date always give
+the same rows. It only writes into an empty data set; `flush()` clears
+an earlier one. Everything is written with bulk_create, so posting
+signals do not fire; the rollups, savings balances and their history,
+last activity dates, member exposure and cached reports are refreshed at
+the end.
+"""
+import random
+import uuid
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from archive.models import (
+    ArchivedJournalLine, ArchivedLoanRepayment, ArchivedMemberTransaction, ArchivedSavingsTransaction, ArchiveRun,
+)
+from core import dormancy, rollups
+from core.metrics import invalidate_dashboard_metrics
+from core.models import (
+    Account, AccountType, DormancyLog, FiscalPeriod, JournalEntry, JournalLine, Member, MemberTransaction, OpeningBalance,
+    ReportTag,
+)
+from loans import eligibility, schedule
+from loans.forecast import invalidate_cash_forecast
+from loans.models import (
+    Loan, LoanInterestAccrual, LoanProduct, LoanRepayment, LoanSchedule, MemberExposure, ProvisionLine,
+    ProvisionRun,
+)
+from mobilemoney.models import MobilePayment, PaymentMatch
+from receipts.models import Receipt
+from reconciliation.models import (
+    BankLine, BankMatch, BankStatement, IntegrityIssue, IntegrityRun, LedgerCheck, LedgerDifference,
+)
+from savings import history, postings
+from savings.models import SavingsAccount, SavingsBalance, SavingsTransaction
+
+FIRST_NAMES = [
+    "Wanjiru", "Otieno", "Achieng", "Kamau", "Njeri", "Mwangi", "Akinyi", "Kiprop",
+    "Chebet", "Mutua", "Wambui", "Omondi", "Nyambura", "Kibet", "Atieno", "Njoroge",
+]
+LAST_NAMES = [
+    "Kariuki", "Odhiambo", "Wafula", "Mutiso", "Kiptoo", "Gitau", "Onyango", "Maina",
+    "Cheruiyot", "Ndungu", "Barasa", "Kilonzo", "Macharia", "Ochieng", "Rotich", "Kimani",
+]
+
+CHART_OF_ACCOUNTS = [
+    ("1010", "Cash at bank - Equity", AccountType.ASSET, ReportTag.ASSET_CASH_EQUITY),
+    ("1200", "Loans receivable - principal", AccountType.ASSET, ReportTag.ASSET_LOANS_PRINCIPAL),
+    ("1210", "Interest receivable on loans", AccountType.ASSET, ReportTag.ASSET_LOAN_INTEREST),
+    ("1290", "Provision for loan losses", AccountType.ASSET, ReportTag.ASSET_LOAN_LOSS_PROVISION),
+    ("2010", "Members savings", AccountType.LIABILITY, ReportTag.LIAB_MEMBERS_SAVINGS),
+    ("3100", "Retained earnings", AccountType.EQUITY, ReportTag.EQUITY_RETAINED_EARNINGS),
+    ("4010", "Interest from loans", AccountType.INCOME, ReportTag.INCOME_INTEREST_ON_LOANS),
+    ("5010", "Provision for bad debts", AccountType.EXPENSE, ReportTag.EXP_BAD_DEBT_PROVISION),
+    ("5020", "Interest on members savings", AccountType.EXPENSE, None),
+]
+
+# Flushed in this order so PROTECT foreign keys never block a delete.
+GENERATED_MODELS = [
+    ArchiveRun, ArchivedJournalLine, ArchivedSavingsTransaction, ArchivedMemberTransaction, ArchivedLoanRepayment,
+    DormancyLog, OpeningBalance, FiscalPeriod, IntegrityIssue, IntegrityRun, LedgerDifference, LedgerCheck, BankMatch,
+    BankLine, BankStatement, PaymentMatch, MobilePayment, Receipt, MemberTransaction, MemberExposure, ProvisionLine, ProvisionRun,
+    LoanInterestAccrual, LoanRepayment, LoanSchedule, Loan, LoanProduct,
+    SavingsBalance, SavingsTransaction, SavingsAccount, JournalLine, JournalEntry, Member,
+]
+
+BATCH_SIZE = 2000
+TWO_PLACES = Decimal("0.01")
+
+
+class GeneratorError(ValueError):
+    pass
+
+
+def add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    year, month = index // 12, index % 12 + 1
+    return date(year, month, min(day.day, 28))
+
+
+def issued_at(day):
+    return timezone.make_aware(datetime.combine(day, time(9, 0)))
+
+
+def existing():
+    """Names of the generated models that already have rows."""
+    return [model.__name__ for model in reversed(GENERATED_MODELS) if model.objects.exists()]
+
+
+def flush():
+    """Delete every row of the models the generator writes to (and its accounts)."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        for model in GENERATED_MODELS:
+            cursor.execute(f"DELETE FROM {connection.ops.quote_name(model._meta.db_table)}")
+        Account.objects.filter(code__in=[code for code, *_ in CHART_OF_ACCOUNTS]).delete()
+
+
+class Generator:
+    def __init__(self, members=1000, years=3, seed=42, end_date=None, loan_share=0.4, log=None):
+        self.members = members
+        self.years = years
+        self.rng = random.Random(seed)
+        self.end_date = end_date or timezone.localdate()
+        self.start_date = add_months(self.end_date.replace(day=1), -12 * years)
+        self.loan_share = loan_share
+        self.log = log or (lambda message: None)
+
+    def uuid(self):
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def money(self, low, high, step=50):
+        return Decimal(self.rng.randrange(low, high + 1, step))
+
+    @transaction.atomic
+    def run(self):
+        accounts = self.make_accounts()
+        products = self.make_products()
+        members = self.make_members()
+        self.log(f"{len(members)} members")
+
+        savings_accounts = self.make_savings_accounts(members, accounts)
+        deposit_count = self.make_savings_activity(savings_accounts, accounts)
+        self.log(f"{deposit_count} savings transactions")
+
+        loan_count = self.make_loans(members, products, accounts)
+        self.log(f"{loan_count} loans")
+
+        rollups.rebuild()
+        postings.recompute_balances()
+        history.rebuild()
+        dormancy.rebuild()
+        eligibility.refresh()
+        invalidate_dashboard_metrics()
+        invalidate_cash_forecast()
+        return self.counts()
+
+    def counts(self):
+        return {model.__name__: model.objects.count() for model in reversed(GENERATED_MODELS)}
+
+    def make_accounts(self):
+        accounts = {}
+        for code, name, account_type, tag in CHART_OF_ACCOUNTS:
+            accounts[tag or code], _ = Account.objects.get_or_create(
+                code=code, defaults={"name": name, "type": account_type, "report_tag": tag}
+            )
+        return accounts
+
+    def make_products(self):
+        return [
+            LoanProduct.objects.get_or_create(
+                name=name,
+                defaults={"annual_rate": rate, "interest_method": method, "default_tenor_months": tenor},
+            )[0]
+            for name, rate, method, tenor in [
+                ("Development Loan", Decimal("12.00"), LoanProduct.REDUCING, 24),
+                ("Emergency Loan", Decimal("15.00"), LoanProduct.FLAT, 6),
+            ]
+        ]
+
+    def make_members(self):
+        span = (self.end_date - self.start_date).days
+        members = []
+        for i in range(1, self.members + 1):
+            first, last = self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+            members.append(Member(
+                member_no=f"M-{i:06d}",
+                payroll_number=f"PR-{i:06d}",
+                full_name=f"{first} {last}",
+                id_number=str(20000000 + i),
+                phone=f"+2547{self.rng.randrange(10000000, 99999999)}",
+                email=f"{first}.{last}.{i}@example.com".lower(),
+                joined_on=self.start_date + timedelta(days=self.rng.randrange(0, max(span // 2, 1))),
+                status=Member.ACTIVE if self.rng.random() > 0.05 else Member.INACTIVE,
+            ))
+        Member.objects.bulk_create(members, batch_size=BATCH_SIZE)
+        return list(Member.objects.filter(member_no__in=[m.member_no for m in members]).order_by("pk"))
+
+    def make_savings_accounts(self, members, accounts):
+        savings = [
+            SavingsAccount(member=member, account=accounts[ReportTag.LIAB_MEMBERS_SAVINGS], opened_on=member.joined_on)
+            for member in members
+        ]
+        SavingsAccount.objects.bulk_create(savings, batch_size=BATCH_SIZE)
+        return list(SavingsAccount.objects.filter(member__in=members).select_related("member").order_by("pk"))
+
+    def monthly_entry(self, month, memo, debit_account, credit_account, amount):
+        entry = JournalEntry.objects.create(
+            date=month, memo=memo, reference=f"SYN-{memo[:3].upper()}-{month:%Y%m}"
+        )
+        JournalLine.objects.bulk_create([
+            JournalLine(entry=entry, account=debit_account, debit=amount),
+            JournalLine(entry=entry, account=credit_account, credit=amount),
+        ])
+        return entry
+
+    def make_savings_activity(self, savings_accounts, accounts):
+        cash = accounts[ReportTag.ASSET_CASH_EQUITY]
+        savings_gl = accounts[ReportTag.LIAB_MEMBERS_SAVINGS]
+        # One summarised entry per transaction type and month: (memo, debit, credit)
+        postings_for = {
+            SavingsTransaction.DEPOSIT: ("Savings check-off", cash, savings_gl),
+            SavingsTransaction.WITHDRAWAL: ("Withdrawals from savings", savings_gl, cash),
+            SavingsTransaction.INTEREST: ("Interest on savings", accounts["5020"], savings_gl),
+        }
+        transactions = []
+        month_totals = {}
+
+        for account in savings_accounts:
+            balance = Decimal(0)
+            contribution = self.money(500, 5000, 100)
+            month = add_months(account.opened_on.replace(day=1), 1)
+            while month <= self.end_date:
+                day = month.replace(day=self.rng.randrange(1, 28))
+                if day > self.end_date:
+                    break
+                if self.rng.random() < 0.9:
+                    transactions.append(SavingsTransaction(
+                        savings_account=account, date=day, transaction_type=SavingsTransaction.DEPOSIT,
+                        amount=contribution, notes="Monthly check-off", source="Check-off",
+                    ))
+                    balance += contribution
+                if balance > 2000 and self.rng.random() < 0.05:
+                    amount = (balance * Decimal(self.rng.uniform(0.1, 0.4))).quantize(Decimal("1"))
+                    transactions.append(SavingsTransaction(
+                        savings_account=account, date=day, transaction_type=SavingsTransaction.WITHDRAWAL,
+                        amount=amount, notes="Partial withdrawal", source="Manual Entry",
+                    ))
+                    balance -= amount
+                if month.month == 12 and balance > 0:
+                    interest = (balance * Decimal("0.06")).quantize(TWO_PLACES)
+                    transactions.append(SavingsTransaction(
+                        savings_account=account, date=month.replace(day=28),
+                        transaction_type=SavingsTransaction.INTEREST, amount=interest,
+                        notes="Annual interest", source="Auto",
+                    ))
+                    balance += interest
+                month = add_months(month, 1)
+
+        for tx in transactions:
+            key = (tx.transaction_type, tx.date.replace(day=1))
+            month_totals[key] = month_totals.get(key, 0) + tx.amount
+        entries = {
+            (kind, month): self.monthly_entry(month, *postings_for[kind], total)
+            for (kind, month), total in sorted(month_totals.items())
+        }
+        for tx in transactions:
+            tx.journal_entry = entries[(tx.transaction_type, tx.date.replace(day=1))]
+        SavingsTransaction.objects.bulk_create(transactions, batch_size=BATCH_SIZE)
+
+        members_by_account = {account.pk: account.member for account in savings_accounts}
+        created = SavingsTransaction.objects.filter(
+            savings_account__in=savings_accounts
+        ).values_list("pk", "savings_account_id", "date", "amount", "transaction_type", "notes", "journal_entry_id")
+        ledger, receipts = [], []
+        for pk, account_id, day, amount, tx_type, notes, entry_id in created.iterator(chunk_size=BATCH_SIZE):
+            member = members_by_account[account_id]
+            ledger.append(MemberTransaction(
+                member=member, date=day, amount=amount, description=notes,
+                transaction_type=f"Savings {tx_type.title()}", source_model="SavingsTransaction",
+                source_id=pk, journal_entry_id=entry_id,
+            ))
+            if tx_type == SavingsTransaction.DEPOSIT:
+                receipts.append(Receipt(
+                    receipt_no=self.uuid(), member=member, type=Receipt.SAVINGS, amount=amount,
+                    issued_on=issued_at(day),
+                    payment_method="Check-off", savings_transaction_id=pk, journal_entry_id=entry_id,
+                    reference_note=f"Auto-generated for Savings Deposit #{pk}",
+                ))
+        MemberTransaction.objects.bulk_create(ledger, batch_size=BATCH_SIZE)
+        Receipt.objects.bulk_create(receipts, batch_size=BATCH_SIZE)
+        return len(transactions)
+
+    def schedule_for(self, loan):
+        return schedule.build_schedule(loan)
+
+    def make_loans(self, members, products, accounts):
+        cash = accounts[ReportTag.ASSET_CASH_EQUITY]
+        principal_gl = accounts[ReportTag.ASSET_LOANS_PRINCIPAL]
+        interest_gl = accounts[ReportTag.ASSET_LOAN_INTEREST]
+        income_gl = accounts[ReportTag.INCOME_INTEREST_ON_LOANS]
+
+        loans = []
+        for member in members:
+            if self.rng.random() > self.loan_share:
+                continue
+            for _ in range(self.rng.choice([1, 1, 1, 2])):
+                product = self.rng.choice(products)
+                disbursed = member.joined_on + timedelta(days=self.rng.randrange(90, 365 * self.years))
+                if disbursed >= self.end_date:
+                    continue
+                loans.append(Loan(
+                    member=member, product=product, principal=self.money(10000, 300000, 1000),
+                    annual_rate=product.annual_rate, interest_method=product.interest_method,
+                    disbursed_on=disbursed, tenor_months=product.default_tenor_months,
+                    principal_account=principal_gl, interest_account=interest_gl,
+                ))
+        Loan.objects.bulk_create(loans, batch_size=BATCH_SIZE)
+        loans = list(Loan.objects.filter(member__in=members).order_by("pk"))
+
+        disbursements = [
+            JournalEntry(date=loan.disbursed_on, memo=f"Loan disbursement #{loan.pk}", reference=f"SYN-DIS-{loan.pk}")
+            for loan in loans
+        ]
+        JournalEntry.objects.bulk_create(disbursements, batch_size=BATCH_SIZE)
+        lines = []
+        for loan, entry in zip(loans, disbursements):
+            lines.append(JournalLine(entry=entry, account=principal_gl, debit=loan.principal))
+            lines.append(JournalLine(entry=entry, account=cash, credit=loan.principal))
+
+        schedules, repayments, repayment_entries = [], [], []
+        for loan in loans:
+            rows = self.schedule_for(loan)
+            defaulter = self.rng.random() < 0.08
+            for row in rows:
+                if row.due_date > self.end_date:
+                    break
+                if defaulter and row.installment_no > 3:
+                    continue
+                if self.rng.random() < 0.93:
+                    row.paid = True
+                    repayment_entries.append(JournalEntry(
+                        date=row.due_date, memo=f"Loan repayment #{loan.pk}",
+                        reference=f"SYN-REP-{loan.pk}-{row.installment_no}",
+                    ))
+                    repayments.append(LoanRepayment(
+                        loan=loan, date=row.due_date, amount=row.total_due,
+                        principal_component=row.principal_due, interest_component=row.interest_due,
+                        source="Check-off",
+                    ))
+            if defaulter and rows[0].due_date < self.end_date - timedelta(days=180):
+                loan.status = Loan.DEFAULTED
+            elif all(row.paid for row in rows):
+                loan.status = Loan.CLOSED
+            schedules.extend(rows)
+
+        Loan.objects.bulk_update([loan for loan in loans if loan.status != Loan.ACTIVE], ["status"], batch_size=BATCH_SIZE)
+        LoanSchedule.objects.bulk_create(schedules, batch_size=BATCH_SIZE)
+        JournalEntry.objects.bulk_create(repayment_entries, batch_size=BATCH_SIZE)
+        for repayment, entry in zip(repayments, repayment_entries):
+            repayment.journal_entry = entry
+            lines.append(JournalLine(entry=entry, account=cash, debit=repayment.amount))
+            lines.append(JournalLine(entry=entry, account=principal_gl, credit=repayment.principal_component))
+            if repayment.interest_component:
+                lines.append(JournalLine(entry=entry, account=income_gl, credit=repayment.interest_component))
+        LoanRepayment.objects.bulk_create(repayments, batch_size=BATCH_SIZE)
+        JournalLine.objects.bulk_create(lines, batch_size=BATCH_SIZE)
+
+        receipts = [
+            Receipt(
+                receipt_no=self.uuid(), member_id=repayment.loan.member_id, type=Receipt.LOAN,
+                amount=repayment.amount,
+                issued_on=issued_at(repayment.date),
+                payment_method="Check-off", loan_repayment=repayment, journal_entry=repayment.journal_entry,
+                reference_note=f"Auto-generated for Loan #{repayment.loan_id}",
+            )
+            for repayment in repayments
+        ]
+        Receipt.objects.bulk_create(receipts, batch_size=BATCH_SIZE)
+        return len(loans)
+
+
+def generate(members=1000, years=3, seed=42, end_date=None, log=None):
+    """Generate a data set and return row counts per model."""
+    found = existing()
+    if found:
+        raise GeneratorError(f"The database already has {', '.join(found)} rows.")
+    return Generator(members=members, years=years, seed=seed, end_date=end_date, log=log).run()
@@ -0,0 +1,8 @@
+from jobs.queue import task
+
+from core import rollups
+
+
+@task("core.rebuild_rollups")
+def rebuild_rollups(job):
+    return {"rows": rollups.rebuild()}
@@ -1,3 +1,229 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import F, Sum
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from savings.models import SavingsAccount, SavingsTransaction
+
+from . import dormancy, periods, rollups
+from .models import (
+    Account, AccountType, FiscalPeriod, JournalEntry, JournalLine, Member, MonthlyRollup, ReportTag, RollupMetric,
+)
+
+
+class PeriodTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        def account(code, name, account_type, tag):
+            return Account.objects.create(code=code, name=name, type=account_type, report_tag=tag)
+
+        cls.cash = account("1010", "Cash", AccountType.ASSET, ReportTag.ASSET_CASH_EQUITY)
+        cls.savings = account("2010", "Members savings", AccountType.LIABILITY, ReportTag.LIAB_MEMBERS_SAVINGS)
+        cls.retained = account("3100", "Retained earnings", AccountType.EQUITY, ReportTag.EQUITY_RETAINED_EARNINGS)
+        cls.income = account("4010", "Interest on loans", AccountType.INCOME, ReportTag.INCOME_INTEREST_ON_LOANS)
+
+        cls.post(date(2025, 3, 1), cls.cash, cls.income, "1000.00")
+        cls.post(date(2025, 6, 1), cls.cash, cls.savings, "500.00")
+        cls.post(date(2026, 1, 10), cls.cash, cls.income, "200.00")
+
+    @staticmethod
+    def post(day, debit, credit, amount, **fields):
+        entry = JournalEntry.objects.create(date=day, **fields)
+        JournalLine.objects.bulk_create([
+            JournalLine(entry=entry, account=debit, debit=Decimal(amount)),
+            JournalLine(entry=entry, account=credit, credit=Decimal(amount)),
+        ])
+        return entry
+
+    def raw_balances(self, as_of):
+        """{account_id: debit - credit} summed over every posted line, no snapshot."""
+        return {
+            account_id: periods._money(total)
+            for account_id, total in JournalLine.objects.filter(entry__posted=True, entry__date__lte=as_of)
+            .values("account_id").annotate(total=Sum(F("debit") - F("credit"), output_field=periods.MONEY))
+            .values_list("account_id", "total")
+            if total
+        }
+
+    def test_close_moves_income_to_retained_earnings_and_snapshots_balances(self):
+        period = periods.close(date(2025, 12, 31))
+
+        self.assertEqual(period.start_date, date(2025, 3, 1))
+        closing = set(period.closing_entry.lines.values_list("account_id", "debit", "credit"))
+        self.assertEqual(
+            closing, {(self.income.pk, Decimal("1000.00"), 0), (self.retained.pk, 0, Decimal("1000.00"))}
+        )
+        snapshot = dict(period.opening_balances.values_list("account_id", "balance"))
+        self.assertEqual(snapshot, self.raw_balances(date(2025, 12, 31)))
+        self.assertNotIn(self.income.pk, snapshot)
+
+        for as_of in (date(2025, 12, 31), date(2026, 1, 10)):
+            with self.subTest(as_of=as_of):
+                reported = {pk: balance for pk, balance in periods.balances(as_of).items() if balance}
+                self.assertEqual(reported, self.raw_balances(as_of))
+
+    def test_activity_leaves_the_closing_entry_out(self):
+        periods.close(date(2025, 12, 31))
+
+        income = periods.activity(date(2025, 1, 1), date(2025, 12, 31), [self.income])
+        self.assertEqual(income, {self.income.pk: Decimal("-1000.00")})
+
+    def test_closed_dates_refuse_entries(self):
+        entry = JournalEntry.objects.get(date=date(2025, 6, 1))
+        periods.close(date(2025, 12, 31))
+
+        with self.assertRaises(periods.PeriodLocked):
+            JournalEntry.objects.create(date=date(2025, 12, 31))
+        with self.assertRaises(periods.PeriodLocked), transaction.atomic():
+            entry.delete()
+        moved = JournalEntry.objects.get(date=date(2026, 1, 10))
+        moved.date = date(2025, 7, 1)
+        with self.assertRaises(periods.PeriodLocked):
+            moved.save()
+        JournalEntry.objects.create(date=date(2026, 1, 1))
+
+    def test_reopen_unlocks_and_removes_the_closing_entry(self):
+        period = periods.close(date(2025, 12, 31))
+        closing_entry = period.closing_entry_id
+
+        periods.reopen()
+
+        self.assertFalse(FiscalPeriod.objects.exists())
+        self.assertFalse(JournalEntry.objects.filter(pk=closing_entry).exists())
+        self.assertFalse(periods.is_locked(date(2025, 6, 1)))
+        JournalEntry.objects.get(date=date(2025, 6, 1)).delete()
+        self.assertEqual(
+            {pk: balance for pk, balance in periods.balances(date(2026, 1, 10)).items() if balance},
+            self.raw_balances(date(2026, 1, 10)),
+        )
+
+    def test_a_period_closes_once_and_not_over_drafts(self):
+        draft = self.post(date(2025, 11, 1), self.cash, self.income, "10.00", posted=False)
+        with self.assertRaisesMessage(periods.PeriodError, "unposted draft"):
+            periods.close(date(2025, 12, 31))
+
+        draft.delete()
+        periods.close(date(2025, 12, 31))
+        with self.assertRaisesMessage(periods.PeriodError, "already closed"):
+            periods.close(date(2025, 12, 31))
+
+
+class RollupTests(TestCase):
+    def test_rebuild_counts_the_rows_it_writes(self):
+        Member.objects.create(member_no="M-000001", full_name="Wanjiru Kariuki", joined_on=date(2025, 3, 4))
+        Member.objects.create(member_no="M-000002", full_name="Otieno Odhiambo", joined_on=date(2025, 3, 20))
+        Member.objects.create(member_no="M-000003", full_name="Achieng Wafula", joined_on=date(2025, 5, 1))
+        real_grouped = rollups._grouped
+
+        def grouped(*args):
+            # An undated group, as a source row without a date would give
+            return [*real_grouped(*args), {"period": None, "value": Decimal("5.00"), "count": 1}]
+
+        with mock.patch.object(rollups, "_grouped", side_effect=grouped):
+            written = rollups.rebuild()
+
+        self.assertEqual(written, MonthlyRollup.objects.count())
+        self.assertEqual(
+            dict(MonthlyRollup.objects.filter(metric=RollupMetric.NEW_MEMBERS).values_list("period", "count")),
+            {date(2025, 3, 1): 2, date(2025, 5, 1): 1},
+        )
+
+
+class DormancyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        savings_gl = Account.objects.create(
+            code="2010", name="Members savings", type=AccountType.LIABILITY, report_tag=ReportTag.LIAB_MEMBERS_SAVINGS
+        )
+        today = timezone.localdate()
+        long_ago = today - timedelta(days=800)
+        cls.busy_member = Member.objects.create(member_no="M-000001", full_name="Wanjiru Kariuki", joined_on=long_ago)
+        cls.busy = SavingsAccount.objects.create(member=cls.busy_member, account=savings_gl, opened_on=long_ago)
+        SavingsTransaction.objects.create(
+            savings_account=cls.busy, date=today - timedelta(days=3),
+            transaction_type=SavingsTransaction.DEPOSIT, amount=Decimal("100.00"),
+        )
+        cls.idle_member = Member.objects.create(member_no="M-000002", full_name="Otieno Odhiambo", joined_on=long_ago)
+        cls.idle = SavingsAccount.objects.create(member=cls.idle_member, account=savings_gl, opened_on=long_ago)
+        # As on a database upgraded before last_activity_on was filled in
+        SavingsAccount.objects.update(last_activity_on=None)
+        Member.objects.update(last_activity_on=None)
+
+    def test_unfilled_last_activity_is_checked_against_the_activity_tables(self):
+        self.assertEqual(list(dormancy.dormant_accounts()), [self.idle])
+        self.assertEqual(list(dormancy.dormant_members()), [self.idle_member])
+
+    def test_rebuild_fills_last_activity(self):
+        dormancy.rebuild()
+
+        self.busy.refresh_from_db()
+        self.busy_member.refresh_from_db()
+        self.assertEqual(self.busy.last_activity_on, timezone.localdate() - timedelta(days=3))
+        self.assertEqual(self.busy_member.last_activity_on, self.busy.last_activity_on)
+        self.assertEqual(dormancy.mark_dormant(accounts=SavingsAccount.objects.all(), members=Member.objects.all()), (1, 1))
+        self.idle.refresh_from_db()
+        self.assertFalse(self.idle.active)
+
+
+class GenerateDataTests(TestCase):
+    def generate(self, *args):
+        call_command(
+            "generate_sacco_data", "--members", "5", "--years", "1", "--end-date", "2025-06-30", *args, stdout=StringIO()
+        )
+
+    def test_a_rerun_needs_flush(self):
+        self.generate()
+        members = list(Member.objects.order_by("member_no").values_list("member_no", "payroll_number"))
+
+        with self.assertRaisesMessage(CommandError, "Pass --flush"):
+            self.generate()
+        self.assertEqual(Member.objects.count(), 5)
+
+        self.generate("--flush", "--noinput")
+        self.assertEqual(list(Member.objects.order_by("member_no").values_list("member_no", "payroll_number")), members)
+
+
+class LastActivityMigrationTests(TransactionTestCase):
+    """savings/migrations/0007 fills last_activity_on on a database upgraded with activity already in it."""
+
+    before = [("savings", "0006_transaction_indexes")]
+    after = [("savings", "0007_backfill_last_activity")]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+        Account = apps.get_model("core", "Account")
+        Member = apps.get_model("core", "Member")
+        SavingsAccount = apps.get_model("savings", "SavingsAccount")
+        SavingsTransaction = apps.get_model("savings", "SavingsTransaction")
+        savings_gl = Account.objects.create(code="2010", name="Members savings", type=AccountType.LIABILITY)
+        self.member_id = Member.objects.create(member_no="M-000001", full_name="Wanjiru Kariuki").pk
+        self.account_id = SavingsAccount.objects.create(
+            member_id=self.member_id, account=savings_gl, opened_on=date(2023, 1, 1)
+        ).pk
+        SavingsTransaction.objects.create(
+            savings_account_id=self.account_id, date=date(2026, 10, 16), transaction_type="DEPOSIT", amount=100,
+        )
+        SavingsAccount.objects.update(last_activity_on=None)
+        Member.objects.update(last_activity_on=None)
+
+    def tearDown(self):
+        MigrationExecutor(connection).migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_backfill(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.after)
+
+        self.assertEqual(
+            SavingsAccount.objects.values_list("last_activity_on", flat=True).get(pk=self.account_id), date(2026, 10, 16)
+        )
+        self.assertEqual(Member.objects.values_list("last_activity_on", flat=True).get(pk=self.member_id), date(2026, 10, 16))
@@ -5,6 +5,15 @@ urlpatterns = [
     # Dashboard
     path('', views.dashboard, name='dashboard'),
 
+    # Reports
+    path('reports/trends/', views.trend_data, name='trend_data'),
+    path('reports/trial-balance/', views.trial_balance, name='trial_balance'),
+
+    # Fiscal periods
+    path('periods/', views.period_list, name='period_list'),
+    path('periods/close/', views.period_close, name='period_close'),
+    path('periods/reopen/', views.period_reopen, name='period_reopen'),
+
     # Accounts
     path('accounts/', views.account_list, name='account_list'),
     path('accounts/new/', views.account_create, name='account_create'),
@@ -24,4 +33,9 @@ urlpatterns = [
     path("members/<int:pk>/", views.member_detail, name="member_detail"),
     path("members/<int:pk>/edit/", views.member_edit, name="member_edit"),
     path("members/<int:pk>/delete/", views.member_delete, name="member_delete"),
+
+    # Dormancy
+    path("dormancy/", views.dormancy_list, name="dormancy_list"),
+    path("dormancy/run/", views.dormancy_run, name="dormancy_run"),
+    path("dormancy/reactivate/", views.dormancy_reactivate, name="dormancy_reactivate"),
 ]
@@ -1,8 +1,11 @@
+from datetime import datetime
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.db import transaction
 from django.contrib.auth.decorators import login_required
-from .models import Account, JournalEntry, Member
+from django.core.paginator import Paginator
+from .models import Account, DormancyLog, FiscalPeriod, JournalEntry, Member
 from .forms import AccountForm, JournalEntryForm, JournalLineFormSet, MemberForm
 from django.urls import reverse_lazy
 from django.contrib.auth.views import LoginView
@@ -10,7 +13,17 @@ from django.db.models import Q
 from core.models import Member, MemberTransaction  # adjust paths as needed
 from savings.models import SavingsTransaction, SavingsAccount
 from loans.models import Loan  # assuming you have a Loan model
+from loans import eligibility
 from django.db.models import Sum
+from django.http import JsonResponse
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from django.views.decorators.http import require_POST
+from .db_routing import use_replica
+from .metrics import get_dashboard_metrics
+from .models import RollupMetric
+from . import dormancy, periods, rollups
+from archive.store import stores
 
 # -----------------------------
 # ACCOUNT VIEWS
@@ -26,17 +39,8 @@ class MyLoginView(LoginView):
     
 @login_required
 def dashboard(request):
-    # Example data for the dashboard
-    total_accounts = Account.objects.count()
-    total_entries = JournalEntry.objects.count()
-    recent_entries = JournalEntry.objects.order_by('-date')[:5]
-
-    context = {
-        'total_accounts': total_accounts,
-        'total_entries': total_entries,
-        'recent_entries': recent_entries,
-    }
-    return render(request, 'core/dashboard.html', context)
+    # All KPIs come from the cache; see core/metrics.py
+    return render(request, 'core/dashboard.html', get_dashboard_metrics())
 
 
 @login_required
@@ -72,6 +76,25 @@ def account_edit(request, pk):
     return render(request, "core/account_form.html", {"form": form})
 
 
+# -----------------------------
+# TREND DATA
+# -----------------------------
+
+@login_required
+@use_replica()
+def trend_data(request):
+    """
+    Monthly trend series for charts, read from the rollup table.
+    ?months=24 (max 120) and ?metric=deposits&metric=repayments to narrow it down.
+    """
+    try:
+        months = min(max(int(request.GET.get("months", 24)), 1), 120)
+    except ValueError:
+        months = 24
+    metrics = [m for m in request.GET.getlist("metric") if m in RollupMetric.values]
+    return JsonResponse(rollups.series(metrics or None, months=months))
+
+
 # -----------------------------
 # JOURNAL ENTRY VIEWS
 # -----------------------------
@@ -79,7 +102,10 @@ def account_edit(request, pk):
 @login_required
 def journal_entry_list(request):
     entries = JournalEntry.objects.all().order_by("-date", "-id")
-    return render(request, "core/journal_entry_list.html", {"entries": entries})
+    return render(request, "core/journal_entry_list.html", {
+        "entries": entries,
+        "locked_through": periods.locked_through(),
+    })
 
 
 @login_required
@@ -132,6 +158,9 @@ def journal_entry_create(request):
 @transaction.atomic
 def journal_entry_edit(request, pk):
     entry = get_object_or_404(JournalEntry, pk=pk)
+    if periods.is_locked(entry.date):
+        messages.error(request, f"🔒 Entry dated {entry.date} is in a closed period and can no longer be edited.")
+        return redirect("journal_entry_list")
 
     if request.method == "POST":
         form = JournalEntryForm(request.POST, instance=entry)
@@ -175,6 +204,9 @@ def journal_entry_edit(request, pk):
 @login_required
 def journal_entry_delete(request, pk):
     entry = get_object_or_404(JournalEntry, pk=pk)
+    if periods.is_locked(entry.date):
+        messages.error(request, f"🔒 Entry dated {entry.date} is in a closed period and can no longer be deleted.")
+        return redirect("journal_entry_list")
     if request.method == "POST":
         entry.delete()
         messages.success(request, "🗑️ Journal entry deleted.")
@@ -183,6 +215,121 @@ def journal_entry_delete(request, pk):
 
 
 
+# -----------------------------
+# FISCAL PERIODS
+# -----------------------------
+
+@login_required
+def period_list(request):
+    return render(request, "core/period_list.html", {
+        "periods": FiscalPeriod.objects.select_related("closing_entry", "closed_by"),
+        "next_start": periods.next_start(),
+    })
+
+
+@login_required
+@require_POST
+def period_close(request):
+    try:
+        end = datetime.strptime(request.POST.get("end", ""), "%Y-%m-%d").date()
+    except ValueError:
+        messages.error(request, "⚠️ Enter the last day of the period as YYYY-MM-DD.")
+        return redirect("period_list")
+    try:
+        period = periods.close(end, user=request.user, name=request.POST.get("name", "").strip())
+    except (periods.PeriodError, ImproperlyConfigured) as exc:
+        messages.error(request, f"⚠️ {exc}")
+    else:
+        messages.success(request, f"🔒 Closed {period}.")
+    return redirect("period_list")
+
+
+@login_required
+@require_POST
+def period_reopen(request):
+    try:
+        period = periods.reopen()
+    except periods.PeriodError as exc:
+        messages.error(request, f"⚠️ {exc}")
+    else:
+        messages.success(request, f"🔓 Reopened {period}.")
+    return redirect("period_list")
+
+
+@login_required
+@use_replica()
+def trial_balance(request):
+    """Account balances as of a date, read from the latest closing snapshot plus the lines after it."""
+    try:
+        as_of = datetime.strptime(request.GET.get("as_of", ""), "%Y-%m-%d").date()
+    except ValueError:
+        as_of = timezone.localdate()
+    totals = periods.balances(as_of)
+    rows = [
+        (account, max(totals[account.pk], 0), max(-totals[account.pk], 0))
+        for account in Account.objects.filter(pk__in=totals).order_by("code")
+        if totals[account.pk]
+    ]
+    return render(request, "core/trial_balance.html", {
+        "as_of": as_of,
+        "rows": rows,
+        "total_debit": sum(debit for _, debit, _ in rows),
+        "total_credit": sum(credit for _, _, credit in rows),
+        "snapshot": FiscalPeriod.objects.filter(end_date__lte=as_of).first(),
+    })
+
+
+# -----------------------------
+# DORMANCY
+# -----------------------------
+
+@login_required
+def dormancy_list(request):
+    """Rows due to go dormant today and the log of status changes, filterable by ?action=."""
+    logs = DormancyLog.objects.select_related("member", "savings_account", "created_by")
+    action = request.GET.get("action", "")
+    if action in dict(DormancyLog.ACTION_CHOICES):
+        logs = logs.filter(action=action)
+    page = Paginator(logs, 100).get_page(request.GET.get("page"))
+    querystring = request.GET.copy()
+    querystring.pop("page", None)
+    return render(request, "core/dormancy_list.html", {
+        "due_accounts": dormancy.dormant_accounts().count(),
+        "due_members": dormancy.dormant_members().count(),
+        "inactive_accounts": SavingsAccount.objects.filter(active=False).count(),
+        "inactive_members": Member.objects.filter(status=Member.INACTIVE).count(),
+        "account_days": dormancy.account_days(),
+        "member_days": dormancy.member_days(),
+        "actions": DormancyLog.ACTION_CHOICES,
+        "action": action,
+        "page_obj": page,
+        "querystring": querystring.urlencode(),
+    })
+
+
+@login_required
+@require_POST
+def dormancy_run(request):
+    accounts, members = dormancy.mark_dormant(
+        accounts=SavingsAccount.objects.all(), members=Member.objects.all(), user=request.user,
+    )
+    messages.success(request, f"💤 Marked {accounts} savings account(s) and {members} member(s) dormant.")
+    return redirect("dormancy_list")
+
+
+@login_required
+@require_POST
+def dormancy_reactivate(request):
+    """Reactivate the ticked savings accounts and members."""
+    accounts, members = dormancy.reactivate(
+        accounts=SavingsAccount.objects.filter(pk__in=request.POST.getlist("account")),
+        members=Member.objects.filter(pk__in=request.POST.getlist("member")),
+        user=request.user,
+    )
+    messages.success(request, f"✅ Reactivated {accounts} savings account(s) and {members} member(s).")
+    return redirect("dormancy_list")
+
+
 # -----------------------------
 # MEMBER VIEWS
 # -----------------------------
@@ -230,10 +377,16 @@ def member_detail(request, pk):
     savings_accounts = member.savingsaccount_set.all()
     savings_transactions = SavingsTransaction.objects.filter(savings_account__member=member)
 
-    total_deposits = savings_transactions.filter(transaction_type='DEPOSIT').aggregate(total=Sum('amount'))['total'] or 0
-    total_withdrawals = savings_transactions.filter(transaction_type='WITHDRAWAL').aggregate(total=Sum('amount'))['total'] or 0
-    total_interest = savings_transactions.filter(transaction_type='INTEREST').aggregate(total=Sum('amount'))['total'] or 0
-    total_interest = savings_transactions.filter(transaction_type='INTEREST').aggregate(total=Sum('amount'))['total'] or 0
+    # Totals over the whole history, archived transactions included
+    totals = {'DEPOSIT': 0, 'WITHDRAWAL': 0, 'INTEREST': 0}
+    for store in stores(SavingsTransaction):
+        for tx_type, total in (
+            store.filter(savings_account__member=member).values('transaction_type')
+            .annotate(total=Sum('amount')).values_list('transaction_type', 'total')
+        ):
+            if tx_type in totals:
+                totals[tx_type] += total or 0
+    total_deposits, total_withdrawals, total_interest = totals['DEPOSIT'], totals['WITHDRAWAL'], totals['INTEREST']
     savings_balance = total_deposits + total_interest - total_withdrawals
 
     # Loan summary
@@ -270,6 +423,7 @@ def member_detail(request, pk):
         "net_position": net_position,
         "recent_ledger": recent_ledger,
         "loan_to_savings_ratio": loan_to_savings_ratio,
+        "eligibility": eligibility.max_loan(member),
     }
 
     return render(request, "core/member_detail.html", context)
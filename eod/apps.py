@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class EodConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'eod'
+    verbose_name = 'End of day'
+
+    def ready(self):
+        import eod.stages  # registers the built-in EOD stages
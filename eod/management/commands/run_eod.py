@@ -0,0 +1,52 @@
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from eod import pipeline
+from eod.models import EodRun
+
+
+class Command(BaseCommand):
+    help = "Run (or resume) the end-of-day batch for a business date."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Business date (YYYY-MM-DD). Defaults to today.")
+        parser.add_argument("--workers", type=int, default=getattr(settings, "EOD_WORKERS", 1))
+        parser.add_argument("--chunk-size", type=int, help="Ids per chunk (default EOD_CHUNK_SIZE).")
+        parser.add_argument("--stage", action="append", dest="stages", help="Run only this stage (repeatable).")
+        parser.add_argument("--restart", action="store_true", help="Discard checkpoints and run every stage again.")
+        parser.add_argument("--list", action="store_true", help="List stages in run order and exit.")
+
+    def handle(self, *args, **options):
+        if options["list"]:
+            for number, wave in enumerate(pipeline.waves(), start=1):
+                self.stdout.write(f"{number}. {', '.join(wave)}")
+            return
+
+        business_date = None
+        if options["date"]:
+            try:
+                business_date = datetime.strptime(options["date"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("--date must be YYYY-MM-DD")
+
+        try:
+            run = pipeline.run_eod(
+                business_date,
+                workers=max(1, options["workers"]),
+                chunk_size=options["chunk_size"],
+                stages=options["stages"],
+                restart=options["restart"],
+                log=self.stdout.write,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        for name, entry in pipeline.stage_summary(run).items():
+            self.stdout.write(
+                f"  {name:<20} {entry['done']}/{entry['chunks']} chunks  {entry['rows']} rows  {entry['ms'] / 1000:.1f}s"
+            )
+        if run.status != EodRun.COMPLETED:
+            raise CommandError(f"EOD {run.business_date} {run.status.lower()}; rerun to resume.\n{run.error}")
+        self.stdout.write(self.style.SUCCESS(f"EOD {run.business_date} completed."))
@@ -0,0 +1,60 @@
+from django.db import models
+
+
+class EodRun(models.Model):
+    """One end-of-day run per business date."""
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+    STATUS_CHOICES = [
+        (RUNNING, "Running"),
+        (COMPLETED, "Completed"),
+        (FAILED, "Failed"),
+    ]
+
+    business_date = models.DateField(unique=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=RUNNING)
+    workers = models.PositiveIntegerField(default=1)
+    chunk_size = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["-business_date"]
+
+    def __str__(self):
+        return f"EOD {self.business_date} ({self.status})"
+
+
+class EodChunk(models.Model):
+    """
+    A checkpoint: one stage applied to one id range. A chunk is marked DONE
+    in the same transaction as its work, so a resumed run skips it safely.
+    """
+    PENDING = "PENDING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    run = models.ForeignKey(EodRun, related_name="chunks", on_delete=models.CASCADE)
+    stage = models.CharField(max_length=64)
+    chunk_no = models.PositiveIntegerField()
+    first_id = models.BigIntegerField(null=True, blank=True)
+    last_id = models.BigIntegerField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    rows = models.IntegerField(default=0)
+    elapsed_ms = models.FloatField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ("run", "stage", "chunk_no")
+        ordering = ["run", "stage", "chunk_no"]
+
+    def __str__(self):
+        return f"{self.run.business_date} {self.stage} #{self.chunk_no}"
@@ -0,0 +1,200 @@
+"""
+End-of-day (EOD) orchestration.
+
+Stages register with `@stage` (see eod/stages.py) and declare what they
+depend on. A run walks the dependency graph in waves: every stage whose
+dependencies are done goes into the next wave, each stage is split into id
+ranges over its partition queryset, and the chunks of a wave are spread
+over a process pool.
+
+Every chunk is an EodChunk row that is marked DONE in the same transaction
+as its work. Running the same business date again resumes: DONE chunks are
+skipped and everything else is retried.
+"""
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import EodChunk, EodRun
+
+DEFAULT_CHUNK_SIZE = 5000
+
+_stages = {}
+
+
+class Stage:
+    def __init__(self, name, func, partition=None, after=()):
+        self.name = name
+        self.func = func
+        self.partition = partition
+        self.after = tuple(after)
+
+    def plan(self, chunk_size):
+        """[(first_id, last_id), ...] covering the partition, or one unbounded chunk."""
+        if self.partition is None:
+            return [(None, None)]
+        ids = list(self.partition().order_by("pk").values_list("pk", flat=True))
+        return [
+            (ids[start], ids[min(start + chunk_size, len(ids)) - 1])
+            for start in range(0, len(ids), chunk_size)
+        ]
+
+
+def stage(name, partition=None, after=()):
+    """
+    Register an EOD stage.
+
+        @stage("mark_overdue", partition=lambda: Loan.objects.all())
+        def mark_overdue(business_date, first_id, last_id):
+            ...
+            return rows_changed
+
+    `partition` returns the queryset whose primary keys are split into
+    chunks; the function gets one inclusive id range per call. Stages
+    without a partition run once with (None, None).
+    """
+    def register(func):
+        _stages[name] = Stage(name, func, partition=partition, after=after)
+        return func
+    return register
+
+
+def registered_stages():
+    return dict(_stages)
+
+
+def waves(names=None):
+    """Group stages into dependency waves. Dependencies outside `names` count as done."""
+    selected = set(names or _stages)
+    unknown = selected - set(_stages)
+    if unknown:
+        raise ValueError(f"Unknown EOD stage(s): {', '.join(sorted(unknown))}")
+
+    done, result = set(), []
+    pending = sorted(selected)
+    while pending:
+        ready = [
+            name for name in pending
+            if all(dep in done or dep not in selected for dep in _stages[name].after)
+        ]
+        if not ready:
+            raise ValueError(f"EOD stages have a dependency cycle: {', '.join(pending)}")
+        result.append(ready)
+        done.update(ready)
+        pending = [name for name in pending if name not in done]
+    return result
+
+
+def run_chunk(chunk_id):
+    """Run one checkpointed chunk. Runs inside a worker process; never raises."""
+    chunk = EodChunk.objects.select_related("run").get(pk=chunk_id)
+    started = time.perf_counter()
+    try:
+        with transaction.atomic():
+            rows = _stages[chunk.stage].func(chunk.run.business_date, chunk.first_id, chunk.last_id)
+            EodChunk.objects.filter(pk=chunk.pk).update(
+                status=EodChunk.DONE,
+                rows=rows or 0,
+                elapsed_ms=(time.perf_counter() - started) * 1000,
+                error="",
+                finished_at=timezone.now(),
+            )
+        return True
+    except Exception:
+        EodChunk.objects.filter(pk=chunk.pk).update(
+            status=EodChunk.FAILED,
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+            error=traceback.format_exc(),
+        )
+        return False
+
+
+def _init_worker():
+    # Under the "spawn" start method the child starts with a bare interpreter.
+    import django
+    django.setup()
+
+
+def _plan(run, stage_obj, chunk_size):
+    if run.chunks.filter(stage=stage_obj.name).exists():
+        return
+    EodChunk.objects.bulk_create([
+        EodChunk(run=run, stage=stage_obj.name, chunk_no=no, first_id=first, last_id=last)
+        for no, (first, last) in enumerate(stage_obj.plan(chunk_size))
+    ])
+
+
+def run_eod(business_date=None, workers=1, chunk_size=None, stages=None, restart=False, log=None):
+    """
+    Run (or resume) the EOD for `business_date`. Returns the EodRun.
+
+    A completed run is left alone unless restart=True, which discards its
+    checkpoints and runs every stage again.
+    """
+    log = log or (lambda message: None)
+    business_date = business_date or timezone.localdate()
+    chunk_size = chunk_size or getattr(settings, "EOD_CHUNK_SIZE", DEFAULT_CHUNK_SIZE)
+    plan = waves(stages)
+
+    run, created = EodRun.objects.get_or_create(
+        business_date=business_date, defaults={"workers": workers, "chunk_size": chunk_size}
+    )
+    if run.status == EodRun.COMPLETED and not restart:
+        log(f"EOD {business_date} already completed.")
+        return run
+    if restart:
+        run.chunks.all().delete()
+    elif not created:
+        resumable = run.chunks.exclude(status=EodChunk.DONE).update(status=EodChunk.PENDING)
+        log(f"Resuming EOD {business_date}: {resumable} chunk(s) left from the previous attempt.")
+
+    run.status, run.workers, run.chunk_size = EodRun.RUNNING, workers, chunk_size
+    run.error, run.finished_at = "", None
+    run.save()
+
+    for wave in plan:
+        for name in wave:
+            _plan(run, _stages[name], chunk_size)
+        todo = list(
+            run.chunks.filter(stage__in=wave, status=EodChunk.PENDING).values_list("pk", flat=True)
+        )
+        started = time.perf_counter()
+        if workers > 1 and len(todo) > 1:
+            # Forked children must not share the parent's open DB connections.
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                list(pool.map(run_chunk, todo))
+        else:
+            for chunk_id in todo:
+                run_chunk(chunk_id)
+        log(f"{', '.join(wave)}: {len(todo)} chunk(s) in {time.perf_counter() - started:.1f}s")
+
+        failed = run.chunks.filter(stage__in=wave, status=EodChunk.FAILED)
+        if failed.exists():
+            first = failed.first()
+            run.status = EodRun.FAILED
+            reason = first.error.strip().splitlines()[-1]
+            run.error = f"{failed.count()} chunk(s) failed; first in {first.stage}: {reason}\n\n{first.error}"
+            run.save(update_fields=["status", "error"])
+            log(f"EOD {business_date} stopped: {run.error.splitlines()[0]}")
+            return run
+
+    run.status, run.finished_at = EodRun.COMPLETED, timezone.now()
+    run.save(update_fields=["status", "finished_at"])
+    return run
+
+
+def stage_summary(run):
+    """{stage: {chunks, done, rows, ms}} for reporting."""
+    summary = {}
+    for chunk in run.chunks.all():
+        entry = summary.setdefault(chunk.stage, {"chunks": 0, "done": 0, "rows": 0, "ms": 0.0})
+        entry["chunks"] += 1
+        entry["done"] += chunk.status == EodChunk.DONE
+        entry["rows"] += chunk.rows
+        entry["ms"] += chunk.elapsed_ms or 0
+    return summary
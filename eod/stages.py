@@ -0,0 +1,118 @@
+"""
+Built-in EOD stages. Each takes (business_date, first_id, last_id) and
+returns the number of rows it changed.
+"""
+import calendar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+
+from core import dormancy, rollups
+from core.metrics import invalidate_dashboard_metrics
+from core.models import JournalEntry, Member
+from loans import accrual, eligibility, provisioning
+from loans.forecast import invalidate_cash_forecast
+from loans.models import Loan, LoanSchedule
+from reconciliation import subledger
+from reconciliation.models import LedgerCheck
+from savings import history
+from savings.models import SavingsAccount
+
+from .pipeline import stage
+
+
+def open_loans():
+    return Loan.objects.filter(status__in=[Loan.ACTIVE, Loan.DEFAULTED])
+
+
+@stage("mark_overdue", partition=open_loans)
+def mark_overdue(business_date, first_id, last_id):
+    installments = LoanSchedule.objects.filter(loan_id__gte=first_id, loan_id__lte=last_id)
+    marked = installments.filter(paid=False, overdue=False, due_date__lt=business_date).update(overdue=True)
+    cleared = installments.filter(overdue=True).filter(
+        Q(paid=True) | Q(due_date__gte=business_date)
+    ).update(overdue=False)
+    return marked + cleared
+
+
+@stage("accrue_interest", partition=lambda: Loan.objects.filter(status=Loan.ACTIVE))
+def accrue_interest(business_date, first_id, last_id):
+    """On the last business date of a month, accrue that month's loan interest."""
+    if business_date.day != calendar.monthrange(business_date.year, business_date.month)[1]:
+        return 0
+    return accrual.accrue(business_date, first_id, last_id)["loans"]
+
+
+@stage(
+    "default_loans",
+    partition=lambda: Loan.objects.filter(status=Loan.ACTIVE),
+    after=["mark_overdue", "accrue_interest"],
+)
+def default_loans(business_date, first_id, last_id):
+    """ACTIVE loans with an installment overdue for LOAN_DEFAULT_DAYS become DEFAULTED."""
+    cutoff = business_date - timedelta(days=getattr(settings, "LOAN_DEFAULT_DAYS", 90))
+    long_overdue = LoanSchedule.objects.filter(loan=OuterRef("pk"), overdue=True, due_date__lt=cutoff)
+    return (
+        Loan.objects.filter(pk__range=(first_id, last_id), status=Loan.ACTIVE)
+        .filter(Exists(long_overdue))
+        .update(status=Loan.DEFAULTED)
+    )
+
+
+@stage("provision_loans", after=["default_loans"])
+def provision_loans(business_date, first_id, last_id):
+    """On the last business date of a month, store a provisioning run and post the adjustment."""
+    if business_date.day != calendar.monthrange(business_date.year, business_date.month)[1]:
+        return 0
+    return provisioning.run_provisioning(business_date).loans
+
+
+@stage("refresh_exposure", partition=lambda: Member.objects.all(), after=["default_loans"])
+def refresh_exposure(business_date, first_id, last_id):
+    """Recompute member exposure so arrears reflect installments that fell due today."""
+    return eligibility.refresh(Member.objects.filter(pk__range=(first_id, last_id)), as_of=business_date)
+
+
+@stage("savings_dormancy", partition=lambda: SavingsAccount.objects.filter(active=True))
+def savings_dormancy(business_date, first_id, last_id):
+    """Deactivate savings accounts with no transaction in SAVINGS_DORMANCY_DAYS."""
+    accounts = SavingsAccount.objects.filter(pk__range=(first_id, last_id))
+    return dormancy.mark_dormant(business_date, accounts=accounts)[0]
+
+
+@stage("member_dormancy", partition=lambda: Member.objects.filter(status=Member.ACTIVE))
+def member_dormancy(business_date, first_id, last_id):
+    """Set members with no activity in MEMBER_DORMANCY_DAYS, and no open loan, INACTIVE."""
+    members = Member.objects.filter(pk__range=(first_id, last_id))
+    return dormancy.mark_dormant(business_date, members=members)[1]
+
+
+@stage("savings_history", partition=lambda: SavingsAccount.objects.all())
+def savings_history(business_date, first_id, last_id):
+    """Rebuild the balance history of accounts whose latest row disagrees with their stored balance."""
+    return history.rebuild(history.stale(SavingsAccount.objects.filter(pk__range=(first_id, last_id))))
+
+
+@stage("refresh_rollups", after=["provision_loans", "savings_dormancy", "member_dormancy"])
+def refresh_rollups(business_date, first_id, last_id):
+    """Reconcile the trend rollups and drop cached reports after the bulk updates."""
+    written = rollups.rebuild()
+    invalidate_dashboard_metrics()
+    invalidate_cash_forecast()
+    return written
+
+
+@stage("ledger_check_entries", partition=lambda: JournalEntry.objects.all(), after=["accrue_interest", "provision_loans"])
+def ledger_check_entries(business_date, first_id, last_id):
+    """Compare each journal entry's control-account lines with the subledger rows linked to it."""
+    check, _ = LedgerCheck.objects.get_or_create(as_of=business_date)
+    return subledger.check_entries(check, first_id, last_id)
+
+
+@stage("ledger_check", after=["ledger_check_entries"])
+def ledger_check(business_date, first_id, last_id):
+    """Finish the nightly subledger-to-GL check: unlinked rows, member and account totals."""
+    check = LedgerCheck.objects.get(as_of=business_date)
+    subledger.finish(check)
+    return check.differences.count()
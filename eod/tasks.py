@@ -0,0 +1,19 @@
+from datetime import date
+
+from django.conf import settings
+
+from eod import pipeline
+from jobs.queue import task
+
+
+@task("eod.run", max_attempts=1)
+def run_eod(job, business_date=None, workers=None):
+    """Run the EOD from the job queue; a failed run is resumed by queuing it again."""
+    run = pipeline.run_eod(
+        date.fromisoformat(business_date) if business_date else None,
+        workers=workers or getattr(settings, "EOD_WORKERS", 1),
+        log=lambda message: job.progress(0, message=message),
+    )
+    if run.status != run.COMPLETED:
+        raise RuntimeError(run.error)
+    return {"business_date": run.business_date.isoformat(), "stages": pipeline.stage_summary(run)}
@@ -0,0 +1,95 @@
+from datetime import date
+from unittest import mock
+
+from django.test import TestCase
+
+from core.models import Member
+
+from . import pipeline
+from .models import EodChunk, EodRun
+
+BUSINESS_DATE = date(2025, 6, 30)
+
+
+class PipelineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.members = [
+            Member.objects.create(member_no=f"M-{n:06d}", full_name=f"Member {n}").pk for n in range(1, 6)
+        ]
+
+    def setUp(self):
+        # Test stages only, in place of the real ones for the length of a test
+        patcher = mock.patch.dict(pipeline._stages, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.calls = []
+        self.failing = set()
+
+        @pipeline.stage("touch_members", partition=lambda: Member.objects.all())
+        def touch_members(business_date, first_id, last_id):
+            self.calls.append(("touch_members", first_id, last_id))
+            changed = Member.objects.filter(pk__gte=first_id, pk__lte=last_id).update(phone="0700000000")
+            if first_id in self.failing:
+                raise RuntimeError(f"chunk from {first_id} failed")
+            return changed
+
+        @pipeline.stage("summarise", after=["touch_members"])
+        def summarise(business_date, first_id, last_id):
+            self.calls.append(("summarise", first_id, last_id))
+            return Member.objects.filter(phone="0700000000").count()
+
+    def stage_calls(self, name):
+        return [(first, last) for stage, first, last in self.calls if stage == name]
+
+    def test_an_interrupted_run_resumes_from_its_checkpoints(self):
+        self.failing.add(self.members[2])
+
+        run = pipeline.run_eod(BUSINESS_DATE, chunk_size=2)
+
+        self.assertEqual(run.status, EodRun.FAILED)
+        self.assertIn("chunk from", run.error)
+        self.assertEqual(
+            list(run.chunks.values_list("stage", "status")),
+            [("touch_members", EodChunk.DONE), ("touch_members", EodChunk.FAILED), ("touch_members", EodChunk.DONE)],
+        )
+        self.assertEqual(self.stage_calls("summarise"), [])
+        # The failed chunk's work was rolled back with it
+        self.assertEqual(Member.objects.filter(phone="0700000000").count(), 3)
+
+        self.failing.clear()
+        self.calls.clear()
+        run = pipeline.run_eod(BUSINESS_DATE, chunk_size=2)
+
+        self.assertEqual(run.status, EodRun.COMPLETED)
+        self.assertEqual(self.stage_calls("touch_members"), [(self.members[2], self.members[3])])
+        self.assertEqual(self.calls[-1][0], "summarise")
+        self.assertEqual(run.chunks.get(stage="summarise").rows, 5)
+        self.assertFalse(run.chunks.exclude(status=EodChunk.DONE).exists())
+
+    def test_a_completed_run_is_left_alone_unless_restarted(self):
+        pipeline.run_eod(BUSINESS_DATE, chunk_size=2)
+        self.calls.clear()
+
+        pipeline.run_eod(BUSINESS_DATE, chunk_size=2)
+        self.assertEqual(self.calls, [])
+
+        pipeline.run_eod(BUSINESS_DATE, chunk_size=2, restart=True)
+        self.assertEqual(len(self.stage_calls("touch_members")), 3)
+        self.assertEqual(len(self.stage_calls("summarise")), 1)
+
+    def test_stages_run_after_their_dependencies(self):
+        pipeline.stage("post_summary", after=["summarise"])(lambda *args: 0)
+        pipeline.stage("standalone")(lambda *args: 0)
+
+        self.assertEqual(
+            pipeline.waves(), [["standalone", "touch_members"], ["summarise"], ["post_summary"]]
+        )
+        # Dependencies left out of the selection count as done
+        self.assertEqual(pipeline.waves(["summarise", "post_summary"]), [["summarise"], ["post_summary"]])
+
+        pipeline.stage("touch_members", after=["post_summary"])(lambda *args: 0)
+        with self.assertRaisesMessage(ValueError, "dependency cycle"):
+            pipeline.waves()
+        with self.assertRaisesMessage(ValueError, "Unknown EOD stage"):
+            pipeline.waves(["no_such_stage"])
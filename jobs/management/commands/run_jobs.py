@@ -0,0 +1,45 @@
+import multiprocessing
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs import queue
+
+
+def _worker(index, once, poll_interval):
+    connections.close_all()
+    queue.work(queue.worker_name(index), once=once, poll_interval=poll_interval)
+
+
+class Command(BaseCommand):
+    help = "Run background job workers. Each process claims and runs queued jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=1, help="Worker processes to start.")
+        parser.add_argument("--once", action="store_true", help="Exit when the queue is empty.")
+        parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds to sleep when idle.")
+
+    def handle(self, *args, **options):
+        processes = max(1, options["processes"])
+        self.stdout.write(f"Starting {processes} worker(s) for: {', '.join(sorted(queue.registered_tasks()))}")
+
+        if processes == 1:
+            ran = queue.work(queue.worker_name(), once=options["once"], poll_interval=options["poll_interval"])
+            self.stdout.write(self.style.SUCCESS(f"Ran {ran} job(s)."))
+            return
+
+        # Children must open their own database connections.
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(target=_worker, args=(i, options["once"], options["poll_interval"]))
+            for i in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
+        self.stdout.write(self.style.SUCCESS("Workers stopped."))
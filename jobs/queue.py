@@ -0,0 +1,227 @@
+"""
+A small DB-backed job queue.
+
+    from jobs.queue import task, enqueue
+
+    @task("loans.accrue_interest")
+    def accrue_interest(job, period):
+        ...
+        job.progress(done, total)
+        return {"loans": n}
+
+    enqueue("loans.accrue_interest", period="2025-09")
+
+Workers (`manage.py run_jobs`) claim due jobs with
+select_for_update(skip_locked=True) plus a conditional status update, so
+any number of worker processes can share the table without a broker.
+Failed jobs are retried with exponential backoff up to max_attempts.
+
+While a job runs, a heartbeat thread refreshes its `locked_at` every
+JOB_HEARTBEAT_SECONDS, so `requeue_stale()` only takes back jobs whose
+worker has died, however long they go without reporting progress. A job
+taken back that way may still finish on the old worker; every write is
+guarded by the worker's lock so that finish is dropped, not recorded.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger("sacco.jobs")
+
+_registry = {}
+
+
+class UnknownTask(KeyError):
+    pass
+
+
+def task(name, max_attempts=3):
+    """Register a function as a background task under `name`."""
+    def register(func):
+        func.task_name = name
+        func.max_attempts = max_attempts
+        func.enqueue = lambda **kwargs: enqueue(name, **kwargs)
+        _registry[name] = func
+        return func
+    return register
+
+
+def registered_tasks():
+    return dict(_registry)
+
+
+def enqueue(name, *, priority=0, run_after=None, max_attempts=None, created_by=None, **kwargs):
+    """Queue a registered task. Keyword arguments must be JSON-serialisable."""
+    if name not in _registry:
+        raise UnknownTask(name)
+    return Job.objects.create(
+        task=name,
+        kwargs=kwargs,
+        priority=priority,
+        run_after=run_after or timezone.now(),
+        max_attempts=max_attempts or _registry[name].max_attempts,
+        created_by=created_by,
+    )
+
+
+def worker_name(index=0):
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+def claim(worker):
+    """Atomically take the next due job, or return None when the queue is empty."""
+    now = timezone.now()
+    due = Job.objects.filter(status=Job.QUEUED, run_after__lte=now).order_by("-priority", "run_after", "id")
+
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        job = due.only("id").first()
+        if job is None:
+            return None
+        # The conditional update makes the claim safe on backends without
+        # row locks (SQLite): only one worker can move it out of QUEUED.
+        claimed = Job.objects.filter(pk=job.pk, status=Job.QUEUED).update(
+            status=Job.RUNNING,
+            locked_by=worker,
+            locked_at=now,
+            started_at=now,
+            attempts=F("attempts") + 1,
+        )
+    if not claimed:
+        return None
+    return Job.objects.get(pk=job.pk)
+
+
+def _held(job):
+    """The job's row, if this worker still holds it."""
+    return Job.objects.filter(pk=job.pk, status=Job.RUNNING, locked_by=job.locked_by)
+
+
+class Heartbeat(threading.Thread):
+    """Refreshes a running job's `locked_at` until stopped."""
+
+    def __init__(self, job, interval=None):
+        super().__init__(name=f"job-{job.pk}-heartbeat", daemon=True)
+        self.job = job
+        self.interval = interval or getattr(settings, "JOB_HEARTBEAT_SECONDS", 60)
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                try:
+                    _held(self.job).update(locked_at=timezone.now())
+                except DatabaseError:
+                    logger.warning("Heartbeat for job %s failed", self.job.pk, exc_info=True)
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class JobContext:
+    """Handed to the task function; lets it report progress on the job row."""
+
+    def __init__(self, job, min_interval=1.0):
+        self.job = job
+        self.min_interval = min_interval
+        self._last_write = 0.0
+
+    @property
+    def id(self):
+        return self.job.pk
+
+    def progress(self, done, total=None, message=""):
+        now = time.monotonic()
+        if total is None or done < total:
+            if now - self._last_write < self.min_interval:
+                return
+        self._last_write = now
+        fields = {"progress_done": done, "locked_at": timezone.now()}
+        if total is not None:
+            fields["progress_total"] = total
+        if message:
+            fields["progress_message"] = message[:255]
+        _held(self.job).update(**fields)
+
+
+def run(job):
+    """Run a claimed job and record its outcome. Never raises."""
+    func = _registry.get(job.task)
+    try:
+        if func is None:
+            raise UnknownTask(job.task)
+        result = func(JobContext(job), **job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        retry = job.attempts < job.max_attempts
+        backoff = getattr(settings, "JOB_RETRY_BACKOFF_SECONDS", 30) * 2 ** (job.attempts - 1)
+        _held(job).update(
+            status=Job.QUEUED if retry else Job.FAILED,
+            run_after=timezone.now() + timedelta(seconds=backoff) if retry else job.run_after,
+            last_error=error,
+            locked_by="",
+            locked_at=None,
+            finished_at=None if retry else timezone.now(),
+        )
+        logger.warning("Job %s (%s) failed on attempt %s", job.pk, job.task, job.attempts, exc_info=True)
+        return False
+
+    finished = _held(job).update(
+        status=Job.SUCCEEDED,
+        result=result,
+        locked_by="",
+        locked_at=None,
+        finished_at=timezone.now(),
+    )
+    if not finished:
+        logger.warning("Job %s (%s) finished after its lock was taken back; result dropped", job.pk, job.task)
+    return bool(finished)
+
+
+def requeue_stale():
+    """Put back jobs whose worker died (no heartbeat for JOB_STALE_SECONDS)."""
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, "JOB_STALE_SECONDS", 900))
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=cutoff)
+    retried = stale.filter(attempts__lt=F("max_attempts")).update(
+        status=Job.QUEUED, locked_by="", locked_at=None, last_error="Worker stopped responding."
+    )
+    failed = stale.update(
+        status=Job.FAILED, locked_by="", finished_at=timezone.now(), last_error="Worker stopped responding."
+    )
+    return retried + failed
+
+
+def work(worker, once=False, poll_interval=2.0, max_jobs=None):
+    """Claim and run jobs until the queue is empty (once=True) or forever."""
+    done = 0
+    while max_jobs is None or done < max_jobs:
+        job = claim(worker)
+        if job is None:
+            if once:
+                break
+            requeue_stale()
+            time.sleep(poll_interval)
+            continue
+        heartbeat = Heartbeat(job)
+        heartbeat.start()
+        try:
+            run(job)
+        finally:
+            heartbeat.stop()
+        done += 1
+    return done
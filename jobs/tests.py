@@ -0,0 +1,149 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from . import queue
+from .models import Job
+
+calls = []
+
+
+@queue.task("tests.record")
+def record(job, value):
+    calls.append(value)
+    return {"value": value}
+
+
+@queue.task("tests.fail", max_attempts=3)
+def fail(job):
+    raise RuntimeError("boom")
+
+
+class ClaimTests(TestCase):
+    def test_a_job_is_claimed_once(self):
+        job = queue.enqueue("tests.record", value=1)
+
+        claimed = queue.claim("worker-a")
+
+        self.assertEqual((claimed.pk, claimed.status, claimed.locked_by, claimed.attempts), (job.pk, Job.RUNNING, "worker-a", 1))
+        self.assertIsNone(queue.claim("worker-b"))
+
+    def test_higher_priority_and_due_jobs_first(self):
+        queue.enqueue("tests.record", value=1)
+        urgent = queue.enqueue("tests.record", value=2, priority=5)
+        queue.enqueue("tests.record", value=3, priority=9, run_after=timezone.now() + timedelta(hours=1))
+
+        self.assertEqual(queue.claim("worker-a").pk, urgent.pk)
+
+
+class WorkerThreadTests(TransactionTestCase):
+    """Workers and heartbeats on separate threads and connections."""
+
+    def test_only_one_worker_gets_the_job(self):
+        job = queue.enqueue("tests.record", value=1)
+        start = threading.Barrier(4)
+
+        def take(index):
+            start.wait()
+            try:
+                claimed = queue.claim(f"worker-{index}")
+                return claimed and claimed.pk
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            claims = list(pool.map(take, range(4)))
+
+        self.assertEqual([pk for pk in claims if pk], [job.pk])
+        self.assertEqual(Job.objects.get(pk=job.pk).attempts, 1)
+
+    @override_settings(JOB_STALE_SECONDS=900)
+    def test_heartbeat_keeps_a_silent_job_from_going_stale(self):
+        queue.enqueue("tests.record", value=1)
+        job = queue.claim("worker-a")
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(seconds=1000))
+
+        heartbeat = queue.Heartbeat(job, interval=0.05)
+        heartbeat.start()
+        try:
+            deadline = timezone.now() + timedelta(seconds=5)
+            while Job.objects.get(pk=job.pk).locked_at < timezone.now() - timedelta(seconds=60):
+                self.assertLess(timezone.now(), deadline, "no heartbeat")
+                time.sleep(0.01)
+        finally:
+            heartbeat.stop()
+
+        self.assertEqual(queue.requeue_stale(), 0)
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.RUNNING)
+
+
+@override_settings(JOB_RETRY_BACKOFF_SECONDS=30)
+class RetryTests(TestCase):
+    def make_due(self, job):
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+
+    def test_failures_back_off_then_fail(self):
+        job = queue.enqueue("tests.fail")
+
+        for attempt, backoff in ((1, 30), (2, 60)):
+            before = timezone.now()
+            self.assertFalse(queue.run(queue.claim("worker-a")))
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts, job.locked_by), (Job.QUEUED, attempt, ""))
+            self.assertIn("RuntimeError: boom", job.last_error)
+            self.assertGreaterEqual(job.run_after, before + timedelta(seconds=backoff))
+            self.assertLess(job.run_after, timezone.now() + timedelta(seconds=backoff))
+            self.assertIsNone(queue.claim("worker-a"))
+            self.make_due(job)
+
+        queue.run(queue.claim("worker-a"))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 3))
+        self.assertIsNotNone(job.finished_at)
+        self.assertIsNone(queue.claim("worker-a"))
+
+    def test_success_records_the_result(self):
+        job = queue.enqueue("tests.record", value=7)
+
+        self.assertTrue(queue.run(queue.claim("worker-a")))
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, job.locked_by), (Job.SUCCEEDED, {"value": 7}, ""))
+
+
+@override_settings(JOB_STALE_SECONDS=900)
+class StaleJobTests(TestCase):
+    def go_silent(self, job, seconds):
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(seconds=seconds))
+
+    def test_a_silent_job_is_taken_back_and_its_old_worker_dropped(self):
+        calls.clear()
+        queue.enqueue("tests.record", value=1)
+        abandoned = queue.claim("worker-a")
+        self.go_silent(abandoned, 60)
+        self.assertEqual(queue.requeue_stale(), 0)
+
+        self.go_silent(abandoned, 1000)
+        self.assertEqual(queue.requeue_stale(), 1)
+        retaken = queue.claim("worker-b")
+
+        self.assertEqual((retaken.pk, retaken.attempts), (abandoned.pk, 2))
+        self.assertFalse(queue.run(abandoned))
+        self.assertEqual(Job.objects.get(pk=retaken.pk).locked_by, "worker-b")
+        self.assertTrue(queue.run(retaken))
+        self.assertEqual(Job.objects.get(pk=retaken.pk).status, Job.SUCCEEDED)
+        self.assertEqual(calls, [1, 1])
+
+    def test_a_silent_job_out_of_attempts_fails(self):
+        job = queue.enqueue("tests.record", value=1, max_attempts=1)
+        self.go_silent(queue.claim("worker-a"), 1000)
+
+        self.assertEqual(queue.requeue_stale(), 1)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.last_error), (Job.FAILED, "Worker stopped responding."))
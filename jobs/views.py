@@ -0,0 +1,51 @@
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+
+from .models import Job
+
+
+@login_required
+def job_list(request):
+    """Recent background jobs, optionally filtered by ?status=."""
+    jobs = Job.objects.all()
+    status = request.GET.get("status", "").strip()
+    if status:
+        jobs = jobs.filter(status=status)
+    return render(request, "jobs/job_list.html", {
+        "jobs": jobs[:200],
+        "status": status,
+        "status_choices": Job.STATUS_CHOICES,
+    })
+
+
+@login_required
+def job_detail(request, pk):
+    """Job status page. ?format=json returns the same data for polling."""
+    job = get_object_or_404(Job, pk=pk)
+    if request.GET.get("format") == "json":
+        return JsonResponse({
+            "id": job.pk,
+            "task": job.task,
+            "status": job.status,
+            "attempts": job.attempts,
+            "progress_done": job.progress_done,
+            "progress_total": job.progress_total,
+            "percent": job.percent,
+            "message": job.progress_message,
+            "result": job.result,
+            "finished": job.is_finished,
+        })
+    return render(request, "jobs/job_detail.html", {"job": job})
+
+
+@login_required
+def job_cancel(request, pk):
+    job = get_object_or_404(Job, pk=pk)
+    if request.method == "POST":
+        if Job.objects.filter(pk=pk, status=Job.QUEUED).update(status=Job.CANCELLED):
+            messages.success(request, "🛑 Job cancelled.")
+        else:
+            messages.error(request, "⚠️ Only queued jobs can be cancelled.")
+    return redirect("job_detail", pk=job.pk)
@@ -0,0 +1,194 @@
+"""
+Monthly interest accrual.
+
+`accrue(period)` computes one month of interest for every ACTIVE loan and
+records it in the LoanInterestAccrual ledger, posting one summarised
+journal entry per run: debit each loan's interest receivable account,
+credit interest income. The whole book is read with three queries and
+computed in a single pass over plain tuples; nothing is fetched per loan.
+
+Re-running a period only accrues loans that have no accrual row for it
+yet, so the run is idempotent and safe to resume. A month ending in a
+closed period (core/periods.py) raises PeriodLocked.
+
+Repayments clear accrued interest through `clear_for_repayment` (wired to
+LoanRepayment saves in loans/signals.py). The clearance rides on the
+repayment's own journal entry; nothing is posted for it separately.
+"""
+import calendar
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Sum
+
+from core import periods
+from core.models import Account, JournalEntry, JournalLine, ReportTag
+
+from .models import Loan, LoanInterestAccrual, LoanProduct, LoanRepayment
+
+CENT = Decimal("0.01")
+ZERO = Decimal("0")
+MONTHS_PER_YEAR = Decimal(12)
+
+
+def period_bounds(period):
+    """(first day, last day) of the month containing `period`."""
+    start = period.replace(day=1)
+    return start, start.replace(day=calendar.monthrange(start.year, start.month)[1])
+
+
+def _maturity(disbursed_on, tenor_months):
+    index = disbursed_on.year * 12 + disbursed_on.month - 1 + tenor_months
+    year, month = index // 12, index % 12 + 1
+    return disbursed_on.replace(year=year, month=month, day=min(disbursed_on.day, calendar.monthrange(year, month)[1]))
+
+
+def monthly_interest(principal, outstanding, annual_rate, method, disbursed_on, tenor_months, start, end):
+    """
+    Interest for the month [start, end] on one loan.
+
+    FLAT charges the original principal until maturity; REDUCING charges the
+    principal still outstanding at the start of the month. The month a loan
+    is disbursed (or matures, for FLAT) is pro-rated by days.
+    """
+    if disbursed_on > end:
+        return ZERO
+    if method == LoanProduct.FLAT:
+        base = principal
+        last_day = min(end, _maturity(disbursed_on, tenor_months))
+    else:
+        base = outstanding
+        last_day = end
+    first_day = max(start, disbursed_on)
+    if base <= 0 or last_day < first_day:
+        return ZERO
+
+    days_in_month = (end - start).days + 1
+    days = (last_day - first_day).days + 1
+    interest = base * annual_rate / 100 / MONTHS_PER_YEAR
+    if days < days_in_month:
+        interest = interest * days / days_in_month
+    return interest.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def income_account():
+    account = Account.objects.filter(report_tag=ReportTag.INCOME_INTEREST_ON_LOANS).order_by("code").first()
+    if account is None:
+        raise ImproperlyConfigured(
+            "Interest accrual needs an account tagged INCOME_INTEREST_ON_LOANS."
+        )
+    return account
+
+
+def accrue(period, first_id=None, last_id=None, user=None):
+    """
+    Accrue interest for the month containing `period` on ACTIVE loans
+    (optionally only ids first_id..last_id). Returns a summary dict.
+    Defaulted and closed loans do not accrue.
+    """
+    start, end = period_bounds(period)
+    periods.check_open(end)
+    already_accrued = LoanInterestAccrual.objects.filter(
+        kind=LoanInterestAccrual.ACCRUAL, period=start
+    ).values("loan_id")
+    loans = Loan.objects.filter(status=Loan.ACTIVE, disbursed_on__lte=end).exclude(pk__in=already_accrued)
+    if first_id is not None:
+        loans = loans.filter(pk__gte=first_id, pk__lte=last_id)
+
+    rows = list(loans.values_list(
+        "pk", "principal", "annual_rate", "interest_method",
+        "disbursed_on", "tenor_months", "interest_account_id",
+    ))
+    if not rows:
+        return {"period": start, "loans": 0, "amount": ZERO, "journal_entry": None}
+
+    repaid = dict(
+        LoanRepayment.objects.filter(
+            loan_id__in=[row[0] for row in rows], date__lt=start
+        ).values("loan_id").annotate(total=Sum("principal_component")).values_list("loan_id", "total")
+    )
+
+    accruals, by_account = [], defaultdict(lambda: ZERO)
+    for loan_id, principal, rate, method, disbursed_on, tenor, interest_account_id in rows:
+        outstanding = principal - (repaid.get(loan_id) or ZERO)
+        amount = monthly_interest(principal, outstanding, rate, method, disbursed_on, tenor, start, end)
+        if amount <= 0:
+            continue
+        accruals.append(LoanInterestAccrual(loan_id=loan_id, period=start, amount=amount))
+        by_account[interest_account_id] += amount
+
+    if not accruals:
+        return {"period": start, "loans": 0, "amount": ZERO, "journal_entry": None}
+
+    total = sum(by_account.values(), ZERO)
+    with transaction.atomic():
+        entry = JournalEntry.objects.create(
+            date=end,
+            memo=f"Loan interest accrual {start:%B %Y} ({len(accruals)} loans)",
+            reference=f"ACCR-{start:%Y%m}",
+            created_by=user,
+        )
+        lines = [
+            JournalLine(entry=entry, account_id=account_id, debit=amount)
+            for account_id, amount in sorted(by_account.items())
+        ]
+        lines.append(JournalLine(entry=entry, account=income_account(), credit=total))
+        JournalLine.objects.bulk_create(lines)
+        for accrual in accruals:
+            accrual.journal_entry = entry
+        LoanInterestAccrual.objects.bulk_create(accruals, batch_size=2000)
+
+    return {"period": start, "loans": len(accruals), "amount": total, "journal_entry": entry}
+
+
+def accrued_balances(loan_ids=None):
+    """{loan_id: accrued interest not yet cleared} for loans with a non-zero balance."""
+    rows = LoanInterestAccrual.objects.all()
+    if loan_ids is not None:
+        rows = rows.filter(loan_id__in=loan_ids)
+    return {
+        loan_id: total
+        for loan_id, total in rows.values("loan_id").annotate(total=Sum("amount")).values_list("loan_id", "total")
+        if total
+    }
+
+
+@transaction.atomic
+def release_for_repayment(repayment):
+    """Delete the repayment's clearance."""
+    LoanInterestAccrual.objects.filter(repayment=repayment).delete()
+
+
+@transaction.atomic
+def clear_for_repayment(repayment):
+    """
+    Clear accrued interest with the repayment's interest component (up to the
+    amount accrued). Re-running for an edited repayment replaces its clearance.
+
+    The clearance is tied to the repayment's journal entry, which is expected
+    to credit the interest receivable (mobilemoney/posting.py). A repayment
+    entered without one is not in the general ledger yet, so its clearance is
+    left unlinked like the repayment itself (the subledger check reports both
+    as UNLINKED) until the repayment is saved with its entry.
+    """
+    release_for_repayment(repayment)
+    if not repayment.interest_component or repayment.interest_component <= 0:
+        return None
+    accrued = LoanInterestAccrual.objects.filter(loan_id=repayment.loan_id).aggregate(
+        total=Sum("amount")
+    )["total"] or ZERO
+    amount = min(Decimal(repayment.interest_component), accrued)
+    paid_on = repayment.date.date() if isinstance(repayment.date, datetime) else repayment.date
+    if amount <= 0:
+        return None
+    return LoanInterestAccrual.objects.create(
+        loan_id=repayment.loan_id,
+        period=paid_on.replace(day=1),
+        kind=LoanInterestAccrual.CLEARED,
+        amount=-amount,
+        repayment=repayment,
+        journal_entry=repayment.journal_entry,
+    )
@@ -0,0 +1,175 @@
+"""
+Loan eligibility from maintained member exposure.
+
+MemberExposure holds one row per member: savings balance, outstanding
+principal on open loans and arrears (unpaid installments already due).
+`refresh()` recomputes rows for any set of members in a handful of grouped
+queries. Postings refresh the affected member as they are saved (see
+loans/signals.py) and the EOD `refresh_exposure` stage refreshes everyone,
+so arrears follow the calendar.
+
+A member may borrow up to the product's savings multiplier (default
+LOAN_SAVINGS_MULTIPLIER) times their savings, less what they already owe,
+and nothing while in arrears. `max_loan()` answers that from one
+primary-key lookup; `prequalification()` answers it for every member in
+one query.
+"""
+from decimal import Decimal, ROUND_DOWN
+
+from django.conf import settings
+from django.db.models import Case, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from archive.store import stores
+from core.models import Member
+from savings.models import SavingsTransaction
+
+from .models import Loan, LoanRepayment, LoanSchedule, MemberExposure
+
+OPEN_STATUSES = [Loan.ACTIVE, Loan.DEFAULTED]
+ZERO = Decimal("0")
+CENT = Decimal("0.01")
+MONEY = DecimalField(max_digits=16, decimal_places=2)
+
+EXPOSURE_FIELDS = ["savings_balance", "outstanding_principal", "arrears", "open_loans", "refreshed_at"]
+
+
+def multiplier(product=None):
+    if product is not None and product.savings_multiplier is not None:
+        return product.savings_multiplier
+    return Decimal(str(getattr(settings, "LOAN_SAVINGS_MULTIPLIER", 3)))
+
+
+def refresh(members=None, as_of=None):
+    """Recompute MemberExposure for `members` (a Member queryset; all members by default)."""
+    as_of = as_of or timezone.localdate()
+    members = Member.objects.all() if members is None else members
+    member_ids = list(members.values_list("pk", flat=True))
+    if not member_ids:
+        return 0
+
+    # Summed from the transactions rather than the stored account balances,
+    # which savings/signals.py may not have moved yet when this runs.
+    savings = {}
+    for store in stores(SavingsTransaction):  # live and archived
+        for member_id, total in (
+            store.filter(savings_account__member__in=members)
+            .values("savings_account__member").annotate(total=Sum(SavingsTransaction.signed_amount()))
+            .values_list("savings_account__member", "total")
+        ):
+            savings[member_id] = savings.get(member_id, ZERO) + (total or ZERO)
+
+    loans = Loan.objects.filter(member__in=members, status__in=OPEN_STATUSES)
+    repaid = dict(
+        LoanRepayment.objects.filter(loan__in=loans)
+        .values("loan_id").annotate(total=Sum("principal_component")).values_list("loan_id", "total")
+    )
+    outstanding, open_loans = {}, {}
+    for loan_id, member_id, principal in loans.values_list("pk", "member_id", "principal"):
+        owed = principal - (repaid.get(loan_id) or ZERO)
+        if owed > 0:
+            outstanding[member_id] = outstanding.get(member_id, ZERO) + owed
+            open_loans[member_id] = open_loans.get(member_id, 0) + 1
+
+    arrears = dict(
+        LoanSchedule.objects.filter(loan__in=loans, paid=False, due_date__lt=as_of)
+        .values("loan__member").annotate(total=Sum("total_due")).values_list("loan__member", "total")
+    )
+
+    now = timezone.now()
+    MemberExposure.objects.bulk_create(
+        [
+            MemberExposure(
+                member_id=member_id,
+                savings_balance=(savings.get(member_id) or ZERO).quantize(CENT),
+                outstanding_principal=outstanding.get(member_id, ZERO).quantize(CENT),
+                arrears=(arrears.get(member_id) or ZERO).quantize(CENT),
+                open_loans=open_loans.get(member_id, 0),
+                refreshed_at=now,
+            )
+            for member_id in member_ids
+        ],
+        batch_size=2000,
+        update_conflicts=True,
+        unique_fields=["member"],
+        update_fields=EXPOSURE_FIELDS,
+    )
+    return len(member_ids)
+
+
+def exposure_for(member_id):
+    """The member's MemberExposure row, computed on first use."""
+    exposure = MemberExposure.objects.filter(pk=member_id).first()
+    if exposure is None:
+        refresh(Member.objects.filter(pk=member_id))
+        exposure = MemberExposure.objects.get(pk=member_id)
+    return exposure
+
+
+def _loan_outstanding(loan):
+    """What an existing open loan currently adds to its member's outstanding principal."""
+    principal = Loan.objects.filter(pk=loan.pk, status__in=OPEN_STATUSES).values_list("principal", flat=True).first()
+    if principal is None:
+        return ZERO
+    repaid = LoanRepayment.objects.filter(loan_id=loan.pk).aggregate(total=Sum("principal_component"))["total"]
+    return max(ZERO, principal - (repaid or ZERO))
+
+
+def max_loan(member, product=None, loan=None):
+    """
+    {"savings_balance", "outstanding_principal", "arrears", "multiplier",
+     "limit", "available", "reason"} for a new loan under `product`.
+    Pass the `loan` being edited to leave its own balance out of the exposure.
+    """
+    exposure = exposure_for(member.pk)
+    rate = multiplier(product)
+    outstanding = exposure.outstanding_principal
+    if loan is not None and loan.pk and loan.member_id == member.pk:
+        outstanding = max(ZERO, outstanding - _loan_outstanding(loan))
+
+    limit = max(ZERO, (exposure.savings_balance * rate).quantize(CENT, rounding=ROUND_DOWN))
+    if exposure.arrears > 0:
+        available, reason = ZERO, "in arrears"
+    else:
+        available = max(ZERO, limit - outstanding)
+        reason = "" if available else "limit used"
+    return {
+        "savings_balance": exposure.savings_balance,
+        "outstanding_principal": outstanding,
+        "arrears": exposure.arrears,
+        "multiplier": rate,
+        "limit": limit,
+        "available": available,
+        "reason": reason,
+    }
+
+
+def refusal(result):
+    """Why a loan above result["available"] is refused, for form errors."""
+    if result["arrears"] > 0:
+        return f"Member has KSh {result['arrears']:,.2f} in arrears; no new lending until it is cleared."
+    return (
+        f"Exceeds the member's limit: KSh {result['available']:,.2f} available "
+        f"({result['multiplier']:g}× savings of KSh {result['savings_balance']:,.2f}, "
+        f"less KSh {result['outstanding_principal']:,.2f} outstanding)."
+    )
+
+
+def prequalification(product=None):
+    """
+    Every member's exposure annotated with `limit` and `available` for
+    `product`, computed in the query and ordered by most available first.
+    """
+    rate = Value(multiplier(product), output_field=MONEY)
+    limit = Greatest(F("savings_balance") * rate, Value(ZERO), output_field=MONEY)
+    return (
+        MemberExposure.objects.select_related("member")
+        .annotate(limit=limit)
+        .annotate(available=Case(
+            When(Q(arrears__gt=0), then=Value(ZERO)),
+            default=Greatest(F("limit") - F("outstanding_principal"), Value(ZERO)),
+            output_field=MONEY,
+        ))
+        .order_by("-available", "member__member_no")
+    )
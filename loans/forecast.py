@@ -0,0 +1,169 @@
+"""
+Projected cash inflows from loan schedules.
+
+`compute_cash_forecast()` sums unpaid installments of open loans by week or month
+of due date in SQL (served by the (paid, due_date) index) and scales each
+product's figures by its historical collection rate: what was repaid
+against what fell due over the last FORECAST_LOOKBACK_MONTHS. The rate is
+one figure per product, applied to every future installment alike; it
+does not vary with how far a loan is in arrears.
+
+Results are cached in the REPORT_CACHE alias, which every process shares.
+Any schedule, repayment or loan save bumps a version key there (see
+loans/signals.py), so the next request in any process recomputes.
+"""
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import Loan, LoanProduct, LoanRepayment, LoanSchedule
+from .schedule import add_months
+
+WEEK = "week"
+MONTH = "month"
+GRANULARITIES = {WEEK: TruncWeek, MONTH: TruncMonth}
+
+CACHE_VERSION_KEY = "loans:forecast:version"
+OPEN_STATUSES = [Loan.ACTIVE, Loan.DEFAULTED]
+ZERO = Decimal("0")
+ONE = Decimal("1")
+CENT = Decimal("0.01")
+
+
+def _as_date(value):
+    return value.date() if hasattr(value, "date") and callable(value.date) else value
+
+
+def collection_rates(as_of=None, months=None):
+    """
+    {product_id: rate} - repayments received / installments due over the
+    lookback window, capped at 1. Products without history are absent;
+    the None key holds the rate for the whole book.
+    """
+    as_of = as_of or timezone.localdate()
+    months = months or getattr(settings, "FORECAST_LOOKBACK_MONTHS", 12)
+    start = add_months(as_of, -months)
+
+    due = dict(
+        LoanSchedule.objects.filter(due_date__gte=start, due_date__lt=as_of)
+        .values("loan__product").annotate(total=Sum("total_due")).values_list("loan__product", "total")
+    )
+    paid = dict(
+        LoanRepayment.objects.filter(date__gte=start, date__lt=as_of)
+        .values("loan__product").annotate(total=Sum("amount")).values_list("loan__product", "total")
+    )
+    rates = {
+        product_id: _rate(paid.get(product_id), total)
+        for product_id, total in due.items()
+        if total
+    }
+    if rates:
+        rates[None] = _rate(sum(paid.values(), ZERO), sum(due.values(), ZERO))
+    return rates
+
+
+def _rate(paid, due):
+    return min(ONE, (paid or ZERO) / due).quantize(Decimal("0.0001"))
+
+
+def compute_cash_forecast(granularity=MONTH, months=12, as_of=None):
+    """
+    {"as_of", "granularity", "months", "overall_rate",
+     "periods": [{period, installments, scheduled, expected}],
+     "products": [{product, rate, scheduled, expected}],
+     "scheduled", "expected", "arrears"}
+    """
+    as_of = as_of or timezone.localdate()
+    trunc = GRANULARITIES[granularity]
+    end = add_months(as_of, months)
+    rates = collection_rates(as_of)
+    # Products with no history yet are assumed to collect like the book as a whole.
+    overall = rates.get(None, ONE)
+
+    upcoming = LoanSchedule.objects.filter(
+        paid=False, due_date__gte=as_of, due_date__lt=end, loan__status__in=OPEN_STATUSES
+    )
+    rows = (
+        upcoming.annotate(period=trunc("due_date"))
+        .values("period", "loan__product")
+        .annotate(installments=Count("id"), scheduled=Sum("total_due"))
+        .order_by("period")
+    )
+
+    periods = {}
+    by_product = defaultdict(lambda: {"scheduled": ZERO, "expected": ZERO})
+    for row in rows:
+        period = _as_date(row["period"])
+        rate = rates.get(row["loan__product"], overall)
+        scheduled = row["scheduled"].quantize(CENT)
+        expected = (scheduled * rate).quantize(CENT)
+        entry = periods.setdefault(period, {"period": period, "installments": 0, "scheduled": ZERO, "expected": ZERO})
+        entry["installments"] += row["installments"]
+        entry["scheduled"] += scheduled
+        entry["expected"] += expected
+        by_product[row["loan__product"]]["scheduled"] += scheduled
+        by_product[row["loan__product"]]["expected"] += expected
+
+    names = dict(LoanProduct.objects.filter(pk__in=by_product).values_list("pk", "name"))
+    arrears = LoanSchedule.objects.filter(
+        paid=False, due_date__lt=as_of, loan__status__in=OPEN_STATUSES
+    ).aggregate(total=Sum("total_due"))["total"] or ZERO
+    arrears = arrears.quantize(CENT)
+
+    return {
+        "as_of": as_of,
+        "granularity": granularity,
+        "months": months,
+        "overall_rate": overall,
+        "periods": [periods[key] for key in sorted(periods)],
+        "products": sorted(
+            (
+                {"product": names.get(pk, "—"), "rate": rates.get(pk, overall), **totals}
+                for pk, totals in by_product.items()
+            ),
+            key=lambda item: -item["scheduled"],
+        ),
+        "scheduled": sum((p["scheduled"] for p in periods.values()), ZERO),
+        "expected": sum((p["expected"] for p in periods.values()), ZERO),
+        "arrears": arrears,
+    }
+
+
+def _cache():
+    return caches[getattr(settings, "REPORT_CACHE", "default")]
+
+
+def _version():
+    cache = _cache()
+    version = cache.get(CACHE_VERSION_KEY)
+    if version is None:
+        # A fresh value, so entries cached before the key was evicted are never reused.
+        cache.add(CACHE_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(CACHE_VERSION_KEY)
+    return version
+
+
+def get_cash_forecast(granularity=MONTH, months=12):
+    """Cached forecast from today; recomputed after new schedules or repayments."""
+    as_of = timezone.localdate()
+    key = f"loans:forecast:{_version()}:{granularity}:{months}:{as_of.isoformat()}"
+    cache = _cache()
+    forecast = cache.get(key)
+    if forecast is None:
+        forecast = compute_cash_forecast(granularity, months, as_of)
+        cache.set(key, forecast, timeout=getattr(settings, "FORECAST_CACHE_TIMEOUT", 6 * 60 * 60))
+    return forecast
+
+
+def invalidate_cash_forecast():
+    cache = _cache()
+    try:
+        cache.incr(CACHE_VERSION_KEY)
+    except ValueError:
+        cache.set(CACHE_VERSION_KEY, time.time_ns(), timeout=None)
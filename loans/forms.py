@@ -1,5 +1,8 @@
 from django import forms
 from django.core.exceptions import ValidationError
+
+from core import periods
+from . import eligibility
 from .models import LoanSchedule, Loan, LoanProduct, LoanRepayment
 
 class LoanProductForm(forms.ModelForm):
@@ -31,6 +34,7 @@ class LoanProductForm(forms.ModelForm):
             "annual_rate",
             "interest_method",
             "default_tenor_months",
+            "savings_multiplier",
         ]
         labels = {
             "name": "Loan Product Name",
@@ -38,6 +42,7 @@ class LoanProductForm(forms.ModelForm):
             "annual_rate": "Annual Interest Rate (%)",
             "interest_method": "Interest Calculation Method",
             "default_tenor_months": "Default Tenor (Months)",
+            "savings_multiplier": "Maximum Loan (× Savings)",
         }
         widgets = {
             "name": forms.TextInput(attrs={"class": "form-control"}),
@@ -52,6 +57,11 @@ class LoanProductForm(forms.ModelForm):
                 "class": "form-control",
                 "min": 1
             }),
+            "savings_multiplier": forms.NumberInput(attrs={
+                "class": "form-control",
+                "step": "0.01",
+                "min": "0"
+            }),
         }
 
 
@@ -112,6 +122,26 @@ class LoanForm(forms.ModelForm):
             "interest_account": forms.Select(attrs={"class": "form-select"}),
         }
 
+    def clean(self):
+        cleaned = super().clean()
+        member = cleaned.get("member")
+        principal = cleaned.get("principal")
+        if member and principal and cleaned.get("status") == Loan.ACTIVE and self._adds_exposure(member, principal):
+            result = eligibility.max_loan(member, cleaned.get("product"), loan=self.instance)
+            if principal > result["available"]:
+                self.add_error("principal", eligibility.refusal(result))
+        return cleaned
+
+    def _adds_exposure(self, member, principal):
+        """New loans, and edits that raise the principal, reopen the loan or move it to another member."""
+        if not self.instance.pk:
+            return True
+        original = Loan.objects.filter(pk=self.instance.pk).values_list("member_id", "principal", "status").first()
+        if original is None:
+            return True
+        member_id, original_principal, status = original
+        return member_id != member.pk or principal > original_principal or status not in eligibility.OPEN_STATUSES
+
 
 
 
@@ -260,6 +290,12 @@ class LoanRepaymentForm(forms.ModelForm):
         self.fields["source"].required = False
         self.fields["excess_routed_to_savings"].required = False
 
+    def clean_date(self):
+        date = self.cleaned_data["date"]
+        if periods.is_locked(date) or self.instance.pk and periods.is_locked(self.instance.date):
+            raise forms.ValidationError(f"Entries up to {periods.locked_through()} are in a closed period.")
+        return date
+
     def clean(self):
         cleaned = super().clean()
         principal = cleaned.get("principal_component") or 0
@@ -0,0 +1,77 @@
+"""
+Portfolio queries over unpaid installments.
+
+Every query starts from `paid=False` plus a due-date range, which the
+(paid, due_date) index on LoanSchedule answers without touching paid rows,
+and joins the loan, member and product in the same statement so callers
+can read contact details without a query per row.
+
+`settle()` marks installments paid once a loan's repayments cover them.
+"""
+from datetime import timedelta
+
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Loan, LoanRepayment, LoanSchedule
+
+OPEN_STATUSES = [Loan.ACTIVE, Loan.DEFAULTED]
+
+UPCOMING = "upcoming"
+OVERDUE = "overdue"
+
+
+def unpaid():
+    return (
+        LoanSchedule.objects.filter(paid=False, loan__status__in=OPEN_STATUSES)
+        .select_related("loan__member", "loan__product")
+    )
+
+
+def due_within(days, as_of=None):
+    """Unpaid installments falling due from `as_of` through `days` days later."""
+    as_of = as_of or timezone.localdate()
+    return unpaid().filter(due_date__gte=as_of, due_date__lte=as_of + timedelta(days=days)).order_by("due_date", "pk")
+
+
+def overdue(as_of=None, min_days=1):
+    """Unpaid installments at least `min_days` past their due date."""
+    as_of = as_of or timezone.localdate()
+    return unpaid().filter(due_date__lte=as_of - timedelta(days=min_days)).order_by("due_date", "pk")
+
+
+def for_kind(kind, days=7, as_of=None):
+    if kind == OVERDUE:
+        return overdue(as_of)
+    return due_within(days, as_of)
+
+
+def settle(loan_ids):
+    """
+    Mark the oldest unpaid installments of each loan paid while its
+    repayments not yet matched to a paid installment cover them.
+    Returns the number of installments marked.
+    """
+    repaid = dict(
+        LoanRepayment.objects.filter(loan_id__in=loan_ids)
+        .values("loan_id").annotate(total=Sum("amount")).values_list("loan_id", "total")
+    )
+    covered = dict(
+        LoanSchedule.objects.filter(loan_id__in=loan_ids, paid=True)
+        .values("loan_id").annotate(total=Sum("total_due")).values_list("loan_id", "total")
+    )
+    credit = {loan_id: total - (covered.get(loan_id) or 0) for loan_id, total in repaid.items()}
+
+    settled = []
+    for pk, loan_id, total_due in (
+        LoanSchedule.objects.filter(loan_id__in=credit, paid=False)
+        .order_by("loan_id", "installment_no").values_list("pk", "loan_id", "total_due")
+    ):
+        if credit[loan_id] >= total_due:
+            credit[loan_id] -= total_due
+            settled.append(pk)
+        else:
+            credit[loan_id] = -1  # later installments wait for this one
+    if settled:
+        LoanSchedule.objects.filter(pk__in=settled).update(paid=True, overdue=False)
+    return len(settled)
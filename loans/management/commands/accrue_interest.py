@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core import periods
+from loans import accrual
+
+
+class Command(BaseCommand):
+    help = "Accrue one month of loan interest. Safe to re-run: loans already accrued for the month are skipped."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--period", help="Month to accrue (YYYY-MM). Defaults to the current month.")
+
+    def handle(self, *args, **options):
+        period = timezone.localdate()
+        if options["period"]:
+            try:
+                period = datetime.strptime(options["period"], "%Y-%m").date()
+            except ValueError:
+                raise CommandError("--period must be YYYY-MM")
+
+        try:
+            result = accrual.accrue(period)
+        except periods.PeriodLocked as exc:
+            raise CommandError(str(exc))
+        if not result["loans"]:
+            self.stdout.write(f"Nothing to accrue for {result['period']:%B %Y}.")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Accrued {result['amount']} on {result['loans']} loans for {result['period']:%B %Y} "
+            f"(journal entry #{result['journal_entry'].pk})."
+        ))
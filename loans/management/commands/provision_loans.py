@@ -0,0 +1,32 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import periods
+from loans import provisioning
+
+
+class Command(BaseCommand):
+    help = "Age the loan portfolio, store a provisioning run and post the adjustment against the ledger allowance."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--as-of", help="Aging date (YYYY-MM-DD). Defaults to today.")
+
+    def handle(self, *args, **options):
+        as_of = None
+        if options["as_of"]:
+            try:
+                as_of = datetime.strptime(options["as_of"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("--as-of must be YYYY-MM-DD")
+
+        try:
+            run = provisioning.run_provisioning(as_of)
+        except (periods.PeriodLocked, provisioning.ProvisioningError) as exc:
+            raise CommandError(str(exc))
+        for label, loans, outstanding, required in provisioning.bucket_summary(run):
+            self.stdout.write(f"  {label:<28} {loans:>7} loans  {outstanding:>16,.2f}  {required:>14,.2f}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Provision as of {run.as_of}: {run.required:,.2f} required, "
+            f"adjustment {run.adjustment:+,.2f} against {run.previous_required:,.2f}."
+        ))
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from loans import eligibility
+
+
+class Command(BaseCommand):
+    help = "Recompute every member's exposure record (savings, outstanding principal, arrears) used for loan limits."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--as-of", help="Arrears date (YYYY-MM-DD). Defaults to today.")
+
+    def handle(self, *args, **options):
+        as_of = None
+        if options["as_of"]:
+            try:
+                as_of = datetime.strptime(options["as_of"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("--as-of must be YYYY-MM-DD")
+
+        count = eligibility.refresh(as_of=as_of)
+        self.stdout.write(self.style.SUCCESS(f"Refreshed exposure for {count} members."))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0002_loanrepayment_excess_routed_to_savings_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loanschedule',
+            name='overdue',
+            field=models.BooleanField(default=False, help_text='Unpaid past its due date; set by the EOD run'),
+        ),
+    ]
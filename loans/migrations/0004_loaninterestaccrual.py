@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_monthlyrollup'),
+        ('loans', '0003_loanschedule_overdue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoanInterestAccrual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField(help_text='First day of the month')),
+                ('kind', models.CharField(choices=[('ACCRUAL', 'Accrual'), ('CLEARED', 'Cleared by repayment')], default='ACCRUAL', max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('journal_entry', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.journalentry')),
+                ('loan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='accruals', to='loans.loan')),
+                ('repayment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='accrual_clearances', to='loans.loanrepayment')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period', 'kind'], name='loans_loani_period_5fb503_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('kind', 'ACCRUAL')), fields=('loan', 'period'), name='one_accrual_per_loan_period')],
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_alter_account_report_tag'),
+        ('loans', '0004_loaninterestaccrual'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProvisionRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateField()),
+                ('loans', models.PositiveIntegerField(default=0)),
+                ('outstanding', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('required', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('previous_required', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('adjustment', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('journal_entry', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.journalentry')),
+            ],
+            options={
+                'ordering': ['-as_of', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProvisionRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.CharField(choices=[('PERFORMING', 'Performing (0 days)'), ('WATCH', 'Watch (1-30 days)'), ('SUBSTANDARD', 'Substandard (31-180 days)'), ('DOUBTFUL', 'Doubtful (181-360 days)'), ('LOSS', 'Loss (over 360 days)')], max_length=16)),
+                ('rate', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='provision_rates', to='loans.loanproduct')),
+            ],
+            options={
+                'unique_together': {('product', 'bucket')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ProvisionLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('days_past_due', models.PositiveIntegerField(default=0)),
+                ('bucket', models.CharField(choices=[('PERFORMING', 'Performing (0 days)'), ('WATCH', 'Watch (1-30 days)'), ('SUBSTANDARD', 'Substandard (31-180 days)'), ('DOUBTFUL', 'Doubtful (181-360 days)'), ('LOSS', 'Loss (over 360 days)')], max_length=16)),
+                ('outstanding', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('rate', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('required', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('loan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='provision_lines', to='loans.loan')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='loans.provisionrun')),
+            ],
+            options={
+                'unique_together': {('run', 'loan')},
+            },
+        ),
+    ]
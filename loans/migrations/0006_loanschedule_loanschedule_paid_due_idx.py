@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0005_provisionrun_provisionrate_provisionline'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loanschedule',
+            index=models.Index(fields=['paid', 'due_date'], name='loanschedule_paid_due_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:54
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_alter_account_report_tag'),
+        ('loans', '0006_loanschedule_loanschedule_paid_due_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberExposure',
+            fields=[
+                ('member', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='exposure', serialize=False, to='core.member')),
+                ('savings_balance', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('outstanding_principal', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('arrears', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('open_loans', models.PositiveIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='loanproduct',
+            name='savings_multiplier',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Maximum loan as a multiple of savings; blank uses settings.LOAN_SAVINGS_MULTIPLIER.', max_digits=5, null=True),
+        ),
+    ]
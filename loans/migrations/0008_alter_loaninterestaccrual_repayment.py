@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0007_member_exposure'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='loaninterestaccrual',
+            name='repayment',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='accrual_clearances', to='loans.loanrepayment'),
+        ),
+    ]
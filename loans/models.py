@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 from core.models import Member, Account, JournalEntry, ReportTag
@@ -20,6 +21,10 @@ class LoanProduct(models.Model):
         # No default — forces user to choose
     )
     default_tenor_months = models.PositiveIntegerField()
+    savings_multiplier = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True,
+        help_text="Maximum loan as a multiple of savings; blank uses settings.LOAN_SAVINGS_MULTIPLIER.",
+    )
 
     def __str__(self):
         return self.name
@@ -63,11 +68,18 @@ class Loan(models.Model):
     def __str__(self):
         return f"Loan #{self.id} - {self.member.full_name}"
 
+    def _repaid(self, **sums):
+        """Repayment totals over the live and archived repayments."""
+        from archive.store import stores  # Avoid circular import
+        totals = dict.fromkeys(sums, 0)
+        for repayments in stores(LoanRepayment):
+            for name, total in repayments.filter(loan_id=self.pk).aggregate(**sums).items():
+                totals[name] += total or 0
+        return totals
+
     def get_total_repaid(self):
         """Sum of all repayments made toward this loan."""
-        return self.repayments.aggregate(
-            total=models.Sum('amount')
-        )['total'] or 0
+        return self._repaid(total=models.Sum('amount'))['total']
 
     def get_balance(self):
         """Remaining loan balance (principal - total repaid)."""
@@ -77,9 +89,13 @@ class Loan(models.Model):
         """Check if the loan is fully repaid."""
         return self.get_balance() <= 0
 
+    def get_accrued_interest(self):
+        """Interest accrued by the accrual run and not yet cleared by repayments."""
+        return self.accruals.aggregate(total=models.Sum('amount'))['total'] or 0
+
     def get_repayment_summary(self):
         """Returns principal vs interest breakdown."""
-        agg = self.repayments.aggregate(
+        agg = self._repaid(
             principal=models.Sum('principal_component'),
             interest=models.Sum('interest_component')
         )
@@ -100,10 +116,15 @@ class LoanSchedule(models.Model):
     interest_due = models.DecimalField(max_digits=14, decimal_places=2)
     total_due = models.DecimalField(max_digits=14, decimal_places=2)
     paid = models.BooleanField(default=False)
+    overdue = models.BooleanField(default=False, help_text="Unpaid past its due date; set by the EOD run")
 
     class Meta:
         unique_together = ("loan", "installment_no")
         ordering = ["due_date"]
+        indexes = [
+            # Forecasts, arrears and PAR all read unpaid installments by due date.
+            models.Index(fields=["paid", "due_date"], name="loanschedule_paid_due_idx"),
+        ]
 
     def __str__(self):
         return f"Loan {self.loan.id} - Installment {self.installment_no}"
@@ -138,4 +159,130 @@ class LoanRepayment(models.Model):
         return self.amount + self.excess_routed_to_savings
 
 
+class LoanInterestAccrual(models.Model):
+    """
+    Accrued-interest ledger. ACCRUAL rows are written once per loan and
+    month by the accrual run (loans/accrual.py); CLEARED rows are negative
+    and tie a repayment's interest component back to what was accrued.
+    The sum of a loan's rows is the interest accrued but not yet paid.
+    """
+    ACCRUAL = "ACCRUAL"
+    CLEARED = "CLEARED"
+    KIND_CHOICES = [
+        (ACCRUAL, "Accrual"),
+        (CLEARED, "Cleared by repayment"),
+    ]
+
+    loan = models.ForeignKey(Loan, related_name="accruals", on_delete=models.CASCADE)
+    period = models.DateField(help_text="First day of the month")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default=ACCRUAL)
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    # No database constraint: repayments of closed loans may move to the archive (archive/store.py)
+    repayment = models.ForeignKey(
+        LoanRepayment, null=True, blank=True, related_name="accrual_clearances", on_delete=models.CASCADE,
+        db_constraint=False,
+    )
+    journal_entry = models.ForeignKey(JournalEntry, null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["loan", "period"],
+                condition=models.Q(kind="ACCRUAL"),
+                name="one_accrual_per_loan_period",
+            ),
+        ]
+        indexes = [models.Index(fields=["period", "kind"])]
+
+    def __str__(self):
+        return f"Loan {self.loan_id} {self.kind.lower()} {self.period:%Y-%m}: {self.amount}"
+
+
+class ProvisionBucket(models.TextChoices):
+    """Arrears classification by days past due (DPD)."""
+    PERFORMING = "PERFORMING", "Performing (0 days)"
+    WATCH = "WATCH", "Watch (1-30 days)"
+    SUBSTANDARD = "SUBSTANDARD", "Substandard (31-180 days)"
+    DOUBTFUL = "DOUBTFUL", "Doubtful (181-360 days)"
+    LOSS = "LOSS", "Loss (over 360 days)"
+
+    @classmethod
+    def for_days(cls, days_past_due):
+        if days_past_due <= 0:
+            return cls.PERFORMING
+        if days_past_due <= 30:
+            return cls.WATCH
+        if days_past_due <= 180:
+            return cls.SUBSTANDARD
+        if days_past_due <= 360:
+            return cls.DOUBTFUL
+        return cls.LOSS
+
+
+class ProvisionRate(models.Model):
+    """
+    Provision rate (% of outstanding principal) for a bucket. A row with a
+    product overrides the product-less default; buckets with no row fall
+    back to settings.LOAN_PROVISION_RATES.
+    """
+    product = models.ForeignKey(LoanProduct, null=True, blank=True, related_name="provision_rates", on_delete=models.CASCADE)
+    bucket = models.CharField(max_length=16, choices=ProvisionBucket.choices)
+    rate = models.DecimalField(max_digits=5, decimal_places=2)
+
+    class Meta:
+        unique_together = ("product", "bucket")
 
+    def __str__(self):
+        return f"{self.product or 'All products'} - {self.get_bucket_display()}: {self.rate}%"
+
+
+class ProvisionRun(models.Model):
+    """One portfolio provisioning run; the audit trail of required provisions."""
+    as_of = models.DateField()
+    loans = models.PositiveIntegerField(default=0)
+    outstanding = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    required = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    previous_required = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    adjustment = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    journal_entry = models.ForeignKey(JournalEntry, null=True, blank=True, on_delete=models.SET_NULL)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-as_of", "-id"]
+
+    def __str__(self):
+        return f"Provision run {self.as_of} ({self.required})"
+
+
+class ProvisionLine(models.Model):
+    run = models.ForeignKey(ProvisionRun, related_name="lines", on_delete=models.CASCADE)
+    loan = models.ForeignKey(Loan, related_name="provision_lines", on_delete=models.CASCADE)
+    days_past_due = models.PositiveIntegerField(default=0)
+    bucket = models.CharField(max_length=16, choices=ProvisionBucket.choices)
+    outstanding = models.DecimalField(max_digits=14, decimal_places=2)
+    rate = models.DecimalField(max_digits=5, decimal_places=2)
+    required = models.DecimalField(max_digits=14, decimal_places=2)
+
+    class Meta:
+        unique_together = ("run", "loan")
+
+    def __str__(self):
+        return f"Loan {self.loan_id} {self.bucket}: {self.required}"
+
+
+class MemberExposure(models.Model):
+    """
+    A member's savings and open-loan position, kept current by
+    loans/eligibility.py so the loan limit is a primary-key lookup.
+    """
+    member = models.OneToOneField(Member, primary_key=True, related_name="exposure", on_delete=models.CASCADE)
+    savings_balance = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    outstanding_principal = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    arrears = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    open_loans = models.PositiveIntegerField(default=0)
+    refreshed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Exposure - member {self.member_id}"
@@ -0,0 +1,163 @@
+"""
+Bad-debt provisioning.
+
+`run_provisioning(as_of)` ages the whole open portfolio in two grouped
+queries: outstanding principal from LoanRepayment and days past due from
+the oldest unpaid LoanSchedule installment. Each loan is classified into a
+ProvisionBucket and provisioned at the rate for its product and bucket.
+
+Every run is stored (ProvisionRun plus one ProvisionLine per loan) and
+only the difference between the requirement and the allowance already in
+the general ledger is posted: debit EXP_BAD_DEBT_PROVISION, credit the
+ASSET_LOAN_LOSS_PROVISION contra account, or the reverse when the
+requirement falls. The ledger balance, not the last run, is the baseline,
+so manual entries to the allowance are trued up too; it is stored as the
+run's `previous_required`. Runs go forward only: one dated before the
+latest run is refused, since its adjustment would shift every later
+run's baseline.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Count, Min, Sum
+from django.utils import timezone
+
+from core import periods
+from core.models import Account, JournalEntry, JournalLine, ReportTag
+
+from .models import Loan, LoanRepayment, LoanSchedule, ProvisionBucket, ProvisionLine, ProvisionRate, ProvisionRun
+
+CENT = Decimal("0.01")
+ZERO = Decimal("0")
+
+class ProvisioningError(ValueError):
+    pass
+
+
+DEFAULT_RATES = {
+    ProvisionBucket.PERFORMING: 1,
+    ProvisionBucket.WATCH: 5,
+    ProvisionBucket.SUBSTANDARD: 25,
+    ProvisionBucket.DOUBTFUL: 50,
+    ProvisionBucket.LOSS: 100,
+}
+
+
+def rate_table():
+    """A function (product_id, bucket) -> rate %, built from ProvisionRate rows and settings."""
+    configured = getattr(settings, "LOAN_PROVISION_RATES", DEFAULT_RATES)
+    defaults = {bucket: Decimal(str(configured.get(bucket, DEFAULT_RATES[bucket]))) for bucket in ProvisionBucket.values}
+    by_product = {}
+    for product_id, bucket, rate in ProvisionRate.objects.values_list("product_id", "bucket", "rate"):
+        if product_id is None:
+            defaults[bucket] = rate
+        else:
+            by_product[(product_id, bucket)] = rate
+    return lambda product_id, bucket: by_product.get((product_id, bucket), defaults[bucket])
+
+
+def aging(as_of):
+    """[(loan_id, product_id, outstanding, days_past_due)] for open loans with principal outstanding."""
+    loans = list(
+        Loan.objects.filter(status__in=[Loan.ACTIVE, Loan.DEFAULTED], disbursed_on__lte=as_of)
+        .values_list("pk", "product_id", "principal")
+    )
+    repaid = dict(
+        LoanRepayment.objects.filter(loan__status__in=[Loan.ACTIVE, Loan.DEFAULTED], date__lte=as_of)
+        .values("loan_id").annotate(total=Sum("principal_component")).values_list("loan_id", "total")
+    )
+    oldest_unpaid = dict(
+        LoanSchedule.objects.filter(
+            loan__status__in=[Loan.ACTIVE, Loan.DEFAULTED], paid=False, due_date__lt=as_of
+        ).values("loan_id").annotate(oldest=Min("due_date")).values_list("loan_id", "oldest")
+    )
+
+    rows = []
+    for loan_id, product_id, principal in loans:
+        outstanding = principal - (repaid.get(loan_id) or ZERO)
+        if outstanding <= 0:
+            continue
+        oldest = oldest_unpaid.get(loan_id)
+        rows.append((loan_id, product_id, outstanding, (as_of - oldest).days if oldest else 0))
+    return rows
+
+
+def _account(tag):
+    account = Account.objects.filter(report_tag=tag).order_by("code").first()
+    if account is None:
+        raise ImproperlyConfigured(f"Provisioning needs an account tagged {tag}.")
+    return account
+
+
+def run_provisioning(as_of=None, user=None):
+    """Compute the required provision as of `as_of`, store the run and post the adjustment."""
+    as_of = as_of or timezone.localdate()
+    periods.check_open(as_of)
+    latest = ProvisionRun.objects.order_by("-as_of").values_list("as_of", flat=True).first()
+    if latest and as_of < latest:
+        raise ProvisioningError(f"The latest provisioning run is as of {latest}; runs cannot be dated before it.")
+    rate_for = rate_table()
+
+    lines, outstanding_total, required_total = [], ZERO, ZERO
+    for loan_id, product_id, outstanding, days in aging(as_of):
+        bucket = ProvisionBucket.for_days(days)
+        rate = rate_for(product_id, bucket)
+        required = (outstanding * rate / 100).quantize(CENT, rounding=ROUND_HALF_UP)
+        lines.append(ProvisionLine(
+            loan_id=loan_id, days_past_due=days, bucket=bucket,
+            outstanding=outstanding, rate=rate, required=required,
+        ))
+        outstanding_total += outstanding
+        required_total += required
+
+    with transaction.atomic():
+        allowance = _account(ReportTag.ASSET_LOAN_LOSS_PROVISION)
+        # A contra asset: the allowance held is its credit balance
+        previous = -periods.balances(as_of, [allowance]).get(allowance.pk, ZERO)
+        adjustment = required_total - previous
+        entry = None
+        if adjustment:
+            expense = _account(ReportTag.EXP_BAD_DEBT_PROVISION)
+            debit, credit = (expense, allowance) if adjustment > 0 else (allowance, expense)
+            entry = JournalEntry.objects.create(
+                date=as_of,
+                memo=f"Loan loss provision adjustment as of {as_of:%d %b %Y}",
+                reference=f"PROV-{as_of:%Y%m%d}",
+                created_by=user,
+            )
+            JournalLine.objects.bulk_create([
+                JournalLine(entry=entry, account=debit, debit=abs(adjustment)),
+                JournalLine(entry=entry, account=credit, credit=abs(adjustment)),
+            ])
+        run = ProvisionRun.objects.create(
+            as_of=as_of,
+            loans=len(lines),
+            outstanding=outstanding_total,
+            required=required_total,
+            previous_required=previous,
+            adjustment=adjustment,
+            journal_entry=entry,
+            created_by=user,
+        )
+        for line in lines:
+            line.run = run
+        ProvisionLine.objects.bulk_create(lines, batch_size=2000)
+    return run
+
+
+def bucket_summary(run):
+    """[(bucket label, loans, outstanding, required)] in bucket order."""
+    totals = {
+        row["bucket"]: row
+        for row in run.lines.values("bucket").annotate(
+            loans=Count("id"), outstanding=Sum("outstanding"), required=Sum("required")
+        )
+    }
+    empty = {"loans": 0, "outstanding": ZERO, "required": ZERO}
+    return [
+        (label, totals.get(bucket, empty)["loans"], totals.get(bucket, empty)["outstanding"],
+         totals.get(bucket, empty)["required"])
+        for bucket, label in ProvisionBucket.choices
+    ]
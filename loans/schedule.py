@@ -0,0 +1,98 @@
+"""
+Repayment schedule generation.
+
+Amounts are worked in integer cents and every rounding is half-up on an
+exact integer division, so the vectorised simulator (loans/simulator.py)
+reproduces each installment to the cent.
+
+REDUCING loans pay a level installment (annuity); each month's interest
+is charged on the balance left after the previous installment and the
+last installment clears the balance. FLAT loans (and zero-rate loans)
+repay equal principal parts with interest on the original principal.
+"""
+import calendar
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP, localcontext
+
+from .models import LoanProduct, LoanSchedule
+
+# Monthly rate = rate_units / RATE_SCALE, where rate_units is the annual
+# rate in hundredths of a percent (12.50% -> 1250): 100 * 100 * 12.
+RATE_SCALE = 120000
+CENT = Decimal("0.01")
+
+
+def to_cents(amount):
+    return int((Decimal(amount) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents):
+    return (Decimal(int(cents)) / 100).quantize(CENT)
+
+
+def rate_units(annual_rate):
+    return int((Decimal(annual_rate) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def div_half_up(numerator, denominator):
+    """round(numerator / denominator) with halves rounded up, for non-negative integers."""
+    return (2 * numerator + denominator) // (2 * denominator)
+
+
+def level_payment(principal_cents, units, tenor_months):
+    """The REDUCING installment in cents: P·r / (1 - (1 + r)^-n), rounded half-up."""
+    with localcontext() as ctx:
+        ctx.prec = 40
+        rate = Decimal(units) / RATE_SCALE
+        payment = Decimal(principal_cents) * rate / (1 - (1 + rate) ** -tenor_months)
+        return int(payment.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def is_amortising(method, units):
+    return method == LoanProduct.REDUCING and units > 0
+
+
+def installments(principal, annual_rate, method, tenor_months):
+    """[(installment_no, principal_cents, interest_cents), ...]"""
+    balance = to_cents(principal)
+    units = rate_units(annual_rate)
+    rows = []
+    if is_amortising(method, units):
+        payment = level_payment(balance, units, tenor_months)
+        for number in range(1, tenor_months + 1):
+            interest = div_half_up(balance * units, RATE_SCALE)
+            part = balance if number == tenor_months else payment - interest
+            balance -= part
+            rows.append((number, part, interest))
+    else:
+        part = div_half_up(balance, tenor_months)
+        interest = div_half_up(balance * units, RATE_SCALE)
+        for number in range(1, tenor_months + 1):
+            this_part = balance if number == tenor_months else part
+            balance -= this_part
+            rows.append((number, this_part, interest))
+    return rows
+
+
+def add_months(day, months):
+    """Same day `months` later, clamped to the end of shorter months."""
+    index = day.year * 12 + day.month - 1 + months
+    year, month = index // 12, index % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def build_schedule(loan):
+    """Unsaved LoanSchedule rows for `loan`."""
+    return [
+        LoanSchedule(
+            loan=loan,
+            installment_no=number,
+            due_date=add_months(loan.disbursed_on, number),
+            principal_due=from_cents(part),
+            interest_due=from_cents(interest),
+            total_due=from_cents(part + interest),
+        )
+        for number, part, interest in installments(
+            loan.principal, loan.annual_rate, loan.interest_method, loan.tenor_months
+        )
+    ]
@@ -0,0 +1,59 @@
+# loans/signals.py
+
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_delete
+
+from core.models import Member
+
+from . import accrual, eligibility
+from .forecast import invalidate_cash_forecast
+
+
+def clear_accrued_interest(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    accrual.clear_for_repayment(instance)
+
+
+def release_accrued_interest(sender, instance, **kwargs):
+    accrual.release_for_repayment(instance)
+
+
+post_save.connect(clear_accrued_interest, sender="loans.LoanRepayment", dispatch_uid="accrual-clear-repayment")
+pre_delete.connect(release_accrued_interest, sender="loans.LoanRepayment", dispatch_uid="accrual-release-repayment")
+
+
+# The cash forecast reads schedules, repayments and loan status.
+FORECAST_SOURCES = ["loans.Loan", "loans.LoanSchedule", "loans.LoanRepayment"]
+
+
+def refresh_forecast(sender, **kwargs):
+    invalidate_cash_forecast()
+
+
+for source in FORECAST_SOURCES:
+    post_save.connect(refresh_forecast, sender=source, dispatch_uid=f"forecast-save-{source}")
+    post_delete.connect(refresh_forecast, sender=source, dispatch_uid=f"forecast-delete-{source}")
+
+
+# Member exposure (loans/eligibility.py) follows each posting that moves a
+# member's savings, principal or arrears. Each entry maps a saved row to
+# its member.
+EXPOSURE_SOURCES = {
+    "savings.SavingsTransaction": lambda row: Q(savingsaccount__pk=row.savings_account_id),
+    "loans.Loan": lambda row: Q(pk=row.member_id),
+    "loans.LoanRepayment": lambda row: Q(loan__pk=row.loan_id),
+    "loans.LoanSchedule": lambda row: Q(loan__pk=row.loan_id),
+}
+
+
+def refresh_exposure(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    member_of = EXPOSURE_SOURCES[sender._meta.label]
+    eligibility.refresh(Member.objects.filter(member_of(instance)).distinct())
+
+
+for source in EXPOSURE_SOURCES:
+    post_save.connect(refresh_exposure, sender=source, dispatch_uid=f"exposure-save-{source}")
+    post_delete.connect(refresh_exposure, sender=source, dispatch_uid=f"exposure-delete-{source}")
@@ -0,0 +1,22 @@
+from datetime import date
+
+from jobs.queue import task
+from loans import accrual, provisioning
+
+
+@task("loans.accrue_interest")
+def accrue_interest(job, period):
+    """Accrue a month of interest; `period` is "YYYY-MM"."""
+    result = accrual.accrue(date.fromisoformat(f"{period}-01"))
+    return {
+        "period": result["period"].isoformat(),
+        "loans": result["loans"],
+        "amount": str(result["amount"]),
+        "journal_entry": result["journal_entry"].pk if result["journal_entry"] else None,
+    }
+
+
+@task("loans.provision")
+def provision(job, as_of=None):
+    run = provisioning.run_provisioning(date.fromisoformat(as_of) if as_of else None)
+    return {"run": run.pk, "required": str(run.required), "adjustment": str(run.adjustment)}
@@ -1,3 +1,354 @@
+from datetime import date
+from decimal import Decimal
+from unittest import skipIf
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+
+from core import periods
+from core.instrumentation import QueryBudgetMixin
+from core.models import Account, AccountType, JournalEntry, JournalLine, Member, ReportTag
+from savings.models import SavingsAccount, SavingsTransaction
+
+from . import accrual, eligibility, provisioning, schedule, simulator
+from .forms import LoanForm
+from .models import Loan, LoanInterestAccrual, LoanProduct, LoanRepayment, LoanSchedule, ProvisionBucket, ProvisionRun
+
+
+class ProvisioningTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        def account(code, name, account_type, tag):
+            return Account.objects.create(code=code, name=name, type=account_type, report_tag=tag)
+
+        principal = account("1200", "Loans", AccountType.ASSET, ReportTag.ASSET_LOANS_PRINCIPAL)
+        interest = account("1210", "Interest receivable", AccountType.ASSET, ReportTag.ASSET_LOAN_INTEREST)
+        cls.allowance = account("1290", "Loan loss allowance", AccountType.ASSET, ReportTag.ASSET_LOAN_LOSS_PROVISION)
+        cls.expense = account("5100", "Bad debt provision", AccountType.EXPENSE, ReportTag.EXP_BAD_DEBT_PROVISION)
+
+        member = Member.objects.create(member_no="M-000001", full_name="Wanjiru Kariuki")
+        product = LoanProduct.objects.create(
+            name="Development Loan", annual_rate=Decimal("12.00"), interest_method=LoanProduct.REDUCING,
+            default_tenor_months=12,
+        )
+        cls.loan = Loan.objects.create(
+            member=member, product=product, principal=Decimal("10000.00"), annual_rate=Decimal("12.00"),
+            interest_method=LoanProduct.REDUCING, disbursed_on=date(2025, 1, 1), tenor_months=12,
+            principal_account=principal, interest_account=interest,
+        )
+        LoanSchedule.objects.create(
+            loan=cls.loan, installment_no=1, due_date=date(2025, 2, 1),
+            principal_due=Decimal("833.33"), interest_due=Decimal("100.00"), total_due=Decimal("933.33"),
+        )
+
+    def allowance_held(self, as_of):
+        return -periods.balances(as_of, [self.allowance]).get(self.allowance.pk, 0)
+
+    def test_each_run_posts_only_the_change_in_requirement(self):
+        first = provisioning.run_provisioning(date(2025, 1, 15))
+        second = provisioning.run_provisioning(date(2025, 2, 15))
+
+        self.assertEqual((first.required, first.previous_required, first.adjustment), (100, 0, 100))
+        self.assertEqual((second.required, second.previous_required, second.adjustment), (500, 100, 400))
+        self.assertEqual(second.lines.get().bucket, ProvisionBucket.WATCH)
+        self.assertEqual(
+            set(second.journal_entry.lines.values_list("account_id", "debit", "credit")),
+            {(self.expense.pk, Decimal("400.00"), 0), (self.allowance.pk, 0, Decimal("400.00"))},
+        )
+        self.assertEqual(self.allowance_held(date(2025, 2, 15)), Decimal("500.00"))
+
+    def test_a_rerun_with_nothing_changed_posts_nothing(self):
+        provisioning.run_provisioning(date(2025, 2, 15))
+        entries = JournalEntry.objects.count()
+
+        rerun = provisioning.run_provisioning(date(2025, 2, 15))
+
+        self.assertEqual((rerun.adjustment, rerun.journal_entry), (0, None))
+        self.assertEqual(JournalEntry.objects.count(), entries)
+
+    def test_a_fall_in_requirement_releases_the_allowance(self):
+        provisioning.run_provisioning(date(2025, 2, 15))
+        LoanSchedule.objects.update(paid=True)
+
+        run = provisioning.run_provisioning(date(2025, 2, 20))
+
+        self.assertEqual((run.required, run.adjustment), (100, -400))
+        self.assertEqual(self.allowance_held(date(2025, 2, 20)), Decimal("100.00"))
+
+    def test_backdated_runs_are_refused(self):
+        provisioning.run_provisioning(date(2025, 2, 15))
+
+        with self.assertRaises(provisioning.ProvisioningError):
+            provisioning.run_provisioning(date(2025, 1, 15))
+        self.assertEqual(ProvisionRun.objects.count(), 1)
+
+    def test_manual_allowance_entries_are_trued_up(self):
+        provisioning.run_provisioning(date(2025, 1, 15))
+        manual = JournalEntry.objects.create(date=date(2025, 1, 31), memo="Manual top-up")
+        JournalLine.objects.bulk_create([
+            JournalLine(entry=manual, account=self.expense, debit=Decimal("250.00")),
+            JournalLine(entry=manual, account=self.allowance, credit=Decimal("250.00")),
+        ])
+
+        run = provisioning.run_provisioning(date(2025, 2, 15))
+
+        self.assertEqual((run.previous_required, run.adjustment), (350, 150))
+        self.assertEqual(self.allowance_held(date(2025, 2, 15)), Decimal("500.00"))
+
+
+class AccrualTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        def account(code, name, account_type, tag):
+            return Account.objects.create(code=code, name=name, type=account_type, report_tag=tag)
+
+        cls.cash = account("1010", "Cash", AccountType.ASSET, ReportTag.ASSET_CASH_EQUITY)
+        principal = account("1200", "Loans", AccountType.ASSET, ReportTag.ASSET_LOANS_PRINCIPAL)
+        cls.receivable = account("1210", "Interest receivable", AccountType.ASSET, ReportTag.ASSET_LOAN_INTEREST)
+        cls.income = account("4010", "Interest on loans", AccountType.INCOME, ReportTag.INCOME_INTEREST_ON_LOANS)
+
+        member = Member.objects.create(member_no="M-000001", full_name="Wanjiru Kariuki")
+        product = LoanProduct.objects.create(
+            name="Development Loan", annual_rate=Decimal("12.00"), interest_method=LoanProduct.REDUCING,
+            default_tenor_months=12,
+        )
+        cls.loan = Loan.objects.create(
+            member=member, product=product, principal=Decimal("10000.00"), annual_rate=Decimal("12.00"),
+            interest_method=LoanProduct.REDUCING, disbursed_on=date(2025, 1, 1), tenor_months=12,
+            principal_account=principal, interest_account=cls.receivable,
+        )
+
+    def repay(self, interest, **fields):
+        return LoanRepayment.objects.create(
+            loan=self.loan, date=date(2025, 2, 10), amount=Decimal("833.33") + interest,
+            principal_component=Decimal("833.33"), interest_component=interest, **fields,
+        )
+
+    def test_rerunning_a_period_accrues_nothing_more(self):
+        first = accrual.accrue(date(2025, 1, 15))
+        entries = JournalEntry.objects.count()
+
+        rerun = accrual.accrue(date(2025, 1, 31))
+
+        self.assertEqual((first["loans"], first["amount"]), (1, Decimal("100.00")))
+        self.assertEqual(
+            set(first["journal_entry"].lines.values_list("account_id", "debit", "credit")),
+            {(self.receivable.pk, Decimal("100.00"), 0), (self.income.pk, 0, Decimal("100.00"))},
+        )
+        self.assertEqual((rerun["loans"], rerun["amount"], rerun["journal_entry"]), (0, 0, None))
+        self.assertEqual(JournalEntry.objects.count(), entries)
+        self.assertEqual(accrual.accrued_balances(), {self.loan.pk: Decimal("100.00")})
+
+    def test_a_repayment_clears_up_to_the_interest_accrued(self):
+        accrual.accrue(date(2025, 1, 15))
+        entry = JournalEntry.objects.create(date=date(2025, 2, 10), reference="RCPT-1")
+
+        repayment = self.repay(Decimal("150.00"), journal_entry=entry)
+
+        clearance = LoanInterestAccrual.objects.get(kind=LoanInterestAccrual.CLEARED)
+        self.assertEqual((clearance.amount, clearance.repayment, clearance.journal_entry), (-100, repayment, entry))
+        self.assertEqual(accrual.accrued_balances(), {})
+
+        repayment.interest_component = Decimal("40.00")
+        repayment.save()
+        self.assertEqual(accrual.accrued_balances(), {self.loan.pk: Decimal("60.00")})
+
+        repayment.delete()
+        self.assertFalse(LoanInterestAccrual.objects.filter(kind=LoanInterestAccrual.CLEARED).exists())
+        self.assertEqual(accrual.accrued_balances(), {self.loan.pk: Decimal("100.00")})
+
+    def test_a_repayment_without_an_entry_posts_nothing(self):
+        accrual.accrue(date(2025, 1, 15))
+        entries = JournalEntry.objects.count()
+
+        repayment = self.repay(Decimal("100.00"))
+
+        self.assertEqual(JournalEntry.objects.count(), entries)
+        clearance = LoanInterestAccrual.objects.get(repayment=repayment)
+        self.assertEqual((clearance.amount, clearance.journal_entry), (-100, None))
+
+        repayment.journal_entry = JournalEntry.objects.create(date=date(2025, 2, 10), reference="RCPT-1")
+        repayment.save()
+        self.assertEqual(LoanInterestAccrual.objects.get(repayment=repayment).journal_entry, repayment.journal_entry)
+
+
+class EligibilityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        def account(code, name, account_type, tag):
+            return Account.objects.create(code=code, name=name, type=account_type, report_tag=tag)
+
+        cls.principal_gl = account("1200", "Loans", AccountType.ASSET, ReportTag.ASSET_LOANS_PRINCIPAL)
+        cls.interest_gl = account("1210", "Interest receivable", AccountType.ASSET, ReportTag.ASSET_LOAN_INTEREST)
+        savings_gl = account("2010", "Members savings", AccountType.LIABILITY, ReportTag.LIAB_MEMBERS_SAVINGS)
+        cls.product = LoanProduct.objects.create(
+            name="Development Loan", annual_rate=Decimal("12.00"), interest_method=LoanProduct.REDUCING,
+            default_tenor_months=12,
+        )
+        cls.member = Member.objects.create(member_no="M-000001", full_name="Wanjiru Kariuki")
+        SavingsTransaction.objects.create(
+            savings_account=SavingsAccount.objects.create(member=cls.member, account=savings_gl),
+            date=date(2025, 1, 2), transaction_type=SavingsTransaction.DEPOSIT, amount=Decimal("10000.00"),
+        )
+
+    def lend(self, principal, **fields):
+        return Loan.objects.create(
+            member=self.member, product=self.product, principal=Decimal(principal), annual_rate=Decimal("12.00"),
+            interest_method=LoanProduct.REDUCING, disbursed_on=date(2025, 1, 1), tenor_months=12,
+            principal_account=self.principal_gl, interest_account=self.interest_gl, **fields,
+        )
+
+    def form(self, principal, instance=None):
+        return LoanForm(data={
+            "member": self.member.pk, "product": self.product.pk, "principal": principal, "annual_rate": "12.00",
+            "interest_method": LoanProduct.REDUCING, "disbursed_on": "2025-02-01", "tenor_months": 12,
+            "status": Loan.ACTIVE, "principal_account": self.principal_gl.pk, "interest_account": self.interest_gl.pk,
+        }, instance=instance)
+
+    def test_limit_is_a_multiple_of_savings(self):
+        result = eligibility.max_loan(self.member, self.product)
+
+        self.assertEqual((result["limit"], result["available"], result["reason"]), (30000, 30000, ""))
+        self.assertTrue(self.form("30000.00").is_valid())
+        self.assertFalse(self.form("30000.01").is_valid())
+
+    def test_existing_active_loans_count_against_the_limit(self):
+        loan = self.lend("20000.00")
+        LoanRepayment.objects.create(
+            loan=loan, date=date(2025, 2, 1), amount=Decimal("5000.00"),
+            principal_component=Decimal("5000.00"), interest_component=Decimal("0.00"),
+        )
+        self.lend("5000.00", status=Loan.CLOSED)
+
+        self.assertEqual(eligibility.max_loan(self.member, self.product)["available"], Decimal("15000.00"))
+        self.assertTrue(self.form("15000.00").is_valid())
+        form = self.form("15000.01")
+        self.assertFalse(form.is_valid())
+        self.assertIn("KSh 15,000.00 available", form.errors["principal"][0])
+
+        # Editing a loan leaves its own balance out of the exposure
+        self.assertTrue(self.form("20000.00", instance=loan).is_valid())
+        self.assertTrue(self.form("30000.00", instance=loan).is_valid())
+        self.assertFalse(self.form("30000.01", instance=loan).is_valid())
+
+    def test_members_in_arrears_are_refused(self):
+        loan = self.lend("1000.00")
+        LoanSchedule.objects.create(
+            loan=loan, installment_no=1, due_date=date(2025, 2, 1),
+            principal_due=Decimal("83.33"), interest_due=Decimal("10.00"), total_due=Decimal("93.33"),
+        )
+
+        form = self.form("100.00")
+
+        self.assertFalse(form.is_valid())
+        self.assertIn("in arrears", form.errors["principal"][0])
+        self.assertEqual(list(eligibility.prequalification().values_list("available", flat=True)), [0])
+
+
+class SimulatorTests(TestCase):
+    LOANS = [
+        (Decimal("50000.00"), Decimal("12.00"), LoanProduct.REDUCING, 12),
+        (Decimal("120000.00"), Decimal("18.50"), LoanProduct.FLAT, 24),
+        (Decimal("7500.00"), Decimal("0.00"), LoanProduct.REDUCING, 5),
+        (Decimal("33333.33"), Decimal("9.99"), LoanProduct.REDUCING, 36),
+    ]
+
+    def test_simulated_installments_match_the_schedule_generator(self):
+        result = simulator.simulate(self.LOANS, use_numpy=False)
+
+        for index, loan in enumerate(self.LOANS):
+            with self.subTest(loan=loan):
+                self.assertEqual(result.installments(index), schedule.installments(*loan))
+        self.assertEqual(result.totals()["principal"], sum(loan[0] for loan in self.LOANS))
+
+    def test_quote_grid_has_a_quote_per_amount_and_tenor(self):
+        grid = simulator.quote_grid([10000, 50000], [6, 12, 24], annual_rate=Decimal("12.00"), method=LoanProduct.REDUCING)
+
+        self.assertEqual([len(row) for row in grid["installment"]], [3, 3])
+        _, principal, interest = schedule.installments(50000, Decimal("12.00"), LoanProduct.REDUCING, 12)[0]
+        self.assertEqual(grid["installment"][1][1], schedule.from_cents(principal + interest))
+        self.assertEqual(grid["total_interest"][0][0], sum(
+            schedule.from_cents(row[2]) for row in schedule.installments(10000, Decimal("12.00"), LoanProduct.REDUCING, 6)
+        ))
+
+    def test_repricing_the_book(self):
+        principal = Account.objects.create(
+            code="1200", name="Loans", type=AccountType.ASSET, report_tag=ReportTag.ASSET_LOANS_PRINCIPAL
+        )
+        interest = Account.objects.create(
+            code="1210", name="Interest receivable", type=AccountType.ASSET, report_tag=ReportTag.ASSET_LOAN_INTEREST
+        )
+        product = LoanProduct.objects.create(
+            name="Development Loan", annual_rate=Decimal("12.00"), interest_method=LoanProduct.REDUCING,
+            default_tenor_months=12,
+        )
+        member = Member.objects.create(member_no="M-000001", full_name="Wanjiru Kariuki")
+        loan = Loan.objects.create(
+            member=member, product=product, principal=Decimal("10000.00"), annual_rate=Decimal("12.00"),
+            interest_method=LoanProduct.REDUCING, disbursed_on=date(2025, 1, 1), tenor_months=12,
+            principal_account=principal, interest_account=interest,
+        )
+        LoanRepayment.objects.create(
+            loan=loan, date=date(2025, 2, 1), amount=Decimal("2100.00"),
+            principal_component=Decimal("2000.00"), interest_component=Decimal("100.00"),
+        )
+
+        unchanged = simulator.reprice_portfolio(as_of=date(2025, 3, 1))
+        dearer = simulator.reprice_portfolio(annual_rate=Decimal("18.00"), as_of=date(2025, 3, 1))
+
+        self.assertEqual(unchanged["current"], unchanged["proposed"])
+        self.assertEqual(unchanged["interest_change"], 0)
+        self.assertEqual(dearer["current"]["principal"], Decimal("8000.00"))
+        self.assertEqual(len(dearer["monthly"]), 10)
+        self.assertGreater(dearer["interest_change"], 0)
+
+    @skipIf(simulator.np is None, "NumPy is not installed")
+    def test_numpy_path_matches_the_pure_python_path(self):
+        self.assertEqual(simulator.reconcile(samples=500), 0)
+
+        vectorised = simulator.simulate(self.LOANS)
+        looped = simulator.simulate(self.LOANS, use_numpy=False)
+        for index in range(len(self.LOANS)):
+            self.assertEqual(vectorised.installments(index), looped.installments(index))
+        self.assertEqual(vectorised.totals(), looped.totals())
+        self.assertEqual(vectorised.monthly_inflows(), looped.monthly_inflows())
+
+    @skipIf(simulator.np is not None, "NumPy is installed")
+    def test_reconcile_has_nothing_to_compare_without_numpy(self):
+        self.assertIsNone(simulator.reconcile(samples=10))
+
+
+class RepaymentListTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("clerk")
+        principal = Account.objects.create(
+            code="1200", name="Loans", type=AccountType.ASSET, report_tag=ReportTag.ASSET_LOANS_PRINCIPAL
+        )
+        interest = Account.objects.create(
+            code="1210", name="Interest receivable", type=AccountType.ASSET, report_tag=ReportTag.ASSET_LOAN_INTEREST
+        )
+        product = LoanProduct.objects.create(
+            name="Development Loan", annual_rate=Decimal("12.00"), interest_method=LoanProduct.REDUCING,
+            default_tenor_months=12,
+        )
+        for n in range(1, 21):
+            member = Member.objects.create(member_no=f"M-{n:06d}", full_name=f"Member {n}")
+            loan = Loan.objects.create(
+                member=member, product=product, principal=Decimal("10000.00"), annual_rate=Decimal("12.00"),
+                interest_method=LoanProduct.REDUCING, disbursed_on=date(2025, 1, 1), tenor_months=12,
+                principal_account=principal, interest_account=interest,
+            )
+            LoanRepayment.objects.create(
+                loan=loan, date=date(2025, 2, 1), amount=Decimal("933.33"),
+                principal_component=Decimal("833.33"), interest_component=Decimal("100.00"),
+            )
+
+    def test_query_count_does_not_grow_with_repayments(self):
+        self.client.force_login(self.user)
+
+        with self.assertMaxQueries(4):
+            response = self.client.get(reverse("loanrepayment_list"))
 
-# Create your tests here.
+        self.assertContains(response, "Member 20")
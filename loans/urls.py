@@ -9,6 +9,9 @@ urlpatterns = [
 
     path("loans/", views.loan_list, name="loan_list"),
     path("loans/new/", views.loan_create, name="loan_create"),
+    path("loans/quote/", views.loan_quote, name="loan_quote"),
+    path("loans/forecast/", views.cash_forecast, name="cash_forecast"),
+    path("loans/prequalification/", views.loan_prequalification, name="loan_prequalification"),
     path("loans/<int:pk>/", views.loan_detail, name="loan_detail"),
     path("loans/<int:pk>/edit/", views.loan_update, name="loan_update"),
     path("loans/<int:pk>/delete/", views.loan_delete, name="loan_delete"),
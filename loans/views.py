@@ -1,9 +1,12 @@
+from decimal import Decimal, InvalidOperation
+
 # Django core imports
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse, reverse_lazy
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required
+from django.contrib import messages
 
 # Local app imports
 from .models import (
@@ -19,8 +22,12 @@ from .forms import (
     LoanRepaymentForm
 )
 
+from django.core.paginator import Paginator
 from django.views.generic.edit import CreateView
 from receipts.models import Receipt
+from core import periods
+from core.db_routing import use_replica
+from . import eligibility, forecast, installments, simulator
 
 @login_required
 def loanproduct_list(request):
@@ -81,6 +88,87 @@ def loan_detail(request, pk):
     return render(request, "loans/loan_detail.html", {"loan": loan})
 
 
+MAX_QUOTE_AMOUNT = Decimal("1e12")  # Loan.principal holds 14 digits, 2 of them decimals
+
+
+def _selected_product(products, request):
+    """The product named by ?product=, or None when it is missing or not an id."""
+    try:
+        pk = int(request.GET.get("product", ""))
+    except ValueError:
+        return None
+    return products.filter(pk=pk).first() if 0 < pk < 2 ** 63 else None
+
+
+@login_required
+def loan_quote(request):
+    """Installment quotes for a grid of amounts and tenors under one product's terms."""
+    products = LoanProduct.objects.order_by("name")
+    product = _selected_product(products, request) or products.first()
+    grid = None
+    if product:
+        try:
+            amounts = [Decimal(a) for a in request.GET.get("amounts", "").replace(" ", "").split(",") if a]
+            tenors = [int(t) for t in request.GET.get("tenors", "").replace(" ", "").split(",") if t]
+        except (InvalidOperation, ValueError):
+            amounts, tenors = [], []
+        amounts = [a for a in amounts if a.is_finite() and 0 < a < MAX_QUOTE_AMOUNT][:50] or [
+            Decimal(a) for a in range(50000, 550000, 50000)
+        ]
+        tenors = [t for t in tenors if 0 < t <= 120][:20] or [6, 12, 18, 24, 36, 48, 60]
+        grid = simulator.quote_grid(amounts, tenors, product.annual_rate, product.interest_method)
+        grid["rows"] = [
+            (amount, list(zip(installments, interest)))
+            for amount, installments, interest in zip(grid["amounts"], grid["installment"], grid["total_interest"])
+        ]
+    return render(request, "loans/loan_quote.html", {
+        "products": products,
+        "product": product,
+        "grid": grid,
+        "amounts": request.GET.get("amounts", ""),
+        "tenors": request.GET.get("tenors", ""),
+    })
+
+
+@login_required
+@use_replica()
+def cash_forecast(request):
+    """Expected loan inflows by week or month for the next ?months= (max 24)."""
+    granularity = request.GET.get("by", forecast.MONTH)
+    if granularity not in forecast.GRANULARITIES:
+        granularity = forecast.MONTH
+    try:
+        months = min(max(int(request.GET.get("months", 12)), 1), 24)
+    except ValueError:
+        months = 12
+    return render(request, "loans/cash_forecast.html", {
+        "forecast": forecast.get_cash_forecast(granularity, months),
+    })
+
+
+@login_required
+@use_replica()
+def loan_prequalification(request):
+    """Every member's maximum new loan under a product, from the maintained exposure records."""
+    products = LoanProduct.objects.order_by("name")
+    product = _selected_product(products, request)
+    eligible_only = request.GET.get("eligible") == "1"
+    rows = eligibility.prequalification(product)
+    if eligible_only:
+        rows = rows.filter(available__gt=0)
+    page = Paginator(rows, 100).get_page(request.GET.get("page"))
+    querystring = request.GET.copy()
+    querystring.pop("page", None)
+    return render(request, "loans/loan_prequalification.html", {
+        "products": products,
+        "product": product,
+        "multiplier": eligibility.multiplier(product),
+        "eligible_only": eligible_only,
+        "page_obj": page,
+        "querystring": querystring.urlencode(),
+    })
+
+
 # Existing views: loan_list, loan_create, loan_detail
 
 @login_required
@@ -111,14 +199,37 @@ class LoanScheduleListView(LoginRequiredMixin, ListView):
     template_name = "loans/loanschedule_list.html"
     context_object_name = "schedules"
 
+    paginate_by = 100
+
     def get_queryset(self):
-        # Optional: support filtering by loan with ?loan=<id>
-        qs = super().get_queryset().select_related("loan", "loan__member", "loan__product")
+        # ?loan=<id>, or a portfolio view: ?status=upcoming&days=N / ?status=overdue
+        status = self.request.GET.get("status")
+        if status == installments.UPCOMING:
+            qs = installments.due_within(self._days())
+        elif status == installments.OVERDUE:
+            qs = installments.overdue()
+        else:
+            qs = super().get_queryset().select_related("loan", "loan__member", "loan__product")
         loan_id = self.request.GET.get("loan")
         if loan_id:
             qs = qs.filter(loan_id=loan_id)
         return qs
 
+    def _days(self):
+        try:
+            return min(max(int(self.request.GET.get("days", 7)), 0), 365)
+        except ValueError:
+            return 7
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["status"] = self.request.GET.get("status", "")
+        context["days"] = self._days()
+        query = self.request.GET.copy()
+        query.pop("page", None)
+        context["querystring"] = query.urlencode()
+        return context
+
 
 class LoanScheduleCreateView(LoginRequiredMixin, CreateView):
     model = LoanSchedule
@@ -187,6 +298,7 @@ class LoanRepaymentListView(LoginRequiredMixin, ListView):
     model = LoanRepayment
     template_name = "loans/loanrepayment_list.html"
     context_object_name = "repayments"
+    queryset = LoanRepayment.objects.select_related("loan__member")
     ordering = ["-date"]
 
 
@@ -207,13 +319,13 @@ class LoanRepaymentCreateView(LoginRequiredMixin, CreateView):
             amount=repayment.total_received(),
             loan_repayment=repayment,
             journal_entry=repayment.journal_entry,
-            payment_method="Mobile",  # You can make this dynamic later
+            payment_method=repayment.source or "Cash",
             issued_by=self.request.user,
             reference_note=f"Auto-generated for Loan #{repayment.loan.id}"
         )
 
         # Redirect to printable receipt view
-        return redirect(reverse("receipt_print", kwargs={"pk": receipt.pk}))
+        return redirect(reverse("receipts:receipt_print", kwargs={"pk": receipt.pk}))
 
 
 
@@ -229,3 +341,12 @@ class LoanRepaymentDeleteView(LoginRequiredMixin, DeleteView):
     model = LoanRepayment
     template_name = "loans/loanrepayment_confirm_delete.html"
     success_url = reverse_lazy("loanrepayment_list")
+
+    def form_valid(self, form):
+        # Its interest clearance may have posted a journal entry, which a closed period keeps
+        if periods.is_locked(self.object.date):
+            messages.error(
+                self.request, f"🔒 Repayment dated {self.object.date} is in a closed period and can no longer be deleted."
+            )
+            return redirect(self.success_url)
+        return super().form_valid(form)
@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class MobilemoneyConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'mobilemoney'
+    verbose_name = "Mobile money"
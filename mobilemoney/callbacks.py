@@ -0,0 +1,77 @@
+"""
+Mobile-money callback intake.
+
+`record()` turns a provider's callback body into a MobilePayment row with
+a single INSERT ... ON CONFLICT DO NOTHING and nothing else, so the
+endpoint can acknowledge at once however large the burst. Matching and
+posting happen later in batches (mobilemoney/posting.py).
+
+Providers are named in MOBILE_MONEY_PROVIDERS and each maps to a parser
+in PARSERS. "stub" speaks the M-Pesa C2B format and is what
+`manage.py replay_mobile_payments` sends; it is only listed when
+MOBILE_MONEY_STUB=1. The view refuses every callback until
+MOBILE_MONEY_CALLBACK_TOKEN is set.
+"""
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import MobilePayment
+
+CENTS = Decimal("0.01")
+
+class InvalidCallback(ValueError):
+    pass
+
+
+def parse_mpesa(payload):
+    """Daraja C2B confirmation: TransID, TransAmount, MSISDN, BillRefNumber, TransTime (YYYYMMDDHHMMSS)."""
+    try:
+        transaction_id = str(payload["TransID"]).strip()
+        amount = Decimal(str(payload["TransAmount"]))
+        if amount.is_finite():
+            amount = amount.quantize(CENTS)
+    except (KeyError, TypeError, InvalidOperation) as exc:
+        raise InvalidCallback(f"missing or bad field: {exc}")
+    field = MobilePayment._meta.get_field("amount")
+    if not amount.is_finite() or len(amount.as_tuple().digits) > field.max_digits:
+        raise InvalidCallback(f"TransAmount {amount} does not fit an amount field")
+    if not transaction_id or amount <= 0:
+        raise InvalidCallback("TransID and a positive TransAmount are required")
+    try:
+        paid_at = timezone.make_aware(datetime.strptime(str(payload.get("TransTime", "")), "%Y%m%d%H%M%S"))
+    except ValueError:
+        paid_at = timezone.now()
+    names = (payload.get("FirstName"), payload.get("MiddleName"), payload.get("LastName"))
+    return {
+        "transaction_id": transaction_id[:64],
+        "amount": amount,
+        "phone": str(payload.get("MSISDN") or "")[:30],
+        "reference": str(payload.get("BillRefNumber") or "").strip()[:64],
+        "payer_name": " ".join(name for name in names if name)[:120],
+        "paid_at": paid_at,
+    }
+
+
+PARSERS = {
+    "mpesa": parse_mpesa,
+    "stub": parse_mpesa,
+}
+
+
+def providers():
+    return getattr(settings, "MOBILE_MONEY_PROVIDERS", ["mpesa"])
+
+
+def record(provider, payload):
+    """Stage one callback. Replays of a transaction already staged are ignored."""
+    if not isinstance(payload, dict):
+        raise InvalidCallback("expected a JSON object")
+    fields = PARSERS[provider](payload)
+    MobilePayment.objects.bulk_create(
+        [MobilePayment(provider=provider, payload=payload, **fields)],
+        ignore_conflicts=True,
+    )
+    return fields["transaction_id"]
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from mobilemoney import posting
+
+
+class Command(BaseCommand):
+    help = "Match staged mobile-money payments to loans and savings and post them in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, help="Payments per batch. Defaults to MOBILE_MONEY_BATCH_SIZE.")
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new payments instead of exiting.")
+        parser.add_argument("--poll-interval", type=float, default=5.0, help="Seconds to sleep when idle (--loop).")
+        parser.add_argument("--retry-unmatched", action="store_true",
+                            help="Try previously unmatched payments again, e.g. after fixing member phone numbers.")
+
+    def handle(self, *args, **options):
+        if options["retry_unmatched"]:
+            self.stdout.write(f"Requeued {posting.requeue_unmatched()} unmatched payment(s).")
+
+        while True:
+            started = time.perf_counter()
+            totals = posting.process(batch_size=options["batch_size"], log=self.stdout.write)
+            if totals:
+                elapsed = time.perf_counter() - started
+                summary = ", ".join(f"{count} {label.lower()}" for label, count in sorted(totals.items()))
+                self.stdout.write(self.style.SUCCESS(
+                    f"Posted {sum(totals.values())} payment(s) in {elapsed:.2f}s: {summary}."
+                ))
+            elif not options["loop"]:
+                self.stdout.write("No pending payments.")
+            if not options["loop"]:
+                return
+            time.sleep(options["poll_interval"])
@@ -0,0 +1,50 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from mobilemoney import stub
+
+
+class Command(BaseCommand):
+    help = (
+        "Send stub-provider payment callbacks for existing members and loans, including resent duplicates. "
+        "Posts in-process through the test client unless --url is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=1000, help="Callbacks to send.")
+        parser.add_argument("--duplicates", type=float, default=0.1, help="Share of callbacks that resend an earlier one.")
+        parser.add_argument("--threads", type=int, default=4, help="Concurrent senders.")
+        parser.add_argument("--url", help="Callback URL of a running server, e.g. http://localhost:8000/mobile-money/callback/stub/.")
+        parser.add_argument("--token", help="X-Callback-Token to send. Defaults to MOBILE_MONEY_CALLBACK_TOKEN.")
+        parser.add_argument("--seed", type=int, help="Random seed, for a repeatable load.")
+        parser.add_argument("--save", help="Also write the payloads to this JSON file.")
+        parser.add_argument("--load", help="Replay payloads from this JSON file instead of generating them.")
+
+    def handle(self, *args, **options):
+        if not options["url"] and stub.PROVIDER not in getattr(settings, "MOBILE_MONEY_PROVIDERS", []):
+            raise CommandError(f'Set MOBILE_MONEY_STUB=1 (or add "{stub.PROVIDER}" to MOBILE_MONEY_PROVIDERS) to accept stub callbacks.')
+        if not (options["token"] or getattr(settings, "MOBILE_MONEY_CALLBACK_TOKEN", "")):
+            raise CommandError("Callbacks are refused without a token; set MOBILE_MONEY_CALLBACK_TOKEN or pass --token.")
+        if options["load"]:
+            with open(options["load"]) as fh:
+                sent = json.load(fh)
+        else:
+            try:
+                sent = stub.payloads(options["count"], duplicates=options["duplicates"], seed=options["seed"])
+            except ValueError as exc:
+                raise CommandError(str(exc))
+        if options["save"]:
+            with open(options["save"], "w") as fh:
+                json.dump(sent, fh)
+
+        result = stub.replay(sent, threads=max(1, options["threads"]), url=options["url"], token=options["token"])
+        for key, value in result.items():
+            self.stdout.write(f"  {key:<14} {value}")
+        if result["rejected"]:
+            raise CommandError(f"{result['rejected']} callbacks were not acknowledged.")
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['acknowledged']} callbacks acknowledged ({result['distinct']} distinct transactions). "
+            "Run process_mobile_payments to post them."
+        ))
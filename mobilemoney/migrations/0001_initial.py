@@ -0,0 +1,77 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:04
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('core', '0007_alter_account_report_tag'),
+        ('loans', '0007_member_exposure'),
+        ('receipts', '0001_initial'),
+        ('savings', '0003_stored_balance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MobilePayment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=20)),
+                ('transaction_id', models.CharField(max_length=64)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('phone', models.CharField(blank=True, max_length=30)),
+                ('reference', models.CharField(blank=True, help_text='Account number the payer typed', max_length=64)),
+                ('payer_name', models.CharField(blank=True, max_length=120)),
+                ('paid_at', models.DateTimeField()),
+                ('payload', models.JSONField()),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PaymentMatch',
+            fields=[
+                ('payment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='match', serialize=False, to='mobilemoney.mobilepayment')),
+                ('outcome', models.CharField(choices=[('LOAN', 'Loan repayment'), ('SAVINGS', 'Savings deposit'), ('UNMATCHED', 'Unmatched')], max_length=10)),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('processed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='mobilepayment',
+            constraint=models.UniqueConstraint(fields=('provider', 'transaction_id'), name='mobilepayment_provider_txn_uniq'),
+        ),
+        migrations.AddField(
+            model_name='paymentmatch',
+            name='journal_entry',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.journalentry'),
+        ),
+        migrations.AddField(
+            model_name='paymentmatch',
+            name='loan_repayment',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='loans.loanrepayment'),
+        ),
+        migrations.AddField(
+            model_name='paymentmatch',
+            name='member',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.member'),
+        ),
+        migrations.AddField(
+            model_name='paymentmatch',
+            name='receipt',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='receipts.receipt'),
+        ),
+        migrations.AddField(
+            model_name='paymentmatch',
+            name='savings_transaction',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='savings.savingstransaction'),
+        ),
+        migrations.AddIndex(
+            model_name='paymentmatch',
+            index=models.Index(fields=['outcome', 'processed_at'], name='mobilemoney_outcome_f1e188_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+from django.db import models
+from django.utils import timezone
+
+from core.models import JournalEntry, Member
+from loans.models import LoanRepayment
+from receipts.models import Receipt
+from savings.models import SavingsTransaction
+
+
+class MobilePayment(models.Model):
+    """
+    A payment callback as the provider sent it. Rows are only ever inserted;
+    the unique (provider, transaction_id) pair makes a repeated callback a no-op.
+    """
+    provider = models.CharField(max_length=20)
+    transaction_id = models.CharField(max_length=64)
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    phone = models.CharField(max_length=30, blank=True)
+    reference = models.CharField(max_length=64, blank=True, help_text="Account number the payer typed")
+    payer_name = models.CharField(max_length=120, blank=True)
+    paid_at = models.DateTimeField()
+    payload = models.JSONField()
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["provider", "transaction_id"], name="mobilepayment_provider_txn_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.provider} {self.transaction_id} ({self.amount})"
+
+
+class PaymentMatch(models.Model):
+    """What the posting worker did with a MobilePayment; payments without one are still pending."""
+    LOAN = "LOAN"
+    SAVINGS = "SAVINGS"
+    UNMATCHED = "UNMATCHED"
+    OUTCOME_CHOICES = [
+        (LOAN, "Loan repayment"),
+        (SAVINGS, "Savings deposit"),
+        (UNMATCHED, "Unmatched"),
+    ]
+
+    payment = models.OneToOneField(MobilePayment, primary_key=True, related_name="match", on_delete=models.CASCADE)
+    outcome = models.CharField(max_length=10, choices=OUTCOME_CHOICES)
+    member = models.ForeignKey(Member, null=True, blank=True, on_delete=models.SET_NULL)
+    # No database constraint: the posted row may have moved to the archive (archive/store.py)
+    loan_repayment = models.OneToOneField(
+        LoanRepayment, null=True, blank=True, on_delete=models.SET_NULL, db_constraint=False
+    )
+    savings_transaction = models.OneToOneField(
+        SavingsTransaction, null=True, blank=True, on_delete=models.SET_NULL, db_constraint=False
+    )
+    receipt = models.OneToOneField(Receipt, null=True, blank=True, on_delete=models.SET_NULL)
+    journal_entry = models.ForeignKey(JournalEntry, null=True, blank=True, on_delete=models.SET_NULL)
+    note = models.CharField(max_length=255, blank=True)
+    processed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=["outcome", "processed_at"])]
+
+    def __str__(self):
+        return f"{self.payment} -> {self.outcome}"
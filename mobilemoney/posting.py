@@ -0,0 +1,313 @@
+"""
+Batch matching and posting of staged mobile-money payments.
+
+`process_batch()` claims up to MOBILE_MONEY_BATCH_SIZE pending payments
+(with SKIP LOCKED where the database has it, so several workers can run
+at once) and resolves each one's reference in a few set-based queries:
+
+    L123 / LOAN-123   an open loan           -> loan repayment
+    S45 / SAV-45      an active savings acct -> savings deposit
+    M-000123          a member number        -> deposit to their savings
+    (anything else)   the payer's phone      -> deposit to their savings
+
+A loan repayment clears accrued interest first, then principal; anything
+beyond the loan balance goes to the member's savings. A payment that
+overpays the loan of a member with no savings account, or is dated in a
+closed period (core/periods.py), is left UNMATCHED for manual posting or
+`requeue_unmatched()` once that is fixed. Journal entries,
+repayments, savings transactions, receipts and the PaymentMatch rows are
+all written with bulk_create in one transaction. bulk_create skips the
+posting signals, so the work they would do (savings balances and their
+history, member ledger, rollups, last activity dates, accrual clearance,
+installment settlement, member exposure and cached reports) is done here
+for the whole batch.
+"""
+import re
+import uuid
+from collections import Counter, defaultdict
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from core import dormancy, periods, rollups
+from core.metrics import invalidate_dashboard_metrics
+from core.models import JournalEntry, JournalLine, Member, MemberTransaction
+from loans import eligibility, installments
+from loans.forecast import invalidate_cash_forecast
+from loans.models import Loan, LoanInterestAccrual, LoanRepayment
+from receipts.models import Receipt
+from savings import history
+from savings.models import SavingsAccount, SavingsTransaction
+from savings.postings import cash_account
+
+from .models import MobilePayment, PaymentMatch
+
+LOAN_REFERENCE = re.compile(r"^L(?:OAN)?[-# ]?(\d+)$")
+SAVINGS_REFERENCE = re.compile(r"^S(?:AV)?[-# ]?(\d+)$")
+PHONE_DIGITS = 9  # Kenyan subscriber number without country code or leading 0
+SOURCE = "Mobile"
+ZERO = Decimal("0")
+
+BATCH_SIZE = 2000
+
+
+def _reference(payment):
+    return payment.reference.strip().upper()
+
+
+def _phone_key(phone):
+    digits = re.sub(r"\D", "", phone or "")
+    return digits[-PHONE_DIGITS:] if len(digits) >= PHONE_DIGITS else ""
+
+
+def _claim(batch_size):
+    pending = MobilePayment.objects.filter(match__isnull=True).order_by("pk")
+    if connection.features.has_select_for_update_skip_locked:
+        pending = pending.select_for_update(skip_locked=True, of=("self",))
+    return list(pending[:batch_size])
+
+
+def _resolve(payments):
+    """{payment.pk: (outcome, member_id, loan or savings account, note)}"""
+    loan_ids, account_ids, member_nos, phones = set(), set(), set(), set()
+    for payment in payments:
+        ref = _reference(payment)
+        if match := LOAN_REFERENCE.match(ref):
+            loan_ids.add(int(match[1]))
+        elif match := SAVINGS_REFERENCE.match(ref):
+            account_ids.add(int(match[1]))
+        elif ref:
+            member_nos.add(ref)
+        if key := _phone_key(payment.phone):
+            phones.add(key)
+
+    loans = Loan.objects.filter(pk__in=loan_ids, status__in=eligibility.OPEN_STATUSES).in_bulk()
+    accounts = SavingsAccount.objects.filter(pk__in=account_ids, active=True).in_bulk()
+    by_number = dict(Member.objects.filter(member_no__in=member_nos).values_list("member_no", "pk"))
+    by_phone = {}
+    if phones:
+        candidates = Member.objects.filter(reduce(or_, (Q(phone__endswith=key) for key in phones)))
+        for pk, phone in candidates.order_by("pk").values_list("pk", "phone"):
+            by_phone.setdefault(_phone_key(phone), pk)
+
+    members = set(by_number.values()) | set(by_phone.values()) | {loan.member_id for loan in loans.values()}
+    savings_of = {}
+    for account in SavingsAccount.objects.filter(member_id__in=members, active=True).order_by("pk"):
+        savings_of.setdefault(account.member_id, account)
+
+    resolved = {}
+    for payment in payments:
+        ref = _reference(payment)
+        if match := LOAN_REFERENCE.match(ref):
+            loan = loans.get(int(match[1]))
+            resolved[payment.pk] = (
+                (PaymentMatch.LOAN, loan.member_id, loan, "") if loan
+                else (PaymentMatch.UNMATCHED, None, None, f"No open loan {match[1]}")
+            )
+            continue
+        if match := SAVINGS_REFERENCE.match(ref):
+            account = accounts.get(int(match[1]))
+            resolved[payment.pk] = (
+                (PaymentMatch.SAVINGS, account.member_id, account, "") if account
+                else (PaymentMatch.UNMATCHED, None, None, f"No active savings account {match[1]}")
+            )
+            continue
+        member_id = by_number.get(ref) or by_phone.get(_phone_key(payment.phone))
+        if member_id is None:
+            resolved[payment.pk] = (PaymentMatch.UNMATCHED, None, None, "No member with this reference or phone")
+        elif member_id not in savings_of:
+            resolved[payment.pk] = (PaymentMatch.UNMATCHED, member_id, None, "Member has no active savings account")
+        else:
+            resolved[payment.pk] = (PaymentMatch.SAVINGS, member_id, savings_of[member_id], "")
+    return resolved, savings_of
+
+
+def _loan_positions(loan_ids):
+    """{loan_id: [accrued interest, outstanding principal]} to allocate payments against."""
+    accrued = dict(
+        LoanInterestAccrual.objects.filter(loan_id__in=loan_ids)
+        .values("loan_id").annotate(total=Sum("amount")).values_list("loan_id", "total")
+    )
+    repaid = dict(
+        LoanRepayment.objects.filter(loan_id__in=loan_ids)
+        .values("loan_id").annotate(total=Sum("principal_component")).values_list("loan_id", "total")
+    )
+    principal = dict(Loan.objects.filter(pk__in=loan_ids).values_list("pk", "principal"))
+    return {
+        loan_id: [max(ZERO, accrued.get(loan_id) or ZERO), max(ZERO, principal[loan_id] - (repaid.get(loan_id) or ZERO))]
+        for loan_id in loan_ids
+    }
+
+
+def process_batch(batch_size=None):
+    """Match and post one batch of pending payments. Returns a Counter of outcomes."""
+    batch_size = batch_size or getattr(settings, "MOBILE_MONEY_BATCH_SIZE", 500)
+    with transaction.atomic():
+        payments = _claim(batch_size)
+        if not payments:
+            return Counter()
+        resolved, savings_of = _resolve(payments)
+        positions = _loan_positions({target.pk for outcome, _, target, _ in resolved.values() if outcome == PaymentMatch.LOAN})
+        cash = cash_account()
+        locked_through = periods.locked_through()
+
+        entries, lines, repayments, deposits, receipts, clearances, matches = [], [], [], [], [], [], []
+        for payment in payments:
+            outcome, member_id, target, note = resolved[payment.pk]
+            paid_on = timezone.localdate(payment.paid_at)
+            if outcome != PaymentMatch.UNMATCHED and locked_through and paid_on <= locked_through:
+                outcome, note = PaymentMatch.UNMATCHED, f"Paid on {paid_on}, in a closed period"
+            if outcome == PaymentMatch.LOAN:
+                position = positions[target.pk]
+                interest = min(payment.amount, position[0])
+                principal = min(payment.amount - interest, position[1])
+                excess = payment.amount - interest - principal
+                savings = savings_of.get(member_id)
+                if excess and savings is None:
+                    outcome = PaymentMatch.UNMATCHED
+                    note = f"Overpays loan #{target.pk} by {excess:,.2f}; member has no active savings account"
+            match = PaymentMatch(payment=payment, outcome=outcome, member_id=member_id, note=note)
+            matches.append(match)
+            if outcome == PaymentMatch.UNMATCHED:
+                continue
+
+            entry = JournalEntry(
+                date=paid_on,
+                memo=f"{payment.provider} payment {payment.transaction_id}",
+                reference=f"MM-{payment.transaction_id}"[:50],
+            )
+            entries.append(entry)
+            match.journal_entry = entry
+            lines.append(JournalLine(entry=entry, account=cash, debit=payment.amount))
+
+            amount, repayment, deposit = payment.amount, None, None
+            if outcome == PaymentMatch.LOAN:
+                position[0] -= interest
+                position[1] -= principal
+                repayment = LoanRepayment(
+                    loan=target, date=paid_on, amount=interest + principal,
+                    principal_component=principal, interest_component=interest,
+                    excess_routed_to_savings=excess, source=SOURCE, journal_entry=entry,
+                )
+                repayments.append(repayment)
+                match.loan_repayment = repayment
+                lines.append(JournalLine(entry=entry, account_id=target.principal_account_id, credit=principal))
+                if interest:
+                    lines.append(JournalLine(entry=entry, account_id=target.interest_account_id, credit=interest))
+                    clearances.append((repayment, paid_on, interest))
+                if excess:
+                    deposit = SavingsTransaction(
+                        savings_account=savings, date=paid_on, transaction_type=SavingsTransaction.DEPOSIT,
+                        amount=excess, journal_entry=entry, source=SOURCE,
+                        notes=f"Loan #{target.pk} overpayment ({payment.transaction_id})",
+                    )
+            else:
+                deposit = SavingsTransaction(
+                    savings_account=target, date=paid_on, transaction_type=SavingsTransaction.DEPOSIT,
+                    amount=amount, journal_entry=entry, source=SOURCE,
+                    notes=f"{payment.provider} {payment.transaction_id}",
+                )
+            if deposit is not None:
+                deposits.append(deposit)
+                match.savings_transaction = deposit
+                lines.append(JournalLine(entry=entry, account_id=deposit.savings_account.account_id, credit=deposit.amount))
+
+            receipt = Receipt(
+                receipt_no=str(uuid.uuid4()),
+                member_id=member_id,
+                type=Receipt.LOAN if repayment else Receipt.SAVINGS,
+                amount=amount,
+                issued_on=payment.paid_at,
+                payment_method=payment.provider,
+                reference_note=f"{payment.provider} {payment.transaction_id}",
+                loan_repayment=repayment,
+                savings_transaction=None if repayment else deposit,
+                journal_entry=entry,
+            )
+            receipts.append(receipt)
+            match.receipt = receipt
+
+        # Parents first, so each bulk_create sees the primary keys it points at.
+        JournalEntry.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+        JournalLine.objects.bulk_create(lines, batch_size=BATCH_SIZE)
+        LoanRepayment.objects.bulk_create(repayments, batch_size=BATCH_SIZE)
+        SavingsTransaction.objects.bulk_create(deposits, batch_size=BATCH_SIZE)
+        Receipt.objects.bulk_create(receipts, batch_size=BATCH_SIZE)
+        PaymentMatch.objects.bulk_create(matches, batch_size=BATCH_SIZE)
+        LoanInterestAccrual.objects.bulk_create(
+            [
+                LoanInterestAccrual(
+                    loan_id=repayment.loan_id, period=paid_on.replace(day=1), kind=LoanInterestAccrual.CLEARED,
+                    amount=-interest, repayment=repayment, journal_entry=repayment.journal_entry,
+                )
+                for repayment, paid_on, interest in clearances
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        _follow_up(repayments, deposits)
+
+    return Counter(match.outcome for match in matches)
+
+
+def _follow_up(repayments, deposits):
+    """What the posting signals would have done, once for the whole batch."""
+    balances = defaultdict(lambda: ZERO)
+    for deposit in deposits:
+        balances[deposit.savings_account_id] += deposit.amount
+    for account_id, amount in balances.items():
+        SavingsAccount.objects.filter(pk=account_id).update(
+            current_balance=F("current_balance") + amount, version=F("version") + 1
+        )
+    history.apply(added=[row for deposit in deposits for row in history.effects(deposit)])
+
+    MemberTransaction.objects.bulk_create(
+        [
+            MemberTransaction(
+                member_id=deposit.savings_account.member_id,
+                date=deposit.date,
+                amount=deposit.amount,
+                description=deposit.notes or f"{deposit.transaction_type} via Savings",
+                transaction_type=f"Savings {deposit.transaction_type.title()}",
+                source_model="SavingsTransaction",
+                source_id=deposit.pk,
+                journal_entry=deposit.journal_entry,
+            )
+            for deposit in deposits
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    rollups.apply(added=[row for posted in [*repayments, *deposits] for row in rollups.contributions(posted)])
+    dormancy.touch([*repayments, *deposits])
+    installments.settle({repayment.loan_id for repayment in repayments})
+
+    member_ids = {repayment.loan.member_id for repayment in repayments}
+    member_ids |= {deposit.savings_account.member_id for deposit in deposits}
+    if member_ids:
+        eligibility.refresh(Member.objects.filter(pk__in=member_ids))
+    invalidate_dashboard_metrics()
+    invalidate_cash_forecast()
+
+
+def process(batch_size=None, max_batches=None, log=None):
+    """Post pending payments batch by batch until none are left. Returns the outcome totals."""
+    log = log or (lambda message: None)
+    totals = Counter()
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        outcome = process_batch(batch_size)
+        if not outcome:
+            break
+        batches += 1
+        totals.update(outcome)
+        log(f"batch {batches}: " + ", ".join(f"{count} {label.lower()}" for label, count in sorted(outcome.items())))
+    return totals
+
+
+def requeue_unmatched():
+    """Forget UNMATCHED outcomes so the next run tries those payments again (e.g. after adding a phone number)."""
+    return PaymentMatch.objects.filter(outcome=PaymentMatch.UNMATCHED).delete()[0]
@@ -0,0 +1,132 @@
+"""
+Local stand-in for a mobile-money provider.
+
+`payloads()` builds M-Pesa C2B confirmations for existing members - loan
+repayments quoting "L<loan id>", savings deposits quoting the member
+number or nothing but the phone, and a few that match nobody - and
+repeats a share of them the way providers resend unacknowledged
+callbacks. `replay()` POSTs them concurrently, either in-process through
+the test client or to a running server, and reports how it went.
+"""
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Member
+from loans.models import Loan
+
+PROVIDER = "stub"
+
+
+def _transaction_id():
+    return "STUB" + uuid.uuid4().hex[:12].upper()
+
+
+def payloads(count, duplicates=0.1, seed=None):
+    rng = random.Random(seed)
+    loans = list(Loan.objects.filter(status=Loan.ACTIVE).values_list("pk", "member__phone", "principal", "tenor_months"))
+    members = list(Member.objects.exclude(phone="").values_list("member_no", "phone", "full_name"))
+    if not members:
+        raise ValueError("No members with phone numbers to pay as; generate some data first.")
+
+    now = timezone.localtime()
+    sent = []
+    for _ in range(count):
+        if sent and rng.random() < duplicates:
+            sent.append(rng.choice(sent))
+            continue
+        roll = rng.random()
+        if loans and roll < 0.5:
+            loan_id, phone, principal, tenor = rng.choice(loans)
+            amount = (principal / max(tenor, 1) * Decimal(rng.uniform(0.5, 1.5))).quantize(Decimal("1"))
+            reference, name = f"L{loan_id}", ""
+        else:
+            member_no, phone, name = rng.choice(members)
+            amount = Decimal(rng.randrange(100, 20000, 50))
+            reference = member_no if roll < 0.8 else ""
+            if roll > 0.95:
+                phone, reference = f"0700{rng.randrange(100000, 999999)}", "UNKNOWN"
+        sent.append({
+            "TransactionType": "Pay Bill",
+            "TransID": _transaction_id(),
+            "TransTime": now.strftime("%Y%m%d%H%M%S"),
+            "TransAmount": str(max(amount, Decimal("10"))),
+            "BusinessShortCode": "600000",
+            "BillRefNumber": reference,
+            "MSISDN": phone,
+            "FirstName": name.split(" ")[0] if name else "",
+        })
+    return sent
+
+
+def _poster(url, token):
+    """A function that POSTs one payload and returns the HTTP status."""
+    headers = {"X-Callback-Token": token} if token else {}
+    if url:
+        def post(payload):
+            request = urllib.request.Request(
+                url, data=json.dumps(payload).encode(), method="POST",
+                headers={"Content-Type": "application/json", **headers},
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    return response.status
+            except urllib.error.HTTPError as exc:
+                return exc.code
+        return post
+
+    client = Client(HTTP_HOST=(settings.ALLOWED_HOSTS or ["localhost"])[0].lstrip(".") or "localhost")
+    path = reverse("mobilemoney_callback", args=[PROVIDER])
+
+    def post(payload):
+        return client.post(path, json.dumps(payload), content_type="application/json",
+                           **{f"HTTP_{key.upper().replace('-', '_')}": value for key, value in headers.items()}).status_code
+    return post
+
+
+def replay(sent, threads=4, url=None, token=None):
+    """POST `sent` across `threads` threads. Returns counts by HTTP status, timing and throughput."""
+    token = getattr(settings, "MOBILE_MONEY_CALLBACK_TOKEN", "") if token is None else token
+    statuses = Counter()
+    lock = threading.Lock()
+    shares = [sent[i::threads] for i in range(threads)]
+
+    def run(share):
+        post = _poster(url, token)
+        try:
+            for payload in share:
+                status = post(payload)
+                with lock:
+                    statuses[status] += 1
+        finally:
+            connections.close_all()
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=run, args=(share,)) for share in shares if share]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "sent": len(sent),
+        "distinct": len({payload["TransID"] for payload in sent}),
+        "acknowledged": statuses.get(200, 0),
+        "rejected": sum(count for status, count in statuses.items() if status != 200),
+        "statuses": dict(statuses),
+        "seconds": round(elapsed, 3),
+        "per_second": round(len(sent) / elapsed, 1) if elapsed else None,
+    }
@@ -0,0 +1,8 @@
+from jobs.queue import task
+from mobilemoney import posting
+
+
+@task("mobilemoney.process", max_attempts=3)
+def process_payments(job, batch_size=None):
+    totals = posting.process(batch_size=batch_size, log=lambda message: job.progress(0, message=message))
+    return dict(totals)
@@ -0,0 +1,167 @@
+import json
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.models import Account, AccountType, JournalLine, Member, ReportTag
+from loans import accrual
+from loans.models import Loan, LoanInterestAccrual, LoanProduct, LoanRepayment
+from savings.models import SavingsAccount, SavingsTransaction
+
+from . import callbacks, posting
+from .models import MobilePayment, PaymentMatch
+
+
+def mpesa(transaction_id, amount, reference="", phone="254700000001"):
+    return {
+        "TransID": transaction_id,
+        "TransAmount": str(amount),
+        "MSISDN": phone,
+        "BillRefNumber": reference,
+        "TransTime": "20260105093000",
+        "FirstName": "Wanjiru",
+    }
+
+
+@override_settings(MOBILE_MONEY_CALLBACK_TOKEN="s3cret")
+class CallbackTests(TestCase):
+    def post(self, payload, provider="mpesa", token="s3cret"):
+        headers = {"HTTP_X_CALLBACK_TOKEN": token} if token is not None else {}
+        return self.client.post(
+            reverse("mobilemoney_callback", args=[provider]), json.dumps(payload), content_type="application/json",
+            **headers,
+        )
+
+    def test_unauthenticated_callbacks_are_refused(self):
+        self.assertEqual(self.post(mpesa("QKX0", "150.00"), token=None).status_code, 403)
+        self.assertEqual(self.post(mpesa("QKX0", "150.00"), token="guess").status_code, 403)
+        with override_settings(MOBILE_MONEY_CALLBACK_TOKEN=""):
+            self.assertEqual(self.post(mpesa("QKX0", "150.00"), token="").status_code, 403)
+        self.assertFalse(MobilePayment.objects.exists())
+
+    def test_stub_provider_is_opt_in(self):
+        self.assertEqual(self.post(mpesa("QKX0", "150.00"), provider="stub").status_code, 404)
+
+    def test_replayed_callback_is_staged_once(self):
+        first = self.post(mpesa("QKX1", "150.00", "M-000001"))
+        replay = self.post(mpesa("QKX1", "150.00", "M-000001"))
+
+        self.assertEqual((first.status_code, replay.status_code), (200, 200))
+        self.assertEqual(MobilePayment.objects.filter(provider="mpesa", transaction_id="QKX1").count(), 1)
+
+    def test_bad_amounts_are_rejected(self):
+        for amount in ["NaN", "sNaN", "Infinity", "1e20", "0", "-5", "abc"]:
+            with self.subTest(amount=amount):
+                self.assertEqual(self.post(mpesa(f"BAD-{amount}", amount)).status_code, 400)
+        self.assertFalse(MobilePayment.objects.exists())
+
+    def test_amount_is_rounded_to_cents(self):
+        self.assertEqual(callbacks.parse_mpesa(mpesa("QKX2", "12.345"))["amount"], Decimal("12.34"))
+
+
+class BatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        def account(code, name, account_type, tag):
+            return Account.objects.create(code=code, name=name, type=account_type, report_tag=tag)
+
+        cls.cash = account("1010", "Cash", AccountType.ASSET, ReportTag.ASSET_CASH_EQUITY)
+        cls.principal_gl = account("1200", "Loans", AccountType.ASSET, ReportTag.ASSET_LOANS_PRINCIPAL)
+        cls.interest_gl = account("1210", "Interest receivable", AccountType.ASSET, ReportTag.ASSET_LOAN_INTEREST)
+        cls.savings_gl = account("2010", "Members savings", AccountType.LIABILITY, ReportTag.LIAB_MEMBERS_SAVINGS)
+
+        cls.member = Member.objects.create(member_no="M-000001", full_name="Wanjiru Kariuki", phone="0700000001")
+        cls.savings = SavingsAccount.objects.create(member=cls.member, account=cls.savings_gl)
+        cls.saver = Member.objects.create(member_no="M-000002", full_name="Otieno Odhiambo", phone="0711000002")
+        cls.saver_account = SavingsAccount.objects.create(member=cls.saver, account=cls.savings_gl)
+        cls.borrower = Member.objects.create(member_no="M-000003", full_name="Achieng Wafula", phone="0722000003")
+
+        product = LoanProduct.objects.create(
+            name="Development Loan", annual_rate=Decimal("12.00"), interest_method=LoanProduct.REDUCING,
+            default_tenor_months=12,
+        )
+        loan = dict(
+            product=product, principal=Decimal("10000.00"), annual_rate=Decimal("12.00"),
+            interest_method=LoanProduct.REDUCING, disbursed_on=date(2025, 11, 1), tenor_months=12,
+            principal_account=cls.principal_gl, interest_account=cls.interest_gl,
+        )
+        cls.loan = Loan.objects.create(member=cls.member, **loan)
+        cls.unsaved_loan = Loan.objects.create(member=cls.borrower, **loan)
+        for target in (cls.loan, cls.unsaved_loan):
+            LoanInterestAccrual.objects.create(loan=target, period=date(2025, 12, 1), amount=Decimal("100.00"))
+
+    def stage(self, transaction_id, amount, reference="", phone=""):
+        callbacks.record("mpesa", mpesa(transaction_id, amount, reference, phone))
+        return MobilePayment.objects.get(transaction_id=transaction_id)
+
+    def test_loan_payment_clears_interest_then_principal_and_saves_the_excess(self):
+        payment = self.stage("QL1", "10350.00", f"L{self.loan.pk}")
+
+        self.assertEqual(posting.process_batch(), {PaymentMatch.LOAN: 1})
+
+        match = PaymentMatch.objects.get(payment=payment)
+        repayment = match.loan_repayment
+        self.assertEqual(
+            (repayment.interest_component, repayment.principal_component, repayment.excess_routed_to_savings),
+            (Decimal("100.00"), Decimal("10000.00"), Decimal("250.00")),
+        )
+        self.assertEqual(accrual.accrued_balances([self.loan.pk]), {})
+        self.savings.refresh_from_db()
+        self.assertEqual(self.savings.current_balance, Decimal("250.00"))
+
+        lines = match.journal_entry.lines.values("account_id").annotate(debit=Sum("debit"), credit=Sum("credit"))
+        self.assertEqual(
+            {row["account_id"]: (row["debit"], row["credit"]) for row in lines},
+            {
+                self.cash.pk: (Decimal("10350.00"), 0),
+                self.principal_gl.pk: (0, Decimal("10000.00")),
+                self.interest_gl.pk: (0, Decimal("100.00")),
+                self.savings_gl.pk: (0, Decimal("250.00")),
+            },
+        )
+
+    def test_payments_in_one_batch_allocate_against_the_running_balance(self):
+        self.stage("QL2", "5000.00", f"LOAN-{self.loan.pk}")
+        self.stage("QL3", "5300.00", f"LOAN-{self.loan.pk}")
+
+        posting.process_batch()
+
+        components = list(
+            LoanRepayment.objects.filter(loan=self.loan).order_by("pk")
+            .values_list("interest_component", "principal_component", "excess_routed_to_savings")
+        )
+        self.assertEqual(components, [
+            (Decimal("100.00"), Decimal("4900.00"), Decimal("0.00")),
+            (Decimal("0.00"), Decimal("5100.00"), Decimal("200.00")),
+        ])
+
+    def test_references_and_phones_resolve_to_savings(self):
+        self.stage("QS1", "300.00", f"S{self.saver_account.pk}")
+        self.stage("QS2", "200.00", "m-000002")
+        self.stage("QS3", "100.00", "", phone="254711000002")
+
+        self.assertEqual(posting.process_batch(), {PaymentMatch.SAVINGS: 3})
+        self.saver_account.refresh_from_db()
+        self.assertEqual(self.saver_account.current_balance, Decimal("600.00"))
+        self.assertEqual(SavingsTransaction.objects.filter(savings_account=self.saver_account).count(), 3)
+
+    def test_unresolvable_payments_are_left_unmatched_and_unposted(self):
+        self.stage("QU1", "100.00", "L999999")
+        self.stage("QU2", "100.00", "nobody", phone="254799999999")
+        overpaid = self.stage("QU3", "20000.00", f"L{self.unsaved_loan.pk}")
+
+        self.assertEqual(posting.process_batch(), {PaymentMatch.UNMATCHED: 3})
+        self.assertFalse(LoanRepayment.objects.exists())
+        self.assertFalse(JournalLine.objects.exists())
+        self.assertIn("no active savings account", PaymentMatch.objects.get(payment=overpaid).note)
+
+    def test_processed_payments_are_not_claimed_again(self):
+        self.stage("QS4", "300.00", f"S{self.saver_account.pk}")
+
+        self.assertEqual(posting.process_batch(), {PaymentMatch.SAVINGS: 1})
+        self.assertEqual(posting.process_batch(), {})
+        self.saver_account.refresh_from_db()
+        self.assertEqual(self.saver_account.current_balance, Decimal("300.00"))
@@ -0,0 +1,8 @@
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path("", views.payment_list, name="mobilepayment_list"),
+    path("callback/<slug:provider>/", views.callback, name="mobilemoney_callback"),
+]
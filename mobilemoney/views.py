@@ -0,0 +1,67 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.db.models import Count, Sum
+from django.http import Http404, JsonResponse
+from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from core.db_routing import use_replica
+
+from . import callbacks
+from .models import MobilePayment, PaymentMatch
+
+ACCEPTED = {"ResultCode": 0, "ResultDesc": "Accepted"}
+
+
+@csrf_exempt
+@require_POST
+def callback(request, provider):
+    """
+    Provider confirmation URL. Stages the payment and acknowledges; nothing
+    is matched or posted here (see mobilemoney/posting.py).
+    """
+    if provider not in callbacks.providers():
+        raise Http404("Unknown provider")
+    # Fails closed: staged payments get posted, so without a token nobody may stage them
+    token = getattr(settings, "MOBILE_MONEY_CALLBACK_TOKEN", "")
+    if not token or not constant_time_compare(request.headers.get("X-Callback-Token", ""), token):
+        return JsonResponse({"ResultCode": 1, "ResultDesc": "Forbidden"}, status=403)
+    try:
+        callbacks.record(provider, json.loads(request.body))
+    except (ValueError, UnicodeDecodeError) as exc:  # InvalidCallback and JSONDecodeError are ValueErrors
+        return JsonResponse({"ResultCode": 1, "ResultDesc": f"Rejected: {exc}"}, status=400)
+    return JsonResponse(ACCEPTED)
+
+
+@login_required
+@use_replica()
+def payment_list(request):
+    """Staged payments with what the worker made of them; ?outcome=PENDING|LOAN|SAVINGS|UNMATCHED."""
+    outcome = request.GET.get("outcome", "")
+    payments = MobilePayment.objects.select_related("match__member").order_by("-pk")
+    if outcome == "PENDING":
+        payments = payments.filter(match__isnull=True)
+    elif outcome in dict(PaymentMatch.OUTCOME_CHOICES):
+        payments = payments.filter(match__outcome=outcome)
+
+    totals = {
+        row["outcome"]: row
+        for row in PaymentMatch.objects.values("outcome").annotate(count=Count("pk"), amount=Sum("payment__amount"))
+    }
+    pending = MobilePayment.objects.filter(match__isnull=True).aggregate(count=Count("pk"), amount=Sum("amount"))
+    page = Paginator(payments, 100).get_page(request.GET.get("page"))
+    querystring = request.GET.copy()
+    querystring.pop("page", None)
+    return render(request, "mobilemoney/payment_list.html", {
+        "page_obj": page,
+        "outcome": outcome,
+        "outcomes": PaymentMatch.OUTCOME_CHOICES,
+        "totals": [(label, totals.get(code, {})) for code, label in PaymentMatch.OUTCOME_CHOICES],
+        "pending": pending,
+        "querystring": querystring.urlencode(),
+    })
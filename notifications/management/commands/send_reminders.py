@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from notifications import reminders
+from notifications.models import ReminderLog
+
+
+class Command(BaseCommand):
+    help = "Send installment reminders by SMS or email. Safe to re-run: sent reminders are not repeated."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--kind", choices=[k for k, _ in ReminderLog.KIND_CHOICES], default=ReminderLog.UPCOMING)
+        parser.add_argument("--days", type=int, help="Upcoming: installments due within this many days.")
+        parser.add_argument("--channel", choices=reminders.CHANNELS, default=reminders.AUTO,
+                            help="auto prefers SMS and falls back to email.")
+        parser.add_argument("--batch-size", type=int)
+        parser.add_argument("--rate", type=float, help="Maximum messages per second.")
+        parser.add_argument("--dry-run", action="store_true", help="Render but do not send or log.")
+
+    def handle(self, *args, **options):
+        totals = reminders.dispatch(
+            kind=options["kind"],
+            days=options["days"],
+            channel=options["channel"],
+            batch_size=options["batch_size"],
+            rate=options["rate"],
+            dry_run=options["dry_run"],
+            log=self.stderr.write,
+        )
+        summary = ", ".join(f"{count} {label.replace('_', ' ')}" for label, count in sorted(totals.items()))
+        self.stdout.write(self.style.SUCCESS(f"{options['kind'].title()} reminders: {summary or 'nothing to send'}."))
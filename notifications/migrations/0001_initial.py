@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('loans', '0006_loanschedule_loanschedule_paid_due_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('upcoming', 'Installment due soon'), ('overdue', 'Installment overdue')], max_length=10)),
+                ('channel', models.CharField(choices=[('sms', 'SMS'), ('email', 'Email')], max_length=10)),
+                ('recipient', models.CharField(max_length=254)),
+                ('status', models.CharField(choices=[('SENT', 'Sent'), ('FAILED', 'Failed')], max_length=10)),
+                ('error', models.TextField(blank=True)),
+                ('sent_at', models.DateTimeField()),
+                ('installment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='loans.loanschedule')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['sent_at'], name='notificatio_sent_at_c3933c_idx')],
+                'unique_together': {('installment', 'kind')},
+            },
+        ),
+    ]
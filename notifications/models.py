@@ -0,0 +1,42 @@
+from django.db import models
+
+from loans.models import LoanSchedule
+
+
+class ReminderLog(models.Model):
+    """One row per installment and reminder kind; a SENT row stops that reminder going out again."""
+    UPCOMING = "upcoming"
+    OVERDUE = "overdue"
+    KIND_CHOICES = [
+        (UPCOMING, "Installment due soon"),
+        (OVERDUE, "Installment overdue"),
+    ]
+
+    SMS = "sms"
+    EMAIL = "email"
+    CHANNEL_CHOICES = [
+        (SMS, "SMS"),
+        (EMAIL, "Email"),
+    ]
+
+    SENT = "SENT"
+    FAILED = "FAILED"
+    STATUS_CHOICES = [
+        (SENT, "Sent"),
+        (FAILED, "Failed"),
+    ]
+
+    installment = models.ForeignKey(LoanSchedule, related_name="reminders", on_delete=models.CASCADE)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    recipient = models.CharField(max_length=254)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    error = models.TextField(blank=True)
+    sent_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("installment", "kind")
+        indexes = [models.Index(fields=["sent_at"])]
+
+    def __str__(self):
+        return f"{self.kind} reminder for installment {self.installment_id} ({self.status})"
@@ -0,0 +1,135 @@
+"""
+Batched installment reminders.
+
+`dispatch()` walks the unpaid installments from loans/installments.py in
+batches. For each batch it renders one message per installment, sends the
+whole batch over a single email connection (EMAIL_BACKEND) and a single
+SMS backend connection (SMS_BACKEND), and records the outcome in
+ReminderLog. Installments that already have a SENT log for the same
+kind are excluded, so a re-run only picks up what is new or failed.
+Sending is paced to REMINDER_RATE_PER_SECOND.
+"""
+import time
+from collections import Counter
+from itertools import islice
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Exists, OuterRef
+from django.template.loader import get_template
+from django.utils import timezone
+
+from loans import installments
+
+from .models import ReminderLog
+from .sms import SmsMessage, get_sms_backend
+
+AUTO = "auto"
+CHANNELS = [AUTO, ReminderLog.SMS, ReminderLog.EMAIL]
+
+SUBJECTS = {
+    ReminderLog.UPCOMING: "Loan installment due on {due:%d %b %Y}",
+    ReminderLog.OVERDUE: "Overdue loan installment ({due:%d %b %Y})",
+}
+
+
+def pending(kind, days=None, as_of=None):
+    """Installments that still need a `kind` reminder."""
+    days = getattr(settings, "REMINDER_DAYS_AHEAD", 3) if days is None else days
+    sent = ReminderLog.objects.filter(installment=OuterRef("pk"), kind=kind, status=ReminderLog.SENT)
+    return installments.for_kind(kind, days, as_of).exclude(Exists(sent))
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _route(member, channel):
+    if channel in (AUTO, ReminderLog.SMS) and member.phone:
+        return ReminderLog.SMS, member.phone
+    if channel in (AUTO, ReminderLog.EMAIL) and member.email:
+        return ReminderLog.EMAIL, member.email
+    return None, None
+
+
+def _send(backend, messages):
+    """Send a batch; return an error string for the whole batch, or ''."""
+    if not messages:
+        return ""
+    try:
+        backend.send_messages(messages)
+    except Exception as exc:  # one bad batch must not stop the run
+        return f"{exc.__class__.__name__}: {exc}"
+    return ""
+
+
+def dispatch(kind=ReminderLog.UPCOMING, days=None, channel=AUTO, batch_size=None, rate=None,
+             dry_run=False, as_of=None, log=None):
+    """
+    Send `kind` reminders. Returns a Counter of sent / failed / no_contact
+    (and would_send on a dry run).
+    """
+    log = log or (lambda message: None)
+    batch_size = batch_size or getattr(settings, "REMINDER_BATCH_SIZE", 200)
+    rate = rate or getattr(settings, "REMINDER_RATE_PER_SECOND", 50)
+    template = get_template(f"notifications/reminder_{kind}.txt")
+    totals = Counter()
+
+    # Fix the work list up front; the batches below write to the table the filter reads.
+    ids = list(pending(kind, days, as_of).values_list("pk", flat=True))
+    log(f"{len(ids)} {kind} reminder(s) to send")
+    with get_connection() as mail, get_sms_backend() as sms:
+        for chunk in _batches(ids, batch_size):
+            batch = installments.unpaid().filter(pk__in=chunk).order_by("due_date", "pk")
+            started = time.monotonic()
+            outgoing = {ReminderLog.SMS: [], ReminderLog.EMAIL: []}
+            routed = []
+            for installment in batch:
+                member = installment.loan.member
+                via, recipient = _route(member, channel)
+                if via is None:
+                    totals["no_contact"] += 1
+                    continue
+                body = template.render({
+                    "member": member, "loan": installment.loan, "installment": installment,
+                }).strip()
+                if via == ReminderLog.SMS:
+                    outgoing[via].append(SmsMessage(recipient, body))
+                else:
+                    subject = SUBJECTS[kind].format(due=installment.due_date)
+                    outgoing[via].append(EmailMessage(subject, body, to=[recipient], connection=mail))
+                routed.append((installment, via, recipient))
+
+            if dry_run:
+                totals["would_send"] += len(routed)
+                continue
+
+            errors = {
+                ReminderLog.SMS: _send(sms, outgoing[ReminderLog.SMS]),
+                ReminderLog.EMAIL: _send(mail, outgoing[ReminderLog.EMAIL]),
+            }
+            now = timezone.now()
+            ReminderLog.objects.bulk_create(
+                [
+                    ReminderLog(
+                        installment=installment, kind=kind, channel=via, recipient=recipient,
+                        status=ReminderLog.FAILED if errors[via] else ReminderLog.SENT,
+                        error=errors[via], sent_at=now,
+                    )
+                    for installment, via, recipient in routed
+                ],
+                update_conflicts=True,
+                unique_fields=["installment", "kind"],
+                update_fields=["channel", "recipient", "status", "error", "sent_at"],
+            )
+            for installment, via, recipient in routed:
+                totals["failed" if errors[via] else "sent"] += 1
+            log(f"{totals['sent']} sent, {totals['failed']} failed")
+
+            # Pace the run: never faster than `rate` messages a second.
+            remaining = len(routed) / rate - (time.monotonic() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+    return totals
@@ -0,0 +1,76 @@
+"""
+Pluggable SMS sending, modelled on django.core.mail backends.
+
+SMS_BACKEND names the class to use. The bundled ones are
+ConsoleSmsBackend, a local stand-in that prints each message, and
+LocmemSmsBackend, which collects messages in `outbox`. A gateway
+integration subclasses BaseSmsBackend and implements send_messages().
+"""
+import sys
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+outbox = []
+
+
+class SmsMessage:
+    def __init__(self, to, body, sender=None):
+        self.to = to
+        self.body = body
+        self.sender = sender or getattr(settings, "SMS_SENDER_ID", "")
+
+    def __repr__(self):
+        return f"<SmsMessage to={self.to!r}>"
+
+
+class BaseSmsBackend:
+    def __init__(self, fail_silently=False, **kwargs):
+        self.fail_silently = fail_silently
+
+    def open(self):
+        return False
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def send_messages(self, messages):
+        """Send a batch of SmsMessage; return how many were sent."""
+        raise NotImplementedError("SMS backends must implement send_messages()")
+
+
+class ConsoleSmsBackend(BaseSmsBackend):
+    def __init__(self, *args, stream=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stream = stream or sys.stdout
+        self._lock = threading.RLock()
+
+    def send_messages(self, messages):
+        with self._lock:
+            for message in messages:
+                self.stream.write(f"SMS from {message.sender} to {message.to}\n{message.body}\n{'-' * 40}\n")
+            self.stream.flush()
+        return len(messages)
+
+
+class LocmemSmsBackend(BaseSmsBackend):
+    def send_messages(self, messages):
+        outbox.extend(messages)
+        return len(messages)
+
+
+def get_sms_backend(backend=None, **kwargs):
+    return import_string(backend or getattr(settings, "SMS_BACKEND", "notifications.sms.ConsoleSmsBackend"))(**kwargs)
+
+
+def send_sms(to, body, sender=None, fail_silently=False):
+    with get_sms_backend(fail_silently=fail_silently) as backend:
+        return backend.send_messages([SmsMessage(to, body, sender)])
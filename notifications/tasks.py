@@ -0,0 +1,9 @@
+from jobs.queue import task
+from notifications import reminders
+from notifications.models import ReminderLog
+
+
+@task("notifications.send_reminders", max_attempts=2)
+def send_reminders(job, kind=ReminderLog.UPCOMING, days=None, channel=reminders.AUTO):
+    totals = reminders.dispatch(kind=kind, days=days, channel=channel, log=lambda message: job.progress(0, message=message))
+    return dict(totals)
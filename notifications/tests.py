@@ -0,0 +1,77 @@
+from datetime import date
+from decimal import Decimal
+
+from django.core import mail
+from django.test import TestCase, override_settings
+
+from core.models import Account, AccountType, Member, ReportTag
+from loans.models import Loan, LoanProduct, LoanSchedule
+
+from . import reminders, sms
+from .models import ReminderLog
+
+AS_OF = date(2025, 2, 27)
+
+
+class BrokenSmsBackend(sms.BaseSmsBackend):
+    def send_messages(self, messages):
+        raise ConnectionError("gateway down")
+
+
+@override_settings(
+    SMS_BACKEND="notifications.sms.LocmemSmsBackend", EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    REMINDER_RATE_PER_SECOND=10000,
+)
+class DispatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        principal = Account.objects.create(
+            code="1200", name="Loans", type=AccountType.ASSET, report_tag=ReportTag.ASSET_LOANS_PRINCIPAL
+        )
+        interest = Account.objects.create(
+            code="1210", name="Interest receivable", type=AccountType.ASSET, report_tag=ReportTag.ASSET_LOAN_INTEREST
+        )
+        product = LoanProduct.objects.create(
+            name="Development Loan", annual_rate=Decimal("12.00"), interest_method=LoanProduct.REDUCING,
+            default_tenor_months=12,
+        )
+        contacts = [{"phone": "0712345678"}, {"email": "otieno@example.com"}, {}]
+        for n, contact in enumerate(contacts, 1):
+            member = Member.objects.create(member_no=f"M-{n:06d}", full_name=f"Member {n}", **contact)
+            loan = Loan.objects.create(
+                member=member, product=product, principal=Decimal("10000.00"), annual_rate=Decimal("12.00"),
+                interest_method=LoanProduct.REDUCING, disbursed_on=date(2025, 1, 1), tenor_months=12,
+                principal_account=principal, interest_account=interest,
+            )
+            LoanSchedule.objects.create(
+                loan=loan, installment_no=1, due_date=date(2025, 3, 1),
+                principal_due=Decimal("833.33"), interest_due=Decimal("100.00"), total_due=Decimal("933.33"),
+            )
+
+    def setUp(self):
+        sms.outbox.clear()
+
+    def test_a_second_run_the_same_day_sends_nothing(self):
+        first = reminders.dispatch(as_of=AS_OF, batch_size=2)
+        second = reminders.dispatch(as_of=AS_OF, batch_size=2)
+
+        self.assertEqual((first["sent"], first["no_contact"]), (2, 1))
+        self.assertEqual(second["sent"], 0)
+        self.assertEqual(([message.to for message in sms.outbox], len(mail.outbox)), (["0712345678"], 1))
+        self.assertEqual(ReminderLog.objects.filter(status=ReminderLog.SENT).count(), 2)
+
+    def test_failed_reminders_are_retried(self):
+        with self.settings(SMS_BACKEND=f"{__name__}.BrokenSmsBackend"):
+            first = reminders.dispatch(as_of=AS_OF)
+
+        self.assertEqual((first["sent"], first["failed"]), (1, 1))
+        failed = ReminderLog.objects.get(channel=ReminderLog.SMS)
+        self.assertEqual(failed.status, ReminderLog.FAILED)
+        self.assertIn("gateway down", failed.error)
+
+        retry = reminders.dispatch(as_of=AS_OF)
+
+        self.assertEqual((retry["sent"], retry["failed"]), (1, 0))
+        self.assertEqual(len(sms.outbox), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertFalse(ReminderLog.objects.exclude(status=ReminderLog.SENT).exists())
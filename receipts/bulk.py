@@ -0,0 +1,185 @@
+"""
+Bulk receipt rendering.
+
+Renders many receipts at once (after a check-off import or a mobile-money
+batch) into one print-ready bundle: a combined HTML document, a ZIP of
+per-receipt HTML files, or a combined PDF when WeasyPrint is installed.
+
+Receipts are fetched in chunks with their member, repayment and savings
+transaction joined in, rendered in parallel worker processes, and cached
+by receipt number so reprints skip the template engine entirely. A
+cached rendering is dropped when the receipt, or a member, repayment,
+savings transaction or journal entry it shows, is saved or deleted
+(receipts/signals.py).
+"""
+import io
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.template.loader import render_to_string
+
+from receipts.models import Receipt
+
+RECEIPT_TEMPLATE = "receipts/_receipt_body.html"
+BUNDLE_TEMPLATE = "receipts/receipt_bundle.html"
+CACHE_KEY_PREFIX = "receipt-render:"
+DEFAULT_CHUNK_SIZE = 500
+
+FORMAT_HTML = "html"
+FORMAT_ZIP = "zip"
+FORMAT_PDF = "pdf"
+FORMATS = [FORMAT_HTML, FORMAT_ZIP, FORMAT_PDF]
+
+CONTENT_TYPES = {
+    FORMAT_HTML: "text/html; charset=utf-8",
+    FORMAT_ZIP: "application/zip",
+    FORMAT_PDF: "application/pdf",
+}
+
+
+def get_render_cache():
+    return caches[getattr(settings, "RECEIPT_RENDER_CACHE", "default")]
+
+
+def cache_key(receipt_no):
+    return f"{CACHE_KEY_PREFIX}{receipt_no}"
+
+
+def invalidate(receipt_no):
+    """Drop the cached rendering of a single receipt."""
+    get_render_cache().delete(cache_key(receipt_no))
+
+
+def invalidate_many(receipt_nos):
+    """Drop the cached renderings of several receipts."""
+    keys = [cache_key(receipt_no) for receipt_no in receipt_nos]
+    if keys:
+        get_render_cache().delete_many(keys)
+
+
+def receipt_queryset():
+    """Receipts with everything the receipt template touches joined in."""
+    return Receipt.objects.select_related(
+        "member",
+        "issued_by",
+        "journal_entry",
+        "loan_repayment__loan",
+        "savings_transaction__savings_account",
+    )
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def render_chunk(receipt_ids):
+    """Render one chunk of receipts. Runs inside a worker process."""
+    receipts = receipt_queryset().filter(pk__in=receipt_ids)
+    return [
+        (receipt.receipt_no, render_to_string(RECEIPT_TEMPLATE, {"receipt": receipt}))
+        for receipt in receipts
+    ]
+
+
+def _init_worker():
+    # Under the "spawn" start method the child starts with a bare interpreter.
+    import django
+    django.setup()
+
+
+def render_receipts(receipt_ids, workers=1, chunk_size=DEFAULT_CHUNK_SIZE, use_cache=True):
+    """
+    Render receipts to HTML fragments.
+
+    Returns a list of (receipt_no, html) pairs in the order the ids were given.
+    Cached renderings are reused; the rest are rendered in chunks, spread over
+    `workers` processes when there is more than one chunk to do.
+    """
+    numbers = dict(
+        Receipt.objects.filter(pk__in=receipt_ids).values_list("pk", "receipt_no")
+    )
+    ordered = [(pk, numbers[pk]) for pk in receipt_ids if pk in numbers]
+
+    cache = get_render_cache()
+    rendered = {}
+    if use_cache:
+        hits = cache.get_many([cache_key(no) for _, no in ordered])
+        rendered = {
+            key[len(CACHE_KEY_PREFIX):]: html for key, html in hits.items()
+        }
+
+    missing = [pk for pk, no in ordered if no not in rendered]
+    chunks = list(chunked(missing, chunk_size))
+
+    fresh = {}
+    if workers > 1 and len(chunks) > 1:
+        # Forked children must not share the parent's open DB connections.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            for pairs in pool.map(render_chunk, chunks):
+                fresh.update(pairs)
+    else:
+        for chunk in chunks:
+            fresh.update(render_chunk(chunk))
+
+    if use_cache and fresh:
+        timeout = getattr(settings, "RECEIPT_RENDER_CACHE_TIMEOUT", None)
+        cache.set_many(
+            {cache_key(no): html for no, html in fresh.items()},
+            timeout=timeout,
+        )
+
+    rendered.update(fresh)
+    return [(no, rendered[no]) for _, no in ordered]
+
+
+def build_html(rendered, title="Receipts"):
+    """One HTML document, one receipt per printed page."""
+    return render_to_string(
+        BUNDLE_TEMPLATE,
+        {"receipts": [html for _, html in rendered], "title": title},
+    )
+
+
+def build_zip(rendered):
+    """A ZIP archive holding one standalone HTML file per receipt."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for receipt_no, html in rendered:
+            page = render_to_string(
+                BUNDLE_TEMPLATE, {"receipts": [html], "title": f"Receipt {receipt_no}"}
+            )
+            archive.writestr(f"{receipt_no}.html", page)
+    return buffer.getvalue()
+
+
+def build_pdf(rendered, title="Receipts"):
+    """A combined PDF. Needs the optional WeasyPrint package."""
+    try:
+        from weasyprint import HTML
+    except ImportError:
+        raise ImproperlyConfigured(
+            "PDF receipt bundles need WeasyPrint. Install it or use the html/zip format."
+        )
+    return HTML(string=build_html(rendered, title=title)).write_pdf()
+
+
+def build_bundle(receipt_ids, fmt=FORMAT_HTML, workers=1, chunk_size=DEFAULT_CHUNK_SIZE,
+                 use_cache=True, title="Receipts"):
+    """Render receipts and package them in the requested format. Returns bytes."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown bundle format: {fmt}")
+
+    rendered = render_receipts(
+        receipt_ids, workers=workers, chunk_size=chunk_size, use_cache=use_cache
+    )
+    if fmt == FORMAT_ZIP:
+        return build_zip(rendered)
+    if fmt == FORMAT_PDF:
+        return build_pdf(rendered, title=title)
+    return build_html(rendered, title=title).encode("utf-8")
@@ -0,0 +1,70 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+
+from core.db_routing import use_replica
+from receipts import bulk
+from receipts.models import Receipt
+
+
+class Command(BaseCommand):
+    help = "Render many receipts into one print-ready bundle (html, zip or pdf)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ids", help="Comma-separated receipt ids.")
+        parser.add_argument("--since", help="Only receipts issued on or after this date (YYYY-MM-DD).")
+        parser.add_argument("--until", help="Only receipts issued on or before this date (YYYY-MM-DD).")
+        parser.add_argument("--member", type=int, help="Only receipts for this member id.")
+        parser.add_argument("--format", choices=bulk.FORMATS, default=bulk.FORMAT_HTML)
+        parser.add_argument("--output", required=True, help="File to write the bundle to.")
+        parser.add_argument("--workers", type=int, default=1, help="Worker processes to render with.")
+        parser.add_argument("--chunk-size", type=int, default=bulk.DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--no-cache", action="store_true", help="Ignore and do not fill the render cache.")
+
+    @use_replica()
+    def handle(self, *args, **options):
+        receipts = Receipt.objects.order_by("issued_on", "id")
+
+        if options["ids"]:
+            try:
+                ids = [int(pk) for pk in options["ids"].split(",") if pk.strip()]
+            except ValueError:
+                raise CommandError("--ids must be a comma-separated list of integers.")
+            receipts = receipts.filter(pk__in=ids)
+        if options["since"]:
+            receipts = receipts.filter(issued_on__gte=self._parse_day(options["since"]))
+        if options["until"]:
+            receipts = receipts.filter(issued_on__lte=self._parse_day(options["until"], end=True))
+        if options["member"]:
+            receipts = receipts.filter(member_id=options["member"])
+
+        receipt_ids = list(receipts.values_list("pk", flat=True))
+        if not receipt_ids:
+            raise CommandError("No receipts match the given filters.")
+
+        try:
+            payload = bulk.build_bundle(
+                receipt_ids,
+                fmt=options["format"],
+                workers=max(1, options["workers"]),
+                chunk_size=options["chunk_size"],
+                use_cache=not options["no_cache"],
+            )
+        except ImproperlyConfigured as exc:
+            raise CommandError(str(exc))
+
+        with open(options["output"], "wb") as fh:
+            fh.write(payload)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {len(receipt_ids)} receipts to {options['output']} ({len(payload):,} bytes)."
+        ))
+
+    def _parse_day(self, value, end=False):
+        try:
+            day = datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError:
+            raise CommandError(f"Invalid date: {value} (expected YYYY-MM-DD)")
+        return timezone.make_aware(datetime.combine(day, time.max if end else time.min))
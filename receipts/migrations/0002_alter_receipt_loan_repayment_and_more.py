@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0008_alter_loaninterestaccrual_repayment'),
+        ('receipts', '0001_initial'),
+        ('savings', '0003_stored_balance'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='receipt',
+            name='loan_repayment',
+            field=models.OneToOneField(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='loans.loanrepayment'),
+        ),
+        migrations.AlterField(
+            model_name='receipt',
+            name='savings_transaction',
+            field=models.OneToOneField(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='savings.savingstransaction'),
+        ),
+    ]
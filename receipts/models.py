@@ -20,11 +20,12 @@ class Receipt(models.Model):
     reference_note = models.TextField(blank=True)
 
     # Source links
+    # No database constraint: the source row may have moved to the archive (archive/store.py)
     loan_repayment = models.OneToOneField(
-        'loans.LoanRepayment', null=True, blank=True, on_delete=models.SET_NULL
+        'loans.LoanRepayment', null=True, blank=True, on_delete=models.SET_NULL, db_constraint=False
     )
     savings_transaction = models.OneToOneField(
-        'savings.SavingsTransaction', null=True, blank=True, on_delete=models.SET_NULL
+        'savings.SavingsTransaction', null=True, blank=True, on_delete=models.SET_NULL, db_constraint=False
     )
 
     journal_entry = models.ForeignKey(JournalEntry, null=True, blank=True, on_delete=models.SET_NULL)
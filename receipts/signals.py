@@ -0,0 +1,48 @@
+# receipts/signals.py
+
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from core.models import JournalEntry, Member
+from loans.models import LoanRepayment
+from savings.models import SavingsTransaction
+from .models import Receipt
+from .bulk import invalidate, invalidate_many
+
+
+@receiver(post_save, sender=Receipt)
+@receiver(post_delete, sender=Receipt)
+def drop_cached_rendering(sender, instance, **kwargs):
+    # A reprint after an edit must show the edited receipt.
+    invalidate(instance.receipt_no)
+
+
+# The rendering also shows the member, the repayment or savings transaction
+# and the journal entry reference. A new row has no receipts yet; a deleted
+# one is unlinked from them (SET_NULL) before post_delete, hence pre_delete.
+SHOWN_ON_RECEIPT = {
+    Member: "member",
+    LoanRepayment: "loan_repayment",
+    SavingsTransaction: "savings_transaction",
+    JournalEntry: "journal_entry",
+}
+
+
+def _drop_receipts_showing(sender, instance):
+    receipts = Receipt.objects.filter(**{SHOWN_ON_RECEIPT[sender]: instance})
+    invalidate_many(receipts.values_list("receipt_no", flat=True))
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_save, sender=LoanRepayment)
+@receiver(post_save, sender=SavingsTransaction)
+@receiver(post_save, sender=JournalEntry)
+def drop_renderings_on_edit(sender, instance, created=False, raw=False, **kwargs):
+    if not created and not raw:
+        _drop_receipts_showing(sender, instance)
+
+
+@receiver(pre_delete, sender=LoanRepayment)
+@receiver(pre_delete, sender=SavingsTransaction)
+@receiver(pre_delete, sender=JournalEntry)
+def drop_renderings_on_delete(sender, instance, **kwargs):
+    _drop_receipts_showing(sender, instance)
@@ -0,0 +1,19 @@
+import os
+
+from django.conf import settings
+
+from jobs.queue import task
+from receipts import bulk
+
+
+@task("receipts.render_bundle", max_attempts=2)
+def render_bundle(job, receipt_ids, fmt=bulk.FORMAT_HTML, workers=1):
+    """Render a receipt bundle to JOB_OUTPUT_DIR; the file path is the job result."""
+    os.makedirs(settings.JOB_OUTPUT_DIR, exist_ok=True)
+    job.progress(0, len(receipt_ids), "Rendering receipts")
+    payload = bulk.build_bundle(receipt_ids, fmt=fmt, workers=workers)
+    path = os.path.join(settings.JOB_OUTPUT_DIR, f"receipts-job-{job.id}.{fmt}")
+    with open(path, "wb") as fh:
+        fh.write(payload)
+    job.progress(len(receipt_ids), len(receipt_ids), "Done")
+    return {"path": path, "receipts": len(receipt_ids), "bytes": len(payload)}
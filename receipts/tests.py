@@ -1,3 +1,83 @@
-from django.test import TestCase
+from datetime import date
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.instrumentation import QueryBudgetMixin
+from core.models import Account, AccountType, JournalEntry, Member, ReportTag
+from savings.models import SavingsAccount, SavingsTransaction
+
+from . import bulk
+from .models import Receipt
+
+
+class ReceiptListTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("clerk")
+        for n in range(1, 21):
+            member = Member.objects.create(member_no=f"M-{n:06d}", full_name=f"Member {n}")
+            entry = JournalEntry.objects.create(date="2025-02-01", reference=f"RCPT-{n}")
+            Receipt.objects.create(
+                member=member, type=Receipt.SAVINGS, amount=Decimal("100.00"), journal_entry=entry, issued_by=cls.user,
+            )
+
+    def test_query_count_does_not_grow_with_receipts(self):
+        self.client.force_login(self.user)
+
+        with self.assertMaxQueries(4):
+            response = self.client.get(reverse("receipts:receipt_list"))
+
+        self.assertContains(response, "RCPT-20")
+
+
+@override_settings(RECEIPT_RENDER_CACHE="default")
+class RenderCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        savings_gl = Account.objects.create(
+            code="2010", name="Members savings", type=AccountType.LIABILITY, report_tag=ReportTag.LIAB_MEMBERS_SAVINGS
+        )
+        cls.member = Member.objects.create(member_no="M-000001", full_name="Wanjiru Kariuki")
+        cls.tx = SavingsTransaction.objects.create(
+            savings_account=SavingsAccount.objects.create(member=cls.member, account=savings_gl),
+            date=timezone.localdate(), transaction_type=SavingsTransaction.DEPOSIT, amount=Decimal("100.00"),
+        )
+        cls.entry = JournalEntry.objects.create(date=timezone.localdate(), reference="RCPT-1")
+        cls.receipt = Receipt.objects.create(
+            member=cls.member, type=Receipt.SAVINGS, amount=Decimal("100.00"),
+            savings_transaction=cls.tx, journal_entry=cls.entry,
+        )
+
+    def setUp(self):
+        caches["default"].clear()
+
+    def render(self):
+        [(_, html)] = bulk.render_receipts([self.receipt.pk])
+        return html
+
+    def test_edits_to_what_the_receipt_shows_drop_its_rendering(self):
+        self.assertIn("Wanjiru Kariuki", self.render())
+
+        self.member.full_name = "Wanjiru Kamau"
+        self.member.save()
+        self.assertIn("Wanjiru Kamau", self.render())
+
+        self.entry.reference = "RCPT-1A"
+        self.entry.save()
+        self.assertIn("RCPT-1A", self.render())
+
+        self.tx.date = date(2025, 3, 31)
+        self.tx.save()
+        self.assertIn("March 31, 2025", self.render())
+
+    def test_deleting_the_source_transaction_drops_its_rendering(self):
+        self.assertIn(str(self.tx.savings_account_id), self.render())
+
+        self.tx.delete()
+
+        self.assertIsNone(caches["default"].get(bulk.cache_key(self.receipt.receipt_no)))
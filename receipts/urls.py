@@ -7,6 +7,7 @@ app_name = "receipts"
 urlpatterns = [
     path("receipts/", views.receipt_list, name="receipt_list"),
     path("receipts/<int:pk>/", views.receipt_detail, name="receipt_detail"),
+    path("receipts/bundle/", views.receipt_bundle, name="receipt_bundle"),
 
     # Print-friendly receipt view
     path("receipts/<int:pk>/print/", ReceiptPrintView.as_view(), name="receipt_print"),
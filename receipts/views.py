@@ -1,8 +1,13 @@
+from datetime import datetime
+
 from django.views.generic import DetailView
 from django.shortcuts import render, get_object_or_404
+from django.http import HttpResponse, HttpResponseBadRequest
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required
 from receipts.models import Receipt
+from receipts import bulk
+from core.db_routing import use_replica
 
 # -----------------------------
 # Class-Based View
@@ -10,7 +15,7 @@ from receipts.models import Receipt
 
 class ReceiptPrintView(LoginRequiredMixin, DetailView):
     model = Receipt
-    template_name = "receipts/receipt_print.html"
+    template_name = "receipts/reciept_print.html"
 
 # -----------------------------
 # Function-Based Views
@@ -23,7 +28,7 @@ def receipt_list(request):
     Supports optional search by member name.
     """
     query = request.GET.get("q", "").strip()
-    receipts = Receipt.objects.select_related("member", "issued_by").order_by("-issued_on")
+    receipts = Receipt.objects.select_related("member", "issued_by", "journal_entry").order_by("-issued_on")
 
     if query:
         receipts = receipts.filter(member__full_name__icontains=query)
@@ -42,3 +47,34 @@ def receipt_detail(request, pk):
     """
     receipt = get_object_or_404(Receipt, pk=pk)
     return render(request, "receipts/receipt_detail.html", {"receipt": receipt})
+
+
+@login_required
+@use_replica()
+def receipt_bundle(request):
+    """
+    Prints many receipts at once, e.g. a whole day's counter or a batch import.
+    Accepts ?ids=1,2,3 or ?date=YYYY-MM-DD, plus ?format=html|zip.
+    """
+    fmt = request.GET.get("format", bulk.FORMAT_HTML)
+    if fmt not in (bulk.FORMAT_HTML, bulk.FORMAT_ZIP):
+        return HttpResponseBadRequest("Unsupported format.")
+
+    receipts = Receipt.objects.order_by("issued_on", "id")
+    ids = request.GET.get("ids", "").strip()
+    day = request.GET.get("date", "").strip()
+    try:
+        if ids:
+            receipts = receipts.filter(pk__in=[int(pk) for pk in ids.split(",") if pk])
+        elif day:
+            receipts = receipts.filter(issued_on__date=datetime.strptime(day, "%Y-%m-%d").date())
+        else:
+            return HttpResponseBadRequest("Pass ?ids= or ?date=.")
+    except ValueError:
+        return HttpResponseBadRequest("Invalid ids or date.")
+
+    payload = bulk.build_bundle(list(receipts.values_list("pk", flat=True)), fmt=fmt)
+    response = HttpResponse(payload, content_type=bulk.CONTENT_TYPES[fmt])
+    if fmt == bulk.FORMAT_ZIP:
+        response["Content-Disposition"] = f'attachment; filename="receipts-{day or "selection"}.zip"'
+    return response
@@ -0,0 +1,334 @@
+"""
+Bank statement import and reconciliation against the books.
+
+`import_statement()` reads a CSV statement row by row and inserts its lines
+in batches. Each line gets a fingerprint (date, amount, reference,
+description and its occurrence number within the file), unique per
+account, so importing an overlapping or repeated statement adds only the
+lines not seen before.
+
+`reconcile()` matches the account's unmatched bank lines to its unmatched
+journal lines (debit = money in). Both sides are loaded once with
+values_list() and joined through dictionaries, in three passes:
+
+1. REFERENCE: a reference token on the bank line (receipt number,
+   provider transaction ID, journal entry reference or "JE<id>") with the
+   same amount, nearest date within the window;
+2. AMOUNT_DATE: same amount, nearest date within the window;
+3. AGGREGATE: one bank line against several book lines of one day whose
+   total equals it - a teller banking the day's takings in one deposit -
+   first per payment method, then for the whole day.
+
+Matches are stored (BankMatch, BankLine.status), so a re-run only looks at
+what is still unmatched on either side.
+"""
+import csv
+import hashlib
+import re
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Max, Min
+
+from core.models import Account, JournalLine, ReportTag
+from receipts.models import Receipt
+
+from .models import BankLine, BankMatch, BankStatement
+
+BATCH_SIZE = 2000
+CENTS = Decimal("0.01")
+
+COLUMNS = {
+    "date": ("date", "transaction date", "txn date", "posting date", "value date"),
+    "description": ("description", "narrative", "details", "particulars", "transaction details"),
+    "reference": ("reference", "ref", "ref no", "reference no", "cheque/ref", "transaction reference"),
+    "amount": ("amount",),
+    "credit": ("credit", "money in", "paid in", "deposits"),
+    "debit": ("debit", "money out", "paid out", "withdrawals"),
+}
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d-%b-%Y", "%d %b %Y", "%d-%b-%y")
+TOKEN = re.compile(r"[A-Z0-9]+")
+
+
+class StatementError(ValueError):
+    pass
+
+
+def bank_account():
+    account = Account.objects.filter(report_tag=ReportTag.ASSET_CASH_EQUITY).order_by("code").first()
+    if account is None:
+        raise ImproperlyConfigured("Bank reconciliation needs an account tagged ASSET_CASH_EQUITY.")
+    return account
+
+
+def window_days():
+    return getattr(settings, "BANK_RECONCILIATION_WINDOW_DAYS", 3)
+
+
+# --- Import -----------------------------------------------------------------
+
+def _columns(header):
+    names = {name.strip().lower(): index for index, name in enumerate(header)}
+    found = {}
+    for field, aliases in COLUMNS.items():
+        found[field] = next((names[alias] for alias in aliases if alias in names), None)
+    if found["date"] is None or (found["amount"] is None and found["credit"] is None and found["debit"] is None):
+        raise StatementError(f"Statement needs a date column and an amount or credit/debit columns; got {header}.")
+    return found
+
+
+def _date(value):
+    value = value.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise StatementError(f"Unrecognised date {value!r}.")
+
+
+def _money(value):
+    value = (value or "").strip().replace(",", "")
+    if not value:
+        return Decimal("0")
+    negative = value.startswith("(") and value.endswith(")")
+    try:
+        amount = Decimal(value.strip("()"))
+    except InvalidOperation:
+        raise StatementError(f"Unrecognised amount {value!r}.")
+    if not amount.is_finite():
+        raise StatementError(f"Unrecognised amount {value!r}.")
+    return -amount if negative else amount
+
+
+def _cents(amount):
+    """`amount` rounded to cents; StatementError if it does not fit BankLine.amount."""
+    max_digits = BankLine._meta.get_field("amount").max_digits
+    try:
+        rounded = amount.quantize(CENTS)
+    except InvalidOperation:
+        rounded = None
+    if rounded is None or len(rounded.as_tuple().digits) > max_digits:
+        raise StatementError(f"Amount {amount} is too large.")
+    return rounded
+
+
+def parse(lines):
+    """Yield (date, amount, reference, description) from CSV text lines; money in is positive."""
+    reader = csv.reader(lines)
+    columns = _columns(next(reader, []))
+
+    def cell(row, field):
+        index = columns[field]
+        return row[index] if index is not None and index < len(row) else ""
+
+    for number, row in enumerate(reader, start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        try:
+            if columns["amount"] is not None:
+                amount = _money(cell(row, "amount"))
+            else:
+                amount = _money(cell(row, "credit")) - abs(_money(cell(row, "debit")))
+            yield (
+                _date(cell(row, "date")),
+                _cents(amount),
+                cell(row, "reference").strip()[:100],
+                cell(row, "description").strip()[:255],
+            )
+        except StatementError as exc:
+            raise StatementError(f"Row {number}: {exc}")
+
+
+def _fingerprint(account_id, row, occurrence):
+    text = "|".join(str(part) for part in (account_id, *row, occurrence))
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def import_statement(lines, account=None, name="", user=None):
+    """Import a CSV statement (any iterable of text lines). Returns the BankStatement."""
+    account = account or bank_account()
+    with transaction.atomic():
+        statement = BankStatement.objects.create(account=account, name=name[:255], imported_by=user)
+        seen = Counter()
+        batch, rows = [], 0
+        for row in parse(lines):
+            seen[row] += 1
+            rows += 1
+            date, amount, reference, description = row
+            batch.append(BankLine(
+                account=account, statement=statement, date=date, amount=amount, reference=reference,
+                description=description, fingerprint=_fingerprint(account.pk, row, seen[row]),
+            ))
+            if len(batch) >= BATCH_SIZE:
+                BankLine.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        BankLine.objects.bulk_create(batch, ignore_conflicts=True)
+
+        added = statement.lines.aggregate(first=Min("date"), last=Max("date"))
+        statement.rows_read = rows
+        statement.lines_added = statement.lines.count()
+        statement.first_date, statement.last_date = added["first"], added["last"]
+        statement.save(update_fields=["rows_read", "lines_added", "first_date", "last_date"])
+    return statement
+
+
+# --- Matching ---------------------------------------------------------------
+
+def _tokens(*texts):
+    """Reference-like tokens: runs of 6+ letters/digits containing a digit, compacted forms included."""
+    tokens = set()
+    for text in texts:
+        if not text:
+            continue
+        upper = text.upper()
+        compact = "".join(TOKEN.findall(upper))
+        for token in [compact, *TOKEN.findall(upper)]:
+            if len(token) >= 6 and any(char.isdigit() for char in token):
+                tokens.add(token)
+    return tokens
+
+
+def _offsets(window):
+    yield 0
+    for days in range(1, window + 1):
+        yield -days
+        yield days
+
+
+def _book(account, first, last):
+    """Unmatched journal lines on `account` dated first..last as [pk, date, amount, method, receipt_id, tokens]."""
+    rows = list(
+        JournalLine.objects.filter(
+            account=account, entry__posted=True, entry__date__range=(first, last), bank_match__isnull=True,
+        ).values_list("pk", "entry_id", "entry__date", "debit", "credit", "entry__reference")
+    )
+    receipts = defaultdict(list)
+    for entry_id, pk, receipt_no, method, note in Receipt.objects.filter(
+        journal_entry__date__range=(first, last)
+    ).values_list("journal_entry_id", "pk", "receipt_no", "payment_method", "reference_note"):
+        receipts[entry_id].append((pk, receipt_no, method, note))
+
+    book = []
+    for pk, entry_id, date, debit, credit, reference in rows:
+        linked = receipts.get(entry_id, [])
+        tokens = _tokens(reference, *(f"{no} {note}" for _, no, _, note in linked)) | {f"JE{entry_id}"}
+        receipt_id, method = (linked[0][0], linked[0][2]) if linked else (None, "")
+        book.append([pk, date, debit - credit, method or "", receipt_id, tokens])
+    return book
+
+
+def reconcile(account=None, window=None, first=None, last=None):
+    """Match unmatched bank lines of `account` (optionally dated first..last). Returns a summary dict."""
+    started = time.perf_counter()
+    account = account or bank_account()
+    window = window_days() if window is None else window
+    days = timedelta(days=1)
+
+    lines = BankLine.objects.filter(account=account, status=BankLine.UNMATCHED)
+    if first:
+        lines = lines.filter(date__gte=first)
+    if last:
+        lines = lines.filter(date__lte=last)
+    bank = list(lines.order_by("date", "pk").values_list("pk", "date", "amount", "reference", "description"))
+    if not bank:
+        return {"bank_lines": 0, "matched": {}, "book_lines_matched": 0, "unmatched": 0, "seconds": 0.0}
+    book = _book(account, bank[0][1] - window * days, bank[-1][1] + window * days)
+
+    used = set()  # indexes into `book`
+    matched = {}  # bank pk -> (rule, [book indexes])
+
+    def nearest(candidates, date):
+        best = None
+        for index in candidates:
+            gap = abs((book[index][1] - date).days)
+            if index not in used and gap <= window and (best is None or gap < best[0]):
+                best = (gap, index)
+        return best and best[1]
+
+    # 1. Reference (and amount)
+    by_reference = defaultdict(list)
+    for index, item in enumerate(book):
+        for token in item[5]:
+            by_reference[(token, item[2])].append(index)
+    for pk, date, amount, reference, description in bank:
+        candidates = [index for token in _tokens(reference, description) for index in by_reference.get((token, amount), ())]
+        index = nearest(candidates, date) if candidates else None
+        if index is not None:
+            used.add(index)
+            matched[pk] = (BankMatch.REFERENCE, [index])
+
+    # 2. Amount and date
+    by_amount = defaultdict(list)
+    for index, item in enumerate(book):
+        if index not in used:
+            by_amount[(item[2], item[1])].append(index)
+    for pk, date, amount, _, _ in bank:
+        if pk in matched:
+            continue
+        for offset in _offsets(window):
+            bucket = by_amount.get((amount, date + offset * days))
+            while bucket and bucket[0] in used:
+                bucket.pop(0)
+            if bucket:
+                index = bucket.pop(0)
+                used.add(index)
+                matched[pk] = (BankMatch.AMOUNT_DATE, [index])
+                break
+
+    # 3. Many book lines to one bank line: a day's lines of one sign, per method, then all together
+    groups = defaultdict(list)
+    for index, item in enumerate(book):
+        if index not in used and item[2]:
+            sign = item[2] > 0
+            groups[(item[1], sign, item[3])].append(index)
+            groups[(item[1], sign, None)].append(index)
+    by_total = defaultdict(list)
+    for (date, _, method), members in sorted(groups.items(), key=lambda group: group[0][2] is None):
+        if len(members) > 1:
+            by_total[(sum(book[index][2] for index in members), date)].append(members)
+    for pk, date, amount, _, _ in bank:
+        if pk in matched:
+            continue
+        for offset in _offsets(window):
+            members = next(
+                (group for group in by_total.get((amount, date + offset * days), ()) if used.isdisjoint(group)),
+                None,
+            )
+            if members:
+                used.update(members)
+                matched[pk] = (BankMatch.AGGREGATE, members)
+                break
+
+    with transaction.atomic():
+        BankMatch.objects.bulk_create(
+            [
+                BankMatch(line_id=pk, journal_line_id=book[index][0], receipt_id=book[index][4], rule=rule)
+                for pk, (rule, indexes) in matched.items()
+                for index in indexes
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        pks = list(matched)
+        for start in range(0, len(pks), BATCH_SIZE):
+            BankLine.objects.filter(pk__in=pks[start:start + BATCH_SIZE]).update(status=BankLine.MATCHED)
+
+    return {
+        "bank_lines": len(bank),
+        "matched": dict(Counter(rule for rule, _ in matched.values())),
+        "book_lines_matched": len(used),
+        "unmatched": len(bank) - len(matched),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def unmatch(lines):
+    """Drop the matches of `lines` (a BankLine queryset) so the next reconcile() reconsiders them."""
+    with transaction.atomic():
+        BankMatch.objects.filter(line__in=lines).delete()
+        return lines.update(status=BankLine.UNMATCHED)
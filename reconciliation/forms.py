@@ -0,0 +1,19 @@
+from django import forms
+
+from core.models import Account, ReportTag
+
+
+class StatementUploadForm(forms.Form):
+    account = forms.ModelChoiceField(
+        queryset=Account.objects.filter(report_tag=ReportTag.ASSET_CASH_EQUITY).order_by("code"),
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+    file = forms.FileField(
+        label="Statement (CSV)",
+        help_text="Needs a date column and either an amount column or credit/debit columns.",
+        widget=forms.ClearableFileInput(attrs={"class": "form-control", "accept": ".csv,text/csv"}),
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["account"].initial = self.fields["account"].queryset.first()
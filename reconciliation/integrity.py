@@ -0,0 +1,167 @@
+"""
+Journal integrity scan.
+
+The journal entry forms check debits against credits, but the admin,
+scripts and the bulk posting paths write JournalLine rows directly. This
+scan finds, with one grouped query each per range of entry ids:
+
+    UNBALANCED   GROUP BY entry HAVING sum(debit) <> sum(credit)
+    EMPTY        entries without lines
+    DUAL_SIDED   lines carrying both a debit and a credit
+    STALE_DRAFT  posted=False entries older than LEDGER_DRAFT_MAX_AGE_DAYS
+
+Findings are kept as open IntegrityIssue rows; rescanning an entry
+replaces its issues, so fixed entries drop off. A full scan walks every
+entry; an incremental one only the entries created since the last scan
+(ids above its `last_entry_id`) plus those with open issues. Drafts are
+always checked in full - there are few of them.
+"""
+import time
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q, Sum
+from django.utils import timezone
+
+from archive.models import ArchivedJournalLine
+from core.models import JournalEntry, JournalLine
+
+from .models import IntegrityIssue, IntegrityRun
+
+BATCH_SIZE = 2000
+DEFAULT_CHUNK_SIZE = 20000
+HALF_CENT = Decimal("0.005")  # SQLite sums decimals as floats
+CENTS = Decimal("0.01")
+ENTRY_KINDS = [IntegrityIssue.UNBALANCED, IntegrityIssue.EMPTY, IntegrityIssue.DUAL_SIDED]
+
+
+def _money(value):
+    return Decimal(value or 0).quantize(CENTS)
+
+
+def draft_max_age():
+    return getattr(settings, "LEDGER_DRAFT_MAX_AGE_DAYS", 7)
+
+
+def scan(run, first_id=None, last_id=None, ids=None):
+    """
+    Replace the UNBALANCED, EMPTY and DUAL_SIDED issues of entries
+    first_id..last_id (or of the entries in `ids`). Returns the issues found.
+    """
+    if ids is not None:
+        entries, lines, issues = Q(pk__in=ids), Q(entry_id__in=ids), Q(journal_entry_id__in=ids)
+    else:
+        entries = Q(pk__gte=first_id, pk__lte=last_id)
+        lines = Q(entry_id__gte=first_id, entry_id__lte=last_id)
+        issues = Q(journal_entry_id__gte=first_id, journal_entry_id__lte=last_id)
+
+    found = []
+    unbalanced = (
+        JournalLine.objects.filter(lines).values("entry_id")
+        .annotate(debits=Sum("debit"), credits=Sum("credit"), count=Count("pk"), gap=Sum("debit") - Sum("credit"))
+        .filter(Q(gap__gt=HALF_CENT) | Q(gap__lt=-HALF_CENT))
+        .values_list("entry_id", "debits", "credits", "count")
+    )
+    for entry_id, debits, credits, count in unbalanced:
+        found.append(IntegrityIssue(
+            journal_entry_id=entry_id, kind=IntegrityIssue.UNBALANCED, run=run,
+            debit=_money(debits), credit=_money(credits), lines=count,
+        ))
+
+    empty = JournalEntry.objects.filter(entries).exclude(Exists(JournalLine.objects.filter(entry=OuterRef("pk")))).exclude(
+        Exists(ArchivedJournalLine.objects.filter(entry=OuterRef("pk")))  # archived whole (archive/store.py)
+    )
+    for entry_id in empty.values_list("pk", flat=True):
+        found.append(IntegrityIssue(journal_entry_id=entry_id, kind=IntegrityIssue.EMPTY, run=run))
+
+    dual_sided = (
+        JournalLine.objects.filter(lines, debit__gt=0, credit__gt=0).values("entry_id")
+        .annotate(debits=Sum("debit"), credits=Sum("credit"), count=Count("pk"))
+        .values_list("entry_id", "debits", "credits", "count")
+    )
+    for entry_id, debits, credits, count in dual_sided:
+        found.append(IntegrityIssue(
+            journal_entry_id=entry_id, kind=IntegrityIssue.DUAL_SIDED, run=run,
+            debit=_money(debits), credit=_money(credits), lines=count,
+        ))
+
+    with transaction.atomic():
+        IntegrityIssue.objects.filter(issues, kind__in=ENTRY_KINDS).delete()
+        IntegrityIssue.objects.bulk_create(found, batch_size=BATCH_SIZE)
+    return found
+
+
+def scan_drafts(run, max_age_days=None):
+    """Replace the STALE_DRAFT issues. Returns how many there are."""
+    max_age_days = draft_max_age() if max_age_days is None else max_age_days
+    cutoff = timezone.now() - timedelta(days=max_age_days)
+    drafts = (
+        JournalEntry.objects.filter(posted=False, created_at__lt=cutoff)
+        .annotate(debits=Sum("lines__debit"), credits=Sum("lines__credit"), count=Count("lines"))
+        .values_list("pk", "debits", "credits", "count")
+    )
+    found = [
+        IntegrityIssue(
+            journal_entry_id=entry_id, kind=IntegrityIssue.STALE_DRAFT, run=run,
+            debit=_money(debits), credit=_money(credits), lines=count,
+        )
+        for entry_id, debits, credits, count in drafts
+    ]
+    with transaction.atomic():
+        IntegrityIssue.objects.filter(kind=IntegrityIssue.STALE_DRAFT).delete()
+        IntegrityIssue.objects.bulk_create(found, batch_size=BATCH_SIZE)
+    return len(found)
+
+
+def last_run():
+    return IntegrityRun.objects.filter(finished_at__isnull=False).order_by("-started_at").first()
+
+
+def open_issues():
+    """{kind: count} of the issues currently open."""
+    return dict(IntegrityIssue.objects.values("kind").annotate(n=Count("pk")).values_list("kind", "n"))
+
+
+def run(full=False, chunk_size=None, draft_days=None, log=None):
+    """Scan the journal (incrementally unless `full`, or when there is no earlier scan). Returns the IntegrityRun."""
+    log = log or (lambda message: None)
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    started = time.perf_counter()
+    previous = None if full else last_run()
+    after = (previous.last_entry_id or 0) if previous else 0
+
+    scan_run = IntegrityRun.objects.create(
+        mode=IntegrityRun.INCREMENTAL if previous else IntegrityRun.FULL, first_entry_id=after + 1 if previous else None,
+    )
+    found = Counter()
+    if previous:
+        recheck = list(
+            IntegrityIssue.objects.filter(kind__in=ENTRY_KINDS, journal_entry_id__lte=after)
+            .values_list("journal_entry_id", flat=True).distinct()
+        )
+        for start in range(0, len(recheck), BATCH_SIZE):
+            found.update(issue.kind for issue in scan(scan_run, ids=recheck[start:start + BATCH_SIZE]))
+        if recheck:
+            log(f"Rechecked {len(recheck)} entries with open issues.")
+
+    ids = list(JournalEntry.objects.filter(pk__gt=after).order_by("pk").values_list("pk", flat=True))
+    for start in range(0, len(ids), chunk_size):
+        first_id, last_id = ids[start], ids[min(start + chunk_size, len(ids)) - 1]
+        issues = scan(scan_run, first_id, last_id)
+        found.update(issue.kind for issue in issues)
+        log(f"Entries {first_id}-{last_id}: {len(issues)} issue(s)")
+    found[IntegrityIssue.STALE_DRAFT] = scan_drafts(scan_run, draft_days)
+
+    scan_run.last_entry_id = ids[-1] if ids else after or None
+    scan_run.entries_scanned = len(ids)
+    scan_run.finished_at = timezone.now()
+    scan_run.summary = {
+        "found": {kind: count for kind, count in found.items() if count},
+        "open": open_issues(),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    scan_run.save()
+    return scan_run
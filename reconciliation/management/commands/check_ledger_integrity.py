@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reconciliation import integrity
+
+
+class Command(BaseCommand):
+    help = (
+        "Scan journal entries for unbalanced, empty and dual-sided entries and stale drafts. "
+        "Only entries created since the last scan are checked unless --full is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Scan every journal entry.")
+        parser.add_argument("--chunk-size", type=int, help=f"Entries per query (default {integrity.DEFAULT_CHUNK_SIZE}).")
+        parser.add_argument("--draft-days", type=int, help="Report drafts older than this many days. "
+                                                           "Defaults to LEDGER_DRAFT_MAX_AGE_DAYS.")
+        parser.add_argument("--fail-on-issue", action="store_true", help="Exit with an error while any issue is open.")
+
+    def handle(self, *args, **options):
+        run = integrity.run(
+            full=options["full"], chunk_size=options["chunk_size"], draft_days=options["draft_days"],
+            log=self.stdout.write,
+        )
+        self.stdout.write(
+            f"{run.get_mode_display()} scan of {run.entries_scanned} entries in {run.summary['seconds']}s "
+            f"(next scan starts after entry {run.last_entry_id})."
+        )
+        for kind, count in sorted(run.summary["open"].items()):
+            self.stdout.write(f"  {kind:<12} {count}")
+        if run.summary["open"]:
+            message = f"{sum(run.summary['open'].values())} journal integrity issue(s) open."
+            if options["fail_on_issue"]:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS("No journal integrity issues."))
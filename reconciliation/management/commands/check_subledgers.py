@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reconciliation import subledger
+
+
+class Command(BaseCommand):
+    help = (
+        "Check the savings and loan subledgers against their GL control accounts and record every difference, "
+        "down to unlinked or mismatched rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--as-of", help="Balance date (YYYY-MM-DD). Defaults to today.")
+        parser.add_argument("--workers", type=int, default=1, help="Processes checking journal entry ranges in parallel.")
+        parser.add_argument("--chunk-size", type=int, help=f"Journal entries per range (default {subledger.DEFAULT_CHUNK_SIZE}).")
+        parser.add_argument("--fail-on-difference", action="store_true",
+                            help="Exit with an error when any difference is found, e.g. for a scheduled run.")
+
+    def handle(self, *args, **options):
+        as_of = None
+        if options["as_of"]:
+            try:
+                as_of = datetime.strptime(options["as_of"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("--as-of must be YYYY-MM-DD")
+
+        check = subledger.run(
+            as_of=as_of, workers=max(1, options["workers"]), chunk_size=options["chunk_size"], log=self.stdout.write
+        )
+        for ledger, totals in check.summary.items():
+            counts = ", ".join(f"{count} {kind.lower()}" for kind, count in sorted(totals["counts"].items())) or "none"
+            self.stdout.write(
+                f"  {ledger:<10} subledger {totals['subledger']:>18}  GL {totals['gl']:>18}  "
+                f"difference {totals['difference']:>16}  ({counts})"
+            )
+        if any(totals["counts"] for totals in check.summary.values()):
+            message = f"Subledgers and GL disagree as of {check.as_of}; see the ledger check report."
+            if options["fail_on_difference"]:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Subledgers agree with the GL as of {check.as_of}."))
@@ -0,0 +1,61 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Account
+from reconciliation import bank
+from reconciliation.models import BankLine
+
+
+def _date(value, option):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"{option} must be YYYY-MM-DD")
+
+
+class Command(BaseCommand):
+    help = "Import bank statement CSV files (if given) and match unmatched bank lines to receipts and journal lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument("statements", nargs="*", help="CSV statement files to import first.")
+        parser.add_argument("--account", help="GL account code of the bank account. Defaults to the ASSET_CASH_EQUITY account.")
+        parser.add_argument("--window", type=int, help="Days a bank date may differ from the book date. "
+                                                       "Defaults to BANK_RECONCILIATION_WINDOW_DAYS.")
+        parser.add_argument("--from", dest="first", help="Only reconcile bank lines dated on or after (YYYY-MM-DD).")
+        parser.add_argument("--to", dest="last", help="Only reconcile bank lines dated on or before (YYYY-MM-DD).")
+        parser.add_argument("--rematch", action="store_true", help="Discard existing matches in the date range first.")
+
+    def handle(self, *args, **options):
+        account = None
+        if options["account"]:
+            account = Account.objects.filter(code=options["account"]).first()
+            if account is None:
+                raise CommandError(f"No account with code {options['account']}.")
+        first = options["first"] and _date(options["first"], "--from")
+        last = options["last"] and _date(options["last"], "--to")
+
+        for path in options["statements"]:
+            try:
+                with open(path, newline="", encoding="utf-8-sig") as fh:
+                    statement = bank.import_statement(fh, account=account, name=path)
+            except (OSError, bank.StatementError) as exc:
+                raise CommandError(f"{path}: {exc}")
+            account = statement.account
+            self.stdout.write(f"{path}: {statement.rows_read} rows, {statement.lines_added} new lines.")
+
+        if options["rematch"]:
+            lines = BankLine.objects.filter(account=account or bank.bank_account())
+            if first:
+                lines = lines.filter(date__gte=first)
+            if last:
+                lines = lines.filter(date__lte=last)
+            self.stdout.write(f"Cleared matches on {bank.unmatch(lines)} bank lines.")
+
+        result = bank.reconcile(account=account, window=options["window"], first=first, last=last)
+        for key, value in result.items():
+            self.stdout.write(f"  {key:<20} {value}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Matched {result['bank_lines'] - result['unmatched']} of {result['bank_lines']} bank lines "
+            f"in {result['seconds']}s; {result['unmatched']} left for review."
+        ))
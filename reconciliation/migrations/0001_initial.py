@@ -0,0 +1,71 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:08
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('core', '0007_alter_account_report_tag'),
+        ('receipts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BankLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, help_text='Money in positive, money out negative', max_digits=14)),
+                ('reference', models.CharField(blank=True, max_length=100)),
+                ('description', models.CharField(blank=True, max_length=255)),
+                ('fingerprint', models.CharField(editable=False, max_length=40)),
+                ('status', models.CharField(choices=[('UNMATCHED', 'Unmatched'), ('MATCHED', 'Matched')], default='UNMATCHED', max_length=10)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='core.account')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BankMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rule', models.CharField(choices=[('REFERENCE', 'Reference and amount'), ('AMOUNT_DATE', 'Amount and date'), ('AGGREGATE', 'Aggregated deposit')], max_length=12)),
+                ('matched_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('journal_line', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='bank_match', to='core.journalline')),
+                ('line', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='reconciliation.bankline')),
+                ('receipt', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='receipts.receipt')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BankStatement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('imported_at', models.DateTimeField(auto_now_add=True)),
+                ('first_date', models.DateField(blank=True, null=True)),
+                ('last_date', models.DateField(blank=True, null=True)),
+                ('rows_read', models.PositiveIntegerField(default=0)),
+                ('lines_added', models.PositiveIntegerField(default=0)),
+                ('account', models.ForeignKey(limit_choices_to={'report_tag': 'ASSET_CASH_EQUITY'}, on_delete=django.db.models.deletion.PROTECT, to='core.account')),
+                ('imported_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='bankline',
+            name='statement',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='reconciliation.bankstatement'),
+        ),
+        migrations.AddIndex(
+            model_name='bankline',
+            index=models.Index(fields=['account', 'status', 'date'], name='reconciliat_account_0c3212_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='bankline',
+            constraint=models.UniqueConstraint(fields=('account', 'fingerprint'), name='bankline_account_fingerprint_uniq'),
+        ),
+    ]
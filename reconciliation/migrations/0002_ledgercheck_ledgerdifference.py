@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:14
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_alter_account_report_tag'),
+        ('reconciliation', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerCheck',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateField(unique=True)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('summary', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'ordering': ['-as_of'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerDifference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ledger', models.CharField(choices=[('SAVINGS', 'Member savings'), ('PRINCIPAL', 'Loan principal'), ('INTEREST', 'Loan interest receivable')], max_length=10)),
+                ('kind', models.CharField(choices=[('ACCOUNT', 'Account balance'), ('MEMBER', 'Member total'), ('ENTRY', 'Journal entry disagrees with its subledger rows'), ('GL_ONLY', 'GL posting without subledger rows'), ('UNLINKED', 'Subledger row without a journal entry')], max_length=10)),
+                ('source_model', models.CharField(blank=True, max_length=50)),
+                ('source_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('date', models.DateField(blank=True, null=True)),
+                ('subledger', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('gl', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('difference', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('account', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.account')),
+                ('journal_entry', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.journalentry')),
+                ('ledger_check', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='differences', to='reconciliation.ledgercheck')),
+                ('member', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.member')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ledger_check', 'ledger', 'kind'], name='reconciliat_ledger__a228b3_idx'), models.Index(fields=['ledger_check', 'member'], name='reconciliat_ledger__8b9079_idx')],
+            },
+        ),
+    ]
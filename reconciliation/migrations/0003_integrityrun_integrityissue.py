@@ -0,0 +1,49 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:19
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_alter_account_report_tag'),
+        ('reconciliation', '0002_ledgercheck_ledgerdifference'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IntegrityRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mode', models.CharField(choices=[('FULL', 'Full'), ('INCREMENTAL', 'Incremental')], max_length=12)),
+                ('first_entry_id', models.BigIntegerField(blank=True, null=True)),
+                ('last_entry_id', models.BigIntegerField(blank=True, null=True)),
+                ('entries_scanned', models.PositiveIntegerField(default=0)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('summary', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='IntegrityIssue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('UNBALANCED', 'Debits and credits differ'), ('EMPTY', 'No lines'), ('DUAL_SIDED', 'Line with both debit and credit'), ('STALE_DRAFT', 'Unposted draft')], max_length=12)),
+                ('debit', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('credit', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('lines', models.PositiveIntegerField(default=0)),
+                ('found_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('journal_entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='integrity_issues', to='core.journalentry')),
+                ('run', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='issues', to='reconciliation.integrityrun')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'found_at'], name='reconciliat_kind_e94ea2_idx')],
+                'constraints': [models.UniqueConstraint(fields=('journal_entry', 'kind'), name='integrityissue_entry_kind_uniq')],
+            },
+        ),
+    ]
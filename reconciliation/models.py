@@ -0,0 +1,184 @@
+from django.contrib.auth.models import User
+from django.db import models
+from django.utils import timezone
+
+from core.models import Account, JournalEntry, JournalLine, Member, ReportTag
+from receipts.models import Receipt
+
+
+class BankStatement(models.Model):
+    """One imported statement file. Its lines are deduplicated against earlier imports of the same account."""
+    account = models.ForeignKey(
+        Account, on_delete=models.PROTECT, limit_choices_to={"report_tag": ReportTag.ASSET_CASH_EQUITY}
+    )
+    name = models.CharField(max_length=255)
+    imported_at = models.DateTimeField(auto_now_add=True)
+    imported_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+    first_date = models.DateField(null=True, blank=True)
+    last_date = models.DateField(null=True, blank=True)
+    rows_read = models.PositiveIntegerField(default=0)
+    lines_added = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} ({self.account.code})"
+
+
+class BankLine(models.Model):
+    UNMATCHED = "UNMATCHED"
+    MATCHED = "MATCHED"
+    STATUS_CHOICES = [(UNMATCHED, "Unmatched"), (MATCHED, "Matched")]
+
+    account = models.ForeignKey(Account, on_delete=models.PROTECT)
+    statement = models.ForeignKey(BankStatement, related_name="lines", on_delete=models.CASCADE)
+    date = models.DateField()
+    amount = models.DecimalField(max_digits=14, decimal_places=2, help_text="Money in positive, money out negative")
+    reference = models.CharField(max_length=100, blank=True)
+    description = models.CharField(max_length=255, blank=True)
+    fingerprint = models.CharField(max_length=40, editable=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=UNMATCHED)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["account", "fingerprint"], name="bankline_account_fingerprint_uniq"),
+        ]
+        indexes = [models.Index(fields=["account", "status", "date"])]
+
+    def __str__(self):
+        return f"{self.date} {self.amount} {self.reference}"
+
+
+class BankMatch(models.Model):
+    """Links a bank line to a book (journal) line. A bank line may carry several: an aggregated deposit."""
+    REFERENCE = "REFERENCE"
+    AMOUNT_DATE = "AMOUNT_DATE"
+    AGGREGATE = "AGGREGATE"
+    RULE_CHOICES = [
+        (REFERENCE, "Reference and amount"),
+        (AMOUNT_DATE, "Amount and date"),
+        (AGGREGATE, "Aggregated deposit"),
+    ]
+
+    line = models.ForeignKey(BankLine, related_name="matches", on_delete=models.CASCADE)
+    journal_line = models.OneToOneField(JournalLine, related_name="bank_match", on_delete=models.CASCADE)
+    receipt = models.ForeignKey(Receipt, null=True, blank=True, on_delete=models.SET_NULL)
+    rule = models.CharField(max_length=12, choices=RULE_CHOICES)
+    matched_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.line} <- JL#{self.journal_line_id} ({self.rule})"
+
+
+class LedgerCheck(models.Model):
+    """A subledger-to-GL check as of a date; re-running the same date replaces its differences."""
+    as_of = models.DateField(unique=True)
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    summary = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        ordering = ["-as_of"]
+
+    def __str__(self):
+        return f"Ledger check {self.as_of}"
+
+
+class LedgerDifference(models.Model):
+    """
+    One disagreement between a subledger and the GL. `difference` is GL
+    minus subledger, both in the control account's normal direction.
+    """
+    SAVINGS = "SAVINGS"
+    PRINCIPAL = "PRINCIPAL"
+    INTEREST = "INTEREST"
+    LEDGER_CHOICES = [
+        (SAVINGS, "Member savings"),
+        (PRINCIPAL, "Loan principal"),
+        (INTEREST, "Loan interest receivable"),
+    ]
+
+    ACCOUNT = "ACCOUNT"
+    MEMBER = "MEMBER"
+    ENTRY = "ENTRY"
+    GL_ONLY = "GL_ONLY"
+    UNLINKED = "UNLINKED"
+    KIND_CHOICES = [
+        (ACCOUNT, "Account balance"),
+        (MEMBER, "Member total"),
+        (ENTRY, "Journal entry disagrees with its subledger rows"),
+        (GL_ONLY, "GL posting without subledger rows"),
+        (UNLINKED, "Subledger row without a journal entry"),
+    ]
+
+    ledger_check = models.ForeignKey(LedgerCheck, related_name="differences", on_delete=models.CASCADE)
+    ledger = models.CharField(max_length=10, choices=LEDGER_CHOICES)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    account = models.ForeignKey(Account, null=True, blank=True, on_delete=models.SET_NULL)
+    member = models.ForeignKey(Member, null=True, blank=True, on_delete=models.SET_NULL)
+    journal_entry = models.ForeignKey(JournalEntry, null=True, blank=True, on_delete=models.SET_NULL)
+    source_model = models.CharField(max_length=50, blank=True)
+    source_id = models.PositiveBigIntegerField(null=True, blank=True)
+    date = models.DateField(null=True, blank=True)
+    subledger = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    gl = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    difference = models.DecimalField(max_digits=16, decimal_places=2)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["ledger_check", "ledger", "kind"]),
+            models.Index(fields=["ledger_check", "member"]),
+        ]
+
+    def __str__(self):
+        return f"{self.ledger} {self.kind} {self.difference}"
+
+
+class IntegrityRun(models.Model):
+    """One ledger integrity scan. `last_entry_id` is where the next incremental scan starts."""
+    FULL = "FULL"
+    INCREMENTAL = "INCREMENTAL"
+    MODE_CHOICES = [(FULL, "Full"), (INCREMENTAL, "Incremental")]
+
+    mode = models.CharField(max_length=12, choices=MODE_CHOICES)
+    first_entry_id = models.BigIntegerField(null=True, blank=True)
+    last_entry_id = models.BigIntegerField(null=True, blank=True)
+    entries_scanned = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    summary = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        ordering = ["-started_at"]
+
+    def __str__(self):
+        return f"{self.get_mode_display()} integrity scan {self.started_at:%Y-%m-%d %H:%M}"
+
+
+class IntegrityIssue(models.Model):
+    """An open problem with a journal entry. Rescanning the entry replaces or clears it."""
+    UNBALANCED = "UNBALANCED"
+    EMPTY = "EMPTY"
+    DUAL_SIDED = "DUAL_SIDED"
+    STALE_DRAFT = "STALE_DRAFT"
+    KIND_CHOICES = [
+        (UNBALANCED, "Debits and credits differ"),
+        (EMPTY, "No lines"),
+        (DUAL_SIDED, "Line with both debit and credit"),
+        (STALE_DRAFT, "Unposted draft"),
+    ]
+
+    journal_entry = models.ForeignKey(JournalEntry, related_name="integrity_issues", on_delete=models.CASCADE)
+    kind = models.CharField(max_length=12, choices=KIND_CHOICES)
+    run = models.ForeignKey(IntegrityRun, related_name="issues", null=True, on_delete=models.SET_NULL)
+    debit = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    credit = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    lines = models.PositiveIntegerField(default=0)
+    found_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["journal_entry", "kind"], name="integrityissue_entry_kind_uniq"),
+        ]
+        indexes = [models.Index(fields=["kind", "found_at"])]
+
+    def __str__(self):
+        return f"JE #{self.journal_entry_id}: {self.kind}"
@@ -0,0 +1,336 @@
+"""
+Subledger-to-GL reconciliation.
+
+Three subledgers are checked against the GL accounts that control them:
+
+    SAVINGS    SavingsTransaction                 LIAB_MEMBERS_SAVINGS
+    PRINCIPAL  Loan.principal - LoanRepayment      ASSET_LOANS_PRINCIPAL
+               .principal_component
+    INTEREST   LoanInterestAccrual (accrued less   ASSET_LOAN_INTEREST
+               cleared)
+
+Everything is computed with grouped aggregates, never row by row:
+
+* `check_entries()` compares, per journal entry and control account, the
+  GL lines with the subledger rows linked to the entry (ENTRY), and finds
+  GL postings with no subledger rows at all (GL_ONLY). It works on one
+  range of journal entry ids, so ranges can run in parallel - as
+  `manage.py check_subledgers --workers N` does, and the EOD's
+  `ledger_check_entries` stage.
+* `finish()` then records subledger rows with no journal entry
+  (UNLINKED), pairs loan disbursements - Loan has no journal entry link -
+  with their GL postings by account, date and amount, and rolls the
+  differences up per member (MEMBER) and per account (ACCOUNT), with the
+  totals of both sides in LedgerCheck.summary.
+
+Rows moved to the archive (archive/store.py) are read alongside the live
+ones, so a check gives the same answer before and after archiving.
+
+A difference is GL minus subledger in the control account's normal
+direction (credit for savings, debit for the loan assets).
+"""
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+
+from django.db import connections, transaction
+from django.db.models import Count, DecimalField, F, Min, Q, Sum
+from django.utils import timezone
+
+from archive.store import stores
+from core import periods
+from core.models import Account, JournalEntry, JournalLine, ReportTag
+from loans.models import Loan, LoanInterestAccrual, LoanRepayment
+from savings.models import SavingsTransaction
+
+from .models import LedgerCheck, LedgerDifference
+
+BATCH_SIZE = 2000
+DEFAULT_CHUNK_SIZE = 20000
+ZERO = Decimal("0")
+CENTS = Decimal("0.01")
+MONEY = DecimalField(max_digits=16, decimal_places=2)
+
+LEDGERS = [LedgerDifference.SAVINGS, LedgerDifference.PRINCIPAL, LedgerDifference.INTEREST]
+
+CONTROL_TAGS = {
+    LedgerDifference.SAVINGS: ReportTag.LIAB_MEMBERS_SAVINGS,
+    LedgerDifference.PRINCIPAL: ReportTag.ASSET_LOANS_PRINCIPAL,
+    LedgerDifference.INTEREST: ReportTag.ASSET_LOAN_INTEREST,
+}
+# GL balance in the normal direction: credit for the liability, debit for the assets.
+GL_SIGNS = {LedgerDifference.SAVINGS: -1, LedgerDifference.PRINCIPAL: 1, LedgerDifference.INTEREST: 1}
+
+ENTRY_KINDS = [LedgerDifference.ENTRY, LedgerDifference.GL_ONLY]
+DERIVED_KINDS = [LedgerDifference.UNLINKED, LedgerDifference.MEMBER, LedgerDifference.ACCOUNT]
+
+
+def sources(ledger, as_of):
+    """
+    The subledger rows of `ledger` as of a date, as
+    [(model name, queryset, amount, account field, member field, entry field or None, date field)].
+    Rows linked to a journal entry count from the entry's date, like the GL; others from their own.
+    """
+    if ledger == LedgerDifference.SAVINGS:
+        rows = [
+            (
+                name, queryset, SavingsTransaction.signed_amount(),
+                "savings_account__account_id", "savings_account__member_id", "journal_entry", "date",
+            )
+            for name, queryset in zip(("SavingsTransaction", "ArchivedSavingsTransaction"), stores(SavingsTransaction))
+        ]
+    elif ledger == LedgerDifference.PRINCIPAL:
+        rows = [(
+            "Loan", Loan.objects.all(), F("principal"),
+            "principal_account_id", "member_id", None, "disbursed_on",
+        )] + [
+            (
+                name, queryset, -F("principal_component"),
+                "loan__principal_account_id", "loan__member_id", "journal_entry", "date",
+            )
+            for name, queryset in zip(("LoanRepayment", "ArchivedLoanRepayment"), stores(LoanRepayment))
+        ]
+    else:
+        rows = [(
+            "LoanInterestAccrual", LoanInterestAccrual.objects.all(), F("amount"),
+            "loan__interest_account_id", "loan__member_id", "journal_entry", "period",
+        )]
+    return [
+        (name, queryset.filter(_posted_by(entry, date, as_of)), amount, account, member, entry and f"{entry}_id", date)
+        for name, queryset, amount, account, member, entry, date in rows
+    ]
+
+
+def _posted_by(entry, date, as_of):
+    if entry is None:
+        return Q(**{f"{date}__lte": as_of})
+    return Q(**{f"{entry}__date__lte": as_of}) | Q(**{f"{entry}__isnull": True, f"{date}__lte": as_of})
+
+
+def _money(value):
+    """Round an aggregate to cents; SQLite sums decimals as floats."""
+    return Decimal(value or 0).quantize(CENTS)
+
+
+def _gl(ledger, as_of):
+    """The control account lines as of a date, live and archived, and their net in the normal direction."""
+    lines = [
+        store.filter(account__report_tag=CONTROL_TAGS[ledger], entry__posted=True, entry__date__lte=as_of)
+        for store in stores(JournalLine)
+    ]
+    return lines, (F("debit") - F("credit")) * GL_SIGNS[ledger]
+
+
+def start(as_of=None):
+    """The LedgerCheck for `as_of` (default today), emptied for a fresh run."""
+    as_of = as_of or timezone.localdate()
+    check, _ = LedgerCheck.objects.get_or_create(as_of=as_of)
+    check.differences.all().delete()
+    check.started_at, check.finished_at, check.summary = timezone.now(), None, {}
+    check.save()
+    return check
+
+
+def plan(chunk_size=None):
+    """Inclusive journal entry id ranges of about `chunk_size` entries."""
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    ids = list(JournalEntry.objects.order_by("pk").values_list("pk", flat=True))
+    return [(ids[i], ids[min(i + chunk_size, len(ids)) - 1]) for i in range(0, len(ids), chunk_size)]
+
+
+def check_entries(check, first_id=None, last_id=None):
+    """Record ENTRY and GL_ONLY differences for journal entries first_id..last_id. Returns how many."""
+    as_of = check.as_of
+    rows = []
+    for ledger in LEDGERS:
+        line_stores, net = _gl(ledger, as_of)
+        subledger = defaultdict(lambda: [ZERO, set()])  # (entry, account) -> [total, member ids]
+        for name, queryset, amount, account, member, entry, _ in sources(ledger, as_of):
+            if entry is None:
+                continue
+            linked = queryset.filter(**{f"{entry}__isnull": False})
+            if first_id is not None:
+                linked = linked.filter(**{f"{entry}__gte": first_id, f"{entry}__lte": last_id})
+            grouped = (
+                linked.values(entry, account)
+                .annotate(total=Sum(amount, output_field=MONEY), members=Count(member, distinct=True), member=Min(member))
+                .values_list(entry, account, "total", "members", "member")
+            )
+            for entry_id, account_id, total, members, member_id in grouped:
+                row = subledger[(entry_id, account_id)]
+                row[0] += _money(total)
+                row[1].add(member_id if members == 1 else None)
+
+        gl = defaultdict(lambda: ZERO)
+        for lines in line_stores:
+            if first_id is not None:
+                lines = lines.filter(entry_id__gte=first_id, entry_id__lte=last_id)
+            for entry_id, account_id, total in (
+                lines.values("entry_id", "account_id")
+                .annotate(total=Sum(net, output_field=MONEY)).values_list("entry_id", "account_id", "total")
+            ):
+                gl[(entry_id, account_id)] += _money(total)
+        for (entry_id, account_id) in set(subledger) | set(gl):
+            sub_total, members = subledger.get((entry_id, account_id), (ZERO, set()))
+            gl_total = gl.get((entry_id, account_id)) or ZERO
+            if sub_total == gl_total:
+                continue
+            rows.append(LedgerDifference(
+                ledger_check=check, ledger=ledger,
+                kind=LedgerDifference.ENTRY if (entry_id, account_id) in subledger else LedgerDifference.GL_ONLY,
+                account_id=account_id, journal_entry_id=entry_id,
+                member_id=next(iter(members)) if len(members) == 1 else None,
+                subledger=sub_total, gl=gl_total, difference=gl_total - sub_total,
+            ))
+
+    if rows:
+        entries = JournalEntry.objects.all()
+        if first_id is not None:
+            entries = entries.filter(pk__range=(first_id, last_id))
+        dates = dict(entries.values_list("pk", "date"))
+        for row in rows:
+            row.date = dates.get(row.journal_entry_id)
+    with transaction.atomic():
+        stale = check.differences.filter(kind__in=ENTRY_KINDS)
+        if first_id is not None:
+            stale = stale.filter(journal_entry_id__gte=first_id, journal_entry_id__lte=last_id)
+        stale.delete()
+        LedgerDifference.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return len(rows)
+
+
+def _unlinked(check, ledger):
+    rows = []
+    for name, queryset, amount, account, member, entry, date in sources(ledger, check.as_of):
+        if entry is not None:
+            queryset = queryset.filter(**{f"{entry}__isnull": True})
+        for pk, account_id, member_id, day, total in (
+            queryset.annotate(row_amount=amount).values_list("pk", account, member, date, "row_amount")
+            .iterator(chunk_size=BATCH_SIZE)
+        ):
+            total = _money(total)
+            if total:
+                rows.append(LedgerDifference(
+                    ledger_check=check, ledger=ledger, kind=LedgerDifference.UNLINKED, account_id=account_id,
+                    member_id=member_id, source_model=name, source_id=pk, date=day,
+                    subledger=total, gl=ZERO, difference=-total,
+                ))
+    return rows
+
+
+def _pair_disbursements(check, unlinked):
+    """Drop Loan rows matched by a GL_ONLY principal posting of the same account, date and amount."""
+    postings = defaultdict(list)
+    for pk, account_id, day, amount in check.differences.filter(
+        ledger=LedgerDifference.PRINCIPAL, kind=LedgerDifference.GL_ONLY, gl__gt=0
+    ).values_list("pk", "account_id", "date", "gl"):
+        postings[(account_id, day, amount)].append(pk)
+
+    paired, kept = [], []
+    for row in unlinked:
+        bucket = postings.get((row.account_id, row.date, row.subledger)) if row.source_model == "Loan" else None
+        if bucket:
+            paired.append(bucket.pop())
+        else:
+            kept.append(row)
+    for start_at in range(0, len(paired), BATCH_SIZE):
+        LedgerDifference.objects.filter(pk__in=paired[start_at:start_at + BATCH_SIZE]).delete()
+    return kept
+
+
+def account_totals(ledger, as_of):
+    """{account_id: [subledger, gl]} for `ledger` as of a date."""
+    totals = defaultdict(lambda: [ZERO, ZERO])
+    for name, queryset, amount, account, *_ in sources(ledger, as_of):
+        for account_id, total in queryset.values(account).annotate(total=Sum(amount, output_field=MONEY)).values_list(account, "total"):
+            totals[account_id][0] += _money(total)
+    # GL side from the latest period-close snapshot plus the lines after it
+    for account_id, balance in periods.balances(as_of, Account.objects.filter(report_tag=CONTROL_TAGS[ledger])).items():
+        totals[account_id][1] += balance * GL_SIGNS[ledger]
+    return totals
+
+
+def finish(check):
+    """Record UNLINKED, MEMBER and ACCOUNT differences once every entry range is checked. Returns the summary."""
+    with transaction.atomic():
+        check.differences.filter(kind__in=DERIVED_KINDS).delete()
+        check.differences.filter(kind__in=ENTRY_KINDS, journal_entry__isnull=True).delete()  # entries deleted since
+
+        summary = {}
+        for ledger in LEDGERS:
+            unlinked = _unlinked(check, ledger)
+            if ledger == LedgerDifference.PRINCIPAL:
+                unlinked = _pair_disbursements(check, unlinked)
+            LedgerDifference.objects.bulk_create(unlinked, batch_size=BATCH_SIZE)
+
+            per_member = (
+                check.differences.filter(ledger=ledger, kind__in=[LedgerDifference.ENTRY, LedgerDifference.UNLINKED], member__isnull=False)
+                .values("member_id").annotate(total=Sum("difference")).values_list("member_id", "total")
+            )
+            LedgerDifference.objects.bulk_create(
+                [
+                    LedgerDifference(
+                        ledger_check=check, ledger=ledger, kind=LedgerDifference.MEMBER, member_id=member_id,
+                        difference=_money(total),
+                    )
+                    for member_id, total in per_member
+                    if _money(total)
+                ],
+                batch_size=BATCH_SIZE,
+            )
+
+            accounts = account_totals(ledger, check.as_of)
+            LedgerDifference.objects.bulk_create([
+                LedgerDifference(
+                    ledger_check=check, ledger=ledger, kind=LedgerDifference.ACCOUNT, account_id=account_id,
+                    subledger=sub_total, gl=gl_total, difference=gl_total - sub_total,
+                )
+                for account_id, (sub_total, gl_total) in accounts.items()
+                if sub_total != gl_total
+            ])
+            sub_total = sum((totals[0] for totals in accounts.values()), ZERO)
+            gl_total = sum((totals[1] for totals in accounts.values()), ZERO)
+            counts = Counter(dict(
+                check.differences.filter(ledger=ledger).values("kind").annotate(n=Count("pk")).values_list("kind", "n")
+            ))
+            summary[ledger] = {
+                "subledger": str(_money(sub_total)),
+                "gl": str(_money(gl_total)),
+                "difference": str(_money(gl_total - sub_total)),
+                "counts": dict(counts),
+            }
+
+        check.summary, check.finished_at = summary, timezone.now()
+        check.save(update_fields=["summary", "finished_at"])
+    return summary
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def _run_range(args):
+    check_id, first_id, last_id = args
+    return check_entries(LedgerCheck.objects.get(pk=check_id), first_id, last_id)
+
+
+def run(as_of=None, workers=1, chunk_size=None, log=None):
+    """Run a complete check, spreading the entry ranges over `workers` processes. Returns the LedgerCheck."""
+    log = log or (lambda message: None)
+    started = time.perf_counter()
+    check = start(as_of)
+    ranges = plan(chunk_size)
+    args = [(check.pk, first_id, last_id) for first_id, last_id in ranges]
+    if workers > 1 and len(args) > 1:
+        # Forked children must not share the parent's open DB connections.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            found = sum(pool.map(_run_range, args))
+    else:
+        found = sum(map(_run_range, args))
+    log(f"{len(ranges)} entry range(s): {found} entry difference(s) in {time.perf_counter() - started:.1f}s")
+    finish(check)
+    log(f"Finished in {time.perf_counter() - started:.1f}s")
+    return check
@@ -0,0 +1,28 @@
+from datetime import date
+
+from jobs.queue import task
+from reconciliation import bank, integrity, subledger
+from reconciliation.models import BankStatement
+
+
+@task("reconciliation.reconcile_bank", max_attempts=2)
+def reconcile_bank(job, statement_id=None, window=None):
+    account = BankStatement.objects.get(pk=statement_id).account if statement_id else None
+    job.progress(0, message="Matching bank lines")
+    return bank.reconcile(account=account, window=window)
+
+
+@task("reconciliation.check_subledgers", max_attempts=1)
+def check_subledgers(job, as_of=None, workers=1):
+    """Subledger-to-GL check; `as_of` is "YYYY-MM-DD"."""
+    check = subledger.run(
+        as_of=date.fromisoformat(as_of) if as_of else None, workers=workers,
+        log=lambda message: job.progress(0, message=message),
+    )
+    return {"check": check.pk, **check.summary}
+
+
+@task("reconciliation.check_integrity", max_attempts=1)
+def check_integrity(job, full=False):
+    run = integrity.run(full=full, log=lambda message: job.progress(0, message=message))
+    return {"run": run.pk, **run.summary}
@@ -0,0 +1,90 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from core.models import Account, AccountType, JournalEntry, JournalLine, ReportTag
+
+from . import bank, integrity
+from .models import IntegrityIssue, IntegrityRun
+
+
+class ParseTests(SimpleTestCase):
+    def parse(self, *rows, header="Date,Amount,Reference"):
+        return list(bank.parse([header, *rows]))
+
+    def test_amounts(self):
+        rows = self.parse("2025-03-01,\"1,250.505\",R1", "01/03/2025,(40.00),R2")
+        self.assertEqual([row[1] for row in rows], [Decimal("1250.50"), Decimal("-40.00")])
+        self.assertEqual(rows[1][0], date(2025, 3, 1))
+
+        split = self.parse("2025-03-01,,15.00,R3", header="Date,Credit,Debit,Reference")
+        self.assertEqual(split[0][1], Decimal("-15.00"))
+
+    def test_bad_amounts_are_statement_errors(self):
+        for amount in ["NaN", "sNaN", "Infinity", "-Inf", "(NaN)", "1e20", "1e40", "abc"]:
+            with self.subTest(amount=amount), self.assertRaisesMessage(bank.StatementError, "Row 2:"):
+                self.parse(f"2025-03-01,{amount},R1")
+        with self.assertRaises(bank.StatementError):
+            self.parse("2025-03-01,Infinity,5.00", header="Date,Credit,Debit")
+
+
+class IntegrityScanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.cash = Account.objects.create(code="1010", name="Cash", type=AccountType.ASSET, report_tag=ReportTag.ASSET_CASH_EQUITY)
+        cls.income = Account.objects.create(
+            code="4010", name="Interest on loans", type=AccountType.INCOME, report_tag=ReportTag.INCOME_INTEREST_ON_LOANS
+        )
+        cls.balanced = cls.entry(("100.00", 0), (0, "100.00"))
+        cls.unbalanced = cls.entry(("100.00", 0), (0, "90.00"))
+        cls.dual_sided = cls.entry(("50.00", "50.00"))
+        cls.empty = cls.entry()
+
+    @classmethod
+    def entry(cls, *lines, **fields):
+        entry = JournalEntry.objects.create(date=date(2025, 3, 1), **fields)
+        JournalLine.objects.bulk_create([
+            JournalLine(entry=entry, account=cls.cash if debit else cls.income, debit=Decimal(debit), credit=Decimal(credit))
+            for debit, credit in lines
+        ])
+        return entry
+
+    def issues(self):
+        return set(IntegrityIssue.objects.values_list("journal_entry_id", "kind"))
+
+    def test_full_scan_reports_each_problem(self):
+        draft = self.entry(("10.00", 0), (0, "10.00"), posted=False)
+        JournalEntry.objects.filter(pk=draft.pk).update(created_at=timezone.now() - timedelta(days=30))
+
+        run = integrity.run(full=True, chunk_size=2, draft_days=7)
+
+        self.assertEqual(self.issues(), {
+            (self.unbalanced.pk, IntegrityIssue.UNBALANCED),
+            (self.dual_sided.pk, IntegrityIssue.DUAL_SIDED),
+            (self.empty.pk, IntegrityIssue.EMPTY),
+            (draft.pk, IntegrityIssue.STALE_DRAFT),
+        })
+        unbalanced = IntegrityIssue.objects.get(journal_entry=self.unbalanced)
+        self.assertEqual((unbalanced.debit, unbalanced.credit, unbalanced.lines), (100, 90, 2))
+        self.assertEqual((run.mode, run.entries_scanned, run.last_entry_id), (IntegrityRun.FULL, 5, draft.pk))
+        self.assertEqual(run.summary["found"], {"UNBALANCED": 1, "DUAL_SIDED": 1, "EMPTY": 1, "STALE_DRAFT": 1})
+
+    def test_incremental_scan_checks_new_entries_and_open_issues(self):
+        integrity.run(full=True)
+        JournalLine.objects.create(entry=self.unbalanced, account=self.income, credit=Decimal("10.00"))
+        JournalLine.objects.create(entry=self.balanced, account=self.cash, debit=Decimal("1.00"))
+        added = self.entry((0, "5.00"))
+
+        run = integrity.run()
+
+        self.assertEqual((run.mode, run.first_entry_id, run.entries_scanned), (IntegrityRun.INCREMENTAL, added.pk, 1))
+        # The fixed entry drops off; the balanced one broken since is left for the next full scan
+        self.assertEqual(self.issues(), {
+            (self.dual_sided.pk, IntegrityIssue.DUAL_SIDED),
+            (self.empty.pk, IntegrityIssue.EMPTY),
+            (added.pk, IntegrityIssue.UNBALANCED),
+        })
+        integrity.run(full=True)
+        self.assertIn((self.balanced.pk, IntegrityIssue.UNBALANCED), self.issues())
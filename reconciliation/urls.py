@@ -0,0 +1,14 @@
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path("bank/", views.statement_list, name="bankstatement_list"),
+    path("bank/<int:pk>/", views.statement_detail, name="bankstatement_detail"),
+    path("bank/<int:pk>/reconcile/", views.statement_reconcile, name="bankstatement_reconcile"),
+    path("ledgers/", views.ledgercheck_detail, name="ledgercheck_latest"),
+    path("ledgers/<int:pk>/", views.ledgercheck_detail, name="ledgercheck_detail"),
+    path("integrity/", views.integrity_detail, name="integrity_detail"),
+    path("integrity/run/", views.integrity_run, name="integrity_run"),
+    path("integrity/status/", views.integrity_status, name="integrity_status"),
+]
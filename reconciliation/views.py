@@ -0,0 +1,188 @@
+import io
+
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.db.models import Count, Q, Sum
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.views.decorators.http import require_POST
+
+from core.db_routing import use_replica
+
+from . import bank, integrity
+from .forms import StatementUploadForm
+from .models import BankLine, BankStatement, IntegrityIssue, LedgerCheck, LedgerDifference
+from .tasks import check_integrity
+
+SOURCE_URLS = {
+    "SavingsTransaction": "savingstransaction_edit",
+    "LoanRepayment": "loanrepayment_edit",
+    "Loan": "loan_detail",
+}
+
+
+def _summary(result):
+    rules = ", ".join(f"{count} by {rule.lower().replace('_', ' ')}" for rule, count in result["matched"].items())
+    return (
+        f"Matched {result['bank_lines'] - result['unmatched']} of {result['bank_lines']} bank lines"
+        f"{f' ({rules})' if rules else ''} in {result['seconds']}s."
+    )
+
+
+@login_required
+def statement_list(request):
+    if request.method == "POST":
+        form = StatementUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data["file"]
+            try:
+                statement = bank.import_statement(
+                    io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline=""),
+                    account=form.cleaned_data["account"], name=upload.name, user=request.user,
+                )
+            except (bank.StatementError, UnicodeDecodeError) as exc:
+                form.add_error("file", str(exc))
+            else:
+                result = bank.reconcile(account=statement.account)
+                messages.success(
+                    request, f"Imported {statement.lines_added} new of {statement.rows_read} lines. {_summary(result)}"
+                )
+                return redirect("bankstatement_detail", pk=statement.pk)
+    else:
+        form = StatementUploadForm()
+
+    statements = (
+        BankStatement.objects.select_related("account", "imported_by")
+        .annotate(unmatched=Count("lines", filter=Q(lines__status=BankLine.UNMATCHED)))
+        .order_by("-imported_at")
+    )
+    page = Paginator(statements, 50).get_page(request.GET.get("page"))
+    return render(request, "reconciliation/statement_list.html", {"form": form, "page_obj": page})
+
+
+@login_required
+def statement_detail(request, pk):
+    statement = get_object_or_404(BankStatement.objects.select_related("account"), pk=pk)
+    status = request.GET.get("status", "")
+    lines = statement.lines.prefetch_related("matches__journal_line__entry", "matches__receipt").order_by("date", "pk")
+    if status in dict(BankLine.STATUS_CHOICES):
+        lines = lines.filter(status=status)
+
+    totals = {
+        row["status"]: row
+        for row in statement.lines.values("status").annotate(count=Count("pk"), amount=Sum("amount"))
+    }
+    page = Paginator(lines, 100).get_page(request.GET.get("page"))
+    querystring = request.GET.copy()
+    querystring.pop("page", None)
+    return render(request, "reconciliation/statement_detail.html", {
+        "statement": statement,
+        "status": status,
+        "statuses": BankLine.STATUS_CHOICES,
+        "totals": [(label, totals.get(code, {})) for code, label in BankLine.STATUS_CHOICES],
+        "page_obj": page,
+        "querystring": querystring.urlencode(),
+    })
+
+
+@login_required
+@require_POST
+def statement_reconcile(request, pk):
+    """Re-run matching for the statement's bank account, e.g. after missing receipts were posted."""
+    statement = get_object_or_404(BankStatement, pk=pk)
+    messages.success(request, _summary(bank.reconcile(account=statement.account)))
+    return redirect("bankstatement_detail", pk=statement.pk)
+
+
+@login_required
+@use_replica()
+def ledgercheck_detail(request, pk=None):
+    """A subledger-to-GL check (the latest by default), filterable down to the differing rows."""
+    checks = LedgerCheck.objects.order_by("-as_of")
+    check = get_object_or_404(checks, pk=pk) if pk else checks.first()
+    filters = {key: request.GET.get(key, "") for key in ("ledger", "kind", "member")}
+
+    differences = LedgerDifference.objects.none()
+    if check:
+        differences = check.differences.select_related("account", "member", "journal_entry").order_by(
+            "ledger", "kind", "-date", "pk"
+        )
+        if filters["ledger"] in dict(LedgerDifference.LEDGER_CHOICES):
+            differences = differences.filter(ledger=filters["ledger"])
+        if filters["kind"] in dict(LedgerDifference.KIND_CHOICES):
+            differences = differences.filter(kind=filters["kind"])
+        if filters["member"].isdigit():
+            differences = differences.filter(member_id=filters["member"])
+
+    page = Paginator(differences, 100).get_page(request.GET.get("page"))
+    for row in page:
+        name = SOURCE_URLS.get(row.source_model)
+        row.source_url = reverse(name, args=[row.source_id]) if name and row.source_id else ""
+    querystring = request.GET.copy()
+    querystring.pop("page", None)
+    return render(request, "reconciliation/ledgercheck_detail.html", {
+        "check": check,
+        "checks": checks[:30],
+        "ledgers": LedgerDifference.LEDGER_CHOICES,
+        "kinds": LedgerDifference.KIND_CHOICES,
+        "filters": filters,
+        "summary": [
+            (label, (check.summary or {}).get(code)) for code, label in LedgerDifference.LEDGER_CHOICES
+        ] if check else [],
+        "page_obj": page,
+        "querystring": querystring.urlencode(),
+    })
+
+
+@login_required
+@use_replica()
+def integrity_detail(request):
+    """Open journal integrity issues, filterable by kind, with the latest scan."""
+    kind = request.GET.get("kind", "")
+    issues = IntegrityIssue.objects.select_related("journal_entry").order_by("kind", "journal_entry_id")
+    if kind in dict(IntegrityIssue.KIND_CHOICES):
+        issues = issues.filter(kind=kind)
+
+    page = Paginator(issues, 100).get_page(request.GET.get("page"))
+    querystring = request.GET.copy()
+    querystring.pop("page", None)
+    counts = integrity.open_issues()
+    return render(request, "reconciliation/integrity_detail.html", {
+        "run": integrity.last_run(),
+        "kinds": [(code, label, counts.get(code, 0)) for code, label in IntegrityIssue.KIND_CHOICES],
+        "kind": kind,
+        "draft_days": integrity.draft_max_age(),
+        "page_obj": page,
+        "querystring": querystring.urlencode(),
+    })
+
+
+@login_required
+@require_POST
+def integrity_run(request):
+    """Queue a scan (incremental unless full=1 is posted) and follow it on the job page."""
+    job = check_integrity.enqueue(full=request.POST.get("full") == "1", created_by=request.user)
+    messages.info(request, "Integrity scan queued.")
+    return redirect("job_detail", pk=job.pk)
+
+
+@login_required
+@use_replica()
+def integrity_status(request):
+    """Latest scan and open issue counts as JSON, for monitoring."""
+    run = integrity.last_run()
+    return JsonResponse({
+        "open": integrity.open_issues(),
+        "last_run": {
+            "id": run.pk,
+            "mode": run.mode,
+            "started_at": run.started_at.isoformat(),
+            "finished_at": run.finished_at.isoformat(),
+            "entries_scanned": run.entries_scanned,
+            "last_entry_id": run.last_entry_id,
+            "found": run.summary.get("found", {}),
+            "seconds": run.summary.get("seconds"),
+        } if run else None,
+    })
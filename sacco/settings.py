@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,15 +44,23 @@ INSTALLED_APPS = [
     'savings',
     'django.contrib.humanize',
     'receipts',
+    'jobs',
+    'eod',
+    'notifications',
+    'mobilemoney',
+    'reconciliation',
+    'archive',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'core.db_routing.ReplicaPinningMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -77,13 +86,83 @@ WSGI_APPLICATION = 'sacco.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+#
+# SACCO_DB_PROFILE picks the database profile:
+#   sqlite   - single file, WAL journal, busy timeout and IMMEDIATE transactions
+#              so concurrent tellers queue for the write lock instead of failing
+#              with "database is locked".
+#   postgres - psycopg 3 connection pool (SACCO_DB_POOL=1, the default) or
+#              persistent connections (SACCO_DB_POOL=0, SACCO_DB_CONN_MAX_AGE).
+# Measure either with `manage.py benchmark_tellers`.
+
+SACCO_DB_PROFILE = os.environ.get('SACCO_DB_PROFILE', 'sqlite')
+
+if SACCO_DB_PROFILE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('SACCO_DB_NAME', 'sacco'),
+            'USER': os.environ.get('SACCO_DB_USER', 'sacco'),
+            'PASSWORD': os.environ.get('SACCO_DB_PASSWORD', ''),
+            'HOST': os.environ.get('SACCO_DB_HOST', 'localhost'),
+            'PORT': os.environ.get('SACCO_DB_PORT', '5432'),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+    if os.environ.get('SACCO_DB_POOL', '1') == '1':
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('SACCO_DB_POOL_MIN', 2)),
+            'max_size': int(os.environ.get('SACCO_DB_POOL_MAX', 20)),
+            'timeout': 10,
+        }
+    else:
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('SACCO_DB_CONN_MAX_AGE', 600))
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SACCO_DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # Take the write lock at BEGIN, so a posting never fails halfway
+                # through when another teller commits first.
+                'transaction_mode': 'IMMEDIATE',
+                # Seconds to wait for the write lock before raising "database is locked".
+                'timeout': int(os.environ.get('SACCO_SQLITE_TIMEOUT', 20)),
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA cache_size=-64000;'
+                    'PRAGMA temp_store=MEMORY;'
+                    'PRAGMA mmap_size=268435456;'
+                ),
+            },
+            # Tests use a file rather than shared-cache memory, whose table locks
+            # ignore the timeout above, so threaded tests contend as tellers do.
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+        }
+    }
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+
+# Read replica for reports and exports (see core/db_routing.py).
+# Set SACCO_DB_REPLICA_HOST (postgres) or SACCO_DB_REPLICA_NAME (a second
+# SQLite file, e.g. made with `sqlite3 db.sqlite3 ".backup replica.sqlite3"`)
+# to enable it. Only code wrapped in `use_replica` reads from it.
+
+_replica_host = os.environ.get('SACCO_DB_REPLICA_HOST')
+_replica_name = os.environ.get('SACCO_DB_REPLICA_NAME')
+if _replica_host or _replica_name:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': _replica_host or DATABASES['default'].get('HOST', ''),
+        'NAME': _replica_name or DATABASES['default']['NAME'],
+        'TEST': {'MIRROR': 'default'},
     }
-}
+
+DATABASE_ROUTERS = ['core.db_routing.ReadReplicaRouter']
+
+# After a POST, keep that user's reads on the primary this long (read-your-writes).
+REPLICA_PIN_SECONDS = 10
 
 
 # Password validation
@@ -127,7 +206,126 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Rendered receipts survive restarts and are shared by worker processes.
+    'receipts': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'receipts',
+        'TIMEOUT': 60 * 60 * 24 * 30,
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+    # Cached reports are shared by every process, so an invalidation in one is seen by all.
+    'reports': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'reports',
+    },
+}
+
+RECEIPT_RENDER_CACHE = 'receipts'
+RECEIPT_RENDER_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+REPORT_CACHE = 'reports'
+
+# Dashboard KPIs are invalidated on posting; the TTL is only a backstop.
+DASHBOARD_CACHE_TIMEOUT = 60
+
+# Portfolio at risk: loans with an unpaid installment overdue by more than this many days.
+PAR_DAYS = 30
+
+# Cash-inflow forecast: collection rates look back this many months; results are cached
+# until a schedule, repayment or loan changes (or the timeout passes).
+FORECAST_LOOKBACK_MONTHS = 12
+FORECAST_CACHE_TIMEOUT = 6 * 60 * 60
+
+# End-of-day batch (manage.py run_eod)
+EOD_WORKERS = 4
+EOD_CHUNK_SIZE = 5000
+LOAN_DEFAULT_DAYS = 90        # overdue this long and an ACTIVE loan becomes DEFAULTED
+SAVINGS_DORMANCY_DAYS = 365   # no savings transaction this long and the account is deactivated
+MEMBER_DORMANCY_DAYS = 365    # no savings, repayment or receipt this long (and no open loan): member INACTIVE
+
+# Loan eligibility (loans/eligibility.py): maximum loan as a multiple of savings,
+# less principal outstanding; a product's own multiplier takes precedence.
+LOAN_SAVINGS_MULTIPLIER = 3
+
+# Unlocked (optimistic) savings postings retry this many times when the
+# account changes underneath them (savings/postings.py).
+SAVINGS_POSTING_RETRIES = 5
+
+# Loan loss provision, % of outstanding principal per arrears bucket.
+# ProvisionRate rows (optionally per product) override these.
+LOAN_PROVISION_RATES = {
+    'PERFORMING': 1,
+    'WATCH': 5,
+    'SUBSTANDARD': 25,
+    'DOUBTFUL': 50,
+    'LOSS': 100,
+}
+
+# SQL instrumentation
+# Per-request query count, SQL time, slowest and repeated statements go to the
+# "sacco.sql" logger and to X-DB-* response headers (see core/middleware.py).
+
+SQL_INSTRUMENTATION_ENABLED = DEBUG
+SQL_INSTRUMENTATION_HEADERS = True
+SQL_INSTRUMENTATION_WARN_QUERIES = 50
+SQL_INSTRUMENTATION_SLOWEST = 5
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'sacco.sql': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+        'sacco.jobs': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+# Background jobs (see jobs/queue.py; run workers with `manage.py run_jobs`)
+JOB_RETRY_BACKOFF_SECONDS = 30
+JOB_STALE_SECONDS = 900
+JOB_HEARTBEAT_SECONDS = 60  # how often a running job refreshes locked_at; well under JOB_STALE_SECONDS
+JOB_OUTPUT_DIR = BASE_DIR / 'job_output'
+
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+# SMS (notifications/sms.py). The console backend is a local stand-in; point this at a
+# gateway backend in production.
+SMS_BACKEND = 'notifications.sms.ConsoleSmsBackend'
+SMS_SENDER_ID = 'HIGHLANDS'
+
+# Installment reminders (manage.py send_reminders)
+REMINDER_DAYS_AHEAD = 3
+REMINDER_BATCH_SIZE = 200
+REMINDER_RATE_PER_SECOND = 50
+
+# Mobile-money callbacks (mobilemoney/). Providers POST to /mobile-money/callback/<provider>/
+# with the shared token in X-Callback-Token; while no token is set every callback is refused.
+# "stub" is the local provider `manage.py replay_mobile_payments` sends as; set
+# MOBILE_MONEY_STUB=1 to accept it.
+MOBILE_MONEY_PROVIDERS = ['mpesa'] + (['stub'] if os.environ.get('MOBILE_MONEY_STUB') == '1' else [])
+MOBILE_MONEY_CALLBACK_TOKEN = os.environ.get('MOBILE_MONEY_CALLBACK_TOKEN', '')
+MOBILE_MONEY_BATCH_SIZE = 500
+
+# Bank reconciliation (manage.py reconcile_bank): how many days a bank line's date may
+# differ from the book date it is matched to.
+BANK_RECONCILIATION_WINDOW_DAYS = 3
+
+# Journal integrity scan (manage.py check_ledger_integrity): unposted journal entries
+# older than this many days are reported as stale drafts.
+LEDGER_DRAFT_MAX_AGE_DAYS = 7
+
+# Archival (manage.py archive_transactions): journal lines, savings and member
+# transactions and closed loans' repayments move to the archive tables once they
+# are inside a closed fiscal period and at least this many days old.
+ARCHIVE_AFTER_DAYS = 365
+
 LOGIN_REDIRECT_URL = '/dashboard/'
 LOGOUT_REDIRECT_URL = '/accounts/login/'
@@ -49,5 +49,8 @@ urlpatterns = [
     path("loans/", include("loans.urls")),
     path('savings/', include('savings.urls')),
     path("receipts/", include("receipts.urls", namespace="receipts")),
+    path("jobs/", include("jobs.urls")),
+    path("mobile-money/", include("mobilemoney.urls")),
+    path("reconciliation/", include("reconciliation.urls")),
 
 ]
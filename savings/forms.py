@@ -1,4 +1,6 @@
 from django import forms
+
+from core import periods
 from .models import SavingsAccount, SavingsTransaction
 
 class SavingsAccountForm(forms.ModelForm):
@@ -36,3 +38,30 @@ class SavingsTransactionForm(forms.ModelForm):
                 'placeholder': 'e.g. Mobile Deposit, Loan Overpayment',
             }),  # 👈 Widget for the new field
         }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Account labels show the member's name
+        self.fields['savings_account'].queryset = SavingsAccount.objects.select_related('member')
+
+    def clean_date(self):
+        date = self.cleaned_data['date']
+        if periods.is_locked(date) or self.instance.pk and periods.is_locked(self.instance.date):
+            raise forms.ValidationError(f"Entries up to {periods.locked_through()} are in a closed period.")
+        return date
+
+    def clean(self):
+        cleaned = super().clean()
+        account = cleaned.get('savings_account')
+        amount = cleaned.get('amount')
+        if amount is not None and amount <= 0:
+            self.add_error('amount', "Amount must be positive.")
+        elif account and amount and cleaned.get('transaction_type') == SavingsTransaction.WITHDRAWAL:
+            # Early check against the stored balance; postings.withdraw re-checks under the lock.
+            available = account.current_balance
+            original = self.instance
+            if original.pk and original.savings_account_id == account.pk:
+                available -= SavingsTransaction.objects.get(pk=original.pk).balance_effect()
+            if amount > available:
+                self.add_error('amount', f"Only {available:,.2f} available in this account.")
+        return cleaned
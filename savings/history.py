@@ -0,0 +1,168 @@
+"""
+Savings balance history.
+
+SavingsBalance holds an account's closing balance for every day its
+balance moved, so the balance on any date is the latest row on or before
+that date: one index seek per account instead of a scan of its
+transactions. `balance_on()` answers for one account, `as_of()` and
+`with_balance_on()` for any number of accounts in one query, and
+`minimum_balance()` gives the lowest balance over a date range, e.g. for
+minimum-monthly-balance interest.
+
+Rows follow every transaction by its delta (savings/signals.py, and
+mobilemoney/posting.py for its bulk batches): a transaction dated `day`
+moves that day's row, created from the row before it if needed, and every
+later row. `rebuild()` recomputes accounts from their transactions,
+archived ones included; the EOD `savings_history` stage rebuilds the
+`stale()` accounts, whose latest row disagrees with the stored balance,
+which catches bulk loads that bypass the signals. Transactions written
+before the history existed are filled in by savings/migrations/0008.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import DecimalField, Exists, F, Min, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Abs, Coalesce
+
+from archive.store import stores
+
+from .models import SavingsAccount, SavingsBalance, SavingsTransaction
+
+BATCH_SIZE = 2000
+CENTS = Decimal("0.01")
+HALF_CENT = Decimal("0.005")
+ZERO = Decimal("0.00")
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+def _money(value):
+    return Decimal(value or 0).quantize(CENTS)  # SQLite sums decimals as floats
+
+
+def _as_date(value):
+    return value.date() if hasattr(value, "date") and callable(value.date) else value
+
+
+def effects(instance):
+    """What a saved SavingsTransaction does to the history, as (account_id, day, delta) tuples."""
+    delta = instance.balance_effect()
+    if instance.savings_account_id and instance.date and delta:
+        return [(instance.savings_account_id, _as_date(instance.date), delta)]
+    return []
+
+
+def apply(added=(), removed=()):
+    """Add one set of effects and subtract another, netting them per (account, day) first."""
+    deltas = defaultdict(lambda: ZERO)
+    for rows, sign in ((added, 1), (removed, -1)):
+        for account_id, day, delta in rows:
+            deltas[(account_id, day)] += sign * delta
+
+    for (account_id, day), delta in sorted(deltas.items()):
+        if delta:
+            _shift(account_id, day, delta)
+
+
+def _shift(account_id, day, delta):
+    rows = SavingsBalance.objects.filter(savings_account_id=account_id)
+    rows.filter(date__gt=day).update(balance=F("balance") + delta)
+    if rows.filter(date=day).update(balance=F("balance") + delta):
+        return
+    previous = rows.filter(date__lt=day).order_by("-date").values_list("balance", flat=True).first()
+    try:
+        with transaction.atomic():
+            SavingsBalance.objects.create(savings_account_id=account_id, date=day, balance=(previous or ZERO) + delta)
+    except IntegrityError:
+        # Another posting created the day's row first; add to theirs.
+        rows.filter(date=day).update(balance=F("balance") + delta)
+
+
+def balance_on(account, day):
+    """`account`'s balance at the end of `day`."""
+    balance = (
+        SavingsBalance.objects.filter(savings_account=account, date__lte=day)
+        .order_by("-date").values_list("balance", flat=True).first()
+    )
+    return ZERO if balance is None else balance
+
+
+def with_balance_on(day, accounts=None):
+    """`accounts` (default all) annotated with `balance_on`, their balance at the end of `day`."""
+    accounts = SavingsAccount.objects.all() if accounts is None else accounts
+    latest = (
+        SavingsBalance.objects.filter(savings_account=OuterRef("pk"), date__lte=day)
+        .order_by("-date").values("balance")[:1]
+    )
+    return accounts.annotate(balance_on=Coalesce(Subquery(latest, output_field=MONEY), Value(ZERO), output_field=MONEY))
+
+
+def as_of(day, accounts=None):
+    """{account_id: balance at the end of `day`} of `accounts` (default all), in one query."""
+    return {
+        account_id: _money(balance)
+        for account_id, balance in with_balance_on(day, accounts).values_list("pk", "balance_on")
+    }
+
+
+def minimum_balance(first, last, accounts=None):
+    """{account_id: lowest end-of-day balance from `first` to `last`}, the balance carried into `first` included."""
+    lowest = as_of(first - timedelta(days=1), accounts)
+    rows = SavingsBalance.objects.filter(date__gte=first, date__lte=last)
+    if accounts is not None:
+        rows = rows.filter(savings_account__in=accounts)
+    for account_id, balance in rows.values("savings_account_id").annotate(low=Min("balance")).values_list(
+        "savings_account_id", "low"
+    ):
+        lowest[account_id] = min(lowest.get(account_id, ZERO), _money(balance))
+    return lowest
+
+
+def stale(accounts=None):
+    """The `accounts` whose history does not end at their stored balance, or is missing despite transactions."""
+    accounts = SavingsAccount.objects.all() if accounts is None else accounts
+    latest = SavingsBalance.objects.filter(savings_account=OuterRef("pk")).order_by("-date").values("balance")[:1]
+    has_transactions = Q()
+    for store in stores(SavingsTransaction):
+        has_transactions |= Exists(store.filter(savings_account_id=OuterRef("pk")))
+    # Compared to the cent: SQLite may store the balances as floats
+    return accounts.annotate(
+        recorded=Subquery(latest, output_field=MONEY),
+        drift=Abs(F("current_balance") - F("recorded"), output_field=MONEY),
+    ).filter(
+        Q(drift__gte=HALF_CENT)
+        | Q(recorded__isnull=True) & (~Q(current_balance=0) | has_transactions)
+    )
+
+
+def rebuild(accounts=None):
+    """Recompute the history of `accounts` (default all) from their transactions. Returns the rows written."""
+    accounts = SavingsAccount.objects.all() if accounts is None else accounts
+    ids = list(accounts.order_by("pk").values_list("pk", flat=True))
+    written = 0
+    for start in range(0, len(ids), BATCH_SIZE):
+        chunk = ids[start:start + BATCH_SIZE]
+        # Live and archived transactions; a day can be split between the two
+        net = defaultdict(lambda: ZERO)
+        for store in stores(SavingsTransaction):
+            days = (
+                store.filter(savings_account_id__in=chunk)
+                .values("savings_account_id", "date")
+                .annotate(total=Sum(SavingsTransaction.signed_amount()))
+                .values_list("savings_account_id", "date", "total")
+                .order_by()
+            )
+            for account_id, day, total in days:
+                net[(account_id, day)] += _money(total)
+
+        running = defaultdict(lambda: ZERO)
+        rows = []
+        for account_id, day in sorted(net):
+            running[account_id] += net[(account_id, day)]
+            rows.append(SavingsBalance(savings_account_id=account_id, date=day, balance=running[account_id]))
+        with transaction.atomic():
+            SavingsBalance.objects.filter(savings_account_id__in=chunk).delete()
+            SavingsBalance.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        written += len(rows)
+    return written
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from savings import history
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily savings balance history from the transaction tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--stale", action="store_true",
+            help="Only accounts whose history does not end at their stored balance.",
+        )
+
+    def handle(self, *args, **options):
+        accounts = history.stale() if options["stale"] else None
+        written = history.rebuild(accounts)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} savings balance rows."))
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:57
+
+from django.db import migrations, models
+from django.db.models import Case, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+
+def fill_balances(apps, schema_editor):
+    SavingsAccount = apps.get_model('savings', 'SavingsAccount')
+    SavingsTransaction = apps.get_model('savings', 'SavingsTransaction')
+    money = models.DecimalField(max_digits=14, decimal_places=2)
+    signed = Case(
+        When(transaction_type__in=['DEPOSIT', 'INTEREST'], then=F('amount')),
+        When(transaction_type='WITHDRAWAL', then=-F('amount')),
+        default=Value(0),
+        output_field=money,
+    )
+    totals = (
+        SavingsTransaction.objects.filter(savings_account=OuterRef('pk'))
+        .values('savings_account').annotate(total=Sum(signed)).values('total')
+    )
+    SavingsAccount.objects.update(current_balance=Coalesce(Subquery(totals, output_field=money), Value(0), output_field=money))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savings', '0002_savingstransaction_source'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='savingsaccount',
+            name='current_balance',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='savingsaccount',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_balances, migrations.RunPython.noop),
+    ]
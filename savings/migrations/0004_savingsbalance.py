@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savings', '0003_stored_balance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SavingsBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('savings_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_history', to='savings.savingsaccount')),
+            ],
+            options={
+                'ordering': ['savings_account', 'date'],
+                'constraints': [models.UniqueConstraint(fields=('savings_account', 'date'), name='savingsbalance_account_date_uniq')],
+            },
+        ),
+    ]
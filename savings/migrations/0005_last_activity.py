@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_dormancy'),
+        ('savings', '0004_savingsbalance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='savingsaccount',
+            name='last_activity_on',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='savingsaccount',
+            index=models.Index(fields=['active', 'last_activity_on'], name='savings_sav_active_94f9d4_idx'),
+        ),
+    ]
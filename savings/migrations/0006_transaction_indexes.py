@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_dormancy'),
+        ('savings', '0005_last_activity'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='savingstransaction',
+            index=models.Index(fields=['savings_account', 'transaction_type', 'date', 'amount'], name='savings_sav_savings_d429c9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='savingstransaction',
+            index=models.Index(fields=['date', 'id'], name='savings_sav_date_8d3183_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='savingstransaction',
+            index=models.Index(fields=['savings_account', 'date', 'id'], name='savings_sav_savings_85bca3_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+from django.db import migrations
+from django.db.models import Max
+from django.utils import timezone
+
+BATCH_SIZE = 2000
+
+
+def _latest(days, key, day):
+    if day is not None and (days.get(key) is None or day > days[key]):
+        days[key] = day
+
+
+def _as_date(value):
+    if value is not None and getattr(value, 'tzinfo', None) is not None:
+        return timezone.localdate(value)
+    return value.date() if hasattr(value, 'date') and callable(value.date) else value
+
+
+def fill_last_activity(apps, schema_editor):
+    """core/dormancy.py rebuild(), on the historical models: last_activity_on from the activity tables."""
+    Member = apps.get_model('core', 'Member')
+    SavingsAccount = apps.get_model('savings', 'SavingsAccount')
+    Receipt = apps.get_model('receipts', 'Receipt')
+    savings_stores = [apps.get_model('savings', 'SavingsTransaction'), apps.get_model('archive', 'ArchivedSavingsTransaction')]
+    repayment_stores = [apps.get_model('loans', 'LoanRepayment'), apps.get_model('archive', 'ArchivedLoanRepayment')]
+    Loan = apps.get_model('loans', 'Loan')
+
+    accounts, members = {}, {}
+    for store in savings_stores:
+        for account_id, day in store.objects.values('savings_account_id').annotate(last=Max('date')).values_list(
+            'savings_account_id', 'last'
+        ).order_by():
+            _latest(accounts, account_id, day)
+    for account_id, member_id in SavingsAccount.objects.values_list('pk', 'member_id'):
+        _latest(members, member_id, accounts.get(account_id))
+    borrowers = dict(Loan.objects.values_list('pk', 'member_id'))
+    for store in repayment_stores:
+        # Archived repayments have no loan relation to join through
+        for loan_id, day in store.objects.values('loan_id').annotate(last=Max('date')).values_list(
+            'loan_id', 'last'
+        ).order_by():
+            if loan_id in borrowers:
+                _latest(members, borrowers[loan_id], day)
+    for member_id, issued in Receipt.objects.values('member_id').annotate(last=Max('issued_on')).values_list(
+        'member_id', 'last'
+    ).order_by():
+        _latest(members, member_id, _as_date(issued))
+
+    for model, days in ((SavingsAccount, accounts), (Member, members)):
+        rows = [model(pk=pk, last_activity_on=day) for pk, day in days.items()]
+        model.objects.bulk_update(rows, ['last_activity_on'], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archive', '0001_initial'),
+        ('core', '0009_dormancy'),
+        ('loans', '0008_alter_loaninterestaccrual_repayment'),
+        ('receipts', '0002_alter_receipt_loan_repayment_and_more'),
+        ('savings', '0006_transaction_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_last_activity, migrations.RunPython.noop),
+    ]
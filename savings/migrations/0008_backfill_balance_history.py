@@ -0,0 +1,49 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Case, F, Sum, Value, When
+
+BATCH_SIZE = 2000
+CENTS = Decimal('0.01')
+
+
+def fill_balance_history(apps, schema_editor):
+    """savings/history.py rebuild(), on the historical models: a closing balance for every day a balance moved."""
+    SavingsBalance = apps.get_model('savings', 'SavingsBalance')
+    stores = [apps.get_model('savings', 'SavingsTransaction'), apps.get_model('archive', 'ArchivedSavingsTransaction')]
+    signed = Case(
+        When(transaction_type__in=['DEPOSIT', 'INTEREST'], then=F('amount')),
+        When(transaction_type='WITHDRAWAL', then=-F('amount')),
+        default=Value(0),
+        output_field=models.DecimalField(max_digits=14, decimal_places=2),
+    )
+
+    net = defaultdict(Decimal)
+    for store in stores:
+        days = (
+            store.objects.values('savings_account_id', 'date').annotate(total=Sum(signed))
+            .values_list('savings_account_id', 'date', 'total').order_by()
+        )
+        for account_id, day, total in days:
+            net[(account_id, day)] += Decimal(total or 0).quantize(CENTS)  # SQLite sums decimals as floats
+
+    running = defaultdict(Decimal)
+    rows = []
+    for account_id, day in sorted(net):
+        running[account_id] += net[(account_id, day)]
+        rows.append(SavingsBalance(savings_account_id=account_id, date=day, balance=running[account_id]))
+    SavingsBalance.objects.all().delete()
+    SavingsBalance.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archive', '0001_initial'),
+        ('savings', '0007_backfill_last_activity'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_balance_history, migrations.RunPython.noop),
+    ]
@@ -7,16 +7,27 @@ class SavingsAccount(models.Model):
     account = models.ForeignKey(Account, on_delete=models.PROTECT)  # Should have ReportTag.LIAB_MEMBERS_SAVINGS
     opened_on = models.DateField(default=timezone.now)
     active = models.BooleanField(default=True)
+    # Maintained with every transaction (savings/signals.py, savings/postings.py).
+    current_balance = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+    version = models.PositiveIntegerField(default=0, editable=False)
+    # Latest transaction date (core/dormancy.py).
+    last_activity_on = models.DateField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [models.Index(fields=["active", "last_activity_on"])]
 
     def __str__(self):
         return f"Savings - {self.member.full_name}"
 
     @property
     def balance(self):
-        total_deposits = self.transactions.filter(transaction_type='DEPOSIT').aggregate(models.Sum('amount'))['amount__sum'] or 0
-        total_withdrawals = self.transactions.filter(transaction_type='WITHDRAWAL').aggregate(models.Sum('amount'))['amount__sum'] or 0
-        total_interest = self.transactions.filter(transaction_type='INTEREST').aggregate(models.Sum('amount'))['amount__sum'] or 0
-        return total_deposits + total_interest - total_withdrawals
+        """Deposits plus interest less withdrawals, as stored on the account."""
+        return self.current_balance
+
+    def balance_on(self, day):
+        """The balance at the end of `day`, from the balance history."""
+        from savings import history  # Avoid circular import
+        return history.balance_on(self, day)
 
     def deposit(self, amount, note=""):
         from savings.models import SavingsTransaction  # Avoid circular import
@@ -28,13 +39,9 @@ class SavingsAccount(models.Model):
         )
 
     def withdraw(self, amount, note=""):
-        from savings.models import SavingsTransaction
-        SavingsTransaction.objects.create(
-            savings_account=self,
-            transaction_type='WITHDRAWAL',
-            amount=amount,
-            notes=note
-        )
+        """Withdraw against the stored balance; raises postings.InsufficientFunds."""
+        from savings import postings  # Avoid circular import
+        return postings.withdraw(self, amount, notes=note)
 
 class SavingsTransaction(models.Model):
     DEPOSIT = 'DEPOSIT'
@@ -58,8 +65,46 @@ class SavingsTransaction(models.Model):
         help_text="Optional tag for transaction origin (e.g. 'Loan Overpayment', 'Mobile Deposit', 'Manual Entry')"
     )
 
+    # How each type moves the account balance.
+    SIGNS = {DEPOSIT: 1, INTEREST: 1, WITHDRAWAL: -1}
+
     class Meta:
         ordering = ['-date', '-id']
+        indexes = [
+            # Per-account totals by type and date range read only the index
+            models.Index(fields=['savings_account', 'transaction_type', 'date', 'amount']),
+            # The transaction list, newest first, whole book or one account
+            models.Index(fields=['date', 'id']),
+            models.Index(fields=['savings_account', 'date', 'id']),
+        ]
+
+    @classmethod
+    def signed_amount(cls):
+        """An expression for the row's effect on the balance, for Sum() over transactions."""
+        return models.Case(
+            *[models.When(transaction_type=kind, then=models.F('amount') * sign) for kind, sign in cls.SIGNS.items()],
+            default=models.Value(0),
+            output_field=models.DecimalField(max_digits=14, decimal_places=2),
+        )
+
+    def balance_effect(self):
+        return self.amount * self.SIGNS.get(self.transaction_type, 0) if self.amount else 0
 
     def __str__(self):
         return f"{self.transaction_type} - {self.amount} on {self.date} ({self.savings_account.member.full_name})"
+
+
+class SavingsBalance(models.Model):
+    """An account's balance at the end of a day it moved (see savings/history.py)."""
+    savings_account = models.ForeignKey(SavingsAccount, related_name='balance_history', on_delete=models.CASCADE)
+    date = models.DateField()
+    balance = models.DecimalField(max_digits=14, decimal_places=2)
+
+    class Meta:
+        ordering = ['savings_account', 'date']
+        constraints = [
+            models.UniqueConstraint(fields=['savings_account', 'date'], name='savingsbalance_account_date_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.savings_account_id} on {self.date}: {self.balance}"
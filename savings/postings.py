@@ -0,0 +1,255 @@
+"""
+Savings withdrawals and transfers.
+
+SavingsAccount stores its balance (`current_balance`) and a `version`
+that goes up with every change. savings/signals.py keeps both in step
+with transactions written anywhere else; the postings here move the
+balance themselves:
+
+* the account rows are read with SELECT ... FOR UPDATE in primary-key
+  order (on SQLite the IMMEDIATE transaction already holds the write
+  lock). With `lock=False` they are read without a lock instead;
+* the withdrawal is checked against the stored balance, one row read
+  rather than a scan of the account's history;
+* the balance moves in an UPDATE guarded by the version that was read.
+  Under the lock it always matches; without it, a concurrent change
+  makes it match nothing and the posting is retried from the top, up to
+  SAVINGS_POSTING_RETRIES times;
+* the journal entry, the transactions and the balance change commit
+  together or not at all;
+* nothing is posted on a date in a closed period (core/periods.py).
+
+`amend()` saves an edited transaction and `remove()` deletes one under
+the same lock, refusing either when it would overdraw the account.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core import periods
+from core.models import Account, JournalEntry, JournalLine, ReportTag
+
+from .models import SavingsAccount, SavingsTransaction
+
+TRANSFER_SOURCE = "Transfer"
+ZERO = Decimal("0")
+
+
+class PostingError(Exception):
+    pass
+
+
+class InsufficientFunds(PostingError):
+    def __init__(self, account, amount):
+        self.account = account
+        self.amount = amount
+        super().__init__(
+            f"Savings account {account.pk} has {account.current_balance:,.2f}; cannot withdraw {amount:,.2f}."
+        )
+
+
+class InactiveAccount(PostingError):
+    def __init__(self, account):
+        self.account = account
+        super().__init__(f"Savings account {account.pk} is inactive.")
+
+
+class ClosedPeriod(PostingError):
+    def __init__(self, date):
+        self.date = date
+        super().__init__(f"Entries up to {periods.locked_through()} are in a closed period; cannot post on {date}.")
+
+
+class ConcurrentUpdate(PostingError):
+    """The account kept changing under an unlocked posting; every retry lost the race."""
+
+
+class _Stale(Exception):
+    pass
+
+
+def cash_account():
+    account = Account.objects.filter(report_tag=ReportTag.ASSET_CASH_EQUITY).order_by("code").first()
+    if account is None:
+        raise ImproperlyConfigured("Savings withdrawals need an account tagged ASSET_CASH_EQUITY.")
+    return account
+
+
+def _amount(value):
+    amount = Decimal(value)
+    if amount <= 0:
+        raise ValueError("Amount must be positive.")
+    return amount
+
+
+def _post(legs, lines, *, date=None, memo="", user=None, journal_entry=None, notes="", source="",
+          lock=True, retries=None):
+    """
+    Post `legs` - [(account_id, transaction_type, amount)] - atomically.
+    `lines(accounts)` returns the journal lines [(gl_account, debit, credit)]
+    given the locked SavingsAccounts by id. Returns the SavingsTransactions.
+    """
+    retries = getattr(settings, "SAVINGS_POSTING_RETRIES", 5) if retries is None else retries
+    date = date or timezone.localdate()
+    if periods.is_locked(date):
+        raise ClosedPeriod(date)
+    account_ids = sorted({account_id for account_id, _, _ in legs})
+
+    for _ in range(retries + 1):
+        try:
+            with transaction.atomic():
+                accounts = SavingsAccount.objects.filter(pk__in=account_ids).order_by("pk")
+                if lock:
+                    accounts = accounts.select_for_update()
+                accounts = {account.pk: account for account in accounts}
+
+                for account_id, kind, amount in legs:
+                    account = accounts[account_id]
+                    if not account.active:
+                        raise InactiveAccount(account)
+                    if kind == SavingsTransaction.WITHDRAWAL and account.current_balance < amount:
+                        raise InsufficientFunds(account, amount)
+
+                for account_id, kind, amount in legs:
+                    moved = SavingsAccount.objects.filter(pk=account_id, version=accounts[account_id].version).update(
+                        current_balance=F("current_balance") + amount * SavingsTransaction.SIGNS[kind],
+                        version=F("version") + 1,
+                    )
+                    if not moved:
+                        raise _Stale
+                    accounts[account_id].version += 1
+
+                entry = journal_entry
+                if entry is None:
+                    entry = JournalEntry.objects.create(
+                        date=date, memo=memo, reference=f"SAV-{date:%Y%m%d}", created_by=user
+                    )
+                    JournalLine.objects.bulk_create([
+                        JournalLine(entry=entry, account=account, debit=debit, credit=credit)
+                        for account, debit, credit in lines(accounts)
+                    ])
+
+                posted = []
+                for account_id, kind, amount in legs:
+                    tx = SavingsTransaction(
+                        savings_account=accounts[account_id],
+                        date=date,
+                        transaction_type=kind,
+                        amount=amount,
+                        journal_entry=entry,
+                        notes=notes,
+                        source=source,
+                    )
+                    tx._balance_applied = True  # the guarded UPDATE above already moved it
+                    tx.save()
+                    posted.append(tx)
+                return posted
+        except _Stale:
+            continue
+    raise ConcurrentUpdate(f"Savings accounts {account_ids} changed on every one of {retries + 1} attempts.")
+
+
+def withdraw(account, amount, *, date=None, user=None, notes="", source="", journal_entry=None,
+             cash=None, lock=True, retries=None):
+    """
+    Withdraw `amount` from `account` and post it (debit the savings GL
+    account, credit `cash` or the ASSET_CASH_EQUITY account), unless an
+    existing `journal_entry` is given to link instead.
+    """
+    amount = _amount(amount)
+    cash = cash or (cash_account() if journal_entry is None else None)
+    account_id = account.pk
+    (tx,) = _post(
+        [(account_id, SavingsTransaction.WITHDRAWAL, amount)],
+        lambda accounts: [(accounts[account_id].account, amount, 0), (cash, 0, amount)],
+        date=date, memo=notes or f"Savings withdrawal - account {account_id}", user=user,
+        journal_entry=journal_entry, notes=notes, source=source, lock=lock, retries=retries,
+    )
+    return tx
+
+
+def transfer(from_account, to_account, amount, *, date=None, user=None, notes="", lock=True, retries=None):
+    """Move `amount` between two savings accounts. Returns (withdrawal, deposit)."""
+    amount = _amount(amount)
+    source_id, target_id = from_account.pk, to_account.pk
+    if source_id == target_id:
+        raise ValueError("Cannot transfer to the same account.")
+    withdrawal, deposit = _post(
+        [
+            (source_id, SavingsTransaction.WITHDRAWAL, amount),
+            (target_id, SavingsTransaction.DEPOSIT, amount),
+        ],
+        lambda accounts: [(accounts[source_id].account, amount, 0), (accounts[target_id].account, 0, amount)],
+        date=date, memo=notes or f"Savings transfer {source_id} -> {target_id}", user=user,
+        notes=notes, source=TRANSFER_SOURCE, lock=lock, retries=retries,
+    )
+    return withdrawal, deposit
+
+
+def amend(tx):
+    """
+    Save an edited SavingsTransaction. The accounts it was and is posted to
+    are locked and the edit is refused if it would take either below zero;
+    the stored balances then move through savings/signals.py as for any
+    other save, still under the lock.
+    """
+    with transaction.atomic():
+        stored = SavingsTransaction.objects.filter(pk=tx.pk).values_list("savings_account_id", flat=True)
+        account_ids = sorted({tx.savings_account_id, stored.first()} - {None})
+        accounts = {
+            account.pk: account
+            for account in SavingsAccount.objects.filter(pk__in=account_ids).order_by("pk").select_for_update()
+        }
+        original = SavingsTransaction.objects.filter(pk=tx.pk).first()
+        for day in (tx.date, original and original.date):
+            if periods.is_locked(day):
+                raise ClosedPeriod(day)
+
+        deltas = {account_id: ZERO for account_id in accounts}
+        deltas[tx.savings_account_id] += tx.balance_effect()
+        if original:
+            deltas[original.savings_account_id] -= original.balance_effect()
+        for account_id, delta in deltas.items():
+            account = accounts[account_id]
+            if delta < 0 and account.current_balance + delta < 0:
+                raise InsufficientFunds(account, -delta)
+        tx.save()
+    return tx
+
+
+def remove(tx):
+    """
+    Delete a SavingsTransaction under its account's lock, refusing it if
+    taking the transaction out - a deposit, say - would leave the account
+    below zero. The stored balance moves through savings/signals.py.
+    """
+    with transaction.atomic():
+        account = SavingsAccount.objects.select_for_update().get(pk=tx.savings_account_id)
+        original = SavingsTransaction.objects.filter(pk=tx.pk).first()
+        if original is None:
+            return
+        if periods.is_locked(original.date):
+            raise ClosedPeriod(original.date)
+        effect = original.balance_effect()
+        if effect > 0 and account.current_balance - effect < 0:
+            raise InsufficientFunds(account, effect)
+        original.delete()
+
+
+def recompute_balances(accounts=None):
+    """Reset stored balances from the transaction history; for bulk loads that bypass the signals."""
+    accounts = SavingsAccount.objects.all() if accounts is None else accounts
+    totals = (
+        SavingsTransaction.objects.filter(savings_account=OuterRef("pk"))
+        .values("savings_account").annotate(total=Sum(SavingsTransaction.signed_amount())).values("total")
+    )
+    money = SavingsAccount._meta.get_field("current_balance")
+    return accounts.update(
+        current_balance=Coalesce(Subquery(totals, output_field=money), Value(0), output_field=money),
+        version=F("version") + 1,
+    )
@@ -1,8 +1,10 @@
 # savings/signals.py
 
-from django.db.models.signals import post_save
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from .models import SavingsTransaction
+from . import history
+from .models import SavingsAccount, SavingsTransaction
 from core.models import MemberTransaction  # adjust path as needed
 
 @receiver(post_save, sender=SavingsTransaction)
@@ -25,3 +27,43 @@ def sync_member_transaction(sender, instance, created, **kwargs):
         source_id=source_id,
         defaults=defaults
     )
+
+
+# Stored balances follow every transaction by its delta. Postings made by
+# savings/postings.py move the balance themselves and set _balance_applied.
+# The balance history (savings/history.py) follows every transaction.
+def _move_balance(account_id, delta):
+    if account_id and delta:
+        SavingsAccount.objects.filter(pk=account_id).update(
+            current_balance=F('current_balance') + delta, version=F('version') + 1
+        )
+
+
+@receiver(pre_save, sender=SavingsTransaction)
+def remember_balance_effect(sender, instance, raw=False, **kwargs):
+    previous = sender.objects.filter(pk=instance.pk).first() if instance.pk and not raw else None
+    instance._balance_previous = (previous.savings_account_id, previous.balance_effect()) if previous else None
+    instance._history_previous = history.effects(previous) if previous else []
+
+
+@receiver(post_save, sender=SavingsTransaction)
+def update_balance(sender, instance, raw=False, **kwargs):
+    previous, instance._balance_previous = getattr(instance, '_balance_previous', None), None
+    history_previous, instance._history_previous = getattr(instance, '_history_previous', []), []
+    if raw:
+        return
+    history.apply(added=history.effects(instance), removed=history_previous)
+    if getattr(instance, '_balance_applied', False):
+        instance._balance_applied = False
+        return
+    if previous:
+        _move_balance(previous[0], -previous[1])
+    _move_balance(instance.savings_account_id, instance.balance_effect())
+
+
+@receiver(post_delete, sender=SavingsTransaction)
+def remove_from_balance(sender, instance, origin=None, **kwargs):
+    _move_balance(instance.savings_account_id, -instance.balance_effect())
+    # Deleting an account (or a queryset of them) deletes its history as well
+    if getattr(origin, 'model', type(origin)) is not SavingsAccount:
+        history.apply(removed=history.effects(instance))
@@ -1,3 +1,305 @@
-from django.test import TestCase
+from datetime import date
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core import benchmarks
+from core.instrumentation import QueryBudgetMixin
+from core.models import Account, AccountType, FiscalPeriod, JournalEntry, Member, ReportTag
+
+from . import history, postings
+from .models import SavingsAccount, SavingsTransaction
+
+
+def concurrent_writer(times):
+    """
+    Patch SavingsAccount.objects so the first `times` version-guarded
+    updates match nothing, as if another connection had committed a change
+    in between. (A real change made here would roll back with the posting's
+    own savepoint.)
+    """
+    real_filter = SavingsAccount.objects.filter
+    lost = []
+
+    def filter(*args, **kwargs):
+        if "version" in kwargs and len(lost) < times:
+            lost.append(kwargs["pk"])
+            return real_filter(pk=kwargs["pk"]).none()
+        return real_filter(*args, **kwargs)
+
+    return mock.patch.object(SavingsAccount.objects, "filter", side_effect=filter), lost
+
+
+class PostingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.cash = Account.objects.create(
+            code="1010", name="Cash", type=AccountType.ASSET, report_tag=ReportTag.ASSET_CASH_EQUITY
+        )
+        cls.savings_gl = Account.objects.create(
+            code="2010", name="Members savings", type=AccountType.LIABILITY, report_tag=ReportTag.LIAB_MEMBERS_SAVINGS
+        )
+        member = Member.objects.create(member_no="M-000001", full_name="Wanjiru Kariuki")
+        cls.account = SavingsAccount.objects.create(member=member, account=cls.savings_gl)
+        SavingsTransaction.objects.create(
+            savings_account=cls.account, date=timezone.localdate(),
+            transaction_type=SavingsTransaction.DEPOSIT, amount=Decimal("1000.00"),
+        )
+
+    def setUp(self):
+        self.account.refresh_from_db()
+
+    def balance(self):
+        self.account.refresh_from_db()
+        return self.account.current_balance
+
+    def test_withdrawal_moves_balance_and_posts_entry(self):
+        tx = postings.withdraw(self.account, Decimal("400.00"))
+
+        self.assertEqual(self.balance(), Decimal("600.00"))
+        lines = set(tx.journal_entry.lines.values_list("account_id", "debit", "credit"))
+        self.assertEqual(lines, {(self.savings_gl.pk, Decimal("400.00"), 0), (self.cash.pk, 0, Decimal("400.00"))})
+
+    def test_overdraft_is_refused(self):
+        entries = JournalEntry.objects.count()
+
+        with self.assertRaises(postings.InsufficientFunds):
+            postings.withdraw(self.account, Decimal("1000.01"))
+
+        self.assertEqual(self.balance(), Decimal("1000.00"))
+        self.assertFalse(SavingsTransaction.objects.filter(transaction_type=SavingsTransaction.WITHDRAWAL).exists())
+        self.assertEqual(JournalEntry.objects.count(), entries)
+
+    def test_transfer_checks_the_source_balance(self):
+        other = SavingsAccount.objects.create(member=self.account.member, account=self.savings_gl)
+
+        with self.assertRaises(postings.InsufficientFunds):
+            postings.transfer(self.account, other, Decimal("1500.00"))
+        postings.transfer(self.account, other, Decimal("250.00"))
+
+        other.refresh_from_db()
+        self.assertEqual((self.balance(), other.current_balance), (Decimal("750.00"), Decimal("250.00")))
+
+    def test_unlocked_posting_retries_after_concurrent_change(self):
+        version = self.account.version
+        patch, lost = concurrent_writer(2)
+
+        with patch:
+            postings.withdraw(self.account, Decimal("100.00"), lock=False, retries=5)
+
+        self.assertEqual(len(lost), 2)
+        self.assertEqual(self.balance(), Decimal("900.00"))
+        self.assertEqual(self.account.version, version + 1)
+        self.assertEqual(SavingsTransaction.objects.filter(transaction_type=SavingsTransaction.WITHDRAWAL).count(), 1)
+
+    def test_unlocked_posting_gives_up_after_retries(self):
+        patch, lost = concurrent_writer(10)
+
+        with patch, self.assertRaises(postings.ConcurrentUpdate):
+            postings.withdraw(self.account, Decimal("100.00"), lock=False, retries=2)
+
+        self.assertEqual(len(lost), 3)
+
+        self.assertEqual(self.balance(), Decimal("1000.00"))
+        self.assertFalse(SavingsTransaction.objects.filter(transaction_type=SavingsTransaction.WITHDRAWAL).exists())
+
+    def test_amend_refuses_an_edit_that_overdraws(self):
+        tx = postings.withdraw(self.account, Decimal("400.00"))
+
+        tx.amount = Decimal("1000.01")
+        with self.assertRaises(postings.InsufficientFunds):
+            postings.amend(tx)
+        tx.refresh_from_db()
+        self.assertEqual((tx.amount, self.balance()), (Decimal("400.00"), Decimal("600.00")))
+
+        tx.amount = Decimal("1000.00")
+        postings.amend(tx)
+        self.assertEqual(self.balance(), Decimal("0.00"))
+
+    def test_remove_refuses_taking_out_a_spent_deposit(self):
+        deposit = SavingsTransaction.objects.get(transaction_type=SavingsTransaction.DEPOSIT)
+        withdrawal = postings.withdraw(self.account, Decimal("400.00"))
+
+        with self.assertRaises(postings.InsufficientFunds):
+            postings.remove(deposit)
+        self.assertEqual(self.balance(), Decimal("600.00"))
+
+        postings.remove(withdrawal)
+        postings.remove(deposit)
+        self.assertEqual(self.balance(), Decimal("0.00"))
+        self.assertFalse(SavingsTransaction.objects.exists())
+
+
+class ContentionTests(TransactionTestCase):
+    """Tellers on separate threads and connections withdrawing from one account (core/benchmarks.py)."""
+
+    def setUp(self):
+        Account.objects.create(code="1010", name="Cash", type=AccountType.ASSET, report_tag=ReportTag.ASSET_CASH_EQUITY)
+        savings_gl = Account.objects.create(
+            code="2010", name="Members savings", type=AccountType.LIABILITY, report_tag=ReportTag.LIAB_MEMBERS_SAVINGS
+        )
+        member = Member.objects.create(member_no="M-000001", full_name="Wanjiru Kariuki")
+        SavingsAccount.objects.create(member=member, account=savings_gl)
+
+    def assertNoOverdraftOrLostUpdate(self, result):
+        self.assertFalse(result["overdrawn"], result)
+        self.assertTrue(result["balance_matches_history"], result)
+        self.assertEqual(
+            result["final_balance"], Decimal(100) * (result["funded_for"] - result["committed"]), result
+        )
+        self.assertEqual(result["committed"] + result["insufficient"] + result["conflicts"] + result["lock_errors"],
+                         result["attempted"], result)
+
+    def test_locked_withdrawals(self):
+        result = benchmarks.withdrawal_contention(threads=4, attempts=10, lock=True, cleanup=False)
+
+        self.assertNoOverdraftOrLostUpdate(result)
+        self.assertEqual((result["committed"], result["insufficient"]), (20, 20), result)
+
+    def test_optimistic_withdrawals(self):
+        result = benchmarks.withdrawal_contention(threads=4, attempts=10, lock=False, cleanup=False)
+
+        self.assertNoOverdraftOrLostUpdate(result)
+        self.assertLessEqual(result["committed"], result["funded_for"], result)
+
+
+class AccountListTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("clerk")
+        savings_gl = Account.objects.create(
+            code="2010", name="Members savings", type=AccountType.LIABILITY, report_tag=ReportTag.LIAB_MEMBERS_SAVINGS
+        )
+        for n in range(1, 21):
+            member = Member.objects.create(member_no=f"M-{n:06d}", full_name=f"Member {n}")
+            SavingsAccount.objects.create(member=member, account=savings_gl)
+
+    def test_query_count_does_not_grow_with_accounts(self):
+        self.client.force_login(self.user)
+
+        with self.assertMaxQueries(4):
+            response = self.client.get(reverse("savingsaccount_list"))
+
+        self.assertContains(response, "Member 20")
+
+
+class TransactionListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("clerk")
+        savings_gl = Account.objects.create(
+            code="2010", name="Members savings", type=AccountType.LIABILITY, report_tag=ReportTag.LIAB_MEMBERS_SAVINGS
+        )
+        member = Member.objects.create(member_no="M-000001", full_name="Wanjiru Kariuki")
+        cls.account = SavingsAccount.objects.create(member=member, account=savings_gl)
+        SavingsTransaction.objects.create(
+            savings_account=cls.account, date=timezone.localdate(),
+            transaction_type=SavingsTransaction.DEPOSIT, amount=Decimal("1000.00"),
+        )
+
+    def test_account_filter(self):
+        self.client.force_login(self.user)
+        url = reverse("savingstransaction_list")
+
+        self.assertEqual(len(self.client.get(url, {"account": self.account.pk}).context["transactions"]), 1)
+        self.assertEqual(len(self.client.get(url, {"account": self.account.pk + 1}).context["transactions"]), 0)
+
+    def test_malformed_ids_are_ignored(self):
+        self.client.force_login(self.user)
+        url = reverse("savingstransaction_list")
+
+        for value in ["²", "99999999999999999999999", "-1", "0", "abc"]:
+            with self.subTest(value=value):
+                for params in ({"account": value}, {"after": f"2025-01-01.{value}"}, {"before": f"2025-01-01.{value}"}):
+                    self.assertEqual(self.client.get(url, params).status_code, 200)
+
+
+class TransactionDeleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("clerk")
+        savings_gl = Account.objects.create(
+            code="2010", name="Members savings", type=AccountType.LIABILITY, report_tag=ReportTag.LIAB_MEMBERS_SAVINGS
+        )
+        member = Member.objects.create(member_no="M-000001", full_name="Wanjiru Kariuki")
+        cls.account = SavingsAccount.objects.create(member=member, account=savings_gl)
+        cls.closed = SavingsTransaction.objects.create(
+            savings_account=cls.account, date=date(2025, 6, 1),
+            transaction_type=SavingsTransaction.DEPOSIT, amount=Decimal("1000.00"),
+        )
+        FiscalPeriod.objects.create(name="FY2025", start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+
+    def delete(self, tx):
+        self.client.force_login(self.user)
+        return self.client.post(reverse("savingstransaction_delete", args=[tx.pk]))
+
+    def test_transactions_in_a_closed_period_are_kept(self):
+        self.delete(self.closed)
+
+        self.assertTrue(SavingsTransaction.objects.filter(pk=self.closed.pk).exists())
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.current_balance, Decimal("1000.00"))
+
+    def test_deleting_a_spent_deposit_is_refused(self):
+        deposit = SavingsTransaction.objects.create(
+            savings_account=self.account, date=date(2026, 1, 5),
+            transaction_type=SavingsTransaction.DEPOSIT, amount=Decimal("500.00"),
+        )
+        SavingsTransaction.objects.create(
+            savings_account=self.account, date=date(2026, 1, 6),
+            transaction_type=SavingsTransaction.WITHDRAWAL, amount=Decimal("1200.00"),
+        )
+
+        response = self.delete(deposit)
+
+        self.assertTrue(SavingsTransaction.objects.filter(pk=deposit.pk).exists())
+        self.assertIn("would overdraw", str(list(response.wsgi_request._messages)[0]))
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.current_balance, Decimal("300.00"))
+
+
+class BalanceHistoryMigrationTests(TransactionTestCase):
+    """savings/migrations/0008 builds the balance history of transactions written before it existed."""
+
+    before = [("savings", "0007_backfill_last_activity")]
+    after = [("savings", "0008_backfill_balance_history")]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+        Account = apps.get_model("core", "Account")
+        Member = apps.get_model("core", "Member")
+        HistoricalAccount = apps.get_model("savings", "SavingsAccount")
+        HistoricalTransaction = apps.get_model("savings", "SavingsTransaction")
+        savings_gl = Account.objects.create(code="2010", name="Members savings", type=AccountType.LIABILITY)
+        member = Member.objects.create(member_no="M-000001", full_name="Wanjiru Kariuki")
+        self.account_id = HistoricalAccount.objects.create(
+            member=member, account=savings_gl, current_balance=Decimal("1000.00")
+        ).pk
+        for day, kind, amount in [
+            (date(2026, 1, 5), "DEPOSIT", "1500.00"),
+            (date(2026, 2, 1), "WITHDRAWAL", "600.00"),
+            (date(2026, 2, 1), "INTEREST", "100.00"),
+        ]:
+            HistoricalTransaction.objects.create(
+                savings_account_id=self.account_id, date=day, transaction_type=kind, amount=Decimal(amount)
+            )
+
+    def tearDown(self):
+        MigrationExecutor(connection).migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_backfill(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+
+        account = SavingsAccount.objects.get(pk=self.account_id)
+        self.assertEqual(history.balance_on(account, date(2026, 1, 31)), Decimal("1500.00"))
+        self.assertEqual(history.balance_on(account, timezone.localdate()), account.current_balance)
+        self.assertEqual(history.stale().count(), 0)
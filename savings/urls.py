@@ -7,6 +7,7 @@ urlpatterns = [
     path("accounts/add/", views.SavingsAccountCreateView.as_view(), name="savingsaccount_add"),
     path("accounts/<int:pk>/edit/", views.SavingsAccountUpdateView.as_view(), name="savingsaccount_edit"),
     path("accounts/<int:pk>/delete/", views.SavingsAccountDeleteView.as_view(), name="savingsaccount_delete"),
+    path("balances/", views.savings_balances, name="savings_balances"),
 
     # Savings Transactions
     path("transactions/", views.SavingsTransactionListView.as_view(), name="savingstransaction_list"),
@@ -1,6 +1,13 @@
+from datetime import datetime
+
 # Django core imports
 from django.urls import reverse, reverse_lazy
-from django.shortcuts import redirect
+from django.shortcuts import redirect, render
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.db.models import Sum
+from django.utils import timezone
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin
 
@@ -8,8 +15,11 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 # Local app imports
 from .models import SavingsAccount, SavingsTransaction
 from .forms import SavingsAccountForm, SavingsTransactionForm
+from . import history, postings
 
 # Cross-app imports
+from core import periods
+from core.db_routing import use_replica
 from receipts.models import Receipt
 
 # Savings Account Views
@@ -17,6 +27,7 @@ class SavingsAccountListView(LoginRequiredMixin, ListView):
     model = SavingsAccount
     template_name = "savings/savingsaccount_list.html"
     context_object_name = "accounts"
+    queryset = SavingsAccount.objects.select_related("member", "account")
 
 
 class SavingsAccountCreateView(LoginRequiredMixin, CreateView):
@@ -39,11 +50,112 @@ class SavingsAccountDeleteView(LoginRequiredMixin, DeleteView):
     success_url = reverse_lazy("savingsaccount_list")
 
 
+@login_required
+@use_replica()
+def savings_balances(request):
+    """Every account's balance at the end of ?as_of=, from the balance history."""
+    try:
+        as_of = datetime.strptime(request.GET.get("as_of", ""), "%Y-%m-%d").date()
+    except ValueError:
+        as_of = timezone.localdate()
+    accounts = history.with_balance_on(as_of, SavingsAccount.objects.select_related("member", "account"))
+    page = Paginator(accounts.order_by("member__member_no", "pk"), 100).get_page(request.GET.get("page"))
+    querystring = request.GET.copy()
+    querystring.pop("page", None)
+    return render(request, "savings/savings_balances.html", {
+        "as_of": as_of,
+        "total": history.with_balance_on(as_of).aggregate(total=Sum("balance_on"))["total"] or 0,
+        "page_obj": page,
+        "querystring": querystring.urlencode(),
+    })
+
+
 # Savings Transaction Views
+def _id(value):
+    """A primary key from a query parameter, or None when it is not one or is out of range."""
+    try:
+        pk = int(value)
+    except (TypeError, ValueError):
+        return None
+    return pk if 0 < pk < 2 ** 63 else None
+
+
+def _cursor(value):
+    """(date, id) from an ?after= / ?before= value such as 2025-03-31.1234, or None."""
+    day, _, pk = (value or "").partition(".")
+    try:
+        day = datetime.strptime(day, "%Y-%m-%d").date()
+    except ValueError:
+        return None
+    pk = _id(pk)
+    return (day, pk) if pk else None
+
+
 class SavingsTransactionListView(LoginRequiredMixin, ListView):
+    """
+    Transactions newest first, filtered by ?account=, ?member= (member
+    number), ?type=, ?source=, ?date_from= and ?date_to=. Pages are keyset
+    pages: ?after= / ?before= carry the (date, id) of the row a page
+    continues from, so a deep page costs what the first does and no COUNT
+    is run.
+    """
     model = SavingsTransaction
     template_name = "savings/savingstransaction_list.html"
     context_object_name = "transactions"
+    page_size = 50
+
+    def get_queryset(self):
+        params = self.request.GET
+        transactions = SavingsTransaction.objects.select_related("savings_account__member")
+        account = _id(params.get("account"))
+        if account:
+            transactions = transactions.filter(savings_account_id=account)
+        if params.get("member", "").strip():
+            transactions = transactions.filter(savings_account__member__member_no=params["member"].strip())
+        if params.get("type") in SavingsTransaction.SIGNS:
+            transactions = transactions.filter(transaction_type=params["type"])
+        if params.get("source", "").strip():
+            transactions = transactions.filter(source=params["source"].strip())
+        for name, lookup in (("date_from", "date__gte"), ("date_to", "date__lte")):
+            try:
+                day = datetime.strptime(params.get(name, ""), "%Y-%m-%d").date()
+            except ValueError:
+                continue
+            transactions = transactions.filter(**{lookup: day})
+        return transactions
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        size = self.page_size
+        after, before = _cursor(self.request.GET.get("after")), _cursor(self.request.GET.get("before"))
+        if before:
+            day, pk = before
+            rows = list(
+                self.object_list.filter(date__gte=day).exclude(date=day, id__lte=pk).order_by("date", "id")[:size + 1]
+            )
+            has_newer, has_older = len(rows) > size, True
+            rows = rows[:size][::-1]
+        else:
+            transactions = self.object_list
+            if after:
+                day, pk = after
+                transactions = transactions.filter(date__lte=day).exclude(date=day, id__gte=pk)
+            rows = list(transactions.order_by("-date", "-id")[:size + 1])
+            has_newer, has_older = after is not None, len(rows) > size
+            rows = rows[:size]
+
+        querystring = self.request.GET.copy()
+        querystring.pop("after", None)
+        querystring.pop("before", None)
+        context.update({
+            "transactions": rows,
+            "newer": f"{rows[0].date:%Y-%m-%d}.{rows[0].pk}" if rows and has_newer else None,
+            "older": f"{rows[-1].date:%Y-%m-%d}.{rows[-1].pk}" if rows and has_older else None,
+            "querystring": querystring.urlencode(),
+            "transaction_types": SavingsTransaction.TRANSACTION_TYPES,
+            "filters": self.request.GET,
+        })
+        return context
 
 
 
@@ -51,27 +163,45 @@ class SavingsTransactionCreateView(LoginRequiredMixin, CreateView):
     model = SavingsTransaction
     form_class = SavingsTransactionForm
     template_name = "savings/savingstransaction_form.html"
+    success_url = reverse_lazy("savingstransaction_list")
 
     def form_valid(self, form):
+        # Withdrawals go through the locked, balance-checked posting
+        if form.cleaned_data["transaction_type"] == SavingsTransaction.WITHDRAWAL:
+            try:
+                self.object = postings.withdraw(
+                    form.cleaned_data["savings_account"],
+                    form.cleaned_data["amount"],
+                    date=form.cleaned_data["date"],
+                    user=self.request.user,
+                    notes=form.cleaned_data["notes"],
+                    source=form.cleaned_data["source"],
+                    journal_entry=form.cleaned_data["journal_entry"],
+                )
+            except postings.PostingError as exc:
+                form.add_error("amount", str(exc))
+                return self.form_invalid(form)
+            return redirect(self.get_success_url())
+
         response = super().form_valid(form)
         transaction = self.object
 
         # Only generate receipt for deposits
-        if transaction.transaction_type == "DEPOSIT":
+        if transaction.transaction_type == SavingsTransaction.DEPOSIT:
             receipt = Receipt.objects.create(
-                member=transaction.member,
-                type="SAVINGS",
+                member=transaction.savings_account.member,
+                type=Receipt.SAVINGS,
                 amount=transaction.amount,
-                savings_deposit=transaction,  # assuming this FK exists
+                savings_transaction=transaction,
                 journal_entry=transaction.journal_entry,
-                payment_method=transaction.payment_method,
+                payment_method=transaction.source,
                 issued_by=self.request.user,
                 reference_note=f"Auto-generated for Savings Deposit #{transaction.id}"
             )
 
             return redirect(reverse("receipts:receipt_print", kwargs={"pk": receipt.pk}))
 
-        return response  # fallback for withdrawals or other types
+        return response  # fallback for interest credits
 
 
 
@@ -81,7 +211,37 @@ class SavingsTransactionUpdateView(LoginRequiredMixin, UpdateView):
     template_name = "savings/savingstransaction_form.html"
     success_url = reverse_lazy("savingstransaction_list")
 
+    def form_valid(self, form):
+        # The form's balance check is early; postings.amend re-checks under the account lock
+        try:
+            self.object = postings.amend(form.instance)
+        except postings.PostingError as exc:
+            form.add_error("amount", str(exc))
+            return self.form_invalid(form)
+        return redirect(self.get_success_url())
+
 class SavingsTransactionDeleteView(LoginRequiredMixin, DeleteView):
     model = SavingsTransaction
     template_name = "savings/savingstransaction_confirm_delete.html"
     success_url = reverse_lazy("savingstransaction_list")
+
+    def form_valid(self, form):
+        # A closed period's subledger totals are final
+        if periods.is_locked(self.object.date):
+            messages.error(
+                self.request,
+                f"🔒 Transaction dated {self.object.date} is in a closed period and can no longer be deleted.",
+            )
+            return redirect(self.success_url)
+        # Taken out under the account lock; refused if it would overdraw the account
+        try:
+            postings.remove(self.object)
+        except postings.InsufficientFunds as exc:
+            messages.error(
+                self.request,
+                f"⚠️ Savings account {exc.account.pk} has {exc.account.current_balance:,.2f}; "
+                f"deleting this {exc.amount:,.2f} would overdraw it.",
+            )
+        except postings.PostingError as exc:
+            messages.error(self.request, f"⚠️ {exc}")
+        return redirect(self.success_url)